@@ -6,7 +6,7 @@ from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from passlib.context import CryptContext
 from pydantic import BaseModel, Field, EmailStr
-from sqlalchemy import Column, Integer, String, DateTime, select, Text, ForeignKey, Boolean, Float
+from sqlalchemy import Column, Integer, String, DateTime, select, update, Text, ForeignKey, Boolean, Float, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import Session
 import os
@@ -92,6 +92,25 @@ class GameMove(Base):
     remaining_time = Column(Float, nullable=True)                                     # 남은 시간
     move_timestamp = Column(DateTime, default=datetime.utcnow)                        # 수를 둔 시간
 
+    # 게임마다 수 번호는 하나 (저널 복구/재시도로 같은 수가 두 번 저장되지 않도록)
+    __table_args__ = (
+        Index("ux_game_moves_game_id_move_number", "game_id", "move_number", unique=True),
+    )
+
+class GameAnalysis(Base):
+    __tablename__ = "game_analyses"
+    game_id        = Column(Integer, ForeignKey("game_histories.id"), primary_key=True)  # 분석한 게임
+    difficulty     = Column(String(20), nullable=False)                                 # 분석에 사용한 탐색 예산
+    analyzed_moves = Column(Integer, default=0, nullable=False)                         # 분석한 수 개수
+    red_avg_loss   = Column(Float, nullable=True)                                       # Red(Player1) 평균 손실
+    blue_avg_loss  = Column(Float, nullable=True)                                       # Blue(Player2) 평균 손실
+    red_mistakes   = Column(Integer, default=0, nullable=False)                         # Red 실수 횟수
+    blue_mistakes  = Column(Integer, default=0, nullable=False)                         # Blue 실수 횟수
+    red_blunders   = Column(Integer, default=0, nullable=False)                         # Red 큰 실수 횟수
+    blue_blunders  = Column(Integer, default=0, nullable=False)                         # Blue 큰 실수 횟수
+    error          = Column(String(200), nullable=True)                                 # 재생 실패 사유
+    analyzed_at    = Column(DateTime, default=datetime.utcnow)                          # 분석 시간
+
 class BattleRequest(Base):
     __tablename__ = "battle_requests"
     id         = Column(Integer, primary_key=True, index=True)
@@ -326,33 +345,29 @@ def get_current_user_factory(get_db_func):
     return get_current_user
 
 # ================== 사용자 관리 함수 ==================
-def create_user(db: Session, signup_data: SignupRequest) -> User:
-    """새 사용자 생성"""
+def create_user(db: Session, signup_data: SignupRequest, hashed_password: str) -> MeResponse:
+    """새 사용자 생성 (비밀번호는 호출 전에 해시, 쓰기 스레드에서 실행)"""
     # 중복 가입 방지: username, email 각각 검사
-    u_exists = db.execute(select(User).where(User.username == signup_data.username)).scalar_one_or_none()
+    u_exists = db.execute(select(User.id).where(User.username == signup_data.username)).first()
     if u_exists:
         raise HTTPException(status_code=409, detail="Username already exists")
 
-    e_exists = db.execute(select(User).where(User.email == signup_data.email)).scalar_one_or_none()
+    e_exists = db.execute(select(User.id).where(User.email == signup_data.email)).first()
     if e_exists:
         raise HTTPException(status_code=409, detail="Email already exists")
 
-    # 비밀번호 해시 후 저장
-    hashed = hash_password(signup_data.password)
-    
     user = User(
         username=signup_data.username, 
-        password=hashed, 
+        password=hashed_password, 
         email=signup_data.email,
         elo_rating=1500,
         created_at=datetime.utcnow()
     )
     
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    db.flush()
     
-    return user
+    return MeResponse(id=user.id, username=user.username, email=user.email, created_at=user.created_at)
 
 def authenticate_user(db: Session, username: str, password: str) -> Optional[User]:
     """사용자 인증"""
@@ -361,11 +376,9 @@ def authenticate_user(db: Session, username: str, password: str) -> Optional[Use
         return None
     return user
 
-def update_user_session(db: Session, user: User, session_token: str) -> None:
-    """사용자의 세션 토큰 업데이트 (중복 로그인 방지)"""
-    user.session_token = session_token
-    db.commit()
-    db.refresh(user)
+def update_user_session(db: Session, user_id: int, session_token: str) -> None:
+    """사용자의 세션 토큰 업데이트 (중복 로그인 방지, 쓰기 스레드에서 실행)"""
+    db.execute(update(User).where(User.id == user_id).values(session_token=session_token))
 
 def get_user_by_id(db: Session, user_id: int) -> Optional[User]:
     """ID로 사용자 조회"""
@@ -393,6 +406,12 @@ def calculate_percentile(db: Session, user_elo: int, elo_column: str) -> float:
     percentile = (lower_users / total_users) * 100
     return round(percentile, 1)
 
+MIN_ELO = 100   # 최소 ELO (calculate_elo_change와 게임 종료 처리에서 사용)
+
+def normalize_time_control(time_control: str) -> str:
+    """시간 제한을 "Blitz" 또는 "Rapid"로 통일 (대소문자 무관, Blitz가 아니면 Rapid)"""
+    return "Blitz" if time_control.lower() == "blitz" else "Rapid"
+
 def calculate_elo_change(winner_elo: int, loser_elo: int, k_factor: int = 32) -> tuple:
     """
     ELO 레이팅 변화량 계산
@@ -427,8 +446,8 @@ def calculate_elo_change(winner_elo: int, loser_elo: int, k_factor: int = 32) ->
 
     # 최소 ELO를 100으로 제한
     # 제한 적용 시 제로섬이 깨질 수 있지만, 최소값 보호가 우선
-    winner_new_elo = max(100, winner_new_elo)
-    loser_new_elo = max(100, loser_new_elo)
+    winner_new_elo = max(MIN_ELO, winner_new_elo)
+    loser_new_elo = max(MIN_ELO, loser_new_elo)
 
     return winner_new_elo, loser_new_elo
 
@@ -516,4 +535,35 @@ class DeleteAccountRequest(BaseModel):
 class DeleteAccountResponse(BaseModel):
     """계정 삭제 응답"""
     success: bool
-    message: str
\ No newline at end of file
+    message: str
+class HintPositionData(BaseModel):
+    """힌트 요청용 보드 상태 (17x17 좌표, 벽은 중심 좌표 "Y,X")"""
+    red_position: str
+    blue_position: str
+    red_walls_remaining: int = Field(10, ge=0, le=10)
+    blue_walls_remaining: int = Field(10, ge=0, le=10)
+    horizontal_walls: List[str] = []
+    vertical_walls: List[str] = []
+    current_player: str = "red"
+
+class HintRequest(BaseModel):
+    """힌트 요청 (보드 상태, FEN 형식 문자열 또는 게임 토큰 + 수 목록)"""
+    state: Optional[HintPositionData] = None
+    position: Optional[str] = None         # QuoridorGameState.to_fen 형식 (예: "e1 e9 - 10 10 r")
+    game_token: Optional[str] = None
+    moves: List[str] = []                  # "Y,X" 또는 "wall:horizontal:Y:X" (AI 대전 메시지 형식)
+    top_n: int = Field(3, ge=1, le=5)
+
+class HintMoveData(BaseModel):
+    type: str
+    wall_type: Optional[str] = None
+    position: str
+    score: Optional[float] = None
+
+class HintResponse(BaseModel):
+    """힌트 응답 (점수는 current_player 관점, 높을수록 좋음)"""
+    position: str                          # 분석한 포지션 (FEN 형식)
+    current_player: str
+    hints: List[HintMoveData]
+    depth: int
+    cached: bool
@@ -0,0 +1,349 @@
+# bench_matchmaking.py
+"""
+매치메이킹 부하 시뮬레이터 (/matchmaking 피크 시간 동작 측정)
+
+- 임시 작업 디렉토리에 테스트 데이터베이스를 만들고 사용자를 생성
+  create_access_token으로 JWT를 발급하고 세션 토큰을 DB에 저장 (로그인과 같은 상태)
+- 서버 실행 방식
+  기본        : 임시 작업 디렉토리에서 uvicorn 서버 프로세스를 localhost에 실행 (서버 CPU를 따로 측정)
+  --in-process: 같은 프로세스의 별도 스레드에서 서버 실행 (CPU는 클라이언트 포함 프로세스 전체)
+  --url/--db  : 이미 실행 중인 서버와 그 서버의 DB 파일 사용 (--server-pid를 주면 서버 CPU 측정)
+- 클라이언트는 포아송 과정으로 도착해 Rapid/Blitz 대기열에 들어가고,
+  지수 분포의 인내 시간 안에 매칭되지 않으면 연결을 끊어 취소
+- 측정: 매칭까지 걸린 시간 분포(p50/p90/p99/최대), 시간에 따른 대기 인원,
+  서버 CPU 사용률, 이벤트 루프 지연(/status/loop-lag)
+
+실행 예:
+    python bench_matchmaking.py --clients 5000 --rate 200 --patience 60
+"""
+import argparse
+import asyncio
+import csv
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional
+
+import httpx
+import websockets
+from jose import jwt
+from sqlalchemy import insert
+from sqlalchemy.orm import sessionmaker
+
+from User import Base, User, ALGORITHM, SECRET_KEY, create_access_token
+from sqlite_profile import create_sqlite_engine
+
+# ================== 시뮬레이션 설정 ==================
+DEFAULT_CLIENTS = 2000             # 전체 클라이언트 수
+DEFAULT_RATE = 100.0               # 초당 평균 도착 수
+DEFAULT_PATIENCE = 60.0            # 취소까지 평균 대기 시간 (초)
+DEFAULT_BLITZ_SHARE = 0.4          # Blitz 대기열을 선택하는 비율
+ELO_MEAN = 1500
+ELO_STDDEV = 200
+SAMPLE_INTERVAL = 1.0              # 서버 상태 수집 간격 (초)
+SERVER_START_TIMEOUT = 30.0
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+# ================== 준비 ==================
+def prepare_users(db_path: str, count: int) -> List[Dict]:
+    """사용자 count명 생성 후 (이름, JWT) 목록 반환 (JWT의 세션 토큰을 DB에 저장)"""
+    engine = create_sqlite_engine(f"sqlite:///{db_path}")
+    Base.metadata.create_all(bind=engine)
+
+    users = []
+    rows = []
+    for i in range(count):
+        username = f"loadtest{i}"
+        token = create_access_token(data={"sub": username})
+        session_token = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])["session"]
+        rapid_elo = int(random.gauss(ELO_MEAN, ELO_STDDEV))
+        blitz_elo = int(random.gauss(ELO_MEAN, ELO_STDDEV))
+        rows.append({
+            "username": username, "password": "x", "email": f"{username}@example.com",
+            "rapid_elo": rapid_elo, "blitz_elo": blitz_elo, "elo_rating": rapid_elo,
+            "session_token": session_token,
+        })
+        users.append({"username": username, "token": token})
+
+    db = sessionmaker(bind=engine)()
+    # 이전 실행에서 만든 사용자는 새 세션 토큰으로 교체
+    db.query(User).filter(User.username.like("loadtest%")).delete(synchronize_session=False)
+    db.execute(insert(User), rows)
+    db.commit()
+    db.close()
+    engine.dispose()
+    return users
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def prepare_workdir(workdir: str):
+    """서버가 작업 디렉토리 기준으로 찾는 static 디렉토리 연결"""
+    static_dir = os.path.join(workdir, "static")
+    if not os.path.exists(static_dir):
+        os.symlink(os.path.join(SERVER_DIR, "static"), static_dir)
+
+
+# ================== 서버 실행 ==================
+class SubprocessServer:
+    """임시 작업 디렉토리에서 실행하는 uvicorn 서버 프로세스"""
+
+    def __init__(self, workdir: str, port: int):
+        env = dict(os.environ, PYTHONPATH=SERVER_DIR + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        self.log = open(os.path.join(workdir, "server.log"), "w")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "main:app", "--host", "127.0.0.1", "--port", str(port),
+             "--log-level", "warning"],
+            cwd=workdir, env=env, stdout=self.log, stderr=subprocess.STDOUT
+        )
+        self.pid = self.process.pid
+
+    def stop(self):
+        self.process.terminate()
+        try:
+            self.process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+        self.log.close()
+
+
+class InProcessServer:
+    """같은 프로세스의 별도 스레드(별도 이벤트 루프)에서 실행하는 uvicorn 서버"""
+
+    def __init__(self, workdir: str, port: int):
+        import uvicorn
+
+        os.chdir(workdir)
+        sys.path.insert(0, SERVER_DIR)
+        import main
+
+        self.server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, name="uvicorn", daemon=True)
+        self.thread.start()
+        self.pid = os.getpid()
+
+    def stop(self):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def wait_for_server(http_url: str):
+    deadline = time.monotonic() + SERVER_START_TIMEOUT
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(f"{http_url}/status/matchmaking")).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(0.2)
+    raise RuntimeError(f"Server at {http_url} did not start within {SERVER_START_TIMEOUT:.0f}s")
+
+
+def process_cpu_seconds(pid: int) -> Optional[float]:
+    """프로세스의 누적 CPU 시간 (Linux /proc 기준, 읽을 수 없으면 None)"""
+    if pid == os.getpid():
+        return time.process_time()
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")
+    except (OSError, IndexError, ValueError):
+        return None
+
+
+# ================== 클라이언트 ==================
+async def run_client(ws_url: str, user: Dict, time_control: str, patience: float, stats: Dict):
+    started = time.perf_counter()
+    try:
+        async with websockets.connect(f"{ws_url}/matchmaking", open_timeout=30, max_queue=4) as ws:
+            await ws.send(f"{time_control} {user['token']}")
+            enqueued = time.perf_counter()
+            try:
+                message = await asyncio.wait_for(ws.recv(), timeout=patience)
+            except asyncio.TimeoutError:
+                stats["cancelled"] += 1
+                return
+
+            if message.split()[0] in ("Red", "Blue"):
+                stats["wait"][time_control].append(time.perf_counter() - enqueued)
+                stats["matched"] += 1
+            else:
+                stats["errors"].append(f"unexpected message: {message[:40]}")
+    except Exception as e:
+        stats["errors"].append(f"{type(e).__name__}: {str(e)[:60]}")
+    finally:
+        stats["connect_s"].append(time.perf_counter() - started)
+
+
+async def sample_server(http_url: str, pid: Optional[int], timeline: List[Dict], stop: asyncio.Event):
+    """대기 인원, 서버 CPU 사용률, 이벤트 루프 지연을 주기적으로 기록"""
+    started = time.perf_counter()
+    last_wall, last_cpu = started, process_cpu_seconds(pid) if pid else None
+
+    async with httpx.AsyncClient(timeout=10) as client:
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), timeout=SAMPLE_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+
+            try:
+                matchmaking = (await client.get(f"{http_url}/status/matchmaking")).json()
+                loop_lag = (await client.get(f"{http_url}/status/loop-lag")).json()["loop_lag"]
+            except httpx.HTTPError as e:
+                print(f"[Bench] Status request failed: {e}")
+                continue
+
+            now = time.perf_counter()
+            cpu = process_cpu_seconds(pid) if pid else None
+            cpu_percent = None
+            if cpu is not None and last_cpu is not None:
+                cpu_percent = (cpu - last_cpu) / (now - last_wall) * 100
+            last_wall, last_cpu = now, cpu
+
+            timeline.append({
+                "t": round(now - started, 1),
+                "rapid_waiting": matchmaking["waiting"].get("Rapid", 0),
+                "blitz_waiting": matchmaking["waiting"].get("Blitz", 0),
+                "cpu_percent": round(cpu_percent, 1) if cpu_percent is not None else None,
+                "loop_lag_p99_ms": loop_lag["p99_ms"],
+                "loop_lag_max_ms": loop_lag["window_max_ms"],
+            })
+
+
+async def run_load(args, ws_url: str, http_url: str, users: List[Dict], pid: Optional[int]) -> Dict:
+    stats = {"matched": 0, "cancelled": 0, "errors": [], "connect_s": [],
+             "wait": {"Rapid": [], "Blitz": []}}
+    timeline: List[Dict] = []
+    stop = asyncio.Event()
+    sampler = asyncio.create_task(sample_server(http_url, pid, timeline, stop))
+
+    started = time.perf_counter()
+    clients = []
+    for user in users:
+        # 포아송 도착 (지수 분포 간격)
+        await asyncio.sleep(random.expovariate(args.rate))
+        time_control = "Blitz" if random.random() < args.blitz_share else "Rapid"
+        patience = random.expovariate(1.0 / args.patience)
+        clients.append(asyncio.create_task(run_client(ws_url, user, time_control, patience, stats)))
+    arrival_seconds = time.perf_counter() - started
+
+    await asyncio.gather(*clients)
+    stop.set()
+    await sampler
+
+    stats["timeline"] = timeline
+    stats["arrival_seconds"] = arrival_seconds
+    stats["seconds"] = time.perf_counter() - started
+    return stats
+
+
+# ================== 결과 출력 ==================
+def percentile(values: List[float], p: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def print_results(stats: Dict, clients: int):
+    timeline = stats["timeline"]
+    print()
+    print(f"{'t(s)':>6s} {'rapid':>7s} {'blitz':>7s} {'cpu %':>7s} {'lag p99':>8s} {'lag max':>8s}")
+    for row in timeline:
+        cpu = f"{row['cpu_percent']:7.1f}" if row["cpu_percent"] is not None else f"{'-':>7s}"
+        print(f"{row['t']:6.1f} {row['rapid_waiting']:7d} {row['blitz_waiting']:7d} {cpu} "
+              f"{row['loop_lag_p99_ms']:8.1f} {row['loop_lag_max_ms']:8.1f}")
+
+    print()
+    print(f"clients {clients}, matched {stats['matched']}, cancelled {stats['cancelled']}, "
+          f"errors {len(stats['errors'])}, arrivals over {stats['arrival_seconds']:.1f}s, total {stats['seconds']:.1f}s")
+    for kind in sorted(set(stats["errors"]))[:5]:
+        print(f"  error: {kind}")
+
+    print()
+    print(f"{'queue':6s} {'matched':>8s} {'p50 s':>7s} {'p90 s':>7s} {'p99 s':>7s} {'max s':>7s}")
+    for time_control, waits in stats["wait"].items():
+        print(f"{time_control:6s} {len(waits):8d} {percentile(waits, 0.5):7.2f} {percentile(waits, 0.9):7.2f} "
+              f"{percentile(waits, 0.99):7.2f} {max(waits, default=0.0):7.2f}")
+
+    cpu_values = [row["cpu_percent"] for row in timeline if row["cpu_percent"] is not None]
+    if cpu_values:
+        print(f"\nserver cpu: mean {sum(cpu_values) / len(cpu_values):.1f}%, max {max(cpu_values):.1f}%")
+    if timeline:
+        print(f"event loop lag: worst p99 {max(r['loop_lag_p99_ms'] for r in timeline):.1f}ms, "
+              f"max {max(r['loop_lag_max_ms'] for r in timeline):.1f}ms")
+        print(f"peak queue: Rapid {max(r['rapid_waiting'] for r in timeline)}, "
+              f"Blitz {max(r['blitz_waiting'] for r in timeline)}")
+
+
+def write_timeline(path: str, timeline: List[Dict]):
+    if not timeline:
+        return
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(timeline[0].keys()))
+        writer.writeheader()
+        writer.writerows(timeline)
+    print(f"[Bench] Timeline written to {path}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Matchmaking load simulator for /matchmaking")
+    parser.add_argument("--clients", type=int, default=DEFAULT_CLIENTS, help="simulated clients")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="mean arrivals per second")
+    parser.add_argument("--patience", type=float, default=DEFAULT_PATIENCE, help="mean seconds before a client cancels")
+    parser.add_argument("--blitz-share", type=float, default=DEFAULT_BLITZ_SHARE, help="fraction of clients queuing Blitz")
+    parser.add_argument("--in-process", action="store_true", help="run the server in this process instead of a subprocess")
+    parser.add_argument("--url", default=None, help="existing server, e.g. http://127.0.0.1:8000 (requires --db)")
+    parser.add_argument("--db", default=None, help="database file of the existing server")
+    parser.add_argument("--server-pid", type=int, default=None, help="pid of the existing server for CPU sampling")
+    parser.add_argument("--csv", default=None, help="write the sampled timeline to this CSV file")
+    parser.add_argument("--seed", type=int, default=None, help="random seed")
+    args = parser.parse_args()
+
+    if args.url and not args.db:
+        parser.error("--url requires --db so that session tokens can be written for the simulated users")
+    if args.seed is not None:
+        random.seed(args.seed)
+
+    workdir = tempfile.mkdtemp(prefix="quoridor-matchmaking-")
+    server = None
+    try:
+        if args.url:
+            http_url = args.url.rstrip("/")
+            db_path = args.db
+            pid = args.server_pid
+        else:
+            prepare_workdir(workdir)
+            db_path = os.path.join(workdir, "quoridor.db")
+            port = free_port()
+            http_url = f"http://127.0.0.1:{port}"
+
+        print(f"[Bench] Creating {args.clients} users in {db_path}")
+        users = prepare_users(db_path, args.clients)
+
+        if not args.url:
+            server = InProcessServer(workdir, port) if args.in_process else SubprocessServer(workdir, port)
+            pid = server.pid
+
+        asyncio.run(wait_for_server(http_url))
+        ws_url = "ws" + http_url[len("http"):]
+        print(f"[Bench] {args.clients} clients at {args.rate:.0f}/s against {http_url}")
+        stats = asyncio.run(run_load(args, ws_url, http_url, users, pid))
+        print_results(stats, args.clients)
+        if args.csv:
+            write_timeline(args.csv, stats["timeline"])
+    finally:
+        if server is not None:
+            server.stop()
+        shutil.rmtree(workdir, ignore_errors=True)
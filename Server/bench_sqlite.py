@@ -0,0 +1,229 @@
+# bench_sqlite.py
+"""
+SQLite 쓰기 처리량 벤치마크 (동시 게임 부하 시뮬레이션)
+
+- 임시 데이터베이스에 사용자와 게임을 만들고, 게임마다 코루틴 하나가 수 기록을 쓰면서
+  중간중간 채팅/상태/크레딧 쓰기를 섞어 보냄
+- 방식별 비교
+  legacy      : SQLite 기본 설정, 쓰기마다 스레드 풀에서 세션을 열어 커밋 (기존 방식)
+  wal         : WAL 프로필, 쓰기마다 스레드 풀에서 커밋
+  wal-writer  : WAL 프로필, 단일 쓰기 스레드 + group commit (DatabaseExecutor)
+- 방식별 초당 쓰기 수, 쓰기 지연(p50/p99), 실패("database is locked" 등) 수 출력
+
+실행 예:
+    python bench_sqlite.py --games 500 --moves 40
+"""
+import argparse
+import asyncio
+import os
+import random
+import shutil
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session, sessionmaker
+
+from User import Base, User, GameHistory, GameMove, ChatMessage, GameCredit
+from db_async import DatabaseExecutor
+from sqlite_profile import create_sqlite_engine
+
+# ================== 벤치마크 설정 ==================
+DEFAULT_GAMES = 500
+DEFAULT_MOVES = 40                 # 게임당 수 기록 수
+DEFAULT_THINK_MS = 0               # 수 사이 대기 (0이면 최대 부하)
+DEFAULT_THREADS = 40               # 쓰기마다 커밋하는 방식의 스레드 수 (FastAPI 기본 스레드 풀 크기)
+SIDE_WRITE_EVERY = 8               # 이 수마다 채팅/상태/크레딧 쓰기 하나 추가
+MODES = ("legacy", "wal", "wal-writer")
+
+
+# ================== 쓰기 작업 (커밋은 실행하는 쪽에서) ==================
+def insert_move(db: Session, game_id: int, move_number: int, player_id: int):
+    db.add(GameMove(
+        game_id=game_id,
+        move_number=move_number,
+        player_id=player_id,
+        move_type="move",
+        position_from="14,8",
+        remaining_time=600.0 - move_number,
+        move_timestamp=datetime.now()
+    ))
+
+
+def insert_chat(db: Session, sender_id: int, receiver_id: int):
+    db.add(ChatMessage(sender_id=sender_id, receiver_id=receiver_id, message="gg"))
+
+
+def update_status(db: Session, user_id: int, status: str):
+    db.execute(update(User).where(User.id == user_id).values(status=status))
+
+
+def consume_credit(db: Session, user_id: int):
+    credit = db.execute(select(GameCredit).where(GameCredit.user_id == user_id)).scalar_one_or_none()
+    if credit and credit.available_games > 0:
+        credit.available_games -= 1
+
+
+# ================== 준비 ==================
+def prepare_database(path: str, games: int) -> List[Dict]:
+    """사용자 2 * games명과 게임 games개 생성 후 게임 목록 반환"""
+    engine = create_sqlite_engine(f"sqlite:///{path}", profile="legacy")
+    Base.metadata.create_all(bind=engine)
+
+    db = sessionmaker(bind=engine)()
+    users = [User(username=f"bench{i}", password="x", email=f"bench{i}@example.com") for i in range(games * 2)]
+    db.add_all(users)
+    db.flush()
+    db.add_all([GameCredit(user_id=user.id, available_games=1000) for user in users])
+
+    histories = [
+        GameHistory(game_token=f"bench-{i}", player1_id=users[2 * i].id, player2_id=users[2 * i + 1].id,
+                    game_mode="rapid", game_start_time=datetime.now(),
+                    player1_elo_before=1500, player2_elo_before=1500)
+        for i in range(games)
+    ]
+    db.add_all(histories)
+    db.commit()
+
+    result = [{"id": h.id, "players": (h.player1_id, h.player2_id)} for h in histories]
+    db.close()
+    engine.dispose()
+    return result
+
+
+# ================== 실행기 ==================
+class PerWriteCommit:
+    """쓰기마다 스레드 풀에서 세션을 열어 커밋"""
+
+    def __init__(self, session_factory, threads: int):
+        self._session_factory = session_factory
+        self._executor = ThreadPoolExecutor(max_workers=threads)
+
+    def _call(self, task, args):
+        db = self._session_factory()
+        try:
+            task(db, *args)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    async def run(self, task, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._executor, self._call, task, args)
+
+    def shutdown(self):
+        self._executor.shutdown(wait=True)
+
+
+async def play_game(runner, game: Dict, moves: int, think_ms: float, latencies: List[float], errors: List[str]):
+    game_id = game["id"]
+    players = game["players"]
+
+    async def write(task, *args):
+        started = time.perf_counter()
+        try:
+            await runner.run(task, *args)
+            latencies.append((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            errors.append(str(e).splitlines()[0])
+
+    for move_number in range(1, moves + 1):
+        if think_ms:
+            await asyncio.sleep(random.uniform(0, 2 * think_ms) / 1000)
+
+        player_id = players[(move_number - 1) % 2]
+        await write(insert_move, game_id, move_number, player_id)
+
+        if move_number % SIDE_WRITE_EVERY == 0:
+            kind = (move_number // SIDE_WRITE_EVERY) % 3
+            if kind == 0:
+                await write(insert_chat, player_id, players[move_number % 2])
+            elif kind == 1:
+                await write(update_status, player_id, "in_game")
+            else:
+                await write(consume_credit, player_id)
+
+
+async def run_mode(mode: str, games: int, moves: int, think_ms: float, threads: int, workdir: str) -> Dict:
+    path = os.path.join(workdir, f"{mode}.db")
+    game_list = prepare_database(path, games)
+    url = f"sqlite:///{path}"
+
+    if mode == "wal-writer":
+        write_engine = create_sqlite_engine(url, role="writer", profile="wal")
+        read_engine = create_sqlite_engine(url, role="reader", profile="wal")
+        runner = DatabaseExecutor(sessionmaker(bind=write_engine), sessionmaker(bind=read_engine))
+        engines = [write_engine, read_engine]
+    else:
+        profile = "legacy" if mode == "legacy" else "wal"
+        engine = create_sqlite_engine(url, profile=profile)
+        runner = PerWriteCommit(sessionmaker(bind=engine), threads)
+        engines = [engine]
+
+    latencies: List[float] = []
+    errors: List[str] = []
+
+    started = time.perf_counter()
+    await asyncio.gather(*(play_game(runner, game, moves, think_ms, latencies, errors) for game in game_list))
+    elapsed = time.perf_counter() - started
+
+    stats = runner.stats() if hasattr(runner, "stats") else {}
+    runner.shutdown()
+    for engine in engines:
+        engine.dispose()
+
+    latencies.sort()
+
+    def percentile(p: float) -> float:
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))] if latencies else 0.0
+
+    return {
+        "mode": mode,
+        "writes": len(latencies),
+        "errors": len(errors),
+        "error_kinds": sorted(set(errors))[:3],
+        "seconds": elapsed,
+        "writes_per_second": len(latencies) / elapsed if elapsed else 0.0,
+        "p50_ms": percentile(0.50),
+        "p99_ms": percentile(0.99),
+        "transactions": stats.get("write_transactions"),
+    }
+
+
+def print_results(results: List[Dict]):
+    print()
+    print(f"{'mode':12s} {'writes':>8s} {'errors':>7s} {'seconds':>8s} {'writes/s':>10s} {'p50 ms':>8s} {'p99 ms':>8s} {'commits':>8s}")
+    for r in results:
+        commits = r["transactions"] if r["transactions"] is not None else r["writes"]
+        print(f"{r['mode']:12s} {r['writes']:8d} {r['errors']:7d} {r['seconds']:8.2f} "
+              f"{r['writes_per_second']:10.0f} {r['p50_ms']:8.1f} {r['p99_ms']:8.1f} {commits:8d}")
+        for kind in r["error_kinds"]:
+            print(f"{'':12s} error: {kind}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SQLite write throughput under simulated concurrent games")
+    parser.add_argument("--games", type=int, default=DEFAULT_GAMES, help="concurrent games")
+    parser.add_argument("--moves", type=int, default=DEFAULT_MOVES, help="moves recorded per game")
+    parser.add_argument("--think-ms", type=float, default=DEFAULT_THINK_MS, help="mean delay between moves")
+    parser.add_argument("--threads", type=int, default=DEFAULT_THREADS, help="threads for per-write commit modes")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES), help="modes to run")
+    parser.add_argument("--dir", default=None, help="directory for the benchmark databases (default: temp dir)")
+    args = parser.parse_args()
+
+    workdir = args.dir or tempfile.mkdtemp(prefix="quoridor-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        results = []
+        for mode in args.modes:
+            print(f"[Bench] {mode}: {args.games} games x {args.moves} moves")
+            results.append(asyncio.run(run_mode(mode, args.games, args.moves, args.think_ms, args.threads, workdir)))
+        print_results(results)
+    finally:
+        if not args.dir:
+            shutil.rmtree(workdir, ignore_errors=True)
@@ -0,0 +1,297 @@
+# bulk_analysis.py
+"""
+저장된 전체 게임 기록(game_moves)을 오프라인으로 일괄 분석하는 배치 작업
+
+- 종료된 게임의 수를 (game_id, move_number) 순으로 청크 단위로 읽으며 게임별로 묶음
+- 게임 하나를 워커 프로세스 작업 하나로 처리 (워커 안에서 수를 차례로 재생하며 분석)
+- 동시에 처리 중인 게임 수를 제한하여 메모리와 DB 읽기 속도를 맞춤
+- 결과는 game_analyses 테이블에 게임당 한 행으로 저장
+- 체크포인트 파일에 완료된 마지막 game_id를 기록하여 중단 후 이어서 실행
+
+실행 예:
+    python bulk_analysis.py --workers 4 --difficulty easy
+"""
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime, timedelta
+from itertools import groupby
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from sqlalchemy import create_engine, insert, text
+
+from User import GameAnalysis
+from game_review import REVIEW_DIFFICULTY, replay_recorded_moves, analyze_review_position
+
+# ================== 배치 설정 ==================
+DEFAULT_DB_PATH = "./quoridor.db"
+DEFAULT_CHECKPOINT_PATH = "./bulk_analysis_checkpoint.json"
+DEFAULT_CHUNK_SIZE = 2000          # 한 번에 읽는 game_moves 행 수
+DEFAULT_WRITE_BATCH = 50           # 한 트랜잭션에 저장할 게임 수
+WORKER_NICE = 10                   # 워커 프로세스 우선순위 (라이브 서버보다 낮게)
+BUSY_TIMEOUT_SECONDS = 30          # 라이브 서버가 쓰는 중일 때 대기 시간
+ACTIVE_GAME_WINDOW_HOURS = 6       # 이 시간 안에 시작한 미종료 게임은 진행 중으로 간주
+
+# 청크 단위 keyset 조회 (OFFSET 없이 마지막 (game_id, move_number) 이후부터)
+MOVES_CHUNK_QUERY = text("""
+    SELECT m.game_id, m.move_number, m.move_type, m.position_from, m.position_to
+    FROM game_moves m
+    JOIN game_histories g ON g.id = m.game_id
+    WHERE g.game_end_time IS NOT NULL
+      AND m.game_id < :ceiling
+      AND (m.game_id > :game_id OR (m.game_id = :game_id AND m.move_number > :move_number))
+    ORDER BY m.game_id, m.move_number
+    LIMIT :limit
+""")
+
+# 진행 중인 게임 중 가장 작은 ID (체크포인트가 진행 중인 게임을 건너뛰지 않도록 그 앞까지만 분석)
+ACTIVE_GAME_CEILING_QUERY = text("""
+    SELECT MIN(id) FROM game_histories
+    WHERE game_end_time IS NULL AND game_start_time > :since
+""")
+
+# 위 조회가 정렬 없이 인덱스를 타도록 (game_id, move_number) 인덱스 생성
+MOVES_INDEX_DDL = text(
+    "CREATE INDEX IF NOT EXISTS ix_game_moves_game_id_move_number "
+    "ON game_moves (game_id, move_number)"
+)
+
+
+# ================== DB 연결 ==================
+def create_read_engine(db_path: str):
+    """읽기 전용 연결 (라이브 서버의 쓰기를 막지 않도록 청크마다 짧은 읽기 트랜잭션만 사용)"""
+    return create_engine(
+        f"sqlite:///file:{db_path}?mode=ro&uri=true",
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_SECONDS},
+    )
+
+
+def create_write_engine(db_path: str):
+    """결과 저장용 연결"""
+    return create_engine(
+        f"sqlite:///{db_path}",
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_SECONDS},
+    )
+
+
+def prepare_database(write_engine):
+    """결과 테이블과 조회용 인덱스 준비"""
+    GameAnalysis.__table__.create(write_engine, checkfirst=True)
+    with write_engine.begin() as conn:
+        conn.execute(MOVES_INDEX_DDL)
+
+
+# ================== 체크포인트 ==================
+def load_checkpoint(path: str) -> int:
+    """마지막으로 완료된 game_id (없으면 0)"""
+    if not os.path.exists(path):
+        return 0
+    with open(path, "r", encoding="utf-8") as f:
+        return int(json.load(f).get("last_game_id", 0))
+
+
+def save_checkpoint(path: str, last_game_id: int, processed: int):
+    """임시 파일에 쓴 뒤 교체하여 중간에 끊겨도 체크포인트가 깨지지 않게 함"""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({
+            "last_game_id": last_game_id,
+            "processed": processed,
+            "updated_at": datetime.utcnow().isoformat(),
+        }, f)
+    os.replace(tmp_path, path)
+
+
+# ================== 기록 스트리밍 ==================
+def find_game_id_ceiling(read_engine) -> int:
+    """분석할 수 있는 game_id 상한 (진행 중인 게임이 없으면 제한 없음)"""
+    since = datetime.utcnow() - timedelta(hours=ACTIVE_GAME_WINDOW_HOURS)
+    with read_engine.connect() as conn:
+        ceiling = conn.execute(ACTIVE_GAME_CEILING_QUERY, {"since": since}).scalar()
+    return ceiling if ceiling is not None else 2 ** 62
+
+
+def stream_move_rows(read_engine, after_game_id: int, chunk_size: int) -> Iterator[Tuple]:
+    """종료된 게임의 수를 (game_id, move_number) 순으로 청크 단위 조회"""
+    game_id, move_number = after_game_id, 2 ** 31
+    ceiling = find_game_id_ceiling(read_engine)
+
+    while True:
+        with read_engine.connect() as conn:
+            rows = conn.execute(MOVES_CHUNK_QUERY, {
+                "game_id": game_id,
+                "move_number": move_number,
+                "ceiling": ceiling,
+                "limit": chunk_size,
+            }).fetchall()
+
+        if not rows:
+            return
+
+        for row in rows:
+            yield tuple(row)
+
+        game_id, move_number = rows[-1][0], rows[-1][1]
+        if len(rows) < chunk_size:
+            return
+
+
+def stream_games(read_engine, after_game_id: int, chunk_size: int) -> Iterator[Tuple[int, List[Tuple]]]:
+    """청크 경계와 상관없이 게임 단위로 (game_id, [(move_type, position_from, position_to), ...]) 반환"""
+    rows = stream_move_rows(read_engine, after_game_id, chunk_size)
+    for game_id, game_rows in groupby(rows, key=lambda row: row[0]):
+        yield game_id, [(move_type, pos_from, pos_to) for _, _, move_type, pos_from, pos_to in game_rows]
+
+
+# ================== 게임 분석 (워커 프로세스에서 실행) ==================
+def lower_worker_priority():
+    """워커 프로세스 초기화: 라이브 서버보다 낮은 CPU 우선순위"""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(WORKER_NICE)
+        except OSError:
+            pass
+
+
+def analyze_game(game_id: int, records: List[Tuple], difficulty: str) -> Dict:
+    """게임 하나를 처음부터 재생하며 수마다 분석하고 플레이어별로 요약"""
+    losses = {"red": [], "blue": []}
+    mistakes = {"red": 0, "blue": 0}
+    blunders = {"red": 0, "blue": 0}
+    error = None
+
+    try:
+        for before, move in replay_recorded_moves(records):
+            entry = analyze_review_position(before, move, difficulty)
+            player = entry["player"]
+            losses[player].append(entry["loss"])
+            mistakes[player] += entry["mistake"]
+            blunders[player] += entry["blunder"]
+    except ValueError as e:
+        error = str(e)[:200]
+
+    def average(values: List[float]) -> Optional[float]:
+        return round(sum(values) / len(values), 2) if values else None
+
+    return {
+        "game_id": game_id,
+        "difficulty": difficulty,
+        "analyzed_moves": len(losses["red"]) + len(losses["blue"]),
+        "red_avg_loss": average(losses["red"]),
+        "blue_avg_loss": average(losses["blue"]),
+        "red_mistakes": mistakes["red"],
+        "blue_mistakes": mistakes["blue"],
+        "red_blunders": blunders["red"],
+        "blue_blunders": blunders["blue"],
+        "error": error,
+        "analyzed_at": datetime.utcnow(),
+    }
+
+
+# ================== 배치 실행 ==================
+def write_results(write_engine, results: List[Dict]):
+    """결과를 한 트랜잭션으로 저장 (다시 분석한 게임은 덮어씀)"""
+    if not results:
+        return
+    with write_engine.begin() as conn:
+        conn.execute(insert(GameAnalysis.__table__).prefix_with("OR REPLACE"), results)
+
+
+def run_bulk_analysis(
+    db_path: str = DEFAULT_DB_PATH,
+    checkpoint_path: str = DEFAULT_CHECKPOINT_PATH,
+    difficulty: str = REVIEW_DIFFICULTY,
+    workers: int = max(1, (os.cpu_count() or 2) - 1),
+    max_in_flight: Optional[int] = None,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    write_batch: int = DEFAULT_WRITE_BATCH,
+    max_games: Optional[int] = None,
+):
+    """체크포인트 이후의 종료된 게임을 모두 분석"""
+    max_in_flight = max_in_flight or workers * 2
+
+    read_engine = create_read_engine(db_path)
+    write_engine = create_write_engine(db_path)
+    prepare_database(write_engine)
+
+    start_after = load_checkpoint(checkpoint_path)
+    print(f"[BulkAnalysis] Starting after game {start_after} "
+          f"({workers} workers, {max_in_flight} in flight, difficulty={difficulty})")
+
+    # 제출 순서대로 game_id를 기억하여, 앞의 게임이 모두 저장된 지점까지만 체크포인트 전진
+    submitted: List[int] = []
+    finished_ids = set()
+    pending_results: List[Dict] = []
+    in_flight = set()
+    checkpoint = start_after
+    processed = 0
+    started = time.time()
+
+    def flush():
+        nonlocal checkpoint, processed
+        write_results(write_engine, pending_results)
+        finished_ids.update(result["game_id"] for result in pending_results)
+        processed += len(pending_results)
+        pending_results.clear()
+
+        while submitted and submitted[0] in finished_ids:
+            checkpoint = submitted.pop(0)
+            finished_ids.discard(checkpoint)
+        save_checkpoint(checkpoint_path, checkpoint, processed)
+
+        elapsed = time.time() - started
+        print(f"[BulkAnalysis] {processed} games done, checkpoint={checkpoint}, "
+              f"{processed / elapsed if elapsed > 0 else 0:.2f} games/s")
+
+    def collect(done):
+        for future in done:
+            pending_results.append(future.result())
+        if len(pending_results) >= write_batch:
+            flush()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=lower_worker_priority) as executor:
+        for count, (game_id, records) in enumerate(stream_games(read_engine, start_after, chunk_size), start=1):
+            if max_games is not None and count > max_games:
+                break
+
+            # 처리 중인 게임이 한도에 도달하면 하나 이상 끝날 때까지 읽기를 멈춤
+            if len(in_flight) >= max_in_flight:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+
+            submitted.append(game_id)
+            in_flight.add(executor.submit(analyze_game, game_id, records, difficulty))
+
+        done, _ = wait(in_flight)
+        collect(done)
+        if pending_results:
+            flush()
+
+    print(f"[BulkAnalysis] Finished: {processed} games in {time.time() - started:.1f}s")
+    return processed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Offline engine analysis of stored games")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    parser.add_argument("--checkpoint", default=DEFAULT_CHECKPOINT_PATH, help="checkpoint file path")
+    parser.add_argument("--difficulty", default=REVIEW_DIFFICULTY, help="search budget per position")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 2) - 1))
+    parser.add_argument("--max-in-flight", type=int, default=None, help="games queued at once (default: workers * 2)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="game_moves rows per query")
+    parser.add_argument("--write-batch", type=int, default=DEFAULT_WRITE_BATCH, help="games per write transaction")
+    parser.add_argument("--max-games", type=int, default=None, help="stop after this many games")
+    args = parser.parse_args()
+
+    run_bulk_analysis(
+        db_path=args.db,
+        checkpoint_path=args.checkpoint,
+        difficulty=args.difficulty,
+        workers=args.workers,
+        max_in_flight=args.max_in_flight,
+        chunk_size=args.chunk_size,
+        write_batch=args.write_batch,
+        max_games=args.max_games,
+    )
@@ -0,0 +1,213 @@
+# db_async.py
+"""
+WebSocket 핸들러용 비동기 DB 접근
+
+- 쓰기 작업은 전용 쓰기 스레드 하나가 요청 큐 순서대로 실행하고, 이벤트 루프는 결과만 기다림
+  이전 커밋 동안 큐에 쌓인 작업들은 한 트랜잭션으로 묶어 커밋 (group commit)
+  묶음 중 실패한 작업이 있으면 전체를 되돌리고 작업마다 SAVEPOINT를 써서 다시 실행
+  (실패한 작업만 되돌리고 나머지는 함께 커밋, 작업이 두 번 실행될 수 있으므로 DB 밖의 부수 효과는 두지 않음)
+- 읽기 작업은 읽기 연결 풀의 스레드에서 동시에 실행
+- 작업 함수는 (db, *args)를 받는 일반 동기 함수
+  쓰기 작업은 commit/rollback을 호출하지 않음 (생성된 ID가 필요하면 flush)
+  세션이 닫힌 뒤 이벤트 루프에서 사용하므로 ORM 객체 대신 일반 값을 반환
+"""
+import asyncio
+import queue
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+# ================== DB 스레드 설정 ==================
+READ_THREADS = 4               # 읽기 스레드 수 (읽기 연결 풀 크기와 같게)
+GROUP_COMMIT_MAX = 256         # 한 트랜잭션에 묶을 최대 작업 수
+SLOW_TASK_MS = 200             # 이보다 오래 걸린 작업/커밋은 로그 출력
+
+
+class SQLiteWriter:
+    """단일 쓰기 스레드 (대기 중인 작업들을 한 트랜잭션으로 커밋)"""
+
+    def __init__(self, session_factory: Callable[[], Session], max_batch: int = GROUP_COMMIT_MAX):
+        self._session_factory = session_factory
+        self._max_batch = max_batch
+        self._queue: "queue.Queue[Optional[Tuple[Future, Callable[..., Any], tuple]]]" = queue.Queue()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        # 통계
+        self.transactions = 0
+        self.tasks = 0
+        self.largest_batch = 0
+        self.max_commit_ms = 0.0
+
+    def submit(self, task: Callable[..., Any], args: tuple) -> Future:
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+                self._thread.start()
+
+        future: Future = Future()
+        self._queue.put((future, task, args))
+        return future
+
+    def stop(self):
+        """큐에 남은 작업을 모두 커밋한 뒤 쓰기 스레드 종료"""
+        with self._lock:
+            if self._thread is None:
+                return
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+
+    @property
+    def queued(self) -> int:
+        return self._queue.qsize()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            # 이전 커밋 동안 쌓인 작업을 함께 처리
+            batch = [item]
+            stopping = False
+            while len(batch) < self._max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            self._commit_batch(batch)
+            if stopping:
+                return
+
+    def _commit_batch(self, batch: List[Tuple[Future, Callable[..., Any], tuple]]):
+        started = time.perf_counter()
+        batch = [item for item in batch if item[0].set_running_or_notify_cancel()]
+        if not batch:
+            return
+
+        outcomes = self._execute(batch, isolate=False)
+        if outcomes is None:
+            outcomes = self._execute(batch, isolate=True)
+
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        self.transactions += 1
+        self.tasks += len(batch)
+        self.largest_batch = max(self.largest_batch, len(batch))
+        self.max_commit_ms = max(self.max_commit_ms, elapsed_ms)
+        if elapsed_ms > SLOW_TASK_MS:
+            print(f"[DB] Slow commit of {len(batch)} tasks: {elapsed_ms:.0f}ms")
+
+        for future, result, error in outcomes:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _execute(self, batch, isolate: bool):
+        """
+        묶음을 한 트랜잭션으로 실행하고 (future, 결과, 예외) 목록 반환
+        isolate=False: SAVEPOINT 없이 실행, 실패한 작업이 있으면 전체를 되돌리고 None 반환
+        isolate=True: 작업마다 SAVEPOINT 사용 (커밋 자체가 실패하면 모든 작업 실패)
+        """
+        outcomes = []
+        db = self._session_factory()
+        try:
+            for future, task, args in batch:
+                if not isolate:
+                    outcomes.append((future, task(db, *args), None))
+                    continue
+                try:
+                    with db.begin_nested():
+                        outcomes.append((future, task(db, *args), None))
+                except Exception as e:
+                    outcomes.append((future, None, e))
+
+            db.commit()
+            return outcomes
+        except Exception as e:
+            db.rollback()
+            if not isolate and len(batch) > 1:
+                return None
+            return [(future, None, error or e) for future, _, error in outcomes] or [(batch[0][0], None, e)]
+        finally:
+            db.close()
+
+
+class DatabaseExecutor:
+    """쓰기 스레드와 읽기 스레드 풀을 묶은 DB 작업 실행기"""
+
+    def __init__(
+        self,
+        write_session_factory: Callable[[], Session],
+        read_session_factory: Callable[[], Session],
+        read_threads: int = READ_THREADS
+    ):
+        self._read_session_factory = read_session_factory
+        self._read_threads = read_threads
+        self._writer = SQLiteWriter(write_session_factory)
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        self.pending_reads = 0
+        self.max_read_ms = 0.0
+
+    def _get_read_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._read_executor is None:
+                self._read_executor = ThreadPoolExecutor(max_workers=self._read_threads, thread_name_prefix="db-read")
+            return self._read_executor
+
+    def shutdown(self):
+        """서버 종료 시 남은 쓰기를 커밋하고 DB 스레드 정리"""
+        self._writer.stop()
+        with self._executor_lock:
+            if self._read_executor is not None:
+                self._read_executor.shutdown(wait=True)
+                self._read_executor = None
+
+    async def run(self, task: Callable[..., Any], *args) -> Any:
+        """쓰기 작업 task(db, *args)를 쓰기 스레드에서 실행하고 커밋 후 결과 반환 (예외는 그대로 전달)"""
+        return await asyncio.wrap_future(self._writer.submit(task, args))
+
+    async def read(self, task: Callable[..., Any], *args) -> Any:
+        """읽기 작업 task(db, *args)를 읽기 스레드에서 실행하고 결과 반환"""
+        loop = asyncio.get_running_loop()
+        self.pending_reads += 1
+        try:
+            return await loop.run_in_executor(self._get_read_executor(), self._call_read, task, args)
+        finally:
+            self.pending_reads -= 1
+
+    def _call_read(self, task: Callable[..., Any], args: tuple) -> Any:
+        started = time.perf_counter()
+        db = self._read_session_factory()
+        try:
+            return task(db, *args)
+        finally:
+            db.close()
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            self.max_read_ms = max(self.max_read_ms, elapsed_ms)
+            if elapsed_ms > SLOW_TASK_MS:
+                print(f"[DB] Slow read {task.__name__}: {elapsed_ms:.0f}ms")
+
+    def stats(self) -> dict:
+        return {
+            "write_queue": self._writer.queued,
+            "write_transactions": self._writer.transactions,
+            "write_tasks": self._writer.tasks,
+            "largest_write_batch": self._writer.largest_batch,
+            "max_commit_ms": round(self._writer.max_commit_ms, 1),
+            "read_threads": self._read_threads,
+            "pending_reads": self.pending_reads,
+            "max_read_ms": round(self.max_read_ms, 1),
+        }
@@ -0,0 +1,206 @@
+# game_finalization.py
+"""
+게임 종료 처리 (정상 종료, 기권/연결 끊김 메시지, WebSocket 연결 끊김 공통)
+
+- ELO 계산, 두 플레이어 ELO 갱신, 게임 히스토리 마감, 크레딧 차감을 쓰기 스레드의 한 트랜잭션으로 처리
+- 게임(시간 제한, 게임 토큰)마다 한 번만 적용
+  두 플레이어가 모두 결과를 보내거나 결과 보고와 연결 끊김이 겹치면 처음 요청만 적용하고
+  나머지 요청은 applied=False를 받음
+  쓰기 전에 세션 저장소의 게임 세션에 "finalized" 필드를 선점하므로 요청이 다른 워커에 와도 한 번만 적용
+  (같은 워커의 나머지 요청은 첫 결과를, 다른 워커의 요청은 ELO 값 없이 applied=False만 받음)
+- 히스토리가 있는 게임은 game_end_time이 비어 있을 때만 마감하므로 서버 재시작 후에도 중복 적용되지 않음
+- ELO 변화량은 게임 시작 시 ELO로 계산하고, 사용자 ELO에는 변화량만 더함 (elo = elo + 변화량)
+  가까운 시각에 끝난 다른 게임의 결과를 덮어쓰지 않음
+"""
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import func, select, update
+from sqlalchemy.orm import Session
+
+from User import User, GameHistory, GameCredit, MIN_ELO, calculate_elo_change, normalize_time_control
+
+# ================== 종료 처리 설정 ==================
+FINALIZED_GAMES_KEPT = 1024    # 중복 요청 확인용으로 기억할 최근 종료 게임 수
+FINALIZED_FIELD = "finalized"  # 종료 처리를 맡은 워커가 게임 세션에 선점하는 필드
+DEFAULT_CREDITS = 5            # 크레딧 레코드가 없는 사용자의 기본 크레딧 (get_or_create_game_credit과 같게)
+
+
+# ================== 종료 처리 트랜잭션 (쓰기 스레드에서 실행) ==================
+def apply_elo_change(db: Session, user_id: Optional[int], time_control: str, change: int) -> Optional[Tuple[int, int]]:
+    """
+    사용자의 시간 제한 ELO에 변화량을 더하고 (적용 전, 적용 후) ELO 반환 (사용자가 없으면 None)
+    값을 계산해 덮어쓰지 않고 SQL에서 더하므로 이 트랜잭션 전에 끝난 다른 게임의 결과가 유지됨
+    """
+    if not user_id:
+        return None
+
+    if normalize_time_control(time_control) == "Blitz":
+        column, fields = User.blitz_elo, ("blitz_elo",)
+    else:
+        # 기존 elo_rating도 업데이트 (호환성)
+        column, fields = User.rapid_elo, ("rapid_elo", "elo_rating")
+
+    before = db.execute(select(column).where(User.id == user_id)).scalar()
+    if before is None:
+        return None
+    new_elo = func.max(MIN_ELO, column + change)
+    after = db.execute(
+        update(User).where(User.id == user_id).values({field: new_elo for field in fields}).returning(column)
+    ).scalar()
+    return before, after
+
+
+def finalize_game_result(
+    db: Session,
+    game_history_id: Optional[int],
+    time_control: str,
+    winner: Tuple[Optional[int], int],
+    loser: Tuple[Optional[int], int],
+    winner_is_player1: bool,
+    game_result: str,
+    charge_loser_credit: bool
+) -> Dict:
+    """
+    승패 결과 적용 (winner/loser: (사용자 ID, 게임 시작 시 ELO))
+    이미 마감된 히스토리이면 아무것도 쓰지 않고 applied=False 반환
+    결과의 ELO 전/후는 적용 시점의 실제 ELO (다른 게임이 먼저 끝났으면 시작 시 ELO와 다를 수 있음)
+    """
+    (winner_id, winner_elo), (loser_id, loser_elo) = winner, loser
+    winner_new_elo, loser_new_elo = calculate_elo_change(winner_elo, loser_elo)
+    winner_change, loser_change = winner_new_elo - winner_elo, loser_new_elo - loser_elo
+
+    result = {
+        "applied": True,
+        "winner_elo_before": winner_elo,
+        "winner_elo_after": winner_new_elo,
+        "loser_elo_before": loser_elo,
+        "loser_elo_after": loser_new_elo,
+        "credits_remaining": None,
+    }
+
+    # 게임 히스토리 마감 (game_end_time이 비어 있을 때만)
+    if game_history_id:
+        player1_change, player2_change = (
+            (winner_change, loser_change) if winner_is_player1 else (loser_change, winner_change)
+        )
+        closed = db.execute(
+            update(GameHistory)
+            .where(GameHistory.id == game_history_id, GameHistory.game_end_time.is_(None))
+            .values(
+                winner_id=winner_id,
+                game_end_time=datetime.now(),
+                game_result=game_result,
+                player1_elo_change=player1_change,
+                player2_elo_change=player2_change
+            )
+        ).rowcount
+        if not closed:
+            return {**result, "applied": False}
+
+    # 두 플레이어 ELO에 변화량 적용 (Blitz가 아니면 Rapid ELO)
+    for role, user_id, change in (("winner", winner_id, winner_change), ("loser", loser_id, loser_change)):
+        applied = apply_elo_change(db, user_id, time_control, change)
+        if applied is not None:
+            result[f"{role}_elo_before"], result[f"{role}_elo_after"] = applied
+
+    # 히스토리의 게임 후 ELO는 실제로 적용된 값
+    if game_history_id:
+        winner_after, loser_after = result["winner_elo_after"], result["loser_elo_after"]
+        player1_after, player2_after = (winner_after, loser_after) if winner_is_player1 else (loser_after, winner_after)
+        db.execute(
+            update(GameHistory)
+            .where(GameHistory.id == game_history_id)
+            .values(player1_elo_after=player1_after, player2_elo_after=player2_after)
+        )
+
+    # 패자의 게임 크레딧 차감 (연결이 끊긴 경우)
+    if charge_loser_credit and loser_id:
+        credit = db.execute(select(GameCredit).where(GameCredit.user_id == loser_id)).scalar_one_or_none()
+        if not credit:
+            credit = GameCredit(user_id=loser_id, available_games=DEFAULT_CREDITS, last_reset_date=datetime.utcnow())
+            db.add(credit)
+        if credit.available_games > 0:
+            credit.available_games -= 1
+            result["credits_remaining"] = credit.available_games
+
+    return result
+
+
+# ================== 종료 처리 서비스 ==================
+def not_applied_result() -> Dict:
+    """다른 워커가 이미 처리한 게임의 결과 (적용된 ELO 값은 알 수 없음)"""
+    return {
+        "applied": False,
+        "winner_elo_before": None,
+        "winner_elo_after": None,
+        "loser_elo_before": None,
+        "loser_elo_after": None,
+        "credits_remaining": None,
+    }
+
+
+class GameFinalizer:
+    """게임마다 한 번만 종료 처리를 적용하는 서비스 (이벤트 루프 하나에서 사용)"""
+
+    def __init__(self, db_executor, session_store):
+        self._db_executor = db_executor
+        self._session_store = session_store
+        # (시간 제한, 게임 토큰) -> 종료 처리 결과 (진행 중이면 완료를 기다림)
+        self._results: "OrderedDict[Tuple[str, str], asyncio.Future]" = OrderedDict()
+
+    async def finalize(
+        self,
+        time_control: str,
+        game_token: str,
+        game_history_id: Optional[int],
+        winner: Tuple[Optional[int], int],
+        loser: Tuple[Optional[int], int],
+        winner_is_player1: bool,
+        game_result: str,
+        charge_loser_credit: bool = False
+    ) -> Dict:
+        """
+        승패 결과를 적용하고 결과 반환 (같은 게임의 두 번째 요청부터는 applied=False로 반환)
+        게임 세션의 finalized 필드를 선점하지 못하면 (다른 워커가 처리했거나 세션이 정리됨) 쓰지 않음
+        저장에 실패하면 선점을 풀고 예외를 그대로 전달해 다음 요청에서 다시 시도
+        """
+        key = (time_control, game_token)
+
+        existing = self._results.get(key)
+        if existing is not None:
+            result = await asyncio.shield(existing)
+            return {**result, "applied": False}
+
+        future = asyncio.get_running_loop().create_future()
+        self._results[key] = future
+        while len(self._results) > FINALIZED_GAMES_KEPT:
+            self._results.popitem(last=False)
+
+        try:
+            if await self._session_store.claim_game_field(time_control, game_token, FINALIZED_FIELD, True):
+                try:
+                    result = await self._db_executor.run(
+                        finalize_game_result, game_history_id, time_control, winner, loser,
+                        winner_is_player1, game_result, charge_loser_credit
+                    )
+                except Exception:
+                    # 트랜잭션이 롤백되었으므로 다른 요청이 다시 맡을 수 있게 선점 해제
+                    # (취소는 쓰기 스레드의 작업이 계속 진행될 수 있으므로 선점 유지)
+                    await self._session_store.release_game_field(time_control, game_token, FINALIZED_FIELD)
+                    raise
+            else:
+                result = not_applied_result()
+        except (Exception, asyncio.CancelledError) as e:
+            self._results.pop(key, None)
+            if isinstance(e, asyncio.CancelledError):
+                e = RuntimeError("Game finalization was interrupted")
+            future.set_exception(e)
+            # 기다리는 요청이 없어도 경고가 남지 않도록 예외 확인 처리
+            future.exception()
+            raise
+
+        future.set_result(result)
+        return result
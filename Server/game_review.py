@@ -0,0 +1,296 @@
+# game_review.py
+"""
+저장된 게임(GameMove 기록)을 QuoridorGameState로 재생하며 수마다 엔진 분석
+
+- 각 포지션은 고정 예산 탐색으로 최선의 수와 실제로 둔 수의 점수를 비교
+- 분석은 낮은 우선순위의 워커 프로세스에서 실행하여 이벤트 루프와 AI 대전을 막지 않음
+  모든 리뷰를 합쳐 REVIEW_MAX_IN_FLIGHT개 포지션까지만 워커 풀에 제출 (나머지는 자리가 나면 제출)
+- 같은 게임을 동시에 요청하면 분석 하나를 함께 받음 (마지막 요청이 끊기면 분석 취소)
+- 종료된 게임은 바뀌지 않으므로 분석 결과를 게임 ID 기준으로 캐시
+"""
+import asyncio
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from quoridor_ai import (
+    QuoridorGameState, MinimaxAI, Move, DISTANCE_WEIGHT,
+    encode_pawn_move, encode_wall_move, MOVE_CODE_TABLE
+)
+
+# ================== 리뷰 설정 ==================
+REVIEW_DIFFICULTY = "medium"                          # 수마다 사용할 탐색 예산 (DIFFICULTY_BUDGETS 키)
+REVIEW_WORKERS = max(1, (os.cpu_count() or 2) // 2)   # 분석 워커 프로세스 수
+REVIEW_MAX_IN_FLIGHT = REVIEW_WORKERS * 2             # 워커 풀에 동시에 제출할 최대 포지션 수 (모든 리뷰 합계)
+REVIEW_WORKER_NICE = 10                               # 워커 프로세스 우선순위 (AI 대전보다 낮게)
+REVIEW_CACHE_SIZE = 256                               # 캐시할 게임 수
+
+# 실제 수와 최선 수의 점수 차이 기준 (DISTANCE_WEIGHT = 목표까지 한 칸)
+MISTAKE_LOSS = DISTANCE_WEIGHT
+BLUNDER_LOSS = DISTANCE_WEIGHT * 2
+
+# 분석 대상이 아닌 기록 (게임 종료 표시)
+NON_BOARD_MOVE_TYPES = ("forfeit", "disconnect")
+
+
+# ================== 기록 -> 엔진 수 변환 ==================
+def recorded_move_to_code(move_type: str, position_from: Optional[str], position_to: Optional[str]) -> int:
+    """
+    GameMove 기록을 엔진 수 코드로 변환 (Red 관점 17x17 좌표)
+
+    - 이동: position_from = "Y,X" (이동한 위치)
+    - 벽: position_from / position_to = 벽이 걸친 두 칸 ("13,8" "13,10" 처럼 한 축이 같음)
+    """
+    y1, x1 = (int(v) for v in position_from.split(","))
+
+    if move_type == "move":
+        return encode_pawn_move(y1, x1)
+
+    if move_type == "wall":
+        y2, x2 = (int(v) for v in position_to.split(","))
+        if y1 == y2:
+            # 가로벽: 두 칸 사이 열이 벽 중심
+            return encode_wall_move("horizontal", y1, min(x1, x2) + 1)
+        # 세로벽: 두 칸 사이 행이 벽 중심
+        return encode_wall_move("vertical", min(y1, y2) + 1, x1)
+
+    raise ValueError(f"Unsupported move type: {move_type}")
+
+
+def apply_recorded_move(state: QuoridorGameState, move: int) -> bool:
+    """현재 차례의 플레이어로 수를 검증 후 적용"""
+    move_type, wall_type, y, x = MOVE_CODE_TABLE[move]
+    player = state.current_player
+
+    if move_type == "move":
+        return state.make_move(player, y, x)
+    return state.make_wall_move(player, wall_type, y, x)
+
+
+def replay_recorded_moves(
+    records: Iterable[Tuple[str, Optional[str], Optional[str]]]
+) -> Iterator[Tuple[QuoridorGameState, int]]:
+    """
+    (move_type, position_from, position_to) 기록을 순서대로 재생하며 (수를 두기 전 상태, 수 코드) 반환
+    잘못된 기록을 만나면 ValueError
+    """
+    state = QuoridorGameState()
+
+    for index, (move_type, position_from, position_to) in enumerate(records, start=1):
+        if move_type in NON_BOARD_MOVE_TYPES:
+            break
+
+        try:
+            move = recorded_move_to_code(move_type, position_from, position_to)
+        except (ValueError, AttributeError, TypeError):
+            raise ValueError(f"Unreadable move #{index}: {move_type} {position_from} {position_to}")
+
+        before = state.copy()
+        if not apply_recorded_move(state, move):
+            raise ValueError(f"Illegal move #{index}: {move_type} {position_from} {position_to}")
+
+        yield before, move
+
+        if state.is_goal("red") or state.is_goal("blue"):
+            break
+
+
+# ================== 포지션 분석 (워커 프로세스에서 실행) ==================
+def analyze_serialized_position(state_bytes: bytes, played: int, difficulty: str = REVIEW_DIFFICULTY) -> Dict:
+    """워커 프로세스 진입점 (상태는 QuoridorGameState.to_bytes 형식으로 전달)"""
+    return analyze_review_position(QuoridorGameState.from_bytes(state_bytes), played, difficulty)
+
+
+def analyze_review_position(state: QuoridorGameState, played: int, difficulty: str = REVIEW_DIFFICULTY) -> Dict:
+    """한 포지션에서 실제 수와 최선 수를 비교 (점수는 수를 둔 플레이어 관점)"""
+    mover = state.current_player
+    engine = MinimaxAI(mover, difficulty)
+    scored = engine.analyze(state, top_n=1, extra_moves=(played,))
+
+    scores = dict(scored)
+    best_move, best_score = scored[0]
+    played_score = scores[played]
+    loss = max(0.0, best_score - played_score)
+
+    return {
+        "position": state.to_fen(),
+        "player": mover,
+        "played": Move.from_code(played).to_dict(),
+        "eval": played_score,
+        "best_move": Move.from_code(best_move).to_dict(),
+        "best_eval": best_score,
+        "loss": loss,
+        "mistake": loss >= MISTAKE_LOSS,
+        "blunder": loss >= BLUNDER_LOSS,
+        "depth": engine.completed_depth,
+    }
+
+
+def lower_review_worker_priority():
+    """워커 프로세스 초기화: AI 대전보다 낮은 CPU 우선순위"""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(REVIEW_WORKER_NICE)
+        except OSError:
+            pass
+
+
+# ================== 워커 풀 / 캐시 ==================
+_review_executor: Optional[ProcessPoolExecutor] = None
+_review_executor_lock = threading.Lock()
+
+# 워커 풀에 제출한 포지션 수 제한 (이벤트 루프 하나에서 사용, 처음 사용할 때 생성)
+_review_slots: Optional[asyncio.Semaphore] = None
+
+# game_id -> 수별 분석 결과 (LRU)
+_review_cache: "OrderedDict[int, List[Dict]]" = OrderedDict()
+
+# (game_id, 기록 수) -> 진행 중인 분석
+_review_jobs: Dict[Tuple[int, int], "ReviewJob"] = {}
+
+
+def get_review_executor() -> ProcessPoolExecutor:
+    """분석용 프로세스 풀 (처음 사용할 때 생성)"""
+    global _review_executor
+    with _review_executor_lock:
+        if _review_executor is None:
+            _review_executor = ProcessPoolExecutor(
+                max_workers=REVIEW_WORKERS, initializer=lower_review_worker_priority
+            )
+        return _review_executor
+
+
+def shutdown_review_executor():
+    """서버 종료 시 워커 프로세스 정리"""
+    global _review_executor
+    with _review_executor_lock:
+        if _review_executor is not None:
+            _review_executor.shutdown(wait=False, cancel_futures=True)
+            _review_executor = None
+
+
+def get_cached_review(game_id: int) -> Optional[List[Dict]]:
+    """캐시된 게임 리뷰 반환"""
+    review = _review_cache.get(game_id)
+    if review is not None:
+        _review_cache.move_to_end(game_id)
+    return review
+
+
+def store_review(game_id: int, review: List[Dict]):
+    """게임 리뷰 캐시에 저장 (오래된 항목부터 제거)"""
+    _review_cache[game_id] = review
+    _review_cache.move_to_end(game_id)
+    while len(_review_cache) > REVIEW_CACHE_SIZE:
+        _review_cache.popitem(last=False)
+
+
+class ReviewJob:
+    """
+    한 게임의 수별 분석 (같은 게임의 요청들이 결과를 함께 받음)
+    results[i]는 i+1번째 수의 분석 결과 (자리가 날 때마다 앞 수부터 워커 풀에 제출)
+    """
+
+    def __init__(self, key: Tuple[int, int], positions: List[Tuple[QuoridorGameState, int]],
+                 error: Optional[str], cacheable: bool):
+        loop = asyncio.get_running_loop()
+        self.key = key
+        self.error = error
+        self.results: List[asyncio.Future] = [loop.create_future() for _ in positions]
+        self.subscribers = 0
+        self._cacheable = cacheable
+        self._submitted: List[asyncio.Future] = []
+        self._task = asyncio.create_task(self._run(positions))
+
+    async def _run(self, positions: List[Tuple[QuoridorGameState, int]]):
+        global _review_slots
+        if _review_slots is None:
+            _review_slots = asyncio.Semaphore(REVIEW_MAX_IN_FLIGHT)
+
+        loop = asyncio.get_running_loop()
+        executor = get_review_executor()
+        try:
+            for index, (before, move) in enumerate(positions):
+                await _review_slots.acquire()
+                future = loop.run_in_executor(executor, analyze_serialized_position, before.to_bytes(), move)
+                future.add_done_callback(lambda done, index=index: self._deliver(index, done))
+                self._submitted.append(future)
+
+            # 모든 분석이 끝나면 캐시 (결과는 _deliver가 전달)
+            entries = [await result for result in self.results]
+            if self._cacheable and not self.error:
+                store_review(self.key[0], entries)
+        finally:
+            # 취소되면 아직 시작하지 않은 분석도 취소
+            for future in self._submitted:
+                future.cancel()
+            if _review_jobs.get(self.key) is self:
+                del _review_jobs[self.key]
+
+    def _deliver(self, index: int, future: asyncio.Future):
+        _review_slots.release()
+        result = self.results[index]
+        if result.done():
+            return
+        if future.cancelled():
+            result.cancel()
+        elif future.exception() is not None:
+            result.set_exception(future.exception())
+        else:
+            entry = future.result()
+            entry["move_number"] = index + 1
+            result.set_result(entry)
+
+    def cancel(self):
+        self._task.cancel()
+        for result in self.results:
+            result.cancel()
+
+
+async def stream_game_review(
+    game_id: int,
+    records: List[Tuple[str, Optional[str], Optional[str]]],
+    cacheable: bool
+):
+    """
+    수별 분석 결과를 분석되는 대로 순서대로 반환하는 async generator
+
+    같은 게임을 분석 중이면 그 분석의 결과를 함께 받고, 없으면 새로 시작
+    """
+    cached = get_cached_review(game_id)
+    if cached is not None:
+        for entry in cached:
+            yield entry
+        return
+
+    key = (game_id, len(records))
+    job = _review_jobs.get(key)
+    if job is None:
+        positions = []
+        error = None
+        try:
+            for before, move in replay_recorded_moves(records):
+                positions.append((before, move))
+        except ValueError as e:
+            # 잘못된 기록 이전까지만 분석
+            error = str(e)
+
+        job = ReviewJob(key, positions, error, cacheable)
+        _review_jobs[key] = job
+
+    job.subscribers += 1
+    try:
+        for result in job.results:
+            # 다른 요청과 함께 기다리는 결과이므로 이 요청이 끊겨도 취소하지 않음
+            yield await asyncio.shield(result)
+    finally:
+        # 마지막 요청이 끊기면 남은 분석 취소 (모두 끝났으면 캐시 저장을 위해 그대로 둠)
+        job.subscribers -= 1
+        if job.subscribers == 0 and not all(result.done() for result in job.results):
+            job.cancel()
+
+    if job.error:
+        print(f"[GameReview] Game {game_id}: {job.error}")
+        yield {"error": job.error}
@@ -0,0 +1,70 @@
+# loop_lag.py
+"""
+이벤트 루프 지연 측정
+
+- 일정 간격으로 잠들었다 깨어나며 예정 시각보다 늦게 깨어난 시간을 지연으로 기록
+- 핸들러가 이벤트 루프에서 블로킹 작업(DB 커밋 등)을 하면 그만큼 지연이 커짐
+- 최근 샘플의 평균/p99/최대 지연과 경고 기준을 넘은 횟수를 제공
+"""
+import asyncio
+import time
+from collections import deque
+from typing import Deque, Optional
+
+# ================== 측정 설정 ==================
+SAMPLE_INTERVAL_MS = 50        # 측정 간격
+WINDOW_SAMPLES = 1200          # 통계에 사용하는 최근 샘플 수 (50ms 간격이면 1분)
+WARN_LAG_MS = 100              # 이보다 큰 지연은 로그 출력
+
+
+class LoopLagMonitor:
+    """이벤트 루프 지연 측정기"""
+
+    def __init__(self, interval_ms: int = SAMPLE_INTERVAL_MS, window: int = WINDOW_SAMPLES):
+        self._interval = interval_ms / 1000.0
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+        self.max_lag_ms = 0.0          # 시작 이후 최대 지연
+        self.slow_samples = 0          # WARN_LAG_MS를 넘은 횟수
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        while True:
+            expected = time.perf_counter() + self._interval
+            await asyncio.sleep(self._interval)
+            lag_ms = max(0.0, (time.perf_counter() - expected) * 1000)
+
+            self._samples.append(lag_ms)
+            self.max_lag_ms = max(self.max_lag_ms, lag_ms)
+            if lag_ms > WARN_LAG_MS:
+                self.slow_samples += 1
+                print(f"[LoopLag] Event loop blocked for {lag_ms:.0f}ms")
+
+    def snapshot(self) -> dict:
+        """최근 샘플 기준 지연 통계 (ms)"""
+        samples = sorted(self._samples)
+        if not samples:
+            return {"samples": 0, "mean_ms": 0.0, "p99_ms": 0.0, "window_max_ms": 0.0,
+                    "max_ms": 0.0, "slow_samples": 0}
+
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        return {
+            "samples": len(samples),
+            "mean_ms": round(sum(samples) / len(samples), 2),
+            "p99_ms": round(p99, 2),
+            "window_max_ms": round(samples[-1], 2),
+            "max_ms": round(self.max_lag_ms, 2),
+            "slow_samples": self.slow_samples,
+        }
@@ -2,17 +2,19 @@
 from fastapi import FastAPI, HTTPException, Depends, WebSocket, WebSocketDisconnect, File, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.security import OAuth2PasswordRequestForm
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
-from sqlalchemy import create_engine, select, func, update
+from sqlalchemy import select, func, update
 from sqlalchemy.orm import sessionmaker, Session
-from heapq import heappop, heappush
-import time
+import asyncio
+import json
 import os
+import secrets
 import uuid
 from pathlib import Path
 from datetime import datetime
 from jose import jwt, JWTError
+import anyio
 
 # 로컬 모듈 import
 from User import (
@@ -28,16 +30,33 @@ from User import (
     ChangePasswordRequest, ChangePasswordResponse,
     GameCreditResponse, ConsumeGameResponse,
     DeleteAccountRequest, DeleteAccountResponse,
+    HintRequest, HintMoveData, HintResponse,
     create_user, authenticate_user, get_current_user_factory, create_access_token,
-    update_user_session, calculate_percentile, calculate_elo_change, update_user_elo,
-    get_user_elos, SECRET_KEY, ALGORITHM, hash_password, verify_password
+    update_user_session, calculate_percentile, normalize_time_control,
+    SECRET_KEY, ALGORITHM, hash_password, verify_password
 )
 from email_sender import generate_verification_code, send_verification_email, generate_temporary_password, send_account_recovery_email
 from quoridor_ai import QuoridorAI
+from game_review import stream_game_review, shutdown_review_executor
+from move_journal import MoveJournal
+from db_async import DatabaseExecutor
+from game_finalization import GameFinalizer
+from sqlite_profile import create_sqlite_engine
+from loop_lag import LoopLagMonitor
+from matchmaking import MatchmakingCoordinator, MATCH_INTERVAL
+from session_store import create_session_store
+from message_bus import create_message_bus
+from move_hint import (
+    hint_service, state_from_position, state_from_fen, state_from_moves, HintRateLimited, HintUnavailable
+)
 
 # ================== 데이터베이스 설정 ==================
 DATABASE_URL = "sqlite:///./quoridor.db"
 
+# ================== 게임 세션 설정 ==================
+GAME_TOKEN_BYTES = 16          # 게임 토큰 길이 (바이트, 16진수 문자열은 두 배, game_token 컬럼은 50자)
+WORKER_ID = f"{os.getpid()}-{secrets.token_hex(4)}"   # 공유 저장소에서 이 워커 프로세스를 구분하는 ID
+
 # ================== 파일 업로드 설정 ==================
 UPLOAD_DIRECTORY = "uploads"
 PROFILE_IMAGES_DIR = os.path.join(UPLOAD_DIRECTORY, "profile_images")
@@ -45,12 +64,67 @@ PROFILE_IMAGES_DIR = os.path.join(UPLOAD_DIRECTORY, "profile_images")
 # 업로드 디렉토리 생성
 os.makedirs(PROFILE_IMAGES_DIR, exist_ok=True)
 
-engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
+# HTTP 핸들러의 조회용 연결 (SQLITE_PROFILE의 PRAGMA 적용, 쓰기는 db_executor의 쓰기 스레드로)
+engine = create_sqlite_engine(DATABASE_URL)
 SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False)
 
+# 모든 쓰기(HTTP/WebSocket 핸들러, 저널)를 맡는 단일 쓰기 연결과 WebSocket 핸들러용 읽기 연결 풀
+write_engine = create_sqlite_engine(DATABASE_URL, role="writer")
+read_engine = create_sqlite_engine(DATABASE_URL, role="reader")
+WriteSessionLocal = sessionmaker(bind=write_engine, autoflush=False, autocommit=False)
+ReadSessionLocal = sessionmaker(bind=read_engine, autoflush=False, autocommit=False)
+
 # 데이터베이스 테이블 생성
 Base.metadata.create_all(bind=engine)
 
+# 기존 데이터베이스에는 create_all이 새 인덱스를 만들지 않으므로 직접 추가
+for index in GameMove.__table__.indexes:
+    try:
+        index.create(bind=engine, checkfirst=True)
+    except Exception as e:
+        print(f"[DB] Failed to create index {index.name} (duplicate moves in game_moves?): {e}")
+
+# WebSocket 핸들러의 DB 작업을 실행하는 쓰기 스레드(group commit)와 읽기 스레드 풀
+db_executor = DatabaseExecutor(WriteSessionLocal, ReadSessionLocal)
+
+# /game 수 기록 저널 (전달 후 쓰기 스레드로 일괄 저장)
+move_journal = MoveJournal(WriteSessionLocal, db_executor, owner=WORKER_ID)
+
+# 이벤트 루프 지연 측정 (/status/loop-lag)
+loop_lag_monitor = LoopLagMonitor()
+
+# 게임 세션/접속 위치/인증 대기/매칭 대기열 저장소 (QUORIDOR_SESSION_STORE, 여러 워커가 공유 가능)
+session_store = create_session_store()
+
+# 게임 종료 처리 (게임마다 한 번, 한 트랜잭션, 세션 저장소에서 선점)
+game_finalizer = GameFinalizer(db_executor, session_store)
+
+# WebSocket 채널 메시지 버스 (QUORIDOR_MESSAGE_BUS, 상대 소켓이 다른 워커에 있어도 전달)
+# "matchmaking:<연결 ID>", "game:<시간 제한>:<게임 토큰>:<사용자>", "fight:<사용자>"
+message_bus = create_message_bus()
+
+async def register_socket(channel, websocket):
+    await message_bus.subscribe(channel, websocket.send_text)
+
+async def unregister_socket(channel, websocket):
+    """같은 채널에 새 소켓이 등록된 경우는 그대로 둠"""
+    await message_bus.unsubscribe(channel, websocket.send_text)
+
+async def send_to_channel(channel, text):
+    """채널의 소켓으로 메시지 전송 (이 워커의 소켓이면 바로 전송, 어디에도 없으면 False)"""
+    return await message_bus.publish(channel, text)
+
+def game_channel(time_control, game_token, username):
+    return f"game:{time_control}:{game_token}:{username}"
+
+def store_call(func, *args):
+    """동기 핸들러(스레드 풀)에서 세션 저장소 메서드를 이벤트 루프로 실행"""
+    return anyio.from_thread.run(func, *args)
+
+def db_write(task, *args):
+    """동기 핸들러(스레드 풀)에서 쓰기 작업 task(db, *args)를 쓰기 스레드로 실행하고 결과 반환"""
+    return anyio.from_thread.run(db_executor.run, task, *args)
+
 def get_db() -> Session:
     db = SessionLocal()
     try:
@@ -81,18 +155,18 @@ app.mount("/static", StaticFiles(directory="static"), name="static")
 get_current_user = get_current_user_factory(get_db)
 
 # ================== 이메일 인증 관련 ==================
-# 임시 인증 데이터 저장소 (email -> {username, password, code, expires_at})
-pending_verifications = {}
+# 임시 인증 데이터는 세션 저장소에 보관 ("verification" 네임스페이스, email -> {username, password, code, expires_at})
+VERIFICATION_TTL_MINUTES = 10
 
 # ================== 사용자 인증 엔드포인트 ==================
 @app.post("/signup", response_model=MeResponse)
-def signup(req: SignupRequest, db: Session = Depends(get_db)):
+def signup(req: SignupRequest):
     print(f"Signup request received for username: {req.username}, email: {req.email}")
     
     try:
-        user = create_user(db, req)
+        user = db_write(create_user, req, hash_password(req.password))
         print(f"User created successfully with ID: {user.id}")
-        return MeResponse(id=user.id, username=user.username, email=user.email, created_at=user.created_at)
+        return user
         
     except HTTPException as he:
         print(f"HTTP Exception: {he.detail}")
@@ -100,7 +174,6 @@ def signup(req: SignupRequest, db: Session = Depends(get_db)):
     except Exception as e:
         print(f"Unexpected signup error: {str(e)}")
         print(f"Error type: {type(e).__name__}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Account creation failed: {str(e)}")
 
 @app.post("/request-verification", response_model=VerificationResponse)
@@ -129,13 +202,13 @@ def request_verification(req: VerificationRequest, db: Session = Depends(get_db)
             raise HTTPException(status_code=500, detail="Failed to send verification email")
 
         # 임시 저장 (10분 만료)
-        expires_at = datetime.utcnow() + timedelta(minutes=10)
-        pending_verifications[req.email] = {
+        expires_at = datetime.utcnow() + timedelta(minutes=VERIFICATION_TTL_MINUTES)
+        store_call(session_store.put_temp, "verification", req.email, {
             "username": req.username,
             "password": hash_password(req.password),  # 비밀번호는 해시해서 저장
             "code": verification_code,
-            "expires_at": expires_at
-        }
+            "expires_at": expires_at.isoformat()
+        }, VERIFICATION_TTL_MINUTES * 60)
 
         print(f"Verification code {verification_code} sent to {req.email}, expires at {expires_at}")
 
@@ -151,50 +224,53 @@ def request_verification(req: VerificationRequest, db: Session = Depends(get_db)
         print(f"Unexpected error during verification request: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Verification request failed: {str(e)}")
 
+def add_verified_user(db: Session, username: str, hashed_password: str, email: str) -> int:
+    """인증을 마친 사용자 계정 생성 후 ID 반환 (쓰기 스레드에서 실행)"""
+    user = User(
+        username=username,
+        password=hashed_password,
+        email=email,
+        elo_rating=1500,
+        created_at=datetime.utcnow()
+    )
+    db.add(user)
+    db.flush()
+    return user.id
+
 @app.post("/verify-code", response_model=VerifyCodeResponse)
-def verify_code(req: VerifyCodeRequest, db: Session = Depends(get_db)):
+def verify_code(req: VerifyCodeRequest):
     """인증 코드 검증 및 계정 생성"""
     print(f"Verification code check for email: {req.email}, code: {req.code}")
 
     try:
         # 임시 저장소에서 데이터 확인
-        if req.email not in pending_verifications:
+        verification_data = store_call(session_store.get_temp, "verification", req.email)
+        if verification_data is None:
             raise HTTPException(status_code=404, detail="No verification request found for this email")
 
-        verification_data = pending_verifications[req.email]
-
         # 만료 확인
-        if datetime.utcnow() > verification_data["expires_at"]:
-            del pending_verifications[req.email]
+        if datetime.utcnow() > datetime.fromisoformat(verification_data["expires_at"]):
+            store_call(session_store.delete_temp, "verification", req.email)
             raise HTTPException(status_code=400, detail="Verification code expired")
 
         # 코드 확인
         if req.code != verification_data["code"]:
             raise HTTPException(status_code=400, detail="Invalid verification code")
 
-        # 계정 생성
-        user = User(
-            username=verification_data["username"],
-            password=verification_data["password"],  # 이미 해시된 비밀번호
-            email=req.email,
-            elo_rating=1500,
-            created_at=datetime.utcnow()
-        )
-
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+        # 계정 생성 (이미 해시된 비밀번호)
+        username = verification_data["username"]
+        user_id = db_write(add_verified_user, username, verification_data["password"], req.email)
 
         # 임시 데이터 삭제
-        del pending_verifications[req.email]
+        store_call(session_store.delete_temp, "verification", req.email)
 
-        print(f"User {user.username} created successfully with ID: {user.id}")
+        print(f"User {username} created successfully with ID: {user_id}")
 
         return VerifyCodeResponse(
             success=True,
             message="Account created successfully",
-            user_id=user.id,
-            username=user.username
+            user_id=user_id,
+            username=username
         )
 
     except HTTPException as he:
@@ -202,9 +278,12 @@ def verify_code(req: VerifyCodeRequest, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         print(f"Unexpected error during verification: {str(e)}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Verification failed: {str(e)}")
 
+def set_user_password(db: Session, user_id: int, hashed_password: str):
+    """사용자 비밀번호 변경 (쓰기 스레드에서 실행)"""
+    db.execute(update(User).where(User.id == user_id).values(password=hashed_password))
+
 @app.post("/forgot-password", response_model=ForgotPasswordResponse)
 def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
     """비밀번호 찾기 - 임시 비밀번호를 이메일로 전송"""
@@ -225,8 +304,7 @@ def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
             raise HTTPException(status_code=500, detail="Failed to send recovery email")
 
         # 사용자 비밀번호를 임시 비밀번호로 업데이트
-        user.password = hash_password(temporary_password)
-        db.commit()
+        db_write(set_user_password, user.id, hash_password(temporary_password))
 
         print(f"Temporary password sent to {req.email} for user {user.username}")
 
@@ -240,7 +318,6 @@ def forgot_password(req: ForgotPasswordRequest, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         print(f"Unexpected error during forgot password: {str(e)}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Password recovery failed: {str(e)}")
 
 @app.post("/change-password", response_model=ChangePasswordResponse)
@@ -259,8 +336,7 @@ def change_password(req: ChangePasswordRequest, db: Session = Depends(get_db)):
             raise HTTPException(status_code=401, detail="Incorrect password.")
 
         # 새 비밀번호로 업데이트
-        user.password = hash_password(req.new_password)
-        db.commit()
+        db_write(set_user_password, user.id, hash_password(req.new_password))
 
         print(f"Password changed successfully for user {user.username}")
 
@@ -274,9 +350,13 @@ def change_password(req: ChangePasswordRequest, db: Session = Depends(get_db)):
         raise
     except Exception as e:
         print(f"Unexpected error during password change: {str(e)}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"Password change failed: {str(e)}")
 
+def start_user_session(db: Session, user_id: int, session_token: str):
+    """새 로그인 세션 토큰 저장 (이전 로그인 무효화) 후 온라인 상태로 설정 (쓰기 스레드에서 실행)"""
+    update_user_session(db, user_id, session_token)
+    db.execute(update(User).where(User.id == user_id).values(status="online", last_active=datetime.utcnow()))
+
 @app.post("/login", response_model=Token)
 def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     try:
@@ -295,12 +375,8 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
         # 사용자 세션 토큰 업데이트 (이전 로그인 무효화)
         if session_token:
             print(f"Updating session token for user {user.username}: {session_token[:10]}...")
-            update_user_session(db, user, session_token)
-
             # 로그인 시 자동으로 온라인 상태로 설정
-            user.status = "online"
-            user.last_active = datetime.utcnow()
-            db.commit()
+            db_write(start_user_session, user.id, session_token)
 
             print(f"Session token updated successfully, status set to online")
         
@@ -356,11 +432,14 @@ def get_user_profile(current_user: User = Depends(get_current_user), db: Session
         profile_image_url=profile_image_url
     )
 
+def set_profile_image(db: Session, user_id: int, filename: str):
+    """사용자 프로필 이미지 파일명 변경 (쓰기 스레드에서 실행)"""
+    db.execute(update(User).where(User.id == user_id).values(profile_image=filename))
+
 @app.post("/upload-profile-image")
 async def upload_profile_image(
     file: UploadFile = File(...),
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: User = Depends(get_current_user)
 ):
     """프로필 이미지 업로드"""
     
@@ -394,8 +473,7 @@ async def upload_profile_image(
         buffer.write(content)
     
     # 데이터베이스 업데이트
-    current_user.profile_image = unique_filename
-    db.commit()
+    await db_executor.run(set_profile_image, current_user.id, unique_filename)
     
     return {"message": "Profile image uploaded successfully", "filename": unique_filename}
 
@@ -424,56 +502,81 @@ def get_server_status():
         "timestamp": datetime.utcnow().isoformat()
     }
 
+@app.get("/status/loop-lag")
+def get_loop_lag():
+    """이벤트 루프 지연 통계와 DB 스레드 상태 (핸들러가 루프를 막지 않는지 확인용)"""
+    return {
+        "loop_lag": loop_lag_monitor.snapshot(),
+        "db_executor": db_executor.stats(),
+        "message_bus": message_bus.stats()
+    }
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    loop_lag_monitor.start()
+
+@app.on_event("shutdown")
+async def stop_loop_lag_monitor():
+    await loop_lag_monitor.stop()
+
 # ================== 친구 요청 관련 엔드포인트 ==================
+def create_friend_request(db: Session, sender_id: int, target_username: str):
+    """
+    친구 요청 생성 후 (결과 메시지, 요청 ID) 반환 (쓰기 스레드에서 실행)
+    대상이 없거나 자기 자신, 이미 친구, 이미 요청한 경우는 요청 ID 없이 메시지만 반환
+    """
+    # 요청 받을 사용자 찾기
+    target_id = db.execute(select(User.id).where(User.username == target_username)).scalar_one_or_none()
+    if target_id is None:
+        return "User doesn't exist!", None
+
+    # 자기 자신에게 요청 방지
+    if target_id == sender_id:
+        return "Cannot send request to yourself!", None
+
+    # 이미 친구인지 확인
+    existing_friendship = db.execute(select(Friendship.id).where(
+        ((Friendship.user_id == sender_id) & (Friendship.friend_id == target_id)) |
+        ((Friendship.user_id == target_id) & (Friendship.friend_id == sender_id))
+    )).first()
+
+    if existing_friendship:
+        return "Already friends!", None
+
+    # 이미 요청을 보냈는지 확인
+    existing_request = db.execute(select(FriendRequest.id).where(
+        (FriendRequest.sender_id == sender_id) &
+        (FriendRequest.receiver_id == target_id) &
+        (FriendRequest.status == "pending")
+    )).first()
+
+    if existing_request:
+        return "Request already sent!", None
+
+    # 새 친구 요청 생성
+    new_request = FriendRequest(
+        sender_id=sender_id,
+        receiver_id=target_id,
+        status="pending"
+    )
+
+    db.add(new_request)
+    db.flush()
+    return "Sent request!", new_request.id
+
 @app.post("/friends/request", response_model=FriendRequestResponse)
-def send_friend_request(request: AddFriendRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def send_friend_request(request: AddFriendRequest, current_user: User = Depends(get_current_user)):
     """친구 요청 보내기"""
     try:
-        # 요청 받을 사용자 찾기
-        target_user = db.execute(select(User).where(User.username == request.username)).scalar_one_or_none()
-        if not target_user:
-            return FriendRequestResponse(message="User doesn't exist!")
-
-        # 자기 자신에게 요청 방지
-        if target_user.id == current_user.id:
-            return FriendRequestResponse(message="Cannot send request to yourself!")
-
-        # 이미 친구인지 확인
-        existing_friendship = db.execute(select(Friendship).where(
-            ((Friendship.user_id == current_user.id) & (Friendship.friend_id == target_user.id)) |
-            ((Friendship.user_id == target_user.id) & (Friendship.friend_id == current_user.id))
-        )).scalar_one_or_none()
-
-        if existing_friendship:
-            return FriendRequestResponse(message="Already friends!")
-
-        # 이미 요청을 보냈는지 확인
-        existing_request = db.execute(select(FriendRequest).where(
-            (FriendRequest.sender_id == current_user.id) &
-            (FriendRequest.receiver_id == target_user.id) &
-            (FriendRequest.status == "pending")
-        )).scalar_one_or_none()
-
-        if existing_request:
-            return FriendRequestResponse(message="Request already sent!")
-
-        # 새 친구 요청 생성
-        new_request = FriendRequest(
-            sender_id=current_user.id,
-            receiver_id=target_user.id,
-            status="pending"
-        )
+        message, request_id = db_write(create_friend_request, current_user.id, request.username)
+        if request_id is None:
+            return FriendRequestResponse(message=message)
 
-        db.add(new_request)
-        db.commit()
-        db.refresh(new_request)
-
-        print(f"Friend request sent from {current_user.username} to {target_user.username}")
-        return FriendRequestResponse(message="Sent request!", request_id=new_request.id)
+        print(f"Friend request sent from {current_user.username} to {request.username}")
+        return FriendRequestResponse(message=message, request_id=request_id)
 
     except Exception as e:
         print(f"Error sending friend request: {e}")
-        db.rollback()
         return FriendRequestResponse(message="Error sending request!")
 
 @app.get("/friends/requests")
@@ -510,65 +613,59 @@ def get_pending_requests(current_user: User = Depends(get_current_user), db: Ses
         print(f"Error getting friend requests: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@app.post("/friends/request/{request_id}/accept")
-def accept_friend_request(request_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
-    """친구 요청 수락"""
-    try:
-        # 요청 찾기
-        friend_request = db.execute(select(FriendRequest).where(
+def answer_friend_request(db: Session, request_id: int, receiver_id: int, status: str):
+    """
+    받은 대기 중 친구 요청을 status("accepted"/"rejected")로 바꾸고 요청자 사용자명 반환 (쓰기 스레드에서 실행)
+    수락이면 친구 관계도 생성, 요청이나 요청자가 없으면 None
+    """
+    # 요청과 요청자 찾기
+    row = db.execute(
+        select(FriendRequest, User.username)
+        .join(User, FriendRequest.sender_id == User.id)
+        .where(
             (FriendRequest.id == request_id) &
-            (FriendRequest.receiver_id == current_user.id) &
+            (FriendRequest.receiver_id == receiver_id) &
             (FriendRequest.status == "pending")
-        )).scalar_one_or_none()
-
-        if not friend_request:
-            raise HTTPException(status_code=404, detail="Friend request not found")
+        )
+    ).first()
+    if row is None:
+        return None
 
-        # 요청자 정보 가져오기
-        sender = db.execute(select(User).where(User.id == friend_request.sender_id)).scalar_one_or_none()
-        if not sender:
-            raise HTTPException(status_code=404, detail="Sender not found")
+    friend_request, sender_username = row
 
-        # 친구 관계 생성
-        new_friendship = Friendship(
-            user_id=friend_request.sender_id,
-            friend_id=current_user.id
-        )
+    # 친구 관계 생성
+    if status == "accepted":
+        db.add(Friendship(user_id=friend_request.sender_id, friend_id=receiver_id))
 
-        # 요청 상태 업데이트
-        friend_request.status = "accepted"
+    # 요청 상태 업데이트
+    friend_request.status = status
+    db.flush()
+    return sender_username
 
-        db.add(new_friendship)
-        db.commit()
+@app.post("/friends/request/{request_id}/accept")
+def accept_friend_request(request_id: int, current_user: User = Depends(get_current_user)):
+    """친구 요청 수락"""
+    try:
+        sender_username = db_write(answer_friend_request, request_id, current_user.id, "accepted")
+        if sender_username is None:
+            raise HTTPException(status_code=404, detail="Friend request not found")
 
-        print(f"Friend request accepted: {sender.username} and {current_user.username} are now friends")
-        return {"message": "Friend request accepted", "friend_username": sender.username}
+        print(f"Friend request accepted: {sender_username} and {current_user.username} are now friends")
+        return {"message": "Friend request accepted", "friend_username": sender_username}
 
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error accepting friend request: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.post("/friends/request/{request_id}/reject")
-def reject_friend_request(request_id: int, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def reject_friend_request(request_id: int, current_user: User = Depends(get_current_user)):
     """친구 요청 거절"""
     try:
-        # 요청 찾기
-        friend_request = db.execute(select(FriendRequest).where(
-            (FriendRequest.id == request_id) &
-            (FriendRequest.receiver_id == current_user.id) &
-            (FriendRequest.status == "pending")
-        )).scalar_one_or_none()
-
-        if not friend_request:
+        if db_write(answer_friend_request, request_id, current_user.id, "rejected") is None:
             raise HTTPException(status_code=404, detail="Friend request not found")
 
-        # 요청 상태 업데이트
-        friend_request.status = "rejected"
-        db.commit()
-
         print(f"Friend request rejected by {current_user.username}")
         return {"message": "Friend request rejected"}
 
@@ -576,7 +673,6 @@ def reject_friend_request(request_id: int, current_user: User = Depends(get_curr
         raise
     except Exception as e:
         print(f"Error rejecting friend request: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 @app.get("/friends", response_model=FriendsListResponse)
@@ -614,36 +710,42 @@ def get_friends_list(current_user: User = Depends(get_current_user), db: Session
         print(f"Error getting friends list: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
+def delete_friendship(db: Session, user_id: int, friend_username: str):
+    """
+    친구 관계 삭제 (쓰기 스레드에서 실행)
+    상대 사용자가 없으면 None, 친구 관계가 없으면 False, 삭제했으면 True
+    """
+    # 제거할 친구 찾기
+    friend_id = db.execute(select(User.id).where(User.username == friend_username)).scalar_one_or_none()
+    if friend_id is None:
+        return None
+
+    # 친구 관계 삭제
+    deleted = db.execute(
+        Friendship.__table__.delete().where(
+            ((Friendship.user_id == user_id) & (Friendship.friend_id == friend_id)) |
+            ((Friendship.user_id == friend_id) & (Friendship.friend_id == user_id))
+        )
+    ).rowcount
+    return deleted > 0
+
 @app.delete("/friends/remove")
-def remove_friend(request: AddFriendRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+def remove_friend(request: AddFriendRequest, current_user: User = Depends(get_current_user)):
     """친구 제거"""
     try:
-        # 제거할 친구 찾기
-        friend_user = db.execute(select(User).where(User.username == request.username)).scalar_one_or_none()
-        if not friend_user:
+        removed = db_write(delete_friendship, current_user.id, request.username)
+        if removed is None:
             raise HTTPException(status_code=404, detail="User not found")
-
-        # 친구 관계 찾기
-        friendship = db.execute(select(Friendship).where(
-            ((Friendship.user_id == current_user.id) & (Friendship.friend_id == friend_user.id)) |
-            ((Friendship.user_id == friend_user.id) & (Friendship.friend_id == current_user.id))
-        )).scalar_one_or_none()
-
-        if not friendship:
+        if not removed:
             raise HTTPException(status_code=404, detail="Friendship not found")
 
-        # 친구 관계 삭제
-        db.delete(friendship)
-        db.commit()
-
-        print(f"User {current_user.username} removed {friend_user.username} from friends")
-        return {"message": "Friend removed successfully", "friend_username": friend_user.username}
+        print(f"User {current_user.username} removed {request.username} from friends")
+        return {"message": "Friend removed successfully", "friend_username": request.username}
 
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error removing friend: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Internal server error")
 
 # ================== 게임 관련 함수 ==================
@@ -656,6 +758,105 @@ def determine_actual_status(user):
     # DB에 저장된 상태 그대로 반환
     return user.status if user.status else "offline"
 
+# ================== WebSocket DB 작업 ==================
+# 아래 함수들은 db_executor.read(조회) 또는 db_executor.run(쓰기)으로 DB 스레드에서 실행
+# 쓰기 작업은 여러 작업이 한 트랜잭션으로 커밋되므로 commit/rollback을 호출하지 않음 (ORM 객체 대신 일반 값을 반환)
+
+def get_user_session_token(db: Session, username: str):
+    """(사용자 존재 여부, 현재 세션 토큰)"""
+    user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+    if not user:
+        return False, None
+    return True, user.session_token
+
+def get_user_status(db: Session, username: str):
+    """사용자 상태 (사용자가 없으면 None)"""
+    user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+    return user.status if user else None
+
+def get_players_identity(db: Session, time_control: str, usernames):
+    """
+    플레이어별 (사용자 ID, 시간 제한에 맞는 ELO) 목록 (Blitz가 아니면 Rapid ELO)
+    없는 사용자는 (None, 1500) - 게임 세션 생성 시 한 번 조회해 세션에 캐시
+    """
+    users = {
+        user.username: user
+        for user in db.execute(select(User).where(User.username.in_(usernames))).scalars()
+    }
+    identities = []
+    for username in usernames:
+        user = users.get(username)
+        if not user:
+            identities.append((None, 1500))
+        elif normalize_time_control(time_control) == "Blitz":
+            identities.append((user.id, user.blitz_elo))
+        else:
+            identities.append((user.id, user.rapid_elo))
+    return identities
+
+def create_game_history(
+    db: Session, game_token: str, time_control: str,
+    player1_id: int, player2_id: int, player1_elo: int, player2_elo: int
+) -> int:
+    """세션에 캐시된 플레이어 정보로 GameHistory 생성 후 ID 반환"""
+    game_history = GameHistory(
+        game_token=game_token,
+        player1_id=player1_id,
+        player2_id=player2_id,
+        game_mode=time_control.lower(),
+        game_start_time=datetime.now(),
+        player1_elo_before=player1_elo,
+        player2_elo_before=player2_elo
+    )
+    db.add(game_history)
+    db.flush()
+    return game_history.id
+
+def session_player(session: dict, username: str):
+    """게임 세션에 캐시된 플레이어의 (사용자 ID, ELO)"""
+    key = "Player1" if username == session["Player1"] else "Player2"
+    return session.get(f"{key}_Id"), session.get(f"{key}_Elo", 1500)
+
+async def finalize_session_game(
+    time_control: str, game_token: str, session: dict, winner_name: str,
+    game_result: str, context: str, charge_loser_credit: bool = False
+):
+    """
+    게임 세션의 승패 결과 적용 (ELO, 히스토리, 크레딧을 한 트랜잭션으로, 게임마다 한 번만)
+    처리 결과 반환 (같은 게임을 이미 처리했으면 applied=False, 저장에 실패하면 None)
+    """
+    # 다른 연결이 나중에 기록한 히스토리 ID를 반영
+    session = await session_store.get_game(time_control, game_token) or session
+    loser_name = session["Player1"] if winner_name == session["Player2"] else session["Player2"]
+
+    # 마지막 수까지 저장한 뒤 마감
+    await move_journal.flush()
+
+    try:
+        result = await game_finalizer.finalize(
+            time_control, game_token, session.get("game_history_id"),
+            session_player(session, winner_name), session_player(session, loser_name),
+            winner_name == session["Player1"], game_result, charge_loser_credit
+        )
+    except Exception as e:
+        print(f"Error finalizing game {game_token} ({context}): {e}")
+        return None
+
+    if not result["applied"]:
+        print(f"Game {game_token} already finalized, ignoring {context} result")
+        return result
+
+    if result["credits_remaining"] is not None:
+        print(f"[Disconnect] Game credit consumed for disconnected player {loser_name}: {result['credits_remaining']} remaining")
+
+    winner_before, winner_after = result["winner_elo_before"], result["winner_elo_after"]
+    loser_before, loser_after = result["loser_elo_before"], result["loser_elo_after"]
+    print(f"ELO updated - {time_control} mode ({context}):")
+    print(f"  {winner_name}: {winner_before} -> {winner_after} (+{winner_after - winner_before})")
+    print(f"  {loser_name}: {loser_before} -> {loser_after} ({loser_after - loser_before})")
+    print(f"Game finalized ({context}): {game_result}")
+    return result
+
 async def notify_opponent_disconnect(current_session, disconnected_user):
     """상대방에게 플레이어 연결 끊김을 알리는 함수"""
     if not current_session or not disconnected_user:
@@ -663,119 +864,56 @@ async def notify_opponent_disconnect(current_session, disconnected_user):
 
     try:
         tc, gt = current_session
-        if (tc not in Game_Session or gt not in Game_Session[tc]):
+        session = await session_store.get_game(tc, gt)
+        if session is None:
             return
 
-        session = Game_Session[tc][gt]
-        opponent_socket = None
         winner_name = None
         loser_name = disconnected_user
 
         # 연결이 끊어진 플레이어의 상대방 찾기
         if disconnected_user == session["Player1"]:
-            opponent_socket = session.get("Player2_Socket")
             winner_name = session["Player2"]
         elif disconnected_user == session["Player2"]:
-            opponent_socket = session.get("Player1_Socket")
             winner_name = session["Player1"]
 
-        # 연결 끊긴 플레이어(패자)의 게임 크레딧 차감
-        if loser_name:
-            try:
-                db_credit = SessionLocal()
-                loser_user = db_credit.execute(select(User).where(User.username == loser_name)).scalar_one_or_none()
-                if loser_user:
-                    loser_credit = get_or_create_game_credit(db_credit, loser_user.id)
-                    if loser_credit.available_games > 0:
-                        loser_credit.available_games -= 1
-                        db_credit.commit()
-                        print(f"[Disconnect] Game credit consumed for disconnected player {loser_name}: {loser_credit.available_games} remaining")
-                    else:
-                        print(f"[Disconnect] No game credit to consume for {loser_name}")
-                db_credit.close()
-            except Exception as e:
-                print(f"Error consuming game credit for disconnected player: {e}")
-
-        # ELO 업데이트 처리
+        # 승패 결과 적용 (연결 끊긴 플레이어의 게임 크레딧 차감 포함)
+        already_finalized = False
         if winner_name and loser_name:
-            try:
-                db = SessionLocal()
-                
-                # 현재 ELO 값들 가져오기
-                winner_rapid_elo, winner_blitz_elo = get_user_elos(db, winner_name)
-                loser_rapid_elo, loser_blitz_elo = get_user_elos(db, loser_name)
-                
-                # 게임 모드에 따라 적절한 ELO 사용
-                if tc == "Rapid":
-                    winner_current_elo = winner_rapid_elo
-                    loser_current_elo = loser_rapid_elo
-                elif tc == "Blitz":
-                    winner_current_elo = winner_blitz_elo
-                    loser_current_elo = loser_blitz_elo
-                else:
-                    # 기본값은 Rapid 사용
-                    winner_current_elo = winner_rapid_elo
-                    loser_current_elo = loser_rapid_elo
-                
-                # ELO 변화량 계산
-                winner_new_elo, loser_new_elo = calculate_elo_change(
-                    winner_current_elo, loser_current_elo
-                )
-                
-                # 데이터베이스 업데이트
-                if tc == "Rapid":
-                    update_user_elo(db, winner_name, new_rapid_elo=winner_new_elo)
-                    update_user_elo(db, loser_name, new_rapid_elo=loser_new_elo)
-                elif tc == "Blitz":
-                    update_user_elo(db, winner_name, new_blitz_elo=winner_new_elo)
-                    update_user_elo(db, loser_name, new_blitz_elo=loser_new_elo)
-                else:
-                    # 기본값은 Rapid 업데이트
-                    update_user_elo(db, winner_name, new_rapid_elo=winner_new_elo)
-                    update_user_elo(db, loser_name, new_rapid_elo=loser_new_elo)
-                
-                print(f"ELO updated - {tc} mode (WebSocket disconnect):")
-                print(f"  {winner_name}: {winner_current_elo} -> {winner_new_elo} (+{winner_new_elo - winner_current_elo})")
-                print(f"  {loser_name}: {loser_current_elo} -> {loser_new_elo} ({loser_new_elo - loser_current_elo})")
-                
-                db.close()
-                
-            except Exception as e:
-                print(f"Error updating ELO after WebSocket disconnect: {e}")
+            result = await finalize_session_game(
+                tc, gt, session, winner_name, f"{winner_name} won by disconnect",
+                "WebSocket disconnect", charge_loser_credit=True
+            )
+            already_finalized = result is not None and not result["applied"]
             
-        # 상대방에게 연결 끊김 승리 메시지 전송
-        if opponent_socket:
+        # 상대방에게 연결 끊김 승리 메시지 전송 (이미 다른 결과로 끝난 게임이면 보내지 않음)
+        if winner_name and not already_finalized:
             disconnect_message = "OpponentDisconnect 0,0 0.0 Won"
             try:
-                await opponent_socket.send_text(disconnect_message)
-                print(f"Sent disconnect notification to opponent: {disconnect_message}")
+                if await send_to_channel(game_channel(tc, gt, winner_name), disconnect_message):
+                    print(f"Sent disconnect notification to opponent: {disconnect_message}")
             except Exception as e:
                 print(f"Failed to send disconnect notification: {e}")
                 
         # 게임 세션 정리
-        try:
-            del Game_Session[tc][gt]
+        if await session_store.delete_game(tc, gt):
             print(f"Cleaned up game session: {tc} {gt}")
-        except:
-            pass
             
     except Exception as e:
         print(f"Error in notify_opponent_disconnect: {e}")
 
 # ================== 매치매이킹 엔드포인트 ==================
 
-MatchmakingQueue = {}
-MatchmakingQueue["Rapid"] = []
-MatchmakingQueue["Blitz"] = []
-Game_Session = {}
-Game_Session["Rapid"] = {}
-Game_Session["Blitz"] = {}
+# 대기열은 세션 저장소에 두고, 매칭 역할을 가진 워커 하나가 주기적으로 매칭
+matchmaking = MatchmakingCoordinator(session_store, ("Rapid", "Blitz"), WORKER_ID)
+
 @app.websocket("/matchmaking")
 async def put_matchmaking(websocket: WebSocket):
     await websocket.accept()
     username = None
     time_control = None
-    db = SessionLocal()
+    connection_id = uuid.uuid4().hex
+    await register_socket(f"matchmaking:{connection_id}", websocket)
     
     try:
         while True:
@@ -794,23 +932,28 @@ async def put_matchmaking(websocket: WebSocket):
                     return
                 
                 # 사용자 존재 및 세션 토큰 검증 (중복 로그인 방지)
-                user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
-                if not user:
+                user_exists, current_session_token = await db_executor.read(get_user_session_token, username)
+                if not user_exists:
                     print(f"User {username} not found during matchmaking")
                     await websocket.close(code=1008, reason="User not found")
                     return
                 
                 # 세션 토큰 검증 (중복 로그인 방지)
-                if user.session_token != session_token:
+                if current_session_token != session_token:
                     print(f"Session mismatch for user {username} during matchmaking - disconnecting")
                     await websocket.send_text("SESSION_EXPIRED")
                     await websocket.close(code=1008, reason="Session expired")
                     return
                 
-                print(f"Valid session for {username} - adding to matchmaking queue")
-                current_time = time.time()
-                heappush(MatchmakingQueue[time_control], (current_time, username, websocket))
-                await matching(time_control)
+                # 레이팅 기반 매칭과 게임 세션에 사용할 ID와 ELO를 대기열 등록 시 한 번만 조회
+                try:
+                    (player_id, player_elo), = await db_executor.read(get_players_identity, time_control, [username])
+                except Exception as e:
+                    print(f"Error getting player ELO: {e}")
+                    player_id, player_elo = None, 1500  # 기본값
+                
+                print(f"Valid session for {username} - adding to {time_control} queue (ELO: {player_elo})")
+                await matchmaking.join(time_control, username, connection_id, player_id, player_elo)
                 
             except JWTError as e:
                 print(f"JWT decode error during matchmaking: {e}")
@@ -820,83 +963,127 @@ async def put_matchmaking(websocket: WebSocket):
         print(f"Client {username} disconnected while matchmaking.")
         # 큐에서 해당 유저 제거
         if username and time_control:
-            remove_user_from_queue(username, time_control)
+            await remove_user_from_queue(username, time_control, connection_id)
     except Exception as e:
         print(f"Matchmaking error for {username}: {e}")
         if username and time_control:
-            remove_user_from_queue(username, time_control)
+            await remove_user_from_queue(username, time_control, connection_id)
     finally:
-        try:
-            db.close()
-        except:
-            pass
+        await unregister_socket(f"matchmaking:{connection_id}", websocket)
         try:
             await websocket.close()
         except:
             pass
 
-def remove_user_from_queue(username, time_control):
-    """큐에서 특정 유저 제거"""
-    if time_control in MatchmakingQueue:
-        # heapq에서 특정 항목 제거는 복잡하므로 새 큐 생성
-        new_queue = []
-        while MatchmakingQueue[time_control]:
-            time_stamp, user, socket = heappop(MatchmakingQueue[time_control])
-            if user != username:
-                heappush(new_queue, (time_stamp, user, socket))
-        MatchmakingQueue[time_control] = new_queue
-        print(f"Removed {username} from {time_control} queue")
+async def remove_user_from_queue(username, time_control, connection_id):
+    """큐에서 특정 유저 제거 (그 연결로 등록된 경우만)"""
+    try:
+        if await matchmaking.leave(time_control, username, connection_id):
+            print(f"Removed {username} from {time_control} queue")
+    except Exception as e:
+        print(f"Error removing {username} from {time_control} queue: {e}")
+
+async def start_match(time_control, player1_entry, player2_entry):
+    """매칭된 두 플레이어의 게임 세션을 만들고 색상/상대 정보 전송"""
+    player1, player2 = player1_entry.username, player2_entry.username
+    player1_elo, player2_elo = player1_entry.elo, player2_entry.elo
+    game_token = new_game_token()
+    print(f"Match found: {player1} ({time_control} ELO: {player1_elo}) vs {player2} ({time_control} ELO: {player2_elo})")
     
-async def matching(time_control):
-    if len(MatchmakingQueue[time_control]) >= 2:
-        _, player1, player1_socket = heappop(MatchmakingQueue[time_control])
-        _, player2, player2_socket = heappop(MatchmakingQueue[time_control])
-        game_token = str(int(time.time()))
-        player_time = 0
-        if time_control == "Rapid":
-            player_time = 600
-        else:
-            player_time = 180
-            
-        # 데이터베이스에서 각 플레이어의 ELO 가져오기
-        db = SessionLocal()
+    await session_store.create_game(time_control, game_token, {
+        "Player1": player1,
+        "Player2": player2,
+        "Player1_Id": player1_entry.player_id,
+        "Player2_Id": player2_entry.player_id,
+        "Player1_Elo": player1_elo,
+        "Player2_Elo": player2_elo
+    })
+    
+    # ELO 정보를 포함한 메시지 전송: "색상 상대이름 게임토큰 상대ELO 본인ELO"
+    for entry, message in (
+        (player1_entry, f"Red {player2} {game_token} {player2_elo} {player1_elo}"),
+        (player2_entry, f"Blue {player1} {game_token} {player1_elo} {player2_elo}"),
+    ):
+        if not await send_to_channel(f"matchmaking:{entry.connection}", message):
+            print(f"Matchmaking socket of {entry.username} is no longer connected")
+
+def new_game_token():
+    """
+    게임 토큰 생성 (무작위 128비트, 16진수 32자)
+    워커/서버 재시작 간 조정 없이도 겹치지 않으므로 같은 시각에 여러 게임을 만들어도 안전
+    """
+    return secrets.token_hex(GAME_TOKEN_BYTES)
+
+async def matching():
+    """주기적으로 시간 제한별 대기열에서 만들 수 있는 쌍을 모두 매칭 (매칭 역할을 가진 워커만)"""
+    while True:
+        await asyncio.sleep(MATCH_INTERVAL)
         try:
-            player1_user = db.execute(select(User).where(User.username == player1)).scalar_one_or_none()
-            player2_user = db.execute(select(User).where(User.username == player2)).scalar_one_or_none()
-            
-            # 게임 모드에 따라 적절한 ELO 사용
-            if time_control == "Rapid":
-                player1_elo = player1_user.rapid_elo if player1_user else 1500
-                player2_elo = player2_user.rapid_elo if player2_user else 1500
-            elif time_control == "Blitz":
-                player1_elo = player1_user.blitz_elo if player1_user else 1500
-                player2_elo = player2_user.blitz_elo if player2_user else 1500
-            else:
-                # 기본값은 Rapid ELO 사용
-                player1_elo = player1_user.rapid_elo if player1_user else 1500
-                player2_elo = player2_user.rapid_elo if player2_user else 1500
-            
-            print(f"Match found: {player1} ({time_control} ELO: {player1_elo}) vs {player2} ({time_control} ELO: {player2_elo})")
-            
+            matched = await matchmaking.tick()
         except Exception as e:
-            print(f"Error getting player ELO: {e}")
-            player1_elo = 1500  # 기본값
-            player2_elo = 1500  # 기본값
-        finally:
-            db.close()
-        
-        Game_Session[time_control][game_token] = {
-            "Player1": player1,
-            "Player2": player2,
-            "Player1_Socket": player1_socket,
-            "Player2_Socket": player2_socket
-        }
-        
-        # ELO 정보를 포함한 메시지 전송: "색상 상대이름 게임토큰 상대ELO 본인ELO"
-        await player1_socket.send_text(f"Red {player2} {game_token} {player2_elo} {player1_elo}")
-        await player2_socket.send_text(f"Blue {player1} {game_token} {player1_elo} {player2_elo}")
+            print(f"Matchmaking tick error: {e}")
+            continue
+        for time_control, pairs in matched.items():
+            results = await asyncio.gather(
+                *(start_match(time_control, player1, player2) for player1, player2 in pairs),
+                return_exceptions=True
+            )
+            for (player1, player2), result in zip(pairs, results):
+                if isinstance(result, Exception):
+                    print(f"Error starting match {player1.username} vs {player2.username}: {result}")
+
+matching_task = None
+
+@app.on_event("startup")
+async def start_matching():
+    global matching_task
+    matching_task = asyncio.create_task(matching())
+
+@app.on_event("shutdown")
+async def stop_matching():
+    if matching_task:
+        matching_task.cancel()
+
+@app.on_event("shutdown")
+async def close_session_store():
+    await message_bus.close()
+    await session_store.close()
+
+@app.get("/status/matchmaking")
+def get_matchmaking_status():
+    """시간 제한별 대기 인원과 매칭 대기 시간 통계"""
+    return {**matchmaking.stats(), "worker": WORKER_ID}
 
 # ================== 게임 세션 엔드포인트 ==================
+@app.on_event("startup")
+async def start_move_journal():
+    """이전 실행에서 저장하지 못한 수를 복구하고 저널 저장 작업 시작"""
+    move_journal.start()
+
+@app.on_event("shutdown")
+async def stop_move_journal():
+    """남은 수를 모두 저장하고 저널과 DB 스레드 종료"""
+    await move_journal.stop()
+    db_executor.shutdown()
+
+async def journal_game_move(time_control, game_token, game_id, player_id, move_type, position_from, position_to,
+                            remaining_time):
+    """
+    게임 수를 저널에 추가 (DB 저장은 저널이 일괄 처리)
+    수 번호는 게임 세션에서 받음 (두 플레이어가 다른 워커에 연결해도 한 순서로 번호 매김)
+    """
+    if not game_id or not player_id:
+        return
+    try:
+        remaining = float(remaining_time)
+    except (TypeError, ValueError):
+        remaining = 0.0
+    move_number = await session_store.increment_game_field(time_control, game_token, "move_count")
+    if move_number is None:
+        print(f"[Game] Session {time_control}/{game_token} already ended, {move_type} not journaled")
+        return
+    move_journal.record(game_id, move_number, player_id, move_type, position_from, position_to, remaining)
+
 @app.websocket("/game")
 async def game(websocket: WebSocket):
     await websocket.accept()
@@ -904,10 +1091,7 @@ async def game(websocket: WebSocket):
     current_user = None
     current_session = None
     current_game_history_id = None
-    move_counter = 0
-
-    # 데이터베이스 세션 생성
-    db = SessionLocal()
+    current_player_id = None
     
     try:
         # 첫 번째 메시지는 연결 등록용: "TimeControl GameToken UserName Connect"
@@ -925,72 +1109,66 @@ async def game(websocket: WebSocket):
             return
         
         # 게임 세션 존재 확인
-        if (TimeControl not in Game_Session or 
-            GameToken not in Game_Session[TimeControl]):
+        session = await session_store.get_game(TimeControl, GameToken)
+        if session is None:
             print(f"Game session not found: {TimeControl}/{GameToken}")
             return
-            
-        session = Game_Session[TimeControl][GameToken]
-        current_user = UserName
-        current_session = (TimeControl, GameToken)
         
-        # 게임 WebSocket 업데이트
+        # 게임 WebSocket 등록 (상대 연결이 이 채널로 메시지를 보냄)
         if UserName == session["Player1"]:
-            session["Player1_Socket"] = websocket
+            opponent_name = session["Player2"]
             print(f"Player1 {UserName} connected to game {GameToken}")
         elif UserName == session["Player2"]:
-            session["Player2_Socket"] = websocket
+            opponent_name = session["Player1"]
             print(f"Player2 {UserName} connected to game {GameToken}")
         else:
             print(f"Unknown user trying to join game: {UserName}")
             return
 
-        # 게임 히스토리 생성 (두 플레이어가 모두 연결되었을 때만)
-        if session.get("Player1_Socket") and session.get("Player2_Socket") and not session.get("history_created"):
-            try:
-                # 플레이어 ID 가져오기
-                player1_user = db.execute(select(User).where(User.username == session["Player1"])).scalar_one_or_none()
-                player2_user = db.execute(select(User).where(User.username == session["Player2"])).scalar_one_or_none()
-
-                if player1_user and player2_user:
-                    # GameHistory 레코드 생성
-                    game_history = GameHistory(
-                        game_token=GameToken,
-                        player1_id=player1_user.id,
-                        player2_id=player2_user.id,
-                        game_mode=TimeControl.lower(),
-                        game_start_time=datetime.now(),
-                        player1_elo_before=player1_user.rapid_elo if TimeControl == "Rapid" else player1_user.blitz_elo,
-                        player2_elo_before=player2_user.rapid_elo if TimeControl == "Rapid" else player2_user.blitz_elo
-                    )
-
-                    db.add(game_history)
-                    db.commit()
-                    db.refresh(game_history)
+        current_user = UserName
+        current_session = (TimeControl, GameToken)
+        await register_socket(game_channel(TimeControl, GameToken, UserName), websocket)
+        opponent_channel = game_channel(TimeControl, GameToken, opponent_name)
 
-                    current_game_history_id = game_history.id
-                    session["history_created"] = True
-                    session["game_history_id"] = game_history.id
+        # 게임 히스토리 생성 (먼저 연결한 플레이어가 한 번만, 다른 워커에 연결한 상대와도 겹치지 않음)
+        if session.get("Player1_Id") and session.get("Player2_Id") and \
+                await session_store.claim_game_field(TimeControl, GameToken, "history_created", True):
+            try:
+                # GameHistory 레코드 생성 (세션에 캐시된 플레이어 정보 사용, DB 스레드에서 실행)
+                current_game_history_id = await db_executor.run(
+                    create_game_history, GameToken, TimeControl,
+                    session["Player1_Id"], session["Player2_Id"], session["Player1_Elo"], session["Player2_Elo"]
+                )
+                await session_store.update_game(TimeControl, GameToken, {"game_history_id": current_game_history_id})
+                session["game_history_id"] = current_game_history_id
 
-                    print(f"Game history created for {GameToken}: ID {game_history.id}")
+                print(f"Game history created for {GameToken}: ID {current_game_history_id}")
 
             except Exception as e:
                 print(f"Error creating game history: {e}")
-                db.rollback()
         else:
-            # 이미 생성된 게임 히스토리 ID 가져오기
+            # 이미 생성된 게임 히스토리 ID 가져오기 (아직 없으면 수를 기록할 때 다시 확인)
             current_game_history_id = session.get("game_history_id")
 
+        current_player_id = session_player(session, UserName)[0]
+
         # 이후 메시지들 처리
         while True:
             message = await websocket.receive_text()
             parts = message.strip().split()
+            journal_entry = None
 
             if len(parts) < 7:
                 print(f"Invalid message format: {message}")
                 continue
                 
             TimeControl_part, GameToken_part, UserName_part, Move_or_Wall = parts[:4]
+
+            # 상대가 먼저 연결해 히스토리를 만드는 중이었으면 생성된 ID 확인
+            if current_game_history_id is None and session.get("Player1_Id") and session.get("Player2_Id"):
+                latest = await session_store.get_game(TimeControl, GameToken)
+                if latest is not None:
+                    current_game_history_id = latest.get("game_history_id")
             
             if Move_or_Wall == "Wall":
                 if len(parts) >= 8:
@@ -999,28 +1177,8 @@ async def game(websocket: WebSocket):
                     Remain_Time = parts[6]          # "594.6"
                     Game_Progress = parts[7]        # "Continue"
 
-                    # 벽 배치 기록
-                    if current_game_history_id:
-                        try:
-                            move_counter += 1
-                            current_user_obj = db.execute(select(User).where(User.username == UserName)).scalar_one_or_none()
-                            if current_user_obj:
-                                game_move = GameMove(
-                                    game_id=current_game_history_id,
-                                    move_number=move_counter,
-                                    player_id=current_user_obj.id,
-                                    move_type="wall",
-                                    position_from=parts[4],  # "13,9"
-                                    position_to=parts[5],    # "13,11"
-                                    remaining_time=float(Remain_Time),
-                                    move_timestamp=datetime.now()
-                                )
-                                db.add(game_move)
-                                db.commit()
-                                print(f"Wall move recorded: {parts[4]} to {parts[5]} by {UserName}")
-                        except Exception as e:
-                            print(f"Error recording wall move: {e}")
-                            db.rollback()
+                    # 벽 배치 기록 (상대에게 전달한 뒤 저널에 추가)
+                    journal_entry = ("wall", parts[4], parts[5])  # "13,9" "13,11"
                 else:
                     print(f"Invalid wall message format (need 8 parts): {message}")
                     continue
@@ -1030,27 +1188,11 @@ async def game(websocket: WebSocket):
                 Remain_Time = parts[5] if len(parts) > 5 else "0.0"
                 Game_Progress = parts[6] if len(parts) > 6 else "Lost"
 
-                # Forfeit/Disconnect 기록
-                if current_game_history_id:
-                    try:
-                        move_counter += 1
-                        current_user_obj = db.execute(select(User).where(User.username == UserName)).scalar_one_or_none()
-                        if current_user_obj:
-                            game_move = GameMove(
-                                game_id=current_game_history_id,
-                                move_number=move_counter,
-                                player_id=current_user_obj.id,
-                                move_type=Move_or_Wall.lower(),  # "forfeit" or "disconnect"
-                                position_from=Pos,
-                                remaining_time=float(Remain_Time) if Remain_Time != "0.0" else 0.0,
-                                move_timestamp=datetime.now()
-                            )
-                            db.add(game_move)
-                            db.commit()
-                            print(f"{Move_or_Wall} move recorded by {UserName}")
-                    except Exception as e:
-                        print(f"Error recording {Move_or_Wall} move: {e}")
-                        db.rollback()
+                # Forfeit/Disconnect 기록 (게임 종료 처리 전에 저널 저장)
+                await journal_game_move(
+                    TimeControl, GameToken, current_game_history_id, current_player_id,
+                    Move_or_Wall.lower(), Pos, None, Remain_Time
+                )
                 
                 # 승패 결정 (포기/연결 끊김한 사람은 패자)
                 loser_name = UserName
@@ -1058,110 +1200,25 @@ async def game(websocket: WebSocket):
                 
                 print(f"Game ended by forfeit/disconnect - Winner: {winner_name}, Loser: {loser_name}")
                 
-                # ELO 업데이트 처리
-                try:
-                    # 현재 ELO 값들 가져오기
-                    winner_rapid_elo, winner_blitz_elo = get_user_elos(db, winner_name)
-                    loser_rapid_elo, loser_blitz_elo = get_user_elos(db, loser_name)
-                    
-                    # 게임 모드에 따라 적절한 ELO 사용
-                    if TimeControl_part == "Rapid":
-                        winner_current_elo = winner_rapid_elo
-                        loser_current_elo = loser_rapid_elo
-                    elif TimeControl_part == "Blitz":
-                        winner_current_elo = winner_blitz_elo
-                        loser_current_elo = loser_blitz_elo
-                    else:
-                        # 기본값은 Rapid 사용
-                        winner_current_elo = winner_rapid_elo
-                        loser_current_elo = loser_rapid_elo
-                    
-                    # ELO 변화량 계산
-                    winner_new_elo, loser_new_elo = calculate_elo_change(
-                        winner_current_elo, loser_current_elo
-                    )
-                    
-                    # 데이터베이스 업데이트
-                    if TimeControl_part == "Rapid":
-                        update_user_elo(db, winner_name, new_rapid_elo=winner_new_elo)
-                        update_user_elo(db, loser_name, new_rapid_elo=loser_new_elo)
-                    elif TimeControl_part == "Blitz":
-                        update_user_elo(db, winner_name, new_blitz_elo=winner_new_elo)
-                        update_user_elo(db, loser_name, new_blitz_elo=loser_new_elo)
-                    else:
-                        # 기본값은 Rapid 업데이트
-                        update_user_elo(db, winner_name, new_rapid_elo=winner_new_elo)
-                        update_user_elo(db, loser_name, new_rapid_elo=loser_new_elo)
-                    
-                    print(f"ELO updated - {TimeControl_part} mode (forfeit/disconnect):")
-                    print(f"  {winner_name}: {winner_current_elo} -> {winner_new_elo} (+{winner_new_elo - winner_current_elo})")
-                    print(f"  {loser_name}: {loser_current_elo} -> {loser_new_elo} ({loser_new_elo - loser_current_elo})")
-                    
-                except Exception as e:
-                    print(f"Error updating ELO after forfeit/disconnect: {e}")
+                # 승패 결과 적용 (ELO, 히스토리를 한 트랜잭션으로, 게임마다 한 번만)
+                result = await finalize_session_game(
+                    TimeControl, GameToken, session, winner_name,
+                    f"{winner_name} won by {Move_or_Wall.lower()}", "forfeit/disconnect"
+                )
+                already_finalized = result is not None and not result["applied"]
 
-                # 게임 히스토리 최종 업데이트 (forfeit/disconnect)
-                if current_game_history_id:
-                    try:
-                        winner_user = db.execute(select(User).where(User.username == winner_name)).scalar_one_or_none()
-                        loser_user = db.execute(select(User).where(User.username == loser_name)).scalar_one_or_none()
-
-                        if winner_user and loser_user:
-                            # 게임 히스토리에서 before ELO 값들 가져오기
-                            current_history = db.execute(select(GameHistory).where(GameHistory.id == current_game_history_id)).scalar_one_or_none()
-
-                            # 최종 ELO 값들 업데이트
-                            winner_elo_after = winner_new_elo if 'winner_new_elo' in locals() else (winner_user.rapid_elo if TimeControl_part == "Rapid" else winner_user.blitz_elo)
-                            loser_elo_after = loser_new_elo if 'loser_new_elo' in locals() else (loser_user.rapid_elo if TimeControl_part == "Rapid" else loser_user.blitz_elo)
-
-                            # ELO 변화량 계산 (before 값들을 사용)
-                            if winner_name == session["Player1"]:
-                                player1_elo_change = winner_elo_after - current_history.player1_elo_before
-                                player2_elo_change = loser_elo_after - current_history.player2_elo_before
-                                player1_elo_after_final = winner_elo_after
-                                player2_elo_after_final = loser_elo_after
-                            else:
-                                player1_elo_change = loser_elo_after - current_history.player1_elo_before
-                                player2_elo_change = winner_elo_after - current_history.player2_elo_before
-                                player1_elo_after_final = loser_elo_after
-                                player2_elo_after_final = winner_elo_after
-
-                            # GameHistory 업데이트
-                            db.execute(
-                                update(GameHistory)
-                                .where(GameHistory.id == current_game_history_id)
-                                .values(
-                                    winner_id=winner_user.id,
-                                    game_end_time=datetime.now(),
-                                    game_result=f"{winner_name} won by {Move_or_Wall.lower()}",
-                                    player1_elo_after=player1_elo_after_final,
-                                    player2_elo_after=player2_elo_after_final,
-                                    player1_elo_change=player1_elo_change,
-                                    player2_elo_change=player2_elo_change
-                                )
-                            )
-                            db.commit()
-                            print(f"Game history finalized for forfeit/disconnect: {winner_name} wins")
-                    except Exception as e:
-                        print(f"Error finalizing game history for forfeit/disconnect: {e}")
-                        db.rollback()
-
-                # 상대방에게 승리 메시지 전송
-                opponent_socket = session.get("Player2_Socket") if UserName == session["Player1"] else session.get("Player1_Socket")
-                if opponent_socket:
+                # 상대방에게 승리 메시지 전송 (이미 다른 결과로 끝난 게임이면 보내지 않음)
+                if not already_finalized:
                     try:
                         disconnect_message = "OpponentDisconnect 0,0 0.0 Won"
-                        await opponent_socket.send_text(disconnect_message)
-                        print(f"Sent forfeit/disconnect victory to opponent: {disconnect_message}")
+                        if await send_to_channel(opponent_channel, disconnect_message):
+                            print(f"Sent forfeit/disconnect victory to opponent: {disconnect_message}")
                     except:
                         print("Failed to send forfeit/disconnect message to opponent")
                 
                 # 게임 세션 정리
-                try:
-                    del Game_Session[TimeControl_part][GameToken_part]
+                if await session_store.delete_game(TimeControl_part, GameToken_part):
                     print(f"Cleaned up game session after forfeit/disconnect: {TimeControl_part} {GameToken_part}")
-                except:
-                    pass
                 continue
                 
             elif len(parts) >= 7:
@@ -1170,27 +1227,9 @@ async def game(websocket: WebSocket):
                 Remain_Time = parts[5]          # "180.0"
                 Game_Progress = parts[6]        # "Continue"
 
-                # 일반 이동 기록
-                if current_game_history_id and Move_or_Wall == "Move":
-                    try:
-                        move_counter += 1
-                        current_user_obj = db.execute(select(User).where(User.username == UserName)).scalar_one_or_none()
-                        if current_user_obj:
-                            game_move = GameMove(
-                                game_id=current_game_history_id,
-                                move_number=move_counter,
-                                player_id=current_user_obj.id,
-                                move_type="move",
-                                position_from=Pos,  # 새로운 위치
-                                remaining_time=float(Remain_Time),
-                                move_timestamp=datetime.now()
-                            )
-                            db.add(game_move)
-                            db.commit()
-                            print(f"Move recorded: {Pos} by {UserName}")
-                    except Exception as e:
-                        print(f"Error recording move: {e}")
-                        db.rollback()
+                # 일반 이동 기록 (상대에게 전달한 뒤 저널에 추가)
+                if Move_or_Wall == "Move":
+                    journal_entry = ("move", Pos, None)  # 새로운 위치
             else:
                 print(f"Invalid message format: {message}")
                 continue
@@ -1208,136 +1247,50 @@ async def game(websocket: WebSocket):
                     winner_name = session["Player1"] if UserName == session["Player2"] else session["Player2"]
                 
                 print(f"Game ended - Winner: {winner_name}, Loser: {loser_name}")
-                
-                # ELO 업데이트 처리
-                try:
-                    # 현재 ELO 값들 가져오기
-                    winner_rapid_elo, winner_blitz_elo = get_user_elos(db, winner_name)
-                    loser_rapid_elo, loser_blitz_elo = get_user_elos(db, loser_name)
-                    
-                    # 게임 모드에 따라 적절한 ELO 사용
-                    if TimeControl_part == "Rapid":
-                        winner_current_elo = winner_rapid_elo
-                        loser_current_elo = loser_rapid_elo
-                    elif TimeControl_part == "Blitz":
-                        winner_current_elo = winner_blitz_elo
-                        loser_current_elo = loser_blitz_elo
-                    else:
-                        # 기본값은 Rapid 사용
-                        winner_current_elo = winner_rapid_elo
-                        loser_current_elo = loser_rapid_elo
-                    
-                    # ELO 변화량 계산
-                    winner_new_elo, loser_new_elo = calculate_elo_change(
-                        winner_current_elo, loser_current_elo
-                    )
-                    
-                    # 데이터베이스 업데이트
-                    if TimeControl_part == "Rapid":
-                        update_user_elo(db, winner_name, new_rapid_elo=winner_new_elo)
-                        update_user_elo(db, loser_name, new_rapid_elo=loser_new_elo)
-                    elif TimeControl_part == "Blitz":
-                        update_user_elo(db, winner_name, new_blitz_elo=winner_new_elo)
-                        update_user_elo(db, loser_name, new_blitz_elo=loser_new_elo)
-                    else:
-                        # 기본값은 Rapid 업데이트
-                        update_user_elo(db, winner_name, new_rapid_elo=winner_new_elo)
-                        update_user_elo(db, loser_name, new_rapid_elo=loser_new_elo)
-                    
-                    print(f"ELO updated - {TimeControl_part} mode:")
-                    print(f"  {winner_name}: {winner_current_elo} -> {winner_new_elo} (+{winner_new_elo - winner_current_elo})")
-                    print(f"  {loser_name}: {loser_current_elo} -> {loser_new_elo} ({loser_new_elo - loser_current_elo})")
-                    
-                except Exception as e:
-                    print(f"Error updating ELO: {e}")
 
-                # 게임 히스토리 최종 업데이트 (정상 게임 종료)
-                if current_game_history_id:
-                    try:
-                        winner_user = db.execute(select(User).where(User.username == winner_name)).scalar_one_or_none()
-                        loser_user = db.execute(select(User).where(User.username == loser_name)).scalar_one_or_none()
-
-                        if winner_user and loser_user:
-                            # 게임 히스토리에서 before ELO 값들 가져오기
-                            current_history = db.execute(select(GameHistory).where(GameHistory.id == current_game_history_id)).scalar_one_or_none()
-
-                            # 최종 ELO 값들 업데이트
-                            winner_elo_after = winner_new_elo if 'winner_new_elo' in locals() else (winner_user.rapid_elo if TimeControl_part == "Rapid" else winner_user.blitz_elo)
-                            loser_elo_after = loser_new_elo if 'loser_new_elo' in locals() else (loser_user.rapid_elo if TimeControl_part == "Rapid" else loser_user.blitz_elo)
-
-                            # ELO 변화량 계산 (before 값들을 사용)
-                            if winner_name == session["Player1"]:
-                                player1_elo_change = winner_elo_after - current_history.player1_elo_before
-                                player2_elo_change = loser_elo_after - current_history.player2_elo_before
-                                player1_elo_after_final = winner_elo_after
-                                player2_elo_after_final = loser_elo_after
-                            else:
-                                player1_elo_change = loser_elo_after - current_history.player1_elo_before
-                                player2_elo_change = winner_elo_after - current_history.player2_elo_before
-                                player1_elo_after_final = loser_elo_after
-                                player2_elo_after_final = winner_elo_after
-
-                            # GameHistory 업데이트
-                            db.execute(
-                                update(GameHistory)
-                                .where(GameHistory.id == current_game_history_id)
-                                .values(
-                                    winner_id=winner_user.id,
-                                    game_end_time=datetime.now(),
-                                    game_result=f"{winner_name} won normally",
-                                    player1_elo_after=player1_elo_after_final,
-                                    player2_elo_after=player2_elo_after_final,
-                                    player1_elo_change=player1_elo_change,
-                                    player2_elo_change=player2_elo_change
-                                )
-                            )
-                            db.commit()
-                            print(f"Game history finalized for normal game end: {winner_name} wins")
-                    except Exception as e:
-                        print(f"Error finalizing game history for normal game end: {e}")
-                        db.rollback()
+                # 마지막 수 기록 (게임 종료 처리 전에 저널 저장)
+                if journal_entry:
+                    await journal_game_move(
+                        TimeControl, GameToken, current_game_history_id, current_player_id, *journal_entry, Remain_Time
+                    )
+                
+                # 승패 결과 적용 (ELO, 히스토리를 한 트랜잭션으로, 게임마다 한 번만)
+                result = await finalize_session_game(
+                    TimeControl, GameToken, session, winner_name, f"{winner_name} won normally", "normal game end"
+                )
+                already_finalized = result is not None and not result["applied"]
 
                 # 상대방에게 게임 종료 메시지 전송 (실제 위치 포함)
-                if UserName == session["Player1"]:
-                    target_socket = session["Player2_Socket"]
-                    opponent_result = "Lost" if Game_Progress in ["Won", "Win"] else "Won"
-                else:
-                    target_socket = session["Player1_Socket"]
-                    opponent_result = "Lost" if Game_Progress in ["Won", "Win"] else "Won"
+                opponent_result = "Lost" if Game_Progress in ["Won", "Win"] else "Won"
 
-                if target_socket:
+                if not already_finalized:
                     try:
                         # 실제 위치와 시간 정보를 포함해서 전송
-                        await target_socket.send_text(f"GameEnd {Pos} {Remain_Time} {opponent_result}")
-                        print(f"Sent game end message to opponent: {opponent_result} at position {Pos}")
+                        if await send_to_channel(opponent_channel, f"GameEnd {Pos} {Remain_Time} {opponent_result}"):
+                            print(f"Sent game end message to opponent: {opponent_result} at position {Pos}")
                     except:
                         print(f"Failed to send game end message to opponent")
                 
                 # 게임 세션 정리
-                if GameToken in Game_Session[TimeControl]:
-                    del Game_Session[TimeControl][GameToken]
+                if await session_store.delete_game(TimeControl, GameToken):
                     print(f"Game session {GameToken} ended and cleaned up")
                 
                 await websocket.close()
                 break
             else:
                 # 상대방에게 메시지 전달
-                if UserName == session["Player1"]:
-                    target_socket = session["Player2_Socket"]
-                    if target_socket:
-                        try:
-                            await target_socket.send_text(f"{Move_or_Wall} {Pos} {Remain_Time} {Game_Progress}")
-                            print(f"Forwarded message from Player1 to Player2: {Move_or_Wall} {Pos}")
-                        except:
-                            print(f"Player2 socket is closed, cannot forward message")
-                elif UserName == session["Player2"]:
-                    target_socket = session["Player1_Socket"]
-                    if target_socket:
-                        try:
-                            await target_socket.send_text(f"{Move_or_Wall} {Pos} {Remain_Time} {Game_Progress}")
-                            print(f"Forwarded message from Player2 to Player1: {Move_or_Wall} {Pos}")
-                        except:
-                            print(f"Player1 socket is closed, cannot forward message")
+                sender, receiver = ("Player1", "Player2") if UserName == session["Player1"] else ("Player2", "Player1")
+                try:
+                    if await send_to_channel(opponent_channel, f"{Move_or_Wall} {Pos} {Remain_Time} {Game_Progress}"):
+                        print(f"Forwarded message from {sender} to {receiver}: {Move_or_Wall} {Pos}")
+                except:
+                    print(f"{receiver} socket is closed, cannot forward message")
+
+                # 전달 후 수 기록 (DB 저장을 기다리지 않음)
+                if journal_entry:
+                    await journal_game_move(
+                        TimeControl, GameToken, current_game_history_id, current_player_id, *journal_entry, Remain_Time
+                    )
                     
     except WebSocketDisconnect:
         print(f"Game WebSocket disconnected: {current_user}")
@@ -1348,63 +1301,81 @@ async def game(websocket: WebSocket):
         # 상대방에게 연결 끊김 알림
         await notify_opponent_disconnect(current_session, current_user)
     finally:
-        # 연결 해제 시 세션에서 WebSocket 정리
+        # 연결 해제 시 이 워커의 게임 WebSocket 등록 해제
         if current_session and current_user:
-            try:
-                tc, gt = current_session
-                if (tc in Game_Session and gt in Game_Session[tc]):
-                    session = Game_Session[tc][gt]
-                    if current_user == session["Player1"]:
-                        session["Player1_Socket"] = None
-                    elif current_user == session["Player2"]:
-                        session["Player2_Socket"] = None
-            except:
-                pass
+            await unregister_socket(game_channel(*current_session, current_user), websocket)
                 
         try:
             await websocket.close()
         except:
             pass
-        
-        # 데이터베이스 세션 정리
-        try:
-            db.close()
-        except:
-            pass
 
 
 # ================== 채팅 엔드포인트 ==================
+# 채팅 쓰기는 쓰기 스레드(db_executor.run)에서, 권한 확인과 기록 조회는 읽기 스레드에서 실행
+
+def find_chat_friend(db: Session, user_id: int, friend_username: str):
+    """(상대 사용자 ID, 친구 관계 여부) - 상대가 없으면 (None, False) (읽기 스레드에서 실행)"""
+    friend_id = db.execute(select(User.id).where(User.username == friend_username)).scalar_one_or_none()
+    if friend_id is None:
+        return None, False
+
+    friendship_exists = db.execute(select(Friendship.id).where(
+        ((Friendship.user_id == user_id) & (Friendship.friend_id == friend_id)) |
+        ((Friendship.user_id == friend_id) & (Friendship.friend_id == user_id))
+    )).first() is not None
+    return friend_id, friendship_exists
+
+def add_chat_message(db: Session, sender_id: int, receiver_id: int, message: str):
+    """채팅 메시지 저장 (쓰기 스레드에서 실행)"""
+    db.add(ChatMessage(
+        sender_id=sender_id,
+        receiver_id=receiver_id,
+        message=message,
+        is_read=False  # 명시적으로 읽지 않음으로 설정
+    ))
+    db.flush()
+
+def load_chat_messages(db: Session, user_id: int, friend_id: int):
+    """두 사용자의 최근 50개 메시지 (id, 보낸 사용자 ID, 메시지, 시각), 오래된 것부터 (읽기 스레드에서 실행)"""
+    messages = db.execute(
+        select(ChatMessage.id, ChatMessage.sender_id, ChatMessage.message, ChatMessage.created_at)
+        .where(
+            ((ChatMessage.sender_id == user_id) & (ChatMessage.receiver_id == friend_id)) |
+            ((ChatMessage.sender_id == friend_id) & (ChatMessage.receiver_id == user_id))
+        )
+        .order_by(ChatMessage.created_at.desc())
+        .limit(50)
+    ).all()
+    return [tuple(message) for message in reversed(messages)]
+
+def mark_chat_read(db: Session, reader_id: int, sender_id: int):
+    """sender_id가 보낸 읽지 않은 메시지를 모두 읽음으로 표시 (쓰기 스레드에서 실행)"""
+    db.execute(
+        update(ChatMessage)
+        .where(
+            (ChatMessage.sender_id == sender_id) &
+            (ChatMessage.receiver_id == reader_id) &
+            (ChatMessage.is_read == False)
+        )
+        .values(is_read=True)
+    )
 
 @app.post("/chat/send", response_model=ChatMessageResponse)
-def send_chat_message(message_data: ChatMessageRequest, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def send_chat_message(message_data: ChatMessageRequest, current_user: User = Depends(get_current_user)):
     """채팅 메시지 전송"""
     try:
-        # 수신자 찾기
-        receiver = db.execute(select(User).where(User.username == message_data.receiver_username)).scalar_one_or_none()
-        if not receiver:
+        # 수신자 찾기, 친구 관계 확인
+        receiver_id, is_friend = await db_executor.read(find_chat_friend, current_user.id, message_data.receiver_username)
+        if receiver_id is None:
             raise HTTPException(status_code=404, detail="Receiver not found")
-
-        # 친구 관계 확인
-        friendship_exists = db.execute(select(Friendship).where(
-            ((Friendship.user_id == current_user.id) & (Friendship.friend_id == receiver.id)) |
-            ((Friendship.user_id == receiver.id) & (Friendship.friend_id == current_user.id))
-        )).scalar_one_or_none()
-
-        if not friendship_exists:
+        if not is_friend:
             raise HTTPException(status_code=403, detail="You can only send messages to friends")
 
         # 메시지 저장
-        chat_message = ChatMessage(
-            sender_id=current_user.id,
-            receiver_id=receiver.id,
-            message=message_data.message,
-            is_read=False  # 명시적으로 읽지 않음으로 설정
-        )
+        await db_executor.run(add_chat_message, current_user.id, receiver_id, message_data.message)
 
-        db.add(chat_message)
-        db.commit()
-
-        print(f"Chat message sent from {current_user.username} to {receiver.username}")
+        print(f"Chat message sent from {current_user.username} to {message_data.receiver_username}")
         return ChatMessageResponse(success=True, message="Message sent successfully")
 
     except HTTPException:
@@ -1414,57 +1385,35 @@ def send_chat_message(message_data: ChatMessageRequest, current_user: User = Dep
         raise HTTPException(status_code=500, detail="Failed to send message")
 
 @app.get("/chat/history/{friend_username}", response_model=ChatHistoryResponse)
-def get_chat_history(friend_username: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_chat_history(friend_username: str, current_user: User = Depends(get_current_user)):
     """친구와의 채팅 기록 조회"""
     try:
-        # 친구 찾기
-        friend = db.execute(select(User).where(User.username == friend_username)).scalar_one_or_none()
-        if not friend:
+        # 친구 찾기, 친구 관계 확인
+        friend_id, is_friend = await db_executor.read(find_chat_friend, current_user.id, friend_username)
+        if friend_id is None:
             raise HTTPException(status_code=404, detail="Friend not found")
-
-        # 친구 관계 확인
-        friendship_exists = db.execute(select(Friendship).where(
-            ((Friendship.user_id == current_user.id) & (Friendship.friend_id == friend.id)) |
-            ((Friendship.user_id == friend.id) & (Friendship.friend_id == current_user.id))
-        )).scalar_one_or_none()
-
-        if not friendship_exists:
+        if not is_friend:
             raise HTTPException(status_code=403, detail="You can only view messages with friends")
 
-        # 채팅 기록 조회 (최근 50개 메시지)
-        messages = db.execute(select(ChatMessage).where(
-            ((ChatMessage.sender_id == current_user.id) & (ChatMessage.receiver_id == friend.id)) |
-            ((ChatMessage.sender_id == friend.id) & (ChatMessage.receiver_id == current_user.id))
-        ).order_by(ChatMessage.created_at.desc()).limit(50)).scalars().all()
-
-        # 메시지를 시간 순으로 정렬 (오래된 것부터)
-        messages = list(reversed(messages))
+        # 채팅 기록 조회 (최근 50개 메시지, 오래된 것부터)
+        messages = await db_executor.read(load_chat_messages, current_user.id, friend_id)
 
         # 해당 친구로부터 받은 읽지 않은 메시지들을 모두 읽음으로 표시
-        db.execute(
-            update(ChatMessage)
-            .where(
-                (ChatMessage.sender_id == friend.id) &
-                (ChatMessage.receiver_id == current_user.id) &
-                (ChatMessage.is_read == False)
-            )
-            .values(is_read=True)
-        )
-        db.commit()
+        await db_executor.run(mark_chat_read, current_user.id, friend_id)
 
         # 응답 데이터 구성
         message_list = []
-        for msg in messages:
-            is_sent_by_me = msg.sender_id == current_user.id
-            sender_username = current_user.username if is_sent_by_me else friend.username
-            receiver_username = friend.username if is_sent_by_me else current_user.username
+        for message_id, sender_id, message, created_at in messages:
+            is_sent_by_me = sender_id == current_user.id
+            sender_username = current_user.username if is_sent_by_me else friend_username
+            receiver_username = friend_username if is_sent_by_me else current_user.username
 
             message_list.append(ChatMessageData(
-                id=msg.id,
+                id=message_id,
                 sender_username=sender_username,
                 receiver_username=receiver_username,
-                message=msg.message,
-                created_at=msg.created_at,
+                message=message,
+                created_at=created_at,
                 is_sent_by_me=is_sent_by_me
             ))
 
@@ -1518,35 +1467,18 @@ def get_unread_message_counts(current_user: User = Depends(get_current_user), db
         raise HTTPException(status_code=500, detail="Failed to get unread message counts")
 
 @app.post("/messages/mark-read/{friend_username}")
-def mark_messages_as_read(friend_username: str, current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def mark_messages_as_read(friend_username: str, current_user: User = Depends(get_current_user)):
     """특정 친구로부터 받은 메시지들을 모두 읽음으로 표시"""
     try:
-        # 친구 찾기
-        friend = db.execute(select(User).where(User.username == friend_username)).scalar_one_or_none()
-        if not friend:
+        # 친구 찾기, 친구 관계 확인
+        friend_id, is_friend = await db_executor.read(find_chat_friend, current_user.id, friend_username)
+        if friend_id is None:
             raise HTTPException(status_code=404, detail="Friend not found")
-
-        # 친구 관계 확인
-        friendship_exists = db.execute(select(Friendship).where(
-            ((Friendship.user_id == current_user.id) & (Friendship.friend_id == friend.id)) |
-            ((Friendship.friend_id == current_user.id) & (Friendship.user_id == friend.id))
-        )).scalar_one_or_none()
-
-        if not friendship_exists:
+        if not is_friend:
             raise HTTPException(status_code=403, detail="You can only mark messages from friends as read")
 
         # 해당 친구로부터 받은 읽지 않은 메시지들을 모두 읽음으로 표시
-        db.execute(
-            update(ChatMessage)
-            .where(
-                (ChatMessage.sender_id == friend.id) &
-                (ChatMessage.receiver_id == current_user.id) &
-                (ChatMessage.is_read == False)
-            )
-            .values(is_read=True)
-        )
-
-        db.commit()
+        await db_executor.run(mark_chat_read, current_user.id, friend_id)
 
         print(f"Marked messages from {friend_username} as read for {current_user.username}")
         return {"message": f"Marked messages from {friend_username} as read"}
@@ -1555,12 +1487,31 @@ def mark_messages_as_read(friend_username: str, current_user: User = Depends(get
         raise
     except Exception as e:
         print(f"Error marking messages as read: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Failed to mark messages as read")
 
 # ================== 사용자 상태 API ==================
+# 상태 변경은 쓰기 스레드(db_executor.run)에서 실행
+
+def set_user_status(db: Session, username: str, status: str, touch: bool = False):
+    """사용자 상태 변경 후 이전 상태 반환 (사용자가 없으면 None, touch면 last_active도 갱신, 쓰기 스레드에서 실행)"""
+    user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
+    if not user:
+        return None
+
+    old_status = user.status
+    user.status = status
+    if touch:
+        user.last_active = datetime.utcnow()
+    db.flush()
+    return old_status
+
+def reset_statuses(db: Session) -> int:
+    """모든 사용자 상태를 offline으로 변경하고 offline 사용자 수 반환 (쓰기 스레드에서 실행)"""
+    db.execute(update(User).values(status="offline"))
+    return db.execute(select(func.count(User.id)).where(User.status == "offline")).scalar()
+
 @app.post("/status", response_model=UserStatusResponse)
-def update_status(request: UserStatusRequest, db: Session = Depends(get_db)):
+async def update_status(request: UserStatusRequest):
     """사용자 상태 업데이트"""
     try:
         # 유효한 상태 값 확인
@@ -1571,70 +1522,50 @@ def update_status(request: UserStatusRequest, db: Session = Depends(get_db)):
                 detail=f"Invalid status. Must be one of: {valid_statuses}"
             )
 
-        # 사용자 조회
-        user = db.execute(select(User).where(User.username == request.username)).scalar_one_or_none()
-        if not user:
+        # 사용자 조회 후 상태 업데이트
+        if await db_executor.run(set_user_status, request.username, request.status, True) is None:
             raise HTTPException(status_code=404, detail="User not found")
 
-        # 상태 업데이트
-        user.status = request.status
-        user.last_active = datetime.utcnow()
-        db.commit()
-
         print(f"User {request.username} status updated to: {request.status}")
 
         return UserStatusResponse(
-            username=user.username,
-            status=user.status
+            username=request.username,
+            status=request.status
         )
 
     except HTTPException:
         raise
     except Exception as e:
         print(f"Error updating user status: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Failed to update status")
     
 # ================== 친구 대전 API ==================
-fight_sockets = {}
+# /fight 소켓은 local_sockets의 "fight:<사용자>" 채널, 접속 워커는 세션 저장소의 "fight" 접속 위치
 # 임시: 모든 사용자 상태를 offline으로 초기화하는 엔드포인트
 @app.post("/reset-all-status")
-def reset_all_user_status(db: Session = Depends(get_db)):
+async def reset_all_user_status():
     try:
         # 모든 사용자의 status를 offline으로 설정
-        db.execute(
-            "UPDATE users SET status = 'offline'"
-        )
-        db.commit()
-
-        updated_count = db.execute(
-            "SELECT COUNT(*) FROM users WHERE status = 'offline'"
-        ).scalar()
+        updated_count = await db_executor.run(reset_statuses)
 
         return {"message": f"All user status reset to offline. Updated {updated_count} users."}
     except Exception as e:
-        db.rollback()
         print(f"Error resetting user status: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to reset status: {str(e)}")
 
 # 특정 사용자의 status 수정 엔드포인트
 @app.post("/update-user-status/{username}")
-def update_user_status_manual(username: str, status: str, db: Session = Depends(get_db)):
+async def update_user_status_manual(username: str, status: str):
     try:
-        user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
-        if not user:
+        old_status = await db_executor.run(set_user_status, username, status)
+        if old_status is None:
             raise HTTPException(status_code=404, detail="User not found")
 
-        old_status = user.status
-        user.status = status
-        db.commit()
-
         print(f"Updated {username} status from '{old_status}' to '{status}'")
         return {"message": f"Updated {username} status to {status}"}
     except HTTPException:
         raise
     except Exception as e:
-        db.rollback()
         print(f"Error updating user status: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to update status: {str(e)}")
 
@@ -1716,7 +1647,7 @@ def get_game_moves(game_id: int, current_user: User = Depends(get_current_user),
         game_moves = db.execute(
             select(GameMove)
             .where(GameMove.game_id == game_id)
-            .order_by(GameMove.move_number.asc())
+            .order_by(GameMove.move_number.asc(), GameMove.id.asc())
         ).scalars().all()
 
         # 플레이어 정보 가져오기
@@ -1765,6 +1696,119 @@ def get_game_moves(game_id: int, current_user: User = Depends(get_current_user),
         print(f"Error getting game moves: {e}")
         raise HTTPException(status_code=500, detail="Failed to get game moves")
 
+def load_review_moves(db: Session, game_id: int, user_id: int):
+    """
+    사용자가 참여한 게임의 (종료 여부, 수 목록) - 리뷰용 (읽기 스레드에서 실행)
+    게임이 없거나 참여하지 않은 게임이면 None
+    """
+    game_history = db.execute(
+        select(GameHistory.game_end_time)
+        .where(
+            (GameHistory.id == game_id) &
+            ((GameHistory.player1_id == user_id) | (GameHistory.player2_id == user_id))
+        )
+    ).first()
+    if not game_history:
+        return None
+
+    records = db.execute(
+        select(GameMove.move_type, GameMove.position_from, GameMove.position_to)
+        .where(GameMove.game_id == game_id)
+        .order_by(GameMove.move_number.asc(), GameMove.id.asc())
+    ).all()
+    return game_history.game_end_time is not None, [tuple(r) for r in records]
+
+@app.get("/game-history/{game_id}/review")
+async def get_game_review(game_id: int, current_user: User = Depends(get_current_user)):
+    """
+    게임 리뷰: 수마다 엔진 평가, 최선의 대안, 실수/블런더 표시
+    분석되는 대로 한 줄에 하나의 JSON(NDJSON)으로 스트리밍
+    """
+    # 게임 히스토리 확인 (현재 사용자가 참여한 게임인지 검증, 이벤트 루프 밖에서 조회)
+    review = await db_executor.read(load_review_moves, game_id, current_user.id)
+    if review is None:
+        raise HTTPException(status_code=404, detail="Game not found or access denied")
+
+    # 종료된 게임만 캐시 (진행 중인 게임은 수가 추가될 수 있음)
+    finished, records = review
+
+    async def review_lines():
+        async for entry in stream_game_review(game_id, records, cacheable=finished):
+            yield json.dumps(entry) + "\n"
+
+    return StreamingResponse(review_lines(), media_type="application/x-ndjson")
+
+# ================== 힌트 API ==================
+def is_game_participant(db: Session, game_token: str, user_id: int) -> bool:
+    """사용자가 참여한 게임인지 확인 (읽기 스레드에서 실행)"""
+    return db.execute(
+        select(GameHistory.id)
+        .where(
+            (GameHistory.game_token == game_token) &
+            ((GameHistory.player1_id == user_id) | (GameHistory.player2_id == user_id))
+        )
+    ).first() is not None
+
+@app.post("/hint", response_model=HintResponse)
+async def get_move_hint(request: HintRequest, current_user: User = Depends(get_current_user)):
+    """
+    현재 포지션에서 엔진이 추천하는 상위 수 목록
+    - state: 보드 상태를 직접 전달 (AI 대전 등)
+    - position: FEN 형식 문자열로 전달 (예: "e1 e9 - 10 10 r")
+    - game_token + moves: 참여 중인 게임의 지금까지 수 목록을 전달
+    """
+    if request.state is None and request.position is None and request.game_token is None:
+        raise HTTPException(status_code=400, detail="One of state, position or game_token with moves is required")
+
+    if request.game_token is not None:
+        # 현재 사용자가 참여한 게임인지 검증 (이벤트 루프 밖에서 조회)
+        if not await db_executor.read(is_game_participant, request.game_token, current_user.id):
+            raise HTTPException(status_code=404, detail="Game not found or access denied")
+
+    try:
+        if request.state is not None:
+            position = request.state
+            state = state_from_position(
+                position.red_position, position.blue_position,
+                position.red_walls_remaining, position.blue_walls_remaining,
+                position.horizontal_walls, position.vertical_walls,
+                position.current_player
+            )
+        elif request.position is not None:
+            state = state_from_fen(request.position)
+        else:
+            state = state_from_moves(request.moves)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if state.is_goal("red") or state.is_goal("blue"):
+        raise HTTPException(status_code=400, detail="Game is already over")
+
+    try:
+        hints, depth, cached = await hint_service.get_hints(current_user.id, state, request.top_n)
+    except HintRateLimited as e:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many hint requests",
+            headers={"Retry-After": str(int(e.retry_after) + 1)}
+        )
+    except HintUnavailable:
+        raise HTTPException(status_code=503, detail="Hint engine is busy, try again later")
+
+    return HintResponse(
+        position=state.to_fen(),
+        current_player=state.current_player,
+        hints=[HintMoveData(**hint) for hint in hints],
+        depth=depth,
+        cached=cached
+    )
+
+@app.on_event("shutdown")
+def shutdown_analysis_workers():
+    """서버 종료 시 리뷰/힌트 분석 워커 프로세스 정리"""
+    shutdown_review_executor()
+    hint_service.shutdown()
+
 # ================== 디버그/테스트 API ==================
 @app.get("/debug/database-info")
 def get_database_info(db: Session = Depends(get_db)):
@@ -1839,7 +1883,6 @@ def get_recent_games_debug(db: Session = Depends(get_db)):
 
 @app.websocket("/fight")
 async def fight(websocket: WebSocket):
-    db = SessionLocal()
     username = None
     await websocket.accept()
     try:
@@ -1858,32 +1901,32 @@ async def fight(websocket: WebSocket):
 
             if first == "start": #형식: start username dummy_text
                 username = second
-                fight_sockets[username] = websocket
+                await register_socket(f"fight:{username}", websocket)
+                await session_store.set_presence("fight", username, WORKER_ID)
                 print(f"[FIGHT] User {username} connected to fight socket")
 
             elif first == "rapid" or first == "blitz": #형식: rapid_or_blitz sender_name friend_name
                 print(f"[FIGHT] Processing {first} request from {second} to {third}")
 
-                user = db.execute(select(User).where(User.username == third)).scalar_one_or_none()
-                if not user:
+                status = await db_executor.read(get_user_status, third)
+                if status is None:
                     response = f"{third} not_found {first}"
                     print(f"[FIGHT] SERVER SENDING: {response}")
                     await websocket.send_text(response)
                     continue
 
-                status = user.status
                 response = f"{third} {status} {first}"
                 print(f"[FIGHT] SERVER SENDING: {response}")
                 await websocket.send_text(response)
 
                 if status == "online":
-                    if third in fight_sockets:
-                        friend_socket = fight_sockets[third]
-                        fight_message = f"fight {second} {first}"
+                    fight_message = f"fight {second} {first}"
+                    if await session_store.get_presence("fight", third) is None:
+                        print(f"[FIGHT] ERROR: {third} not connected to fight socket")
+                    elif await send_to_channel(f"fight:{third}", fight_message):
                         print(f"[FIGHT] SERVER SENDING to {third}: {fight_message}")
-                        await friend_socket.send_text(fight_message)
                     else:
-                        print(f"[FIGHT] ERROR: {third} not connected to fight socket")
+                        print(f"[FIGHT] ERROR: {third} fight socket is no longer connected")
 
             elif first == "accept": #형식: accept opponent time_control
                 print(f"[FIGHT] Accept request: {message}")
@@ -1891,65 +1934,50 @@ async def fight(websocket: WebSocket):
                 time_control = third
 
                 # 1. 게임 토큰 생성
-                game_token = str(int(time.time()))
+                game_token = new_game_token()
 
-                # 2. 게임 토큰이 짝수인지 홀수인지에 따라 플레이어 색깔 결정
-                token_number = int(game_token)
-                if token_number % 2 == 0:
-                    # 짝수: 수락한 사람이 Red, 요청한 사람이 Blue
+                # 2. 플레이어 색깔은 토큰과 무관하게 무작위로 결정
+                if secrets.randbelow(2) == 0:
                     accepter_color = "Red"
                     requester_color = "Blue"
                 else:
-                    # 홀수: 수락한 사람이 Blue, 요청한 사람이 Red
                     accepter_color = "Blue"
                     requester_color = "Red"
 
                 print(f"[FIGHT] Game created - Token: {game_token}, {username}({accepter_color}) vs {opponent_name}({requester_color})")
 
                 # 3. 각 플레이어의 ELO 가져오기
+                time_control_key = normalize_time_control(time_control)
+
                 try:
-                    accepter_user = db.execute(select(User).where(User.username == username)).scalar_one_or_none()
-                    requester_user = db.execute(select(User).where(User.username == opponent_name)).scalar_one_or_none()
-
-                    if time_control.lower() == "rapid":
-                        accepter_elo = accepter_user.rapid_elo if accepter_user else 1500
-                        requester_elo = requester_user.rapid_elo if requester_user else 1500
-                        time_control_key = "Rapid"
-                    elif time_control.lower() == "blitz":
-                        accepter_elo = accepter_user.blitz_elo if accepter_user else 1500
-                        requester_elo = requester_user.blitz_elo if requester_user else 1500
-                        time_control_key = "Blitz"
-                    else:
-                        accepter_elo = accepter_user.rapid_elo if accepter_user else 1500
-                        requester_elo = requester_user.rapid_elo if requester_user else 1500
-                        time_control_key = "Rapid"
+                    (accepter_id, accepter_elo), (requester_id, requester_elo) = await db_executor.read(
+                        get_players_identity, time_control_key, [username, opponent_name]
+                    )
 
                     print(f"[FIGHT] ELO - {username}: {accepter_elo}, {opponent_name}: {requester_elo}")
 
                 except Exception as e:
                     print(f"[FIGHT] Error getting ELO: {e}")
+                    accepter_id = requester_id = None
                     accepter_elo = 1500
                     requester_elo = 1500
-                    time_control_key = "Rapid"
 
-                # 4. Game_Session에 게임 생성
+                # 4. 세션 저장소에 게임 생성 (플레이어 ID와 ELO 캐시)
                 if accepter_color == "Red":
-                    player1 = username
-                    player2 = opponent_name
-                    player1_socket = websocket
-                    player2_socket = fight_sockets.get(opponent_name)
+                    player1, player1_id, player1_elo = username, accepter_id, accepter_elo
+                    player2, player2_id, player2_elo = opponent_name, requester_id, requester_elo
                 else:
-                    player1 = opponent_name
-                    player2 = username
-                    player1_socket = fight_sockets.get(opponent_name)
-                    player2_socket = websocket
+                    player1, player1_id, player1_elo = opponent_name, requester_id, requester_elo
+                    player2, player2_id, player2_elo = username, accepter_id, accepter_elo
 
-                Game_Session[time_control_key][game_token] = {
+                await session_store.create_game(time_control_key, game_token, {
                     "Player1": player1,
                     "Player2": player2,
-                    "Player1_Socket": player1_socket,
-                    "Player2_Socket": player2_socket
-                }
+                    "Player1_Id": player1_id,
+                    "Player2_Id": player2_id,
+                    "Player1_Elo": player1_elo,
+                    "Player2_Elo": player2_elo
+                })
 
                 # 5. 클라이언트들에게 게임 생성 메시지 전송
                 # 수락한 사람에게 메시지 (본인 색깔, 상대 이름, 게임 토큰, 상대 ELO, 본인 ELO, 게임 모드)
@@ -1958,9 +1986,8 @@ async def fight(websocket: WebSocket):
                 print(f"[FIGHT] Sent to accepter {username}: {accepter_message}")
 
                 # 요청한 사람에게 메시지
-                if opponent_name in fight_sockets:
-                    requester_message = f"{requester_color} {username} {game_token} {accepter_elo} {requester_elo} {time_control_key}"
-                    await fight_sockets[opponent_name].send_text(requester_message)
+                requester_message = f"{requester_color} {username} {game_token} {accepter_elo} {requester_elo} {time_control_key}"
+                if await send_to_channel(f"fight:{opponent_name}", requester_message):
                     print(f"[FIGHT] Sent to requester {opponent_name}: {requester_message}")
                 else:
                     print(f"[FIGHT] ERROR: {opponent_name} not connected to fight socket")
@@ -1974,18 +2001,21 @@ async def fight(websocket: WebSocket):
                 print(f"[FIGHT] Unknown command: {first}")
 
     except WebSocketDisconnect:
-        if username and username in fight_sockets:
-            del fight_sockets[username]
+        if username:
             print(f"[FIGHT] User {username} disconnected from fight socket")
     except Exception as e:
         print(f"[FIGHT] ERROR: {e}")
-        if username and username in fight_sockets:
-            del fight_sockets[username]
+    finally:
+        if username:
+            await unregister_socket(f"fight:{username}", websocket)
+            try:
+                await session_store.clear_presence("fight", username, WORKER_ID)
+            except Exception as e:
+                print(f"[FIGHT] Error clearing presence for {username}: {e}")
 
 
 # ================== AI 게임 WebSocket ==================
-# AI 세션 저장소 (클라이언트별 AI 인스턴스)
-ai_sessions = {}
+# AI 인스턴스는 연결마다 핸들러 안에서 만들고 연결이 끊기면 사라짐 (워커 간 공유 없음)
 
 @app.websocket("/ai-game")
 async def ai_game(websocket: WebSocket):
@@ -2012,13 +2042,14 @@ async def ai_game(websocket: WebSocket):
 
         print(f"[AI Game] Player: {player_color}, AI: {ai_player}, Difficulty: {difficulty}")
 
-        # AI 인스턴스 생성
-        ai = QuoridorAI(player=ai_player, difficulty=difficulty)
+        # AI 인스턴스 생성 (동시 탐색 수에 따라 예산을 줄이는 부하 인지 모드)
+        ai = QuoridorAI(player=ai_player, difficulty=difficulty, load_aware=True)
 
         # AI가 Red(먼저 시작)인 경우 첫 수를 먼저 보냄
         if ai_player == 'red':
             print(f"[AI Game] AI (Red) starts first")
-            best_move = ai.get_best_move()
+            # 탐색은 스레드에서 실행하여 이벤트 루프를 막지 않음
+            best_move = await asyncio.to_thread(ai.get_best_move)
 
             if best_move is not None:
                 if best_move['type'] == 'move':
@@ -2066,8 +2097,8 @@ async def ai_game(websocket: WebSocket):
                 print(f"[AI Game] Game ended. Winner: {winner}")
                 break
 
-            # AI의 수 계산
-            best_move = ai.get_best_move()
+            # AI의 수 계산 (스레드에서 실행하여 이벤트 루프를 막지 않음)
+            best_move = await asyncio.to_thread(ai.get_best_move)
 
             if best_move is None:
                 print(f"[AI Game] AI has no valid move")
@@ -2119,6 +2150,7 @@ async def ai_game(websocket: WebSocket):
             del ai
 
 # ================== 게임 크레딧 API ==================
+# 크레딧 조회도 레코드 생성/일일 리셋을 쓸 수 있으므로 쓰기 스레드(db_executor.run)에서 실행
 
 def get_or_create_game_credit(db: Session, user_id: int) -> GameCredit:
     """사용자의 게임 크레딧 가져오기 또는 생성"""
@@ -2132,8 +2164,7 @@ def get_or_create_game_credit(db: Session, user_id: int) -> GameCredit:
             last_reset_date=datetime.utcnow()
         )
         db.add(credit)
-        db.commit()
-        db.refresh(credit)
+        db.flush()
 
     return credit
 
@@ -2146,90 +2177,130 @@ def check_and_reset_daily(db: Session, credit: GameCredit) -> GameCredit:
         # 날짜가 바뀌면 최소 5회 보장 (광고로 모은 횟수는 유지)
         credit.available_games = max(credit.available_games, 5)
         credit.last_reset_date = datetime.utcnow()
-        db.commit()
-        db.refresh(credit)
+        db.flush()
 
     return credit
 
+def change_game_credit(db: Session, user_id: int, change: int):
+    """
+    일일 리셋 후 게임 횟수를 change만큼 변경 (쓰기 스레드에서 실행)
+    (변경 여부, 사용 가능 횟수, 마지막 리셋 시각) 반환 - 남은 횟수보다 많이 차감하면 변경하지 않음
+    """
+    credit = check_and_reset_daily(db, get_or_create_game_credit(db, user_id))
+    changed = credit.available_games + change >= 0
+    if changed and change:
+        credit.available_games += change
+        db.flush()
+    return changed, credit.available_games, credit.last_reset_date
+
 @app.get("/api/game-credits", response_model=GameCreditResponse)
-def get_game_credits(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_game_credits(current_user: User = Depends(get_current_user)):
     """
     게임 크레딧 조회
     - 사용 가능한 게임 횟수 반환
     """
     try:
-        credit = get_or_create_game_credit(db, current_user.id)
-        credit = check_and_reset_daily(db, credit)
+        _, available_games, last_reset_date = await db_executor.run(change_game_credit, current_user.id, 0)
 
-        can_play = credit.available_games > 0
+        can_play = available_games > 0
 
         return GameCreditResponse(
-            available_games=credit.available_games,
+            available_games=available_games,
             can_play=can_play,
-            last_reset_date=credit.last_reset_date
+            last_reset_date=last_reset_date
         )
     except Exception as e:
         print(f"Error getting game credits: {e}")
         raise HTTPException(status_code=500, detail="Failed to get game credits")
 
 @app.post("/api/game-credits/consume", response_model=ConsumeGameResponse)
-def consume_game_credit(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def consume_game_credit(current_user: User = Depends(get_current_user)):
     """
     게임 1회 소비
     - 게임 횟수 1 차감
     """
     try:
-        credit = get_or_create_game_credit(db, current_user.id)
-        credit = check_and_reset_daily(db, credit)
+        # 게임 횟수 체크 후 1회 차감 (한 트랜잭션)
+        consumed, available_games, _ = await db_executor.run(change_game_credit, current_user.id, -1)
 
-        # 게임 횟수 체크
-        if credit.available_games <= 0:
+        if not consumed:
             return ConsumeGameResponse(
                 success=False,
                 remaining_games=0,
                 message="No games available"
             )
 
-        # 게임 1회 차감
-        credit.available_games -= 1
-        db.commit()
-        db.refresh(credit)
-
         return ConsumeGameResponse(
             success=True,
-            remaining_games=credit.available_games,
-            message=f"{credit.available_games} games remaining"
+            remaining_games=available_games,
+            message=f"{available_games} games remaining"
         )
     except Exception as e:
         print(f"Error consuming game credit: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Failed to consume game credit")
 
 @app.post("/api/game-credits/add-from-ad", response_model=ConsumeGameResponse)
-def add_game_from_ad(current_user: User = Depends(get_current_user), db: Session = Depends(get_db)):
+async def add_game_from_ad(current_user: User = Depends(get_current_user)):
     """
     광고 시청으로 게임 1회 추가
     """
     try:
-        credit = get_or_create_game_credit(db, current_user.id)
-        credit = check_and_reset_daily(db, credit)
-
-        # 게임 1회 추가
-        credit.available_games += 1
-        db.commit()
-        db.refresh(credit)
+        _, available_games, _ = await db_executor.run(change_game_credit, current_user.id, 1)
 
         return ConsumeGameResponse(
             success=True,
-            remaining_games=credit.available_games,
-            message=f"Ad reward added. Total: {credit.available_games} games"
+            remaining_games=available_games,
+            message=f"Ad reward added. Total: {available_games} games"
         )
     except Exception as e:
         print(f"Error adding game from ad: {e}")
-        db.rollback()
         raise HTTPException(status_code=500, detail="Failed to add game credit")
 
 # ================== 계정 삭제 엔드포인트 ==================
+def delete_user_data(db: Session, user_id: int) -> dict:
+    """
+    사용자 계정과 관련 데이터 삭제 후 항목별 삭제 수 반환 (쓰기 스레드에서 실행)
+    게임 기록(GameHistory, GameMove)은 통계 목적으로 보존
+    """
+    deleted = {}
+
+    # 친구 관계 (양방향)
+    deleted["friendships"] = db.execute(
+        Friendship.__table__.delete().where(
+            (Friendship.user_id == user_id) | (Friendship.friend_id == user_id)
+        )
+    ).rowcount
+
+    # 친구 요청 (보낸 것, 받은 것)
+    deleted["friend_requests"] = db.execute(
+        FriendRequest.__table__.delete().where(
+            (FriendRequest.sender_id == user_id) | (FriendRequest.receiver_id == user_id)
+        )
+    ).rowcount
+
+    # 채팅 메시지 (보낸 것, 받은 것)
+    deleted["chat_messages"] = db.execute(
+        ChatMessage.__table__.delete().where(
+            (ChatMessage.sender_id == user_id) | (ChatMessage.receiver_id == user_id)
+        )
+    ).rowcount
+
+    # 배틀 요청
+    deleted["battle_requests"] = db.execute(
+        BattleRequest.__table__.delete().where(
+            (BattleRequest.sender_id == user_id) | (BattleRequest.receiver_id == user_id)
+        )
+    ).rowcount
+
+    # 게임 크레딧 (구독 토큰 포함)
+    deleted["game_credits"] = db.execute(
+        GameCredit.__table__.delete().where(GameCredit.user_id == user_id)
+    ).rowcount
+
+    # 사용자 계정 (마지막에 삭제)
+    db.execute(User.__table__.delete().where(User.id == user_id))
+    return deleted
+
 @app.post("/api/delete-account", response_model=DeleteAccountResponse)
 def delete_account(
     req: DeleteAccountRequest,
@@ -2276,73 +2347,15 @@ def delete_account(
 
         print(f"[DELETE ACCOUNT] Authentication successful for user_id: {user_id}, username: {username}")
 
-        # 2. 친구 관계 삭제 (양방향)
-        friendships_deleted = db.execute(
-            select(func.count()).select_from(Friendship).where(
-                (Friendship.user_id == user_id) | (Friendship.friend_id == user_id)
-            )
-        ).scalar()
-
-        db.execute(
-            Friendship.__table__.delete().where(
-                (Friendship.user_id == user_id) | (Friendship.friend_id == user_id)
-            )
-        )
-        print(f"[DELETE ACCOUNT] Deleted {friendships_deleted} friendships")
-
-        # 3. 친구 요청 삭제 (보낸 것, 받은 것)
-        friend_requests_deleted = db.execute(
-            select(func.count()).select_from(FriendRequest).where(
-                (FriendRequest.sender_id == user_id) | (FriendRequest.receiver_id == user_id)
-            )
-        ).scalar()
-
-        db.execute(
-            FriendRequest.__table__.delete().where(
-                (FriendRequest.sender_id == user_id) | (FriendRequest.receiver_id == user_id)
-            )
-        )
-        print(f"[DELETE ACCOUNT] Deleted {friend_requests_deleted} friend requests")
-
-        # 4. 채팅 메시지 삭제 (보낸 것, 받은 것)
-        chat_messages_deleted = db.execute(
-            select(func.count()).select_from(ChatMessage).where(
-                (ChatMessage.sender_id == user_id) | (ChatMessage.receiver_id == user_id)
-            )
-        ).scalar()
-
-        db.execute(
-            ChatMessage.__table__.delete().where(
-                (ChatMessage.sender_id == user_id) | (ChatMessage.receiver_id == user_id)
-            )
-        )
-        print(f"[DELETE ACCOUNT] Deleted {chat_messages_deleted} chat messages")
-
-        # 5. 배틀 요청 삭제
-        battle_requests_deleted = db.execute(
-            select(func.count()).select_from(BattleRequest).where(
-                (BattleRequest.sender_id == user_id) | (BattleRequest.receiver_id == user_id)
-            )
-        ).scalar()
-
-        db.execute(
-            BattleRequest.__table__.delete().where(
-                (BattleRequest.sender_id == user_id) | (BattleRequest.receiver_id == user_id)
-            )
-        )
-        print(f"[DELETE ACCOUNT] Deleted {battle_requests_deleted} battle requests")
-
-        # 6. 게임 크레딧 삭제 (구독 토큰 포함)
-        game_credit_deleted = db.execute(
-            select(func.count()).select_from(GameCredit).where(GameCredit.user_id == user_id)
-        ).scalar()
-
-        db.execute(
-            GameCredit.__table__.delete().where(GameCredit.user_id == user_id)
-        )
+        # 2~6. 관련 데이터와 사용자 계정 삭제 (한 트랜잭션)
+        deleted = db_write(delete_user_data, user_id)
+        print(f"[DELETE ACCOUNT] Deleted {deleted['friendships']} friendships")
+        print(f"[DELETE ACCOUNT] Deleted {deleted['friend_requests']} friend requests")
+        print(f"[DELETE ACCOUNT] Deleted {deleted['chat_messages']} chat messages")
+        print(f"[DELETE ACCOUNT] Deleted {deleted['battle_requests']} battle requests")
         print(f"[DELETE ACCOUNT] Deleted game credit (purchase_token cleared)")
 
-        # 7. 프로필 이미지 파일 삭제
+        # 7. 프로필 이미지 파일 삭제 (계정 삭제가 커밋된 뒤)
         if profile_image:
             profile_image_path = os.path.join(PROFILE_IMAGES_DIR, profile_image)
             if os.path.exists(profile_image_path):
@@ -2352,14 +2365,8 @@ def delete_account(
                 except Exception as e:
                     print(f"[DELETE ACCOUNT] Failed to delete profile image: {e}")
 
-        # 8. 사용자 계정 삭제 (마지막에 삭제)
-        db.delete(user)
-
-        # 9. 변경사항 커밋
-        db.commit()
-
         print(f"[DELETE ACCOUNT] Successfully deleted account: {username} (user_id: {user_id})")
-        print(f"[DELETE ACCOUNT] Summary: {friendships_deleted} friendships, {friend_requests_deleted} friend requests, {chat_messages_deleted} chat messages")
+        print(f"[DELETE ACCOUNT] Summary: {deleted['friendships']} friendships, {deleted['friend_requests']} friend requests, {deleted['chat_messages']} chat messages")
 
         return DeleteAccountResponse(
             success=True,
@@ -2373,7 +2380,6 @@ def delete_account(
     except Exception as e:
         print(f"[DELETE ACCOUNT] Unexpected error: {e}")
         print(f"[DELETE ACCOUNT] Error type: {type(e).__name__}")
-        db.rollback()
         raise HTTPException(status_code=500, detail=f"계정 삭제 중 오류가 발생했습니다: {str(e)}")
 
 @app.get("/delete-account")
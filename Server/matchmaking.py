@@ -0,0 +1,255 @@
+# matchmaking.py
+"""
+레이팅 기반 매치메이킹 엔진
+
+- 시간 제한(Rapid/Blitz)마다 ELO 구간(BUCKET_WIDTH) 단위의 대기열을 두고, 구간 안에서는 대기 시작 순서 유지
+- 사용자 이름 인덱스로 대기열 추가/제거가 O(1) (연결이 끊긴 사용자 제거 시 큐 전체를 다시 만들지 않음)
+- 허용 ELO 차이는 대기 시간에 따라 넓어짐 (BASE_WINDOW + WIDEN_PER_SECOND * 대기 초)
+- match()는 주기적으로 호출되어 한 번에 여러 쌍을 만듦
+  오래 기다린 사용자부터 자신의 허용 범위 안에서 ELO가 가장 가까운 상대를 찾음 (같으면 먼저 온 상대)
+  먼저 기다린 사용자가 Player1(Red)
+- MatchmakingCoordinator: 여러 워커가 세션 저장소의 대기열을 함께 사용
+  참가/취소는 저장소에 이벤트로 기록하고, 역할 잠금을 가진 워커 하나만 이벤트를 엔진에 반영해 매칭
+  매칭을 새로 맡은 워커는 저장소의 대기자 목록으로 엔진을 다시 만듦
+"""
+import time
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# ================== 매칭 설정 ==================
+BUCKET_WIDTH = 50              # ELO 구간 크기
+BASE_WINDOW = 100              # 대기 시작 시 허용 ELO 차이
+WIDEN_PER_SECOND = 20          # 대기 1초마다 늘어나는 허용 ELO 차이
+BUCKET_SCAN_LIMIT = 8          # 구간마다 확인할 최대 대기자 수 (오래 기다린 순)
+MATCH_INTERVAL = 0.25          # 매칭 주기 (초)
+MATCHMAKER_ROLE_TTL = 3.0      # 매칭 워커가 이 시간 동안 갱신하지 않으면 다른 워커가 맡음 (초)
+EVENTS_PER_READ = 1000         # 저장소에서 한 번에 꺼낼 참가/취소 이벤트 수
+
+
+class QueueEntry:
+    """대기 중인 사용자 (게임 세션에 필요한 ID와 ELO를 함께 보관)"""
+    __slots__ = ("username", "connection", "player_id", "elo", "time_control", "bucket", "enqueued_at")
+
+    def __init__(self, username: str, connection: str, player_id: Optional[int], elo: int,
+                 time_control: str, enqueued_at: float):
+        self.username = username
+        self.connection = connection
+        self.player_id = player_id
+        self.elo = elo
+        self.time_control = time_control
+        self.bucket = elo // BUCKET_WIDTH
+        self.enqueued_at = enqueued_at
+
+    def window(self, now: float) -> float:
+        """현재 허용 ELO 차이"""
+        return BASE_WINDOW + WIDEN_PER_SECOND * max(0.0, now - self.enqueued_at)
+
+
+class MatchmakingEngine:
+    """시간 제한별 ELO 구간 대기열 (이벤트 루프 하나에서 사용)"""
+
+    def __init__(self, time_controls: Iterable[str]):
+        # 시간 제한 -> ELO 구간 -> 사용자 이름 -> 대기자 (구간 안에서는 대기 시작 순서)
+        self._buckets: Dict[str, Dict[int, "OrderedDict[str, QueueEntry]"]] = {tc: {} for tc in time_controls}
+        # 시간 제한 -> 사용자 이름 -> 대기자 (전체 대기 시작 순서)
+        self._waiting: Dict[str, "OrderedDict[str, QueueEntry]"] = {tc: OrderedDict() for tc in self._buckets}
+        # 사용자 이름 -> 대기자 (한 사용자는 한 대기열에만 있음)
+        self._index: Dict[str, QueueEntry] = {}
+
+        # 통계
+        self.matches = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __contains__(self, username: str) -> bool:
+        return username in self._index
+
+    def queue_size(self, time_control: str) -> int:
+        return len(self._waiting[time_control])
+
+    def add(self, time_control: str, username: str, connection: str, player_id: Optional[int], elo: int,
+            now: Optional[float] = None) -> QueueEntry:
+        """대기열에 추가 (이미 대기 중이면 이전 항목을 새 항목으로 교체)"""
+        if time_control not in self._waiting:
+            raise KeyError(f"Unknown time control: {time_control}")
+        self.remove(username)
+
+        entry = QueueEntry(username, connection, player_id, elo, time_control, time.time() if now is None else now)
+        self._index[username] = entry
+        self._waiting[time_control][username] = entry
+        self._buckets[time_control].setdefault(entry.bucket, OrderedDict())[username] = entry
+        return entry
+
+    def remove(self, username: str, connection: Optional[str] = None) -> Optional[QueueEntry]:
+        """
+        대기열에서 제거하고 제거한 항목 반환 (없으면 None)
+        connection을 주면 그 연결로 등록된 항목일 때만 제거 (다시 연결한 사용자의 새 항목 보호)
+        """
+        entry = self._index.get(username)
+        if entry is None or (connection is not None and entry.connection != connection):
+            return None
+
+        del self._index[username]
+        del self._waiting[entry.time_control][username]
+        buckets = self._buckets[entry.time_control]
+        bucket = buckets[entry.bucket]
+        del bucket[username]
+        if not bucket:
+            del buckets[entry.bucket]
+        return entry
+
+    def match(self, time_control: str, now: Optional[float] = None) -> List[Tuple[QueueEntry, QueueEntry]]:
+        """대기열에서 만들 수 있는 모든 쌍을 찾아 제거하고 (Player1, Player2) 목록 반환"""
+        now = time.time() if now is None else now
+        waiting = self._waiting[time_control]
+        buckets = self._buckets[time_control]
+        if len(waiting) < 2:
+            return []
+
+        lowest, highest = min(buckets), max(buckets)
+        pairs: List[Tuple[QueueEntry, QueueEntry]] = []
+
+        # 매칭되면 waiting에서 빠지므로 처음 목록의 사본을 순회
+        for username, entry in list(waiting.items()):
+            if username not in waiting:
+                continue
+            opponent = self._find_opponent(buckets, entry, now, lowest, highest)
+            if opponent is None:
+                continue
+
+            self.remove(entry.username)
+            self.remove(opponent.username)
+            if opponent.enqueued_at < entry.enqueued_at:
+                entry, opponent = opponent, entry
+            pairs.append((entry, opponent))
+
+            wait = now - entry.enqueued_at
+            self.matches += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+
+            if len(waiting) < 2:
+                break
+
+        return pairs
+
+    def _find_opponent(self, buckets: Dict[int, "OrderedDict[str, QueueEntry]"], entry: QueueEntry,
+                       now: float, lowest: int, highest: int) -> Optional[QueueEntry]:
+        """허용 범위 안에서 ELO가 가장 가까운 상대 (가까운 구간부터 확인)"""
+        window = entry.window(now)
+        best: Optional[QueueEntry] = None
+        best_diff = 0
+
+        distance = 0
+        while True:
+            # distance만큼 떨어진 구간의 ELO 차이는 최소 (distance - 1) * BUCKET_WIDTH + 1
+            nearest_possible = max(0, (distance - 1) * BUCKET_WIDTH + 1)
+            if nearest_possible > window or (best is not None and nearest_possible > best_diff):
+                break
+            if entry.bucket - distance < lowest and entry.bucket + distance > highest:
+                break
+
+            for index in {entry.bucket - distance, entry.bucket + distance}:
+                bucket = buckets.get(index)
+                if not bucket:
+                    continue
+                scanned = 0
+                for candidate in bucket.values():
+                    if candidate is entry:
+                        continue
+                    diff = abs(candidate.elo - entry.elo)
+                    if diff <= window and (
+                        best is None or diff < best_diff
+                        or (diff == best_diff and candidate.enqueued_at < best.enqueued_at)
+                    ):
+                        best, best_diff = candidate, diff
+                    scanned += 1
+                    if scanned >= BUCKET_SCAN_LIMIT:
+                        break
+            distance += 1
+
+        return best
+
+    def stats(self) -> dict:
+        return {
+            "waiting": {tc: len(waiting) for tc, waiting in self._waiting.items()},
+            "matches": self.matches,
+            "mean_wait_s": round(self.total_wait / self.matches, 2) if self.matches else 0.0,
+            "max_wait_s": round(self.max_wait, 2),
+        }
+
+
+class MatchmakingCoordinator:
+    """세션 저장소를 통해 여러 워커가 함께 쓰는 매칭 대기열"""
+
+    def __init__(self, store, time_controls: Iterable[str], owner: str):
+        self._store = store
+        self._time_controls = tuple(time_controls)
+        self._owner = owner
+        self.engine = MatchmakingEngine(self._time_controls)
+        self.leading = False
+
+    async def join(self, time_control: str, username: str, connection: str, player_id: Optional[int], elo: int):
+        if time_control not in self._time_controls:
+            raise KeyError(f"Unknown time control: {time_control}")
+        await self._store.queue_join(time_control, {
+            "username": username,
+            "connection": connection,
+            "player_id": player_id,
+            "elo": elo,
+            "enqueued_at": time.time(),
+        })
+
+    async def leave(self, time_control: str, username: str, connection: str) -> bool:
+        return await self._store.queue_leave(time_control, username, connection)
+
+    async def tick(self) -> Dict[str, List[Tuple[QueueEntry, QueueEntry]]]:
+        """매칭 역할을 가진 워커이면 대기열을 갱신하고 시간 제한별 매칭 결과 반환 (아니면 빈 결과)"""
+        if not await self._store.acquire_role("matchmaker", self._owner, MATCHMAKER_ROLE_TTL):
+            if self.leading:
+                print("[Matchmaking] Matchmaker role moved to another worker")
+                self.leading = False
+                self.engine = MatchmakingEngine(self._time_controls)
+            return {}
+
+        if not self.leading:
+            await self._rebuild()
+            self.leading = True
+
+        while True:
+            events = await self._store.queue_take_events(EVENTS_PER_READ)
+            for event in events:
+                self._apply(event)
+            if len(events) < EVENTS_PER_READ:
+                break
+
+        results = {}
+        for time_control in self._time_controls:
+            pairs = self.engine.match(time_control)
+            if pairs:
+                await self._store.queue_remove(
+                    time_control, [entry.username for pair in pairs for entry in pair]
+                )
+                results[time_control] = pairs
+        return results
+
+    async def _rebuild(self):
+        self.engine = MatchmakingEngine(self._time_controls)
+        for time_control in self._time_controls:
+            for entry in await self._store.queue_entries(time_control):
+                self._apply({"type": "join", "time_control": time_control, "entry": entry})
+        print(f"[Matchmaking] Took matchmaker role with {len(self.engine)} waiting players")
+
+    def _apply(self, event: dict):
+        if event["type"] == "join":
+            entry = event["entry"]
+            self.engine.add(event["time_control"], entry["username"], entry["connection"],
+                            entry["player_id"], entry["elo"], now=entry["enqueued_at"])
+        else:
+            self.engine.remove(event["username"], event["connection"])
+
+    def stats(self) -> dict:
+        return {**self.engine.stats(), "matchmaker": self.leading}
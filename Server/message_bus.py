@@ -0,0 +1,175 @@
+# message_bus.py
+"""
+워커 간 메시지 버스 (게임 수 전달, 상대 연결 끊김 알림, 친구 대전 신청, 매칭 결과)
+
+- 채널마다 이 워커의 수신 함수(보통 WebSocket.send_text) 하나를 등록
+  채널 이름: "matchmaking:<연결 ID>", "game:<시간 제한>:<게임 토큰>:<사용자>", "fight:<사용자>"
+- publish: 채널이 이 워커에 있으면 수신 함수를 바로 호출 (직렬화/네트워크 없음)
+  없으면 전송 계층으로 다른 워커에 전달 (Redis 프로토콜 PUBLISH/SUBSCRIBE, resp.py의 로컬 대체 서버 사용 가능)
+- 다른 워커에서 받은 메시지는 채널마다 받은 순서대로 전달
+- 버스 URL (QUORIDOR_MESSAGE_BUS 환경 변수, 기본값은 세션 저장소 URL)
+  memory:// 이면 전송 계층 없이 워커 하나 안에서만 전달
+"""
+import asyncio
+import os
+from collections import deque
+from typing import Awaitable, Callable, Deque, Dict, Optional
+
+from resp import RespClient, RespSubscriber
+from session_store import SESSION_STORE_URL, KEY_PREFIX
+
+# ================== 메시지 버스 설정 ==================
+MESSAGE_BUS_URL = os.environ.get("QUORIDOR_MESSAGE_BUS", SESSION_STORE_URL)
+CHANNEL_PREFIX = KEY_PREFIX + "bus:"
+
+Handler = Callable[[str], Awaitable[None]]
+
+
+class RespTransport:
+    """Redis 프로토콜 PUBLISH/SUBSCRIBE 전송 계층 (발행 연결과 구독 연결을 따로 사용)"""
+
+    def __init__(self, url: str, prefix: str = CHANNEL_PREFIX):
+        self._prefix = prefix
+        self._client = RespClient(url)
+        self._subscriber: Optional[RespSubscriber] = None
+        self._url = url
+        self._on_message: Optional[Callable[[str, str], None]] = None
+
+    async def start(self, on_message: Callable[[str, str], None]):
+        self._on_message = on_message
+        self._subscriber = RespSubscriber(self._url, self._receive)
+        await self._subscriber.start()
+
+    def _receive(self, channel: str, message: str):
+        if channel.startswith(self._prefix):
+            self._on_message(channel[len(self._prefix):], message)
+
+    async def subscribe(self, channel: str):
+        await self._subscriber.subscribe(self._prefix + channel)
+
+    async def unsubscribe(self, channel: str):
+        await self._subscriber.unsubscribe(self._prefix + channel)
+
+    async def publish(self, channel: str, message: str) -> int:
+        """받은 워커 수 반환"""
+        return await self._client.execute("PUBLISH", self._prefix + channel, message)
+
+    async def close(self):
+        if self._subscriber is not None:
+            await self._subscriber.close()
+        await self._client.close()
+
+
+class MessageBus:
+    """채널 단위 메시지 전달 (이벤트 루프 하나에서 사용)"""
+
+    def __init__(self, transport: Optional[RespTransport] = None):
+        self._transport = transport
+        self._handlers: Dict[str, Handler] = {}
+        # 다른 워커에서 받은 메시지 (채널 -> 대기 메시지, 채널마다 전달 작업 하나)
+        self._inbox: Dict[str, Deque[str]] = {}
+        self._started = False
+
+        # 통계
+        self.local_deliveries = 0
+        self.remote_publishes = 0
+        self.remote_deliveries = 0
+        self.undelivered = 0
+
+    async def _ensure_started(self):
+        if self._transport is not None and not self._started:
+            self._started = True
+            await self._transport.start(self._receive)
+
+    async def subscribe(self, channel: str, handler: Handler):
+        """채널의 수신 함수 등록 (이미 있으면 교체)"""
+        replaced = channel in self._handlers
+        self._handlers[channel] = handler
+        if self._transport is not None and not replaced:
+            await self._ensure_started()
+            await self._transport.subscribe(channel)
+
+    async def unsubscribe(self, channel: str, handler: Handler):
+        """handler가 등록된 경우만 해제 (같은 채널에 새로 등록된 수신 함수는 유지)"""
+        if self._handlers.get(channel) != handler:
+            return
+        del self._handlers[channel]
+        if self._transport is not None:
+            try:
+                await self._transport.unsubscribe(channel)
+            except Exception as e:
+                print(f"[Bus] Failed to unsubscribe {channel}: {e}")
+
+    def is_local(self, channel: str) -> bool:
+        return channel in self._handlers
+
+    async def publish(self, channel: str, message: str) -> bool:
+        """
+        채널로 메시지 전달 (받을 곳이 없으면 False)
+        이 워커의 채널이면 수신 함수를 바로 호출하고 예외도 그대로 전달
+        """
+        handler = self._handlers.get(channel)
+        if handler is not None:
+            self.local_deliveries += 1
+            await handler(message)
+            return True
+
+        if self._transport is None:
+            self.undelivered += 1
+            return False
+
+        await self._ensure_started()
+        self.remote_publishes += 1
+        if await self._transport.publish(channel, message) > 0:
+            return True
+        self.undelivered += 1
+        return False
+
+    def _receive(self, channel: str, message: str):
+        if channel not in self._handlers:
+            return
+        inbox = self._inbox.get(channel)
+        if inbox is not None:
+            inbox.append(message)
+            return
+        self._inbox[channel] = deque([message])
+        asyncio.create_task(self._deliver(channel))
+
+    async def _deliver(self, channel: str):
+        inbox = self._inbox[channel]
+        try:
+            while inbox:
+                message = inbox.popleft()
+                handler = self._handlers.get(channel)
+                if handler is None:
+                    break
+                try:
+                    await handler(message)
+                    self.remote_deliveries += 1
+                except Exception as e:
+                    print(f"[Bus] Failed to deliver to {channel}: {e}")
+        finally:
+            del self._inbox[channel]
+
+    async def close(self):
+        if self._transport is not None:
+            await self._transport.close()
+
+    def stats(self) -> dict:
+        return {
+            "transport": type(self._transport).__name__ if self._transport else None,
+            "local_channels": len(self._handlers),
+            "local_deliveries": self.local_deliveries,
+            "remote_publishes": self.remote_publishes,
+            "remote_deliveries": self.remote_deliveries,
+            "undelivered": self.undelivered,
+        }
+
+
+def create_message_bus(url: str = MESSAGE_BUS_URL) -> MessageBus:
+    """URL에 맞는 메시지 버스 생성 (memory:// 이면 워커 하나 안에서만 전달)"""
+    if url.startswith("memory://"):
+        return MessageBus()
+    if url.startswith(("redis://", "unix://")):
+        return MessageBus(RespTransport(url))
+    raise ValueError(f"Unsupported message bus URL: {url}")
@@ -0,0 +1,289 @@
+# move_hint.py
+"""
+힌트 API용 엔진 분석
+
+- 요청된 포지션(보드 상태, FEN 형식 문자열 또는 수 목록)을 QuoridorGameState로 복원
+- 요청마다 고정된 시간 한도 안에서 상위 N개의 수와 점수 계산
+- 같은 포지션은 사용자와 상관없이 결과 캐시 공유 (진행 중인 같은 분석도 공유)
+- 사용자별 요청 속도 제한과 낮은 우선순위의 소수 워커 프로세스로 AI 대전의 CPU를 보호
+"""
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+from quoridor_ai import (
+    QuoridorGameState, MinimaxAI, Move, UNREACHABLE, shortest_distance_to_goal
+)
+
+# ================== 힌트 설정 ==================
+HINT_DIFFICULTY = "hard"         # 탐색 설정 (DIFFICULTY_BUDGETS 키)
+HINT_TIME_LIMIT = 2.0            # 요청당 탐색 시간 한도 (초)
+HINT_SEARCH_SHARE = 0.6          # 시간 한도 중 반복 심화에 쓰는 비율 (나머지는 상위 수 재탐색)
+HINT_QUEUE_GRACE = 1.0           # 워커 대기까지 포함한 응답 한도 = HINT_TIME_LIMIT + HINT_QUEUE_GRACE
+HINT_WORKERS = 1                 # 힌트 전용 워커 프로세스 수
+HINT_MAX_PENDING = 8             # 동시에 대기할 수 있는 분석 수 (초과하면 바로 거절)
+HINT_WORKER_NICE = 10            # 워커 프로세스 우선순위 (AI 대전보다 낮게)
+HINT_CACHE_SIZE = 4096           # 캐시할 포지션 수
+
+# 사용자별 속도 제한 (토큰 버킷: 분당 HINT_RATE_PER_MINUTE개, 최대 HINT_RATE_BURST개 연속)
+# 캐시된 결과는 탐색 비용이 없으므로 제한에 포함하지 않음
+HINT_RATE_PER_MINUTE = 6
+HINT_RATE_BURST = 3
+HINT_BUCKET_PRUNE_INTERVAL = 60.0   # 가득 찬 버킷(최근에 요청하지 않은 사용자)을 정리하는 간격 (초)
+
+
+class HintRateLimited(Exception):
+    """속도 제한 초과 (retry_after: 다시 요청할 수 있을 때까지 초)"""
+
+    def __init__(self, retry_after: float):
+        super().__init__(f"Hint rate limit exceeded, retry after {retry_after:.0f}s")
+        self.retry_after = retry_after
+
+
+class HintUnavailable(Exception):
+    """힌트 워커가 밀려 있어 시간 안에 분석할 수 없음"""
+    pass
+
+
+# ================== 포지션 복원 ==================
+def _parse_cell(text: str) -> Tuple[int, int]:
+    y, x = (int(v) for v in text.split(","))
+    return y, x
+
+
+def state_from_position(
+    red_position: str,
+    blue_position: str,
+    red_walls_remaining: int,
+    blue_walls_remaining: int,
+    horizontal_walls: List[str],
+    vertical_walls: List[str],
+    current_player: str
+) -> QuoridorGameState:
+    """보드 상태 필드로 QuoridorGameState 생성 (잘못된 상태이면 ValueError)"""
+    state = QuoridorGameState()
+
+    try:
+        state.red_pos = _parse_cell(red_position)
+        state.blue_pos = _parse_cell(blue_position)
+        walls = [("horizontal", _parse_cell(w)) for w in horizontal_walls]
+        walls += [("vertical", _parse_cell(w)) for w in vertical_walls]
+    except (ValueError, AttributeError):
+        raise ValueError("Positions must be formatted as 'Y,X'")
+
+    # 말은 칸(짝수 좌표)에만 놓임 (홀수 좌표는 벽 자리이므로 to_bytes에서 다른 칸으로 바뀜)
+    for y, x in (state.red_pos, state.blue_pos):
+        if not state.is_valid_position(y, x) or y % 2 or x % 2:
+            raise ValueError(f"Invalid pawn position: {y},{x}")
+    if state.red_pos == state.blue_pos:
+        raise ValueError("Pawns cannot share a cell")
+
+    if current_player not in ("red", "blue"):
+        raise ValueError("current_player must be 'red' or 'blue'")
+    state.current_player = current_player
+
+    total_walls = QuoridorGameState.INITIAL_WALLS * 2
+    if red_walls_remaining + blue_walls_remaining + len(walls) > total_walls:
+        raise ValueError("Too many walls")
+    state.red_walls = red_walls_remaining
+    state.blue_walls = blue_walls_remaining
+
+    for wall_type, (y, x) in walls:
+        if not state.can_fit_wall(wall_type, y, x):
+            raise ValueError(f"Invalid wall: {wall_type} {y},{x}")
+        state._add_wall(wall_type, y, x)
+
+    check_paths(state)
+    return state
+
+
+def state_from_fen(text: str) -> QuoridorGameState:
+    """QuoridorGameState.to_fen 형식 문자열로 상태 생성 (잘못된 상태이면 ValueError)"""
+    state = QuoridorGameState.from_fen(text)
+    check_paths(state)
+    return state
+
+
+def check_paths(state: QuoridorGameState):
+    """두 플레이어 모두 목표까지 경로가 있는지 확인"""
+    for player in ("red", "blue"):
+        if shortest_distance_to_goal(state, player) >= UNREACHABLE:
+            raise ValueError(f"No path to goal for {player}")
+
+
+def state_from_moves(moves: List[str]) -> QuoridorGameState:
+    """
+    초기 상태에서 수 목록을 차례로 적용 (Red부터 번갈아 둠, 잘못된 수이면 ValueError)
+
+    수 형식은 AI 대전 메시지와 같음: 이동 "Y,X", 벽 "wall:horizontal:Y:X"
+    """
+    state = QuoridorGameState()
+
+    for index, move in enumerate(moves, start=1):
+        if state.is_goal("red") or state.is_goal("blue"):
+            raise ValueError(f"Move #{index} after the game ended")
+
+        player = state.current_player
+        try:
+            if move.startswith("wall:"):
+                _, wall_type, y, x = move.split(":")
+                success = state.make_wall_move(player, wall_type, int(y), int(x))
+            else:
+                y, x = _parse_cell(move)
+                success = state.make_move(player, y, x)
+        except ValueError:
+            success = False
+
+        if not success:
+            raise ValueError(f"Illegal move #{index}: {move}")
+
+    return state
+
+
+# ================== 분석 (워커 프로세스에서 실행) ==================
+def lower_hint_worker_priority():
+    """워커 프로세스 초기화: AI 대전보다 낮은 CPU 우선순위"""
+    if hasattr(os, "nice"):
+        try:
+            os.nice(HINT_WORKER_NICE)
+        except OSError:
+            pass
+
+
+def compute_hints(state_bytes: bytes, top_n: int) -> Tuple[List[Dict], int]:
+    """현재 차례 플레이어의 상위 수 목록과 완료된 탐색 깊이 (상태는 to_bytes 형식으로 전달)"""
+    state = QuoridorGameState.from_bytes(state_bytes)
+    engine = MinimaxAI(state.current_player, HINT_DIFFICULTY)
+    engine.time_budget = min(engine.time_budget, HINT_TIME_LIMIT * HINT_SEARCH_SHARE)
+
+    hints = []
+    for move, score in engine.analyze(state, top_n=top_n, time_limit=HINT_TIME_LIMIT):
+        hint = Move.from_code(move).to_dict()
+        hints.append({
+            "type": hint["type"],
+            "wall_type": hint.get("wall_type"),
+            "position": hint["position"],
+            "score": score,
+        })
+
+    return hints[:top_n], engine.completed_depth
+
+
+# ================== 힌트 서비스 ==================
+class HintService:
+    """워커 풀, 포지션 캐시, 사용자별 속도 제한을 묶은 힌트 제공자"""
+
+    def __init__(self):
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._executor_lock = threading.Lock()
+
+        # (상태 이진 표현, top_n) -> (hints, depth) (LRU, 같은 포지션이면 수 순서와 상관없이 같은 키)
+        self._cache: "OrderedDict[Tuple[bytes, int], Tuple[List[Dict], int]]" = OrderedDict()
+
+        # 진행 중인 분석 (같은 포지션 요청은 기존 분석 결과를 기다림)
+        self._in_flight: Dict[Tuple[bytes, int], asyncio.Future] = {}
+
+        # user_id -> (남은 토큰, 마지막 갱신 시각) (가득 찬 버킷은 주기적으로 삭제, 없으면 가득 찬 것으로 취급)
+        self._buckets: Dict[int, Tuple[float, float]] = {}
+        self._buckets_pruned = time.time()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=HINT_WORKERS, initializer=lower_hint_worker_priority
+                )
+            return self._executor
+
+    def shutdown(self):
+        """서버 종료 시 워커 프로세스 정리"""
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def _consume_rate_token(self, user_id: int):
+        """사용자의 토큰 하나 사용 (없으면 HintRateLimited)"""
+        now = time.time()
+        refill_per_second = HINT_RATE_PER_MINUTE / 60.0
+        if now - self._buckets_pruned >= HINT_BUCKET_PRUNE_INTERVAL:
+            self._prune_buckets(now, refill_per_second)
+
+        tokens, updated = self._buckets.get(user_id, (HINT_RATE_BURST, now))
+        tokens = min(HINT_RATE_BURST, tokens + (now - updated) * refill_per_second)
+
+        if tokens < 1:
+            self._buckets[user_id] = (tokens, now)
+            raise HintRateLimited((1 - tokens) / refill_per_second)
+
+        self._buckets[user_id] = (tokens - 1, now)
+
+    def _prune_buckets(self, now: float, refill_per_second: float):
+        """HINT_RATE_BURST까지 다시 채워진 버킷 삭제"""
+        self._buckets = {
+            user_id: (tokens, updated)
+            for user_id, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * refill_per_second < HINT_RATE_BURST
+        }
+        self._buckets_pruned = now
+
+    async def get_hints(self, user_id: int, state: QuoridorGameState, top_n: int) -> Tuple[List[Dict], int, bool]:
+        """
+        (상위 수 목록, 탐색 깊이, 캐시 사용 여부) 반환
+
+        Raises:
+            HintRateLimited: 사용자 요청 속도 초과
+            HintUnavailable: 워커가 밀려 시간 한도 안에 분석할 수 없음
+        """
+        state_bytes = state.to_bytes()
+        key = (state_bytes, top_n)
+
+        cached = self._cache.get(key)
+        if cached is not None:
+            self._cache.move_to_end(key)
+            return cached[0], cached[1], True
+
+        future = self._in_flight.get(key)
+        if future is None:
+            if len(self._in_flight) >= HINT_MAX_PENDING:
+                raise HintUnavailable()
+
+            self._consume_rate_token(user_id)
+
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._get_executor(), compute_hints, state_bytes, top_n)
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+
+        try:
+            hints, depth = await asyncio.wait_for(
+                asyncio.shield(future), timeout=HINT_TIME_LIMIT + HINT_QUEUE_GRACE
+            )
+        except asyncio.TimeoutError:
+            raise HintUnavailable()
+
+        return hints, depth, False
+
+    def _finish(self, key: Tuple[bytes, int], future: asyncio.Future):
+        """분석 완료 시 진행 목록에서 제거하고 결과 캐시"""
+        self._in_flight.pop(key, None)
+        if future.cancelled() or future.exception() is not None:
+            return
+
+        # 시간 한도에 걸려 점수가 빠진 결과는 다음 요청에서 다시 분석
+        hints, _ = future.result()
+        if any(hint["score"] is None for hint in hints):
+            return
+
+        self._cache[key] = future.result()
+        self._cache.move_to_end(key)
+        while len(self._cache) > HINT_CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+
+# 전역 힌트 서비스
+hint_service = HintService()
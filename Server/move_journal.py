@@ -0,0 +1,358 @@
+# move_journal.py
+"""
+/game 수 기록용 write-behind 저널
+
+- 수는 메모리 저널에 추가하고 바로 반환 (DB 저장을 기다리지 않고 상대에게 전달)
+- 백그라운드 작업이 FLUSH_INTERVAL_MS마다, 또는 게임 종료 시 모인 수를 한 번에 저장
+  (db_executor가 있으면 쓰기 스레드로 보내 다른 쓰기와 함께 커밋, 없으면 워커 스레드에서 직접 커밋)
+- 저장 전의 수는 추가 전용 로그 파일(세그먼트)에도 기록하여 서버 프로세스가 죽어도 재시작 시 복구
+  (세그먼트는 OS 버퍼까지만 쓰고 fsync하지 않으므로 전달 지연이 디스크 속도와 무관)
+- 세그먼트는 워커마다 별도 디렉토리(JOURNAL_DIR/worker-<워커 ID>)에 기록하고,
+  워커는 실행 중 디렉토리의 잠금 파일(flock)을 계속 잡고 있음
+  시작 시에는 잠금을 잡을 수 있는 디렉토리(주인 워커가 종료됨)만 복구하므로 실행 중인 워커의 세그먼트는 건드리지 않음
+- 저장에 실패한 묶음은 반씩 나눠 다시 저장하고, 혼자서도 실패하는 수는 DEAD_LETTER_FILE에 기록 후 제외
+  (DB 잠김 등 일시적 오류는 묶음 전체를 다음 주기에 재시도)
+"""
+import asyncio
+import json
+import os
+import time
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from User import GameMove
+
+try:
+    import fcntl
+except ImportError:
+    # flock이 없는 환경(Windows)은 워커 하나로만 실행 (다른 워커 디렉토리는 항상 복구 대상)
+    fcntl = None
+
+# ================== 저널 설정 ==================
+JOURNAL_DIR = "./move_journal"     # 워커별 세그먼트 디렉토리의 상위 디렉토리
+FLUSH_INTERVAL_MS = 200            # 백그라운드 저장 주기
+SEGMENT_PREFIX = "segment-"
+WORKER_DIR_PREFIX = "worker-"
+OWNER_LOCK_FILE = "owner.lock"     # 워커 디렉토리의 주인이 실행 중인 동안 잡는 잠금
+RECOVERY_LOCK_FILE = "recovery.lock"   # 워커 디렉토리 생성과 복구를 한 번에 한 워커만 수행
+DEAD_LETTER_FILE = "dead-letter.log"   # 저장할 수 없는 수 (한 줄에 하나의 JSON)
+
+
+def add_journal_entries(db: Session, entries: List[Dict]):
+    """저널 항목을 GameMove로 추가 (커밋은 호출한 쪽에서, 제약 조건 위반은 이 작업 안에서 발생하도록 flush)"""
+    db.add_all([
+        GameMove(**{**entry, "move_timestamp": datetime.fromisoformat(entry["move_timestamp"])})
+        for entry in entries
+    ])
+    db.flush()
+
+
+def _try_lock(path: str):
+    """잠금 파일을 열고 배타적 잠금 시도 (다른 프로세스가 잡고 있으면 None)"""
+    lock_file = open(path, "a")
+    if fcntl is None:
+        return lock_file
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock_file.close()
+        return None
+    return lock_file
+
+
+class MoveJournal:
+    """게임 수 기록을 모아 두었다가 일괄 저장하는 저널 (이벤트 루프 하나에서 사용)"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        db_executor: Optional[Any] = None,
+        journal_dir: str = JOURNAL_DIR,
+        flush_interval_ms: int = FLUSH_INTERVAL_MS,
+        owner: Optional[str] = None
+    ):
+        self._session_factory = session_factory
+        self._db_executor = db_executor
+        self._journal_dir = journal_dir
+        self._worker_dir = os.path.join(journal_dir, f"{WORKER_DIR_PREFIX}{owner or os.getpid()}")
+        self._flush_interval = flush_interval_ms / 1000.0
+
+        # 아직 저장하지 않은 수 (일시적 오류로 저장하지 못한 수는 _retry에 보관 후 다음 주기에 재시도)
+        self._pending: List[Dict] = []
+        self._retry: List[Dict] = []
+        self._retry_segments: List[str] = []
+
+        self._owner_lock = None
+        self._segment = None
+        self._segment_path: Optional[str] = None
+        self._segment_index = 0
+
+        self._flush_lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+
+        # 통계
+        self.dead_letters = 0
+
+    # ---------------- 시작 / 종료 ----------------
+    def start(self):
+        """종료된 워커가 남긴 세그먼트를 복구하고, 이 워커의 디렉토리를 잠근 뒤 백그라운드 저장 시작"""
+        os.makedirs(self._journal_dir, exist_ok=True)
+
+        # 다른 워커가 복구 중에 이 워커의 디렉토리를 잠그기 전 상태로 보지 않도록 복구와 생성을 함께 잠금
+        recovery_lock = open(os.path.join(self._journal_dir, RECOVERY_LOCK_FILE), "a")
+        try:
+            if fcntl is not None:
+                fcntl.flock(recovery_lock, fcntl.LOCK_EX)
+            self.recover()
+            os.makedirs(self._worker_dir, exist_ok=True)
+            self._owner_lock = _try_lock(os.path.join(self._worker_dir, OWNER_LOCK_FILE))
+            if self._owner_lock is None:
+                raise RuntimeError(f"Journal directory is in use by another process: {self._worker_dir}")
+        finally:
+            recovery_lock.close()
+
+        self._open_segment()
+        self._flush_lock = asyncio.Lock()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """백그라운드 저장을 멈추고 남은 수를 모두 저장 (모두 저장했으면 이 워커의 디렉토리 삭제)"""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+        await self.flush()
+        if self._segment:
+            self._segment.close()
+            self._segment = None
+            if not self._pending and not self._retry:
+                os.remove(self._segment_path)
+
+        if self._owner_lock:
+            if not any(name.startswith(SEGMENT_PREFIX) for name in os.listdir(self._worker_dir)):
+                os.remove(os.path.join(self._worker_dir, OWNER_LOCK_FILE))
+                os.rmdir(self._worker_dir)
+            self._owner_lock.close()
+            self._owner_lock = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._flush_interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                print(f"[MoveJournal] Flush error: {e}")
+
+    # ---------------- 기록 ----------------
+    def record(
+        self,
+        game_id: int,
+        move_number: int,
+        player_id: int,
+        move_type: str,
+        position_from: Optional[str],
+        position_to: Optional[str] = None,
+        remaining_time: Optional[float] = None
+    ):
+        """
+        수를 저널에 추가 (DB에 접근하지 않음)
+        move_number는 게임 세션에서 받은 번호 (두 플레이어가 다른 워커에 연결해도 한 순서)
+        """
+        entry = {
+            "game_id": game_id,
+            "move_number": move_number,
+            "player_id": player_id,
+            "move_type": move_type,
+            "position_from": position_from,
+            "position_to": position_to,
+            "remaining_time": remaining_time,
+            "move_timestamp": datetime.now().isoformat(),
+        }
+        self._pending.append(entry)
+
+        # 프로세스가 죽어도 남도록 OS 버퍼까지 기록 (fsync 없음)
+        self._segment.write(json.dumps(entry) + "\n")
+        self._segment.flush()
+
+    # ---------------- 저장 ----------------
+    async def flush(self):
+        """모인 수를 한 트랜잭션으로 저장 (저장하거나 dead-letter로 옮긴 세그먼트는 삭제)"""
+        async with self._flush_lock:
+            if not self._pending and not self._retry:
+                return
+
+            entries = self._retry + self._pending
+            segments = self._retry_segments + [self._segment_path]
+            self._pending = []
+            self._open_segment()
+
+            try:
+                await self._save(entries)
+                unsaved = []
+            except OperationalError as e:
+                print(f"[MoveJournal] Database unavailable, will retry {len(entries)} moves: {e}")
+                unsaved = entries
+            except Exception as e:
+                print(f"[MoveJournal] Failed to save {len(entries)} moves, retrying in smaller batches: {e}")
+                unsaved = await self._save_isolating(entries)
+
+            if unsaved:
+                self._retry, self._retry_segments = unsaved, segments
+                return
+
+            self._retry, self._retry_segments = [], []
+            for path in segments:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    async def _save(self, entries: List[Dict]):
+        if self._db_executor is not None:
+            await self._db_executor.run(add_journal_entries, entries)
+        else:
+            await asyncio.to_thread(self._write_entries, entries)
+
+    async def _save_isolating(self, entries: List[Dict]) -> List[Dict]:
+        """
+        실패한 묶음을 반씩 나눠 저장하고, 혼자서도 실패하는 수는 dead-letter 파일로 옮김
+        도중에 일시적 오류가 나면 아직 저장하지 못한 수를 반환 (다음 주기에 재시도)
+        """
+        chunks = [entries]
+        while chunks:
+            chunk = chunks.pop()
+            try:
+                await self._save(chunk)
+            except OperationalError as e:
+                print(f"[MoveJournal] Database unavailable, will retry remaining moves: {e}")
+                return chunk + [entry for rest in reversed(chunks) for entry in rest]
+            except Exception as e:
+                if len(chunk) == 1:
+                    self._dead_letter(chunk[0], e)
+                    continue
+                middle = len(chunk) // 2
+                chunks.append(chunk[middle:])
+                chunks.append(chunk[:middle])
+        return []
+
+    def _dead_letter(self, entry: Dict, error: Exception):
+        """저장할 수 없는 수를 dead-letter 파일에 기록 (여러 워커가 같은 파일에 한 줄씩 추가)"""
+        self.dead_letters += 1
+        print(f"[MoveJournal] Dropping move {entry.get('game_id')}/{entry.get('move_number')}: {error}")
+        record = {"entry": entry, "error": str(error), "failed_at": datetime.now().isoformat()}
+        with open(os.path.join(self._journal_dir, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, default=str) + "\n")
+
+    def _write_entries(self, entries: List[Dict]):
+        """수 묶음을 별도 세션으로 저장 (복구 및 db_executor가 없을 때)"""
+        db = self._session_factory()
+        try:
+            add_journal_entries(db, entries)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _open_segment(self):
+        """새 세그먼트 파일 열기 (이전 세그먼트는 저장 후 삭제)"""
+        if self._segment:
+            self._segment.close()
+        self._segment_index += 1
+        self._segment_path = os.path.join(
+            self._worker_dir, f"{SEGMENT_PREFIX}{int(time.time() * 1000)}-{self._segment_index:06d}.log"
+        )
+        self._segment = open(self._segment_path, "a", encoding="utf-8")
+
+    # ---------------- 복구 ----------------
+    def recover(self) -> int:
+        """
+        주인 워커가 종료된 디렉토리의 세그먼트를 복구하고 디렉토리 삭제 (복구한 수 개수 반환)
+        실행 중인 워커의 디렉토리는 잠금을 잡을 수 없으므로 건너뜀
+        """
+        recovered = 0
+        for name in sorted(os.listdir(self._journal_dir)):
+            worker_dir = os.path.join(self._journal_dir, name)
+            if not name.startswith(WORKER_DIR_PREFIX) or worker_dir == self._worker_dir:
+                continue
+            if not os.path.isdir(worker_dir):
+                continue
+
+            lock_file = _try_lock(os.path.join(worker_dir, OWNER_LOCK_FILE))
+            if lock_file is None:
+                continue
+            try:
+                recovered += self._recover_directory(worker_dir)
+                os.remove(os.path.join(worker_dir, OWNER_LOCK_FILE))
+                os.rmdir(worker_dir)
+            finally:
+                lock_file.close()
+        return recovered
+
+    def _recover_directory(self, worker_dir: str) -> int:
+        """
+        세그먼트의 수 중 DB에 없는 것만 저장 후 세그먼트 삭제
+        저장 직후 세그먼트 삭제 전에 종료된 경우를 위해 (game_id, move_number)로 중복 제외
+        """
+        paths = sorted(
+            os.path.join(worker_dir, name)
+            for name in os.listdir(worker_dir) if name.startswith(SEGMENT_PREFIX)
+        )
+
+        entries = []
+        for path in paths:
+            with open(path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        # 기록 도중 종료된 마지막 줄
+                        continue
+
+        missing = []
+        if entries:
+            db = self._session_factory()
+            try:
+                game_ids = {entry["game_id"] for entry in entries}
+                saved = {
+                    tuple(row) for row in db.execute(
+                        select(GameMove.game_id, GameMove.move_number).where(GameMove.game_id.in_(game_ids))
+                    )
+                }
+                for entry in entries:
+                    key = (entry["game_id"], entry["move_number"])
+                    if key not in saved:
+                        saved.add(key)
+                        missing.append(entry)
+            finally:
+                db.close()
+
+        if missing:
+            try:
+                self._write_entries(missing)
+            except OperationalError:
+                raise
+            except Exception as e:
+                print(f"[MoveJournal] Failed to recover {len(missing)} moves, saving one by one: {e}")
+                for entry in missing:
+                    try:
+                        self._write_entries([entry])
+                    except OperationalError:
+                        raise
+                    except Exception as entry_error:
+                        self._dead_letter(entry, entry_error)
+
+        for path in paths:
+            os.remove(path)
+
+        print(f"[MoveJournal] Recovered {len(missing)} unsaved moves from {len(paths)} segments in {worker_dir}")
+        return len(missing)
@@ -7,17 +7,178 @@ Date: 2025
 License: Commercial Use Allowed
 """
 
-from typing import Tuple, Optional, List, Set, Dict
+from typing import Tuple, Optional, List, Set, Dict, Iterator
+from array import array
 from collections import deque
 from copy import deepcopy
+import contextlib
+import heapq
+import io
+import json
+import logging
+import math
+import os
+import threading
 import time
 from functools import lru_cache
 
+try:
+    import numpy as np
+except ImportError:  # NumPy가 없으면 배치 평가를 사용하지 않고 기존 경로로 동작
+    np = None
+
+logger = logging.getLogger(__name__)
+
 
 # ============================================================================
 # SECTION 1: Game State Management
 # ============================================================================
 
+# 보드 조회 테이블 (좌표 계산/경계 검사 없이 조회와 비트 검사만으로 이동 판정)
+# - 칸 인덱스: (y // 2) * 9 + (x // 2)
+# - 벽 비트: 가로 벽 ((y - 1) // 2) * 8 + (x - 1) // 2, 세로 벽은 여기에 64를 더한 값
+# - 이동 방향 순서는 (오른쪽, 왼쪽, 아래, 위)로 기존 탐색 순서와 동일
+BOARD_CELLS = 9
+WALL_GRID = 8
+VERTICAL_WALL_BIT_OFFSET = WALL_GRID * WALL_GRID
+
+# 칸 인덱스 -> (y, x) 17x17 좌표
+CELL_POSITIONS: List[Tuple[int, int]] = [
+    (r * 2, c * 2) for r in range(BOARD_CELLS) for c in range(BOARD_CELLS)
+]
+
+_STEP_DIRECTIONS = [(0, 1), (0, -1), (1, 0), (-1, 0)]
+
+# 17x17 좌표 이동량 -> 방향 번호
+_STEP_TO_DIRECTION = {(dr * 2, dc * 2): d for d, (dr, dc) in enumerate(_STEP_DIRECTIONS)}
+
+
+def wall_bit(wall_type: str, y: int, x: int) -> int:
+    """벽 좌표(17x17)의 비트 위치"""
+    slot = ((y - 1) // 2) * WALL_GRID + (x - 1) // 2
+    return slot + VERTICAL_WALL_BIT_OFFSET if wall_type == 'vertical' else slot
+
+
+def _edge_blockers(r: int, c: int, dr: int, dc: int) -> Optional[int]:
+    """칸 (r, c)에서 (dr, dc) 방향 간선을 막는 벽 비트 마스크 (보드 밖이면 None)"""
+    nr, nc = r + dr, c + dc
+    if not (0 <= nr < BOARD_CELLS and 0 <= nc < BOARD_CELLS):
+        return None
+
+    mask = 0
+    if dr != 0:
+        # 위/아래 이동은 두 칸 사이 행의 가로 벽 중 열이 c - 1, c인 벽이 막음
+        wall_row = min(r, nr)
+        for wall_col in (c - 1, c):
+            if 0 <= wall_col < WALL_GRID:
+                mask |= 1 << (wall_row * WALL_GRID + wall_col)
+    else:
+        # 좌/우 이동은 두 칸 사이 열의 세로 벽 중 행이 r - 1, r인 벽이 막음
+        wall_col = min(c, nc)
+        for wall_row in (r - 1, r):
+            if 0 <= wall_row < WALL_GRID:
+                mask |= 1 << (VERTICAL_WALL_BIT_OFFSET + wall_row * WALL_GRID + wall_col)
+    return mask
+
+
+# 칸별 방향별 (이웃 칸, 막는 벽 마스크), 보드 밖 방향은 None
+_EDGE_TABLE: List[List[Optional[Tuple[int, int]]]] = []
+for _r in range(BOARD_CELLS):
+    for _c in range(BOARD_CELLS):
+        _edges = []
+        for _dr, _dc in _STEP_DIRECTIONS:
+            _mask = _edge_blockers(_r, _c, _dr, _dc)
+            _edges.append(None if _mask is None else ((_r + _dr) * BOARD_CELLS + _c + _dc, _mask))
+        _EDGE_TABLE.append(_edges)
+
+# 칸별 보드 안 이웃 목록 ((이웃 칸, 막는 벽 마스크), ...) - BFS용
+NEIGHBOR_TABLE: List[Tuple[Tuple[int, int], ...]] = [
+    tuple(edge for edge in edges if edge is not None) for edges in _EDGE_TABLE
+]
+
+# 칸별 말 이동 테이블: 방향마다
+# (이웃 칸, 막는 벽, 직선 점프 칸(-1: 보드 밖), 직선 점프를 막는 벽, ((대각선 칸, 막는 벽), ...))
+# 상대가 이웃 칸에 있을 때 점프/대각선 점프 대상을 미리 계산
+_DIAGONAL_SIDES = {0: (3, 2), 1: (3, 2), 2: (1, 0), 3: (1, 0)}
+MOVE_TABLE: List[Tuple[Tuple[int, int, int, int, Tuple[Tuple[int, int], ...]], ...]] = []
+for _cell in range(BOARD_CELLS * BOARD_CELLS):
+    _entries = []
+    for _d, _edge in enumerate(_EDGE_TABLE[_cell]):
+        if _edge is None:
+            continue
+        _neighbor, _mask = _edge
+        _jump = _EDGE_TABLE[_neighbor][_d]
+        _diagonals = tuple(
+            _EDGE_TABLE[_neighbor][_side] for _side in _DIAGONAL_SIDES[_d]
+            if _EDGE_TABLE[_neighbor][_side] is not None
+        )
+        _entries.append((
+            _neighbor, _mask,
+            _jump[0] if _jump else -1, _jump[1] if _jump else 0,
+            _diagonals
+        ))
+    MOVE_TABLE.append(tuple(_entries))
+
+# int 해시는 2^61 - 1로 나눈 나머지라 128비트 마스크는 60비트씩 나눠 해시 (충돌 방지)
+WALL_HASH_CHUNK = (1 << 60) - 1
+
+# 상태 직렬화 (to_bytes / to_fen)
+# - 이진: [Red 칸 | 차례(Blue=1) << 7][Blue 칸][Red 남은 벽 << 4 | Blue 남은 벽][벽 비트맵 16바이트, little endian]
+# - 텍스트: "<Red 칸> <Blue 칸> <벽 목록 또는 -> <Red 남은 벽> <Blue 남은 벽> <r|b>" (예: "e1 e9 d2h,e5v 9 10 b")
+#   칸은 열 a~i(x 증가 방향) + 행 1~9(Red 출발 줄이 1), 벽은 중심의 왼쪽 위 칸 + h/v
+STATE_BYTES = 19
+FEN_COLUMNS = "abcdefghi"
+FEN_MAX_LENGTH = 100   # 벽 20개를 모두 적은 가장 긴 표현(91자)보다 약간 길게
+
+# 벽 슬롯(0~63) -> 벽 중심 (y, x) 17x17 좌표 (가로/세로 공통)
+WALL_BIT_CENTERS: List[Tuple[int, int]] = [
+    (r * 2 + 1, c * 2 + 1) for r in range(WALL_GRID) for c in range(WALL_GRID)
+]
+WALL_SLOTS_MASK = (1 << VERTICAL_WALL_BIT_OFFSET) - 1
+
+# 오른쪽 이웃 슬롯이 같은 행에 있는 슬롯 (마지막 열 제외)
+WALL_RIGHT_NEIGHBOR_MASK = sum(
+    1 << (r * WALL_GRID + c) for r in range(WALL_GRID) for c in range(WALL_GRID - 1)
+)
+
+# 벽 행 하나(8슬롯)의 비트 패턴 -> 벽 중심 목록 (행별 조회로 비트 단위 반복을 피함)
+_WALL_ROW_CENTERS: List[List[Tuple[Tuple[int, int], ...]]] = [
+    [
+        tuple(WALL_BIT_CENTERS[r * WALL_GRID + c] for c in range(WALL_GRID) if pattern >> c & 1)
+        for pattern in range(1 << WALL_GRID)
+    ]
+    for r in range(WALL_GRID)
+]
+
+
+def _walls_from_rows(rows: bytes) -> Set[Tuple[int, int]]:
+    """벽 행별 비트 패턴(8바이트)의 벽 중심 집합"""
+    walls = set()
+    for row, pattern in enumerate(rows):
+        if pattern:
+            walls.update(_WALL_ROW_CENTERS[row][pattern])
+    return walls
+
+# 벽 비트별로 함께 놓일 수 없는 벽 마스크 (같은 자리, 교차, 같은 방향으로 겹침)
+WALL_CONFLICTS: List[int] = [0] * (2 * WALL_GRID * WALL_GRID)
+for _row in range(WALL_GRID):
+    for _col in range(WALL_GRID):
+        _slot = _row * WALL_GRID + _col
+        _h, _v = _slot, _slot + VERTICAL_WALL_BIT_OFFSET
+        _h_mask = (1 << _h) | (1 << _v)
+        _v_mask = (1 << _h) | (1 << _v)
+        if _col > 0:
+            _h_mask |= 1 << (_h - 1)
+        if _col < WALL_GRID - 1:
+            _h_mask |= 1 << (_h + 1)
+        if _row > 0:
+            _v_mask |= 1 << (_v - WALL_GRID)
+        if _row < WALL_GRID - 1:
+            _v_mask |= 1 << (_v + WALL_GRID)
+        WALL_CONFLICTS[_h] = _h_mask
+        WALL_CONFLICTS[_v] = _v_mask
+
+
 class QuoridorGameState:
     """
     Quoridor 게임 상태를 관리하는 클래스
@@ -31,6 +192,11 @@ class QuoridorGameState:
     BOARD_SIZE = 17
     INITIAL_WALLS = 10
 
+    __slots__ = (
+        'red_pos', 'blue_pos', 'red_walls', 'blue_walls',
+        'horizontal_walls', 'vertical_walls', 'wall_mask', 'current_player'
+    )
+
     def __init__(self):
         """게임 상태 초기화"""
         # 플레이어 위치 (y, x) - 짝수 좌표만 사용
@@ -45,18 +211,23 @@ class QuoridorGameState:
         self.horizontal_walls: Set[Tuple[int, int]] = set()
         self.vertical_walls: Set[Tuple[int, int]] = set()
 
+        # 배치된 벽의 비트 마스크 (벽 집합과 항상 함께 갱신, 조회 테이블과의 비트 검사용)
+        self.wall_mask = 0
+
         # 현재 턴 ('red' 또는 'blue')
         self.current_player = 'red'
 
     def copy(self) -> 'QuoridorGameState':
         """게임 상태의 깊은 복사본 반환"""
-        new_state = QuoridorGameState()
+        # 초기화 과정을 생략하고 필드만 복사
+        new_state = QuoridorGameState.__new__(QuoridorGameState)
         new_state.red_pos = self.red_pos
         new_state.blue_pos = self.blue_pos
         new_state.red_walls = self.red_walls
         new_state.blue_walls = self.blue_walls
         new_state.horizontal_walls = self.horizontal_walls.copy()
         new_state.vertical_walls = self.vertical_walls.copy()
+        new_state.wall_mask = self.wall_mask
         new_state.current_player = self.current_player
         return new_state
 
@@ -91,88 +262,45 @@ class QuoridorGameState:
         두 칸 사이에 벽이 있는지 확인 (17x17 좌표계)
         플레이어는 짝수 좌표에만 있고, 2칸씩 이동함
         """
-        # 위로 이동 (y1 - 2)
-        if y2 == y1 - 2 and x2 == x1:
-            wall_y = y1 - 1  # 사이의 홀수 좌표
-            # 가로 벽이 (wall_y, x1-1), (wall_y, x1), (wall_y, x1+1) 중 하나에 있으면 막힘
-            return ((wall_y, x1) in self.horizontal_walls or
-                    (wall_y, x1 - 1) in self.horizontal_walls or
-                    (wall_y, x1 + 1) in self.horizontal_walls)
-
-        # 아래로 이동 (y1 + 2)
-        if y2 == y1 + 2 and x2 == x1:
-            wall_y = y1 + 1  # 사이의 홀수 좌표
-            return ((wall_y, x1) in self.horizontal_walls or
-                    (wall_y, x1 - 1) in self.horizontal_walls or
-                    (wall_y, x1 + 1) in self.horizontal_walls)
-
-        # 왼쪽으로 이동 (x1 - 2)
-        if y2 == y1 and x2 == x1 - 2:
-            wall_x = x1 - 1  # 사이의 홀수 좌표
-            # 세로 벽이 (y1-1, wall_x), (y1, wall_x), (y1+1, wall_x) 중 하나에 있으면 막힘
-            return ((y1, wall_x) in self.vertical_walls or
-                    (y1 - 1, wall_x) in self.vertical_walls or
-                    (y1 + 1, wall_x) in self.vertical_walls)
-
-        # 오른쪽으로 이동 (x1 + 2)
-        if y2 == y1 and x2 == x1 + 2:
-            wall_x = x1 + 1  # 사이의 홀수 좌표
-            return ((y1, wall_x) in self.vertical_walls or
-                    (y1 - 1, wall_x) in self.vertical_walls or
-                    (y1 + 1, wall_x) in self.vertical_walls)
+        direction = _STEP_TO_DIRECTION.get((y2 - y1, x2 - x1))
+        if direction is None:
+            return False
 
-        return False
+        edge = _EDGE_TABLE[(y1 // 2) * BOARD_CELLS + x1 // 2][direction]
+        return edge is not None and bool(self.wall_mask & edge[1])
 
     def can_move_to(self, from_y: int, from_x: int, to_y: int, to_x: int) -> bool:
         """이동 가능한지 확인 (17x17 좌표계: 2칸씩 이동)"""
         if not self.is_valid_position(to_y, to_x):
             return False
-        dy = abs(to_y - from_y)
-        dx = abs(to_x - from_x)
-        # 17x17 좌표계에서는 2칸씩 이동
-        if not ((dy == 2 and dx == 0) or (dy == 0 and dx == 2)):
-            return False
-        if self.is_wall_between(from_y, from_x, to_y, to_x):
+        direction = _STEP_TO_DIRECTION.get((to_y - from_y, to_x - from_x))
+        if direction is None:
             return False
-        return True
+        edge = _EDGE_TABLE[(from_y // 2) * BOARD_CELLS + from_x // 2][direction]
+        return edge is not None and not self.wall_mask & edge[1]
 
     def get_valid_moves(self, player: str) -> List[Tuple[int, int]]:
         """플레이어가 이동할 수 있는 모든 유효한 위치 반환 (점프 포함, 17x17 좌표계)"""
         y, x = self.get_player_position(player)
-        opponent_pos = self.get_player_position(self.get_opponent(player))
+        oy, ox = self.get_player_position(self.get_opponent(player))
+        opponent_cell = (oy // 2) * BOARD_CELLS + ox // 2
+        mask = self.wall_mask
         valid_moves = []
 
-        # 17x17 좌표계에서는 2칸씩 이동
-        directions = [(0, 2), (0, -2), (2, 0), (-2, 0)]
-
-        for dy, dx in directions:
-            ny, nx = y + dy, x + dx
-
-            if not self.can_move_to(y, x, ny, nx):
+        for neighbor, blockers, jump, jump_blockers, diagonals in MOVE_TABLE[(y // 2) * BOARD_CELLS + x // 2]:
+            if mask & blockers:
                 continue
 
-            if (ny, nx) == opponent_pos:
-                # 점프 시도 (상대방을 넘어서 2칸 더 이동)
-                jump_y, jump_x = ny + dy, nx + dx
-                if (self.is_valid_position(jump_y, jump_x) and
-                    not self.is_wall_between(ny, nx, jump_y, jump_x)):
-                    valid_moves.append((jump_y, jump_x))
-                else:
-                    # 대각선 점프 (2칸씩)
-                    if dy != 0:
-                        for side_dx in [-2, 2]:
-                            side_x = nx + side_dx
-                            if (self.is_valid_position(ny, side_x) and
-                                not self.is_wall_between(ny, nx, ny, side_x)):
-                                valid_moves.append((ny, side_x))
-                    else:
-                        for side_dy in [-2, 2]:
-                            side_y = ny + side_dy
-                            if (self.is_valid_position(side_y, nx) and
-                                not self.is_wall_between(ny, nx, side_y, nx)):
-                                valid_moves.append((side_y, nx))
+            if neighbor != opponent_cell:
+                valid_moves.append(CELL_POSITIONS[neighbor])
+            elif jump >= 0 and not mask & jump_blockers:
+                # 상대방을 넘어 직선 점프
+                valid_moves.append(CELL_POSITIONS[jump])
             else:
-                valid_moves.append((ny, nx))
+                # 직선 점프가 막혔으면 대각선 점프
+                for side, side_blockers in diagonals:
+                    if not mask & side_blockers:
+                        valid_moves.append(CELL_POSITIONS[side])
 
         return valid_moves
 
@@ -181,59 +309,40 @@ class QuoridorGameState:
         벽을 배치할 수 있는지 확인 (17x17 좌표계)
         벽은 홀수 좌표(1,3,5,...,15)에만 배치 가능
         """
-        # 홀수 좌표 범위 확인 (1~15)
-        if not (1 <= y <= 15 and 1 <= x <= 15):
+        if not self.can_fit_wall(wall_type, y, x):
             return False
 
-        # 홀수 좌표인지 확인
-        if y % 2 == 0 or x % 2 == 0:
-            return False
-
-        if wall_type == 'horizontal':
-            # 이미 같은 위치에 벽이 있는지 확인
-            if (y, x) in self.horizontal_walls:
-                return False
-            if (y, x) in self.vertical_walls:
-                return False
-            # 가로 벽은 좌우로 2칸씩 겹치면 안됨
-            if (y, x - 2) in self.horizontal_walls:
-                return False
-            if (y, x + 2) in self.horizontal_walls:
-                return False
-        else:  # vertical
-            # 이미 같은 위치에 벽이 있는지 확인
-            if (y, x) in self.vertical_walls:
-                return False
-            if (y, x) in self.horizontal_walls:
-                return False
-            # 세로 벽은 위아래로 2칸씩 겹치면 안됨
-            if (y - 2, x) in self.vertical_walls:
-                return False
-            if (y + 2, x) in self.vertical_walls:
-                return False
-
         # 경로 검증: 벽을 놓아도 양쪽 플레이어 모두 목표에 도달할 수 있어야 함
         # 임시로 벽 배치
-        if wall_type == 'horizontal':
-            self.horizontal_walls.add((y, x))
-        else:
-            self.vertical_walls.add((y, x))
+        self._add_wall(wall_type, y, x)
 
         # 양쪽 플레이어가 목표에 도달할 수 있는지 확인
         red_can_reach = shortest_distance_to_goal(self, 'red') < 999
         blue_can_reach = shortest_distance_to_goal(self, 'blue') < 999
 
         # 임시 벽 제거
-        if wall_type == 'horizontal':
-            self.horizontal_walls.discard((y, x))
-        else:
-            self.vertical_walls.discard((y, x))
+        self.remove_wall(wall_type, y, x)
 
         if not (red_can_reach and blue_can_reach):
             return False
 
         return True
 
+    def can_fit_wall(self, wall_type: str, y: int, x: int) -> bool:
+        """
+        벽이 보드 범위 안에 있고 기존 벽과 겹치지 않는지 확인 (경로 검증 제외)
+        """
+        # 홀수 좌표 범위 확인 (1~15)
+        if not (1 <= y <= 15 and 1 <= x <= 15):
+            return False
+
+        # 홀수 좌표인지 확인
+        if y % 2 == 0 or x % 2 == 0:
+            return False
+
+        # 같은 위치, 교차, 같은 방향으로 2칸 겹침을 한 번의 비트 검사로 확인
+        return not self.wall_mask & WALL_CONFLICTS[wall_bit(wall_type, y, x)]
+
     def place_wall(self, player: str, wall_type: str, y: int, x: int) -> bool:
         """벽 배치"""
         walls_left = self.get_player_walls(player)
@@ -243,10 +352,7 @@ class QuoridorGameState:
         if not self.can_place_wall(wall_type, y, x):
             return False
 
-        if wall_type == 'horizontal':
-            self.horizontal_walls.add((y, x))
-        else:
-            self.vertical_walls.add((y, x))
+        self._add_wall(wall_type, y, x)
 
         if player == 'red':
             self.red_walls -= 1
@@ -255,12 +361,32 @@ class QuoridorGameState:
 
         return True
 
+    def place_wall_unchecked(self, player: str, wall_type: str, y: int, x: int):
+        """검증 없이 벽 배치 후 턴 변경 (탐색에서 이미 검증된 수 적용용)"""
+        self._add_wall(wall_type, y, x)
+
+        if player == 'red':
+            self.red_walls -= 1
+        else:
+            self.blue_walls -= 1
+
+        self.current_player = self.get_opponent(player)
+
+    def _add_wall(self, wall_type: str, y: int, x: int):
+        """벽 집합과 비트 마스크에 벽 추가 (검증 없음)"""
+        if wall_type == 'horizontal':
+            self.horizontal_walls.add((y, x))
+        else:
+            self.vertical_walls.add((y, x))
+        self.wall_mask |= 1 << wall_bit(wall_type, y, x)
+
     def remove_wall(self, wall_type: str, y: int, x: int):
         """벽 제거 (되돌리기용)"""
         if wall_type == 'horizontal':
             self.horizontal_walls.discard((y, x))
         else:
             self.vertical_walls.discard((y, x))
+        self.wall_mask &= ~(1 << wall_bit(wall_type, y, x))
 
     def make_move(self, player: str, y: int, x: int) -> bool:
         """플레이어 이동"""
@@ -296,15 +422,141 @@ class QuoridorGameState:
 
     def get_hash(self) -> int:
         """게임 상태의 해시값 반환 (캐싱용)"""
+        mask = self.wall_mask
         return hash((
             self.red_pos,
             self.blue_pos,
             self.red_walls,
             self.blue_walls,
-            frozenset(self.horizontal_walls),
-            frozenset(self.vertical_walls)
+            mask & WALL_HASH_CHUNK,
+            (mask >> 60) & WALL_HASH_CHUNK,
+            mask >> 120
         ))
 
+    def __eq__(self, other) -> bool:
+        """말 위치, 남은 벽, 벽 배치, 차례가 모두 같으면 같은 상태"""
+        if not isinstance(other, QuoridorGameState):
+            return NotImplemented
+        return (self.red_pos == other.red_pos and self.blue_pos == other.blue_pos and
+                self.red_walls == other.red_walls and self.blue_walls == other.blue_walls and
+                self.wall_mask == other.wall_mask and self.current_player == other.current_player)
+
+    def __hash__(self) -> int:
+        return self.get_hash()
+
+    def to_bytes(self) -> bytes:
+        """고정 크기(STATE_BYTES) 이진 표현 (캐시 키, 프로세스 간 전달용)"""
+        red_cell = (self.red_pos[0] // 2) * BOARD_CELLS + self.red_pos[1] // 2
+        blue_cell = (self.blue_pos[0] // 2) * BOARD_CELLS + self.blue_pos[1] // 2
+        side = 1 if self.current_player == 'blue' else 0
+        header = bytes((red_cell | side << 7, blue_cell, self.red_walls << 4 | self.blue_walls))
+        return header + self.wall_mask.to_bytes(16, 'little')
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> 'QuoridorGameState':
+        """to_bytes 결과로 상태 복원 (형식이 잘못되면 ValueError)"""
+        if len(data) != STATE_BYTES:
+            raise ValueError(f"State must be {STATE_BYTES} bytes")
+        return cls._from_fields(
+            data[0] & 0x7F, data[1], data[2] >> 4, data[2] & 0x0F,
+            data[3:], 'blue' if data[0] >> 7 else 'red'
+        )
+
+    def to_fen(self) -> str:
+        """짧은 텍스트 표현 (로그, 디버깅, API용)"""
+        def cell_name(y: int, x: int) -> str:
+            return f"{FEN_COLUMNS[x // 2]}{BOARD_CELLS - y // 2}"
+
+        # 비트 순서(가로 벽 먼저, 각각 행/열 순)로 나열하여 같은 상태는 항상 같은 문자열
+        walls = []
+        for bit in range(2 * VERTICAL_WALL_BIT_OFFSET):
+            if self.wall_mask >> bit & 1:
+                y, x = WALL_BIT_CENTERS[bit % VERTICAL_WALL_BIT_OFFSET]
+                walls.append(cell_name(y - 1, x - 1) + ('v' if bit >= VERTICAL_WALL_BIT_OFFSET else 'h'))
+
+        return " ".join((
+            cell_name(*self.red_pos),
+            cell_name(*self.blue_pos),
+            ",".join(walls) or "-",
+            str(self.red_walls),
+            str(self.blue_walls),
+            self.current_player[0]
+        ))
+
+    @classmethod
+    def from_fen(cls, text: str) -> 'QuoridorGameState':
+        """to_fen 결과로 상태 복원 (형식이 잘못되면 ValueError)"""
+        def cell_index(name: str) -> int:
+            column = FEN_COLUMNS.find(name[:1])
+            row = int(name[1:]) if name[1:].isdigit() else 0
+            if len(name) != 2 or column < 0 or not 1 <= row <= BOARD_CELLS:
+                raise ValueError(f"Invalid cell: {name}")
+            return (BOARD_CELLS - row) * BOARD_CELLS + column
+
+        if len(text) > FEN_MAX_LENGTH:
+            raise ValueError(f"Position must be at most {FEN_MAX_LENGTH} characters")
+
+        fields = text.split()
+        if len(fields) != 6 or fields[5] not in ('r', 'b'):
+            raise ValueError("Expected '<red> <blue> <walls> <red walls> <blue walls> <r|b>'")
+
+        mask = 0
+        if fields[2] != '-':
+            for wall in fields[2].split(','):
+                if len(wall) != 3 or wall[2] not in ('h', 'v'):
+                    raise ValueError(f"Invalid wall: {wall}")
+                row, column = divmod(cell_index(wall[:2]), BOARD_CELLS)
+                if row >= WALL_GRID or column >= WALL_GRID:
+                    raise ValueError(f"Invalid wall: {wall}")
+                slot = row * WALL_GRID + column
+                bit = 1 << (slot + VERTICAL_WALL_BIT_OFFSET if wall[2] == 'v' else slot)
+                if mask & bit:
+                    raise ValueError(f"Duplicate wall: {wall}")
+                mask |= bit
+
+        if not (fields[3].isdigit() and fields[4].isdigit()):
+            raise ValueError("Wall counts must be numbers")
+
+        return cls._from_fields(
+            cell_index(fields[0]), cell_index(fields[1]), int(fields[3]), int(fields[4]),
+            mask.to_bytes(16, 'little'), 'red' if fields[5] == 'r' else 'blue'
+        )
+
+    @classmethod
+    def _from_fields(
+        cls, red_cell: int, blue_cell: int, red_walls: int, blue_walls: int, wall_bytes: bytes, current_player: str
+    ) -> 'QuoridorGameState':
+        """직렬화 필드 검증 후 상태 생성 (경로 존재 여부는 검사하지 않음)"""
+        wall_mask = int.from_bytes(wall_bytes, 'little')
+        cell_count = BOARD_CELLS * BOARD_CELLS
+        if not (red_cell < cell_count and blue_cell < cell_count) or red_cell == blue_cell:
+            raise ValueError("Invalid pawn cells")
+
+        wall_count = bin(wall_mask).count('1')
+        if (red_walls > cls.INITIAL_WALLS or blue_walls > cls.INITIAL_WALLS or
+                red_walls + blue_walls + wall_count > cls.INITIAL_WALLS * 2):
+            raise ValueError("Invalid wall counts")
+
+        state = cls.__new__(cls)
+        state.red_pos = CELL_POSITIONS[red_cell]
+        state.blue_pos = CELL_POSITIONS[blue_cell]
+        state.red_walls = red_walls
+        state.blue_walls = blue_walls
+        state.wall_mask = wall_mask
+        state.current_player = current_player
+
+        # 교차(같은 슬롯), 같은 행의 가로 벽 이웃, 같은 열의 세로 벽 이웃이 있으면 겹침
+        horizontal_mask = wall_mask & WALL_SLOTS_MASK
+        vertical_mask = wall_mask >> VERTICAL_WALL_BIT_OFFSET
+        if (horizontal_mask & vertical_mask or
+                horizontal_mask & (horizontal_mask >> 1) & WALL_RIGHT_NEIGHBOR_MASK or
+                vertical_mask & (vertical_mask >> WALL_GRID)):
+            raise ValueError("Overlapping walls")
+
+        state.horizontal_walls = _walls_from_rows(wall_bytes[:WALL_GRID])
+        state.vertical_walls = _walls_from_rows(wall_bytes[WALL_GRID:])
+        return state
+
     def __repr__(self) -> str:
         """게임 상태를 문자열로 표현"""
         board = [['.' for _ in range(self.BOARD_SIZE)] for _ in range(self.BOARD_SIZE)]
@@ -338,9 +590,21 @@ class QuoridorGameState:
 # SECTION 2: Pathfinding Algorithms
 # ============================================================================
 
+CELL_COUNT = 9
+UNREACHABLE = 999
+
+# 칸별 막힌 방향 비트 (9x9 칸 단위, 배치 평가용)
+BLOCK_NORTH = 1  # y 감소 방향
+BLOCK_SOUTH = 2  # y 증가 방향
+BLOCK_WEST = 4   # x 감소 방향
+BLOCK_EAST = 8   # x 증가 방향
+
+
 class PathfindingCache:
     """BFS 결과를 캐싱하여 성능 향상"""
 
+    __slots__ = ('distance_cache', 'path_cache', 'max_size')
+
     def __init__(self, max_size: int = 10000):
         self.distance_cache: Dict[Tuple[int, str], int] = {}
         self.path_cache: Dict[Tuple[int, str], List[Tuple[int, int]]] = {}
@@ -393,31 +657,28 @@ def shortest_distance_to_goal(state: QuoridorGameState, player: str, use_cache:
         if cached_distance is not None:
             return cached_distance
 
-    start_pos = state.get_player_position(player)
-    goal_line = state.get_goal_line(player)
+    start_y, start_x = state.get_player_position(player)
+    goal_row = state.get_goal_line(player) // 2
+    start = (start_y // 2) * BOARD_CELLS + start_x // 2
+    mask = state.wall_mask
 
-    queue = deque([(start_pos, 0)])
-    visited: Set[Tuple[int, int]] = {start_pos}
+    queue = deque([(start, 0)])
+    visited = bytearray(BOARD_CELLS * BOARD_CELLS)
+    visited[start] = 1
 
     while queue:
-        (y, x), distance = queue.popleft()
+        cell, distance = queue.popleft()
 
-        if y == goal_line:
+        if cell // BOARD_CELLS == goal_row:
             # 캐시에 저장
             if use_cache:
                 _pathfinding_cache.set_distance(state_hash, player, distance)
             return distance
 
-        # 17x17 좌표계에서는 2칸씩 이동
-        for dy, dx in [(0, 2), (0, -2), (2, 0), (-2, 0)]:
-            ny, nx = y + dy, x + dx
-
-            if (state.is_valid_position(ny, nx) and
-                (ny, nx) not in visited and
-                state.can_move_to(y, x, ny, nx)):
-
-                visited.add((ny, nx))
-                queue.append(((ny, nx), distance + 1))
+        for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+            if not visited[neighbor] and not mask & blockers:
+                visited[neighbor] = 1
+                queue.append((neighbor, distance + 1))
 
     # 캐시에 저장
     if use_cache:
@@ -434,32 +695,35 @@ def get_shortest_path(state: QuoridorGameState, player: str, use_cache: bool = T
         if cached_path is not None:
             return cached_path
 
-    start_pos = state.get_player_position(player)
-    goal_line = state.get_goal_line(player)
+    start_y, start_x = state.get_player_position(player)
+    goal_row = state.get_goal_line(player) // 2
+    start = (start_y // 2) * BOARD_CELLS + start_x // 2
+    mask = state.wall_mask
 
-    queue = deque([(start_pos, [start_pos])])
-    visited: Set[Tuple[int, int]] = {start_pos}
+    # 경로 목록 대신 부모 칸만 기록하고 목표 도달 시 역추적
+    queue = deque([start])
+    parent = [-1] * (BOARD_CELLS * BOARD_CELLS)
+    parent[start] = start
 
     while queue:
-        (y, x), path = queue.popleft()
+        cell = queue.popleft()
+
+        if cell // BOARD_CELLS == goal_row:
+            path = [CELL_POSITIONS[cell]]
+            while cell != start:
+                cell = parent[cell]
+                path.append(CELL_POSITIONS[cell])
+            path.reverse()
 
-        if y == goal_line:
             # 캐시에 저장
             if use_cache:
                 _pathfinding_cache.set_path(state_hash, player, path)
             return path
 
-        # 17x17 좌표계에서는 2칸씩 이동
-        for dy, dx in [(0, 2), (0, -2), (2, 0), (-2, 0)]:
-            ny, nx = y + dy, x + dx
-
-            if (state.is_valid_position(ny, nx) and
-                (ny, nx) not in visited and
-                state.can_move_to(y, x, ny, nx)):
-
-                visited.add((ny, nx))
-                new_path = path + [(ny, nx)]
-                queue.append(((ny, nx), new_path))
+        for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+            if parent[neighbor] < 0 and not mask & blockers:
+                parent[neighbor] = cell
+                queue.append(neighbor)
 
     # 캐시에 저장
     if use_cache:
@@ -473,45 +737,203 @@ def has_valid_path_to_goal(state: QuoridorGameState, player: str) -> bool:
 
 
 def count_paths_to_goal(state: QuoridorGameState, player: str, max_paths: int = 10) -> int:
-    """플레이어가 목표까지 가는 경로의 개수 카운트 (17x17 좌표계)"""
-    start_pos = state.get_player_position(player)
-    goal_line = state.get_goal_line(player)
+    """
+    플레이어가 목표까지 가는 최단 경로의 개수 (17x17 좌표계, max_paths에서 상한)
 
-    path_count = [0]
-    visited_in_current_path: Set[Tuple[int, int]] = set()
+    BFS 층(layer)을 따라 각 칸까지의 최단 경로 수를 누적하는 DP라 보드 크기에 대해 다항 시간
+    """
+    start_y, start_x = state.get_player_position(player)
+    goal_row = state.get_goal_line(player) // 2
+    start = (start_y // 2) * BOARD_CELLS + start_x // 2
+    mask = state.wall_mask
 
-    def dfs(y: int, x: int) -> None:
-        if y == goal_line:
-            path_count[0] += 1
-            return
+    if start // BOARD_CELLS == goal_row:
+        return min(1, max_paths)
 
-        if path_count[0] >= max_paths:
-            return
+    distance = [-1] * (BOARD_CELLS * BOARD_CELLS)
+    paths = [0] * (BOARD_CELLS * BOARD_CELLS)
+    distance[start] = 0
+    paths[start] = 1
+    layer = [start]
+    depth = 0
+
+    while layer:
+        next_layer = []
+
+        for cell in layer:
+            for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+                if mask & blockers:
+                    continue
+
+                if distance[neighbor] < 0:
+                    distance[neighbor] = depth + 1
+                    next_layer.append(neighbor)
 
-        visited_in_current_path.add((y, x))
+                # 다음 층의 칸에만 경로 수를 전달
+                if distance[neighbor] == depth + 1:
+                    paths[neighbor] += paths[cell]
+
+        goal_paths = sum(paths[cell] for cell in next_layer if cell // BOARD_CELLS == goal_row)
+        if goal_paths:
+            return min(goal_paths, max_paths)
+
+        layer = next_layer
+        depth += 1
+
+    return 0
+
+
+def goal_distance_field(wall_mask: int, goal_row: int) -> List[int]:
+    """목표 행(9x9 칸 단위) 전체에서 시작하는 BFS로 칸별 목표까지의 거리 계산"""
+    dist = [UNREACHABLE] * (BOARD_CELLS * BOARD_CELLS)
+    queue = deque()
+    for cell in range(goal_row * BOARD_CELLS, (goal_row + 1) * BOARD_CELLS):
+        dist[cell] = 0
+        queue.append(cell)
+
+    while queue:
+        cell = queue.popleft()
+        next_dist = dist[cell] + 1
+        for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+            if dist[neighbor] > next_dist and not wall_mask & blockers:
+                dist[neighbor] = next_dist
+                queue.append(neighbor)
+
+    return dist
+
+
+class DynamicDistanceField:
+    """
+    두 플레이어의 목표 거리장(9x9 칸)을 벽 배치에 따라 증분 갱신 (Ramalingam-Reps 방식)
+
+    - 벽 하나는 간선 두 개만 막으므로, 최단 거리를 지지하던 이웃을 잃은 칸만 다시 계산
+    - push_wall / pop_wall로 벽을 놓고 되돌리며, 되돌릴 때는 변경 기록(undo stack)으로 복원
+    - 말 위치와 무관하므로 말 이동 후에도 그대로 조회 (shortest_distance_to_goal과 같은 거리)
+    """
 
-        # 17x17 좌표계에서는 2칸씩 이동
-        for dy, dx in [(0, 2), (0, -2), (2, 0), (-2, 0)]:
-            ny, nx = y + dy, x + dx
+    __slots__ = ('wall_mask', 'red', 'blue', '_undo')
+
+    def __init__(self, wall_mask: int = 0):
+        self.wall_mask = wall_mask
+        self.red = goal_distance_field(wall_mask, 0)
+        self.blue = goal_distance_field(wall_mask, CELL_COUNT - 1)
+        self._undo: List[Tuple[int, List[Tuple[List[int], int, int]]]] = []
+
+    def distance(self, player: str, pos: Tuple[int, int]) -> int:
+        """pos(17x17 좌표)에서 player의 목표까지 최단 거리"""
+        field = self.red if player == 'red' else self.blue
+        return field[(pos[0] // 2) * BOARD_CELLS + pos[1] // 2]
+
+    def push_wall(self, bit: int):
+        """벽 비트(wall_bit)를 추가하고 영향받는 칸의 거리만 갱신"""
+        slot = bit % VERTICAL_WALL_BIT_OFFSET
+        top_left = (slot // WALL_GRID) * BOARD_CELLS + slot % WALL_GRID
+        # 벽이 막는 두 간선의 양 끝 (벽 중심을 둘러싼 네 칸)
+        seeds = (top_left, top_left + 1, top_left + BOARD_CELLS, top_left + BOARD_CELLS + 1)
+
+        log: List[Tuple[List[int], int, int]] = []
+        self._undo.append((self.wall_mask, log))
+        self.wall_mask |= 1 << bit
+        self._repair(self.red, seeds, log)
+        self._repair(self.blue, seeds, log)
+
+    def pop_wall(self):
+        """마지막으로 추가한 벽을 제거하고 이전 거리장 복원"""
+        self.wall_mask, log = self._undo.pop()
+        for field, cell, old in reversed(log):
+            field[cell] = old
+
+    def _repair(self, dist: List[int], seeds: Tuple[int, ...], log: List[Tuple[List[int], int, int]]):
+        """간선 삭제 후 거리장 복구 (거리는 늘어나기만 함)"""
+        mask = self.wall_mask
+
+        # 1. 지지 이웃(거리 d - 1)을 모두 잃은 칸을 거리순으로 찾아 전파
+        heap = [(dist[cell], cell) for cell in seeds if 0 < dist[cell] < UNREACHABLE]
+        if not heap:
+            return
+        heapq.heapify(heap)
+        affected: Set[int] = set()
 
-            if (state.is_valid_position(ny, nx) and
-                (ny, nx) not in visited_in_current_path and
-                state.can_move_to(y, x, ny, nx)):
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if cell in affected:
+                continue
 
-                dfs(ny, nx)
+            for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+                if dist[neighbor] == d - 1 and neighbor not in affected and not mask & blockers:
+                    break
+            else:
+                affected.add(cell)
+                for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+                    if dist[neighbor] == d + 1 and not mask & blockers:
+                        heapq.heappush(heap, (d + 1, neighbor))
 
-        visited_in_current_path.remove((y, x))
+        if not affected:
+            return
 
-    dfs(start_pos[0], start_pos[1])
-    return min(path_count[0], max_paths)
+        # 2. 영향받지 않은 이웃을 경계로 영향받은 칸들만 다시 계산
+        heap = []
+        for cell in affected:
+            best = UNREACHABLE
+            for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+                if neighbor not in affected and dist[neighbor] + 1 < best and not mask & blockers:
+                    best = dist[neighbor] + 1
+            log.append((dist, cell, dist[cell]))
+            dist[cell] = best
+            if best < UNREACHABLE:
+                heap.append((best, cell))
+
+        heapq.heapify(heap)
+        while heap:
+            d, cell = heapq.heappop(heap)
+            if d > dist[cell]:
+                continue
+            for neighbor, blockers in NEIGHBOR_TABLE[cell]:
+                if neighbor in affected and d + 1 < dist[neighbor] and not mask & blockers:
+                    dist[neighbor] = d + 1
+                    heapq.heappush(heap, (d + 1, neighbor))
 
 
 # ============================================================================
 # SECTION 3: Move Generation
 # ============================================================================
 
+# 엔진 내부에서는 수를 작은 정수 코드로 표현
+# - 0 ~ 80: 말 이동 (목표 칸 = (y // 2) * 9 + (x // 2))
+# - 81 ~ 144: 가로 벽, 145 ~ 208: 세로 벽 (슬롯 = ((y - 1) // 2) * 8 + (x - 1) // 2)
+PAWN_MOVE_CODES = 81
+WALL_SLOTS = 64
+HORIZONTAL_WALL_BASE = PAWN_MOVE_CODES
+VERTICAL_WALL_BASE = PAWN_MOVE_CODES + WALL_SLOTS
+MOVE_CODE_COUNT = PAWN_MOVE_CODES + 2 * WALL_SLOTS
+
+# 코드 -> (move_type, wall_type, y, x) 디코딩 테이블 (17x17 좌표계)
+MOVE_CODE_TABLE: List[Tuple[str, Optional[str], int, int]] = (
+    [('move', None, (c // 9) * 2, (c % 9) * 2) for c in range(PAWN_MOVE_CODES)] +
+    [('wall', 'horizontal', (c // 8) * 2 + 1, (c % 8) * 2 + 1) for c in range(WALL_SLOTS)] +
+    [('wall', 'vertical', (c // 8) * 2 + 1, (c % 8) * 2 + 1) for c in range(WALL_SLOTS)]
+)
+
+
+def encode_pawn_move(y: int, x: int) -> int:
+    """말 이동을 정수 코드로 변환"""
+    return (y // 2) * 9 + (x // 2)
+
+
+def encode_wall_move(wall_type: str, y: int, x: int) -> int:
+    """벽 배치를 정수 코드로 변환"""
+    return HORIZONTAL_WALL_BASE + wall_bit(wall_type, y, x)
+
+
+def is_wall_code(code: int) -> bool:
+    """벽 배치 코드인지 확인"""
+    return code >= PAWN_MOVE_CODES
+
+
 class Move:
-    """Quoridor에서의 수(move)를 나타내는 클래스"""
+    """Quoridor에서의 수(move)를 나타내는 클래스 (엔진 외부 인터페이스용)"""
+
+    __slots__ = ('move_type', 'wall_type', 'y', 'x')
 
     def __init__(self, move_type: str, **kwargs):
         self.move_type = move_type
@@ -527,6 +949,38 @@ class Move:
         else:
             raise ValueError(f"Invalid move_type: {move_type}")
 
+    @classmethod
+    def from_code(cls, code: int) -> 'Move':
+        """정수 코드로부터 Move 생성"""
+        move_type, wall_type, y, x = MOVE_CODE_TABLE[code]
+        if move_type == 'move':
+            return cls('move', y=y, x=x)
+        return cls('wall', wall_type=wall_type, y=y, x=x)
+
+    @property
+    def code(self) -> int:
+        """정수 코드로 변환"""
+        if self.move_type == 'move':
+            return encode_pawn_move(self.y, self.x)
+        return encode_wall_move(self.wall_type, self.y, self.x)
+
+    def to_dict(self) -> Dict:
+        """API 응답용 딕셔너리 (QuoridorAI.get_best_move와 같은 형식)"""
+        if self.move_type == 'move':
+            return {
+                'type': 'move',
+                'position': f"{self.y},{self.x}",
+                'y': self.y,
+                'x': self.x
+            }
+        return {
+            'type': 'wall',
+            'wall_type': self.wall_type,
+            'position': f"{self.y},{self.x}",
+            'y': self.y,
+            'x': self.x
+        }
+
     def __repr__(self) -> str:
         if self.move_type == 'move':
             return f"Move({self.y},{self.x})"
@@ -551,107 +1005,307 @@ class Move:
             return hash(('wall', self.wall_type, self.y, self.x))
 
 
-def generate_smart_moves(state: QuoridorGameState, player: str, max_wall_moves: int = 20) -> List[Move]:
-    """좋은 수만 선택적으로 생성 (성능 최적화)"""
-    moves = []
-    opponent = state.get_opponent(player)
+def _collect_wall_candidates(state: QuoridorGameState, opponent_path: List[Tuple[int, int]]) -> List[int]:
+    """상대 최단 경로 주변의 벽 후보 코드 수집 (겹침 검사만 수행, 경로 검증 전, 중복 제거)"""
+    candidates = []
+    seen = bytearray(MOVE_CODE_COUNT)
 
-    # 1. 모든 이동 수는 포함
-    valid_positions = state.get_valid_moves(player)
-    for y, x in valid_positions:
-        moves.append(Move('move', y=y, x=x))
+    for i in range(min(5, len(opponent_path) - 1)):
+        py, px = opponent_path[i]
 
-    # 2. 전략적 벽만 선택
-    if state.get_player_walls(player) > 0:
-        wall_candidates = []
-        opponent_path = get_shortest_path(state, opponent)
+        for dy in range(-1, 2):
+            for dx in range(-1, 2):
+                wy, wx = py + dy, px + dx
 
-        for i in range(min(5, len(opponent_path) - 1)):
-            py, px = opponent_path[i]
+                if not (0 <= wy < state.BOARD_SIZE - 1 and 0 <= wx < state.BOARD_SIZE - 1):
+                    continue
 
-            for dy in range(-1, 2):
-                for dx in range(-1, 2):
-                    wy, wx = py + dy, px + dx
+                # 벽은 홀수 좌표에만 배치 가능
+                if wy % 2 == 0 or wx % 2 == 0:
+                    continue
 
-                    if not (0 <= wy < state.BOARD_SIZE - 1 and 0 <= wx < state.BOARD_SIZE - 1):
+                for wall_type in ('horizontal', 'vertical'):
+                    code = encode_wall_move(wall_type, wy, wx)
+                    if seen[code]:
                         continue
+                    seen[code] = 1
+
+                    if state.can_fit_wall(wall_type, wy, wx):
+                        candidates.append(code)
+
+    return candidates
+
+
+def generate_smart_moves(
+    state: QuoridorGameState,
+    player: str,
+    max_wall_moves: int = 20,
+    field: Optional['DynamicDistanceField'] = None
+) -> List[int]:
+    """좋은 수만 선택적으로 생성 (성능 최적화, 수 코드 목록 반환)"""
+    # 1. 모든 이동 수는 포함
+    moves = [encode_pawn_move(y, x) for y, x in state.get_valid_moves(player)]
 
-                    # 가로 벽
-                    if state.can_place_wall('horizontal', wy, wx):
-                        state.horizontal_walls.add((wy, wx))
-                        if has_valid_path_to_goal(state, 'red') and has_valid_path_to_goal(state, 'blue'):
-                            new_dist = shortest_distance_to_goal(state, opponent)
-                            old_dist = len(opponent_path) - 1
-                            score = new_dist - old_dist
-                            wall_candidates.append((score, Move('wall', wall_type='horizontal', y=wy, x=wx)))
-                        state.horizontal_walls.remove((wy, wx))
-
-                    # 세로 벽
-                    if state.can_place_wall('vertical', wy, wx):
-                        state.vertical_walls.add((wy, wx))
-                        if has_valid_path_to_goal(state, 'red') and has_valid_path_to_goal(state, 'blue'):
-                            new_dist = shortest_distance_to_goal(state, opponent)
-                            old_dist = len(opponent_path) - 1
-                            score = new_dist - old_dist
-                            wall_candidates.append((score, Move('wall', wall_type='vertical', y=wy, x=wx)))
-                        state.vertical_walls.remove((wy, wx))
-
-        wall_candidates.sort(key=lambda x: x[0], reverse=True)
-        for score, wall_move in wall_candidates[:max_wall_moves]:
-            moves.append(wall_move)
+    # 2. 전략적 벽만 선택
+    moves.extend(generate_wall_moves(state, player, max_wall_moves, field))
 
     return moves
 
 
-def apply_move(state: QuoridorGameState, player: str, move: Move) -> QuoridorGameState:
-    """수를 적용한 새로운 게임 상태 반환"""
+def generate_wall_moves(
+    state: QuoridorGameState,
+    player: str,
+    max_wall_moves: int = 20,
+    field: Optional['DynamicDistanceField'] = None
+) -> List[int]:
+    """
+    상대 최단 경로를 가장 많이 늘리는 벽 수 코드 목록 (점수 내림차순)
+    field(state의 벽 배치와 같은 거리장)가 있으면 후보마다 증분 갱신 후 되돌려 평가
+    """
+    if state.get_player_walls(player) <= 0:
+        return []
+
+    opponent = state.get_opponent(player)
+    wall_candidates = []
+    opponent_path = get_shortest_path(state, opponent)
+    old_dist = len(opponent_path) - 1
+    candidates = _collect_wall_candidates(state, opponent_path)
+
+    if candidates and field is not None:
+        opponent_pos = state.get_player_position(opponent)
+        for code in candidates:
+            _, wall_type, wy, wx = MOVE_CODE_TABLE[code]
+            field.push_wall(wall_bit(wall_type, wy, wx))
+            if (field.distance('red', state.red_pos) < UNREACHABLE and
+                    field.distance('blue', state.blue_pos) < UNREACHABLE):
+                wall_candidates.append((field.distance(opponent, opponent_pos) - old_dist, code))
+            field.pop_wall()
+    elif candidates and np is not None:
+        # 모든 후보에 대한 두 플레이어의 거리를 한 번에 계산
+        red_dists, blue_dists = batched_wall_distances(state, candidates)
+        opponent_dists = red_dists if opponent == 'red' else blue_dists
+
+        for code, red_dist, blue_dist, new_dist in zip(
+            candidates, red_dists.tolist(), blue_dists.tolist(), opponent_dists.tolist()
+        ):
+            if red_dist < UNREACHABLE and blue_dist < UNREACHABLE:
+                wall_candidates.append((new_dist - old_dist, code))
+    else:
+        for code in candidates:
+            _, wall_type, wy, wx = MOVE_CODE_TABLE[code]
+            state._add_wall(wall_type, wy, wx)
+            if has_valid_path_to_goal(state, 'red') and has_valid_path_to_goal(state, 'blue'):
+                new_dist = shortest_distance_to_goal(state, opponent)
+                wall_candidates.append((new_dist - old_dist, code))
+            state.remove_wall(wall_type, wy, wx)
+
+    wall_candidates.sort(key=lambda x: x[0], reverse=True)
+    return [wall_move for score, wall_move in wall_candidates[:max_wall_moves]]
+
+
+def pawn_move_distances(
+    state: QuoridorGameState,
+    player: str,
+    pawn_moves: List[int],
+    field: Optional['DynamicDistanceField'] = None
+) -> List[int]:
+    """각 말 이동 후 목표까지의 최단 거리 (벽 배치가 같으므로 거리장 한 번으로 계산, field가 있으면 조회만)"""
+    if field is not None:
+        return [field.distance(player, MOVE_CODE_TABLE[move][2:]) for move in pawn_moves]
+
+    if np is not None:
+        goal_row = 0 if player == 'red' else CELL_COUNT - 1
+        field = batched_goal_distances(build_wall_grid(state)[np.newaxis], goal_row)[0]
+        return [int(field[move // 9, move % 9]) for move in pawn_moves]
+
+    distances = []
+    old_pos = state.get_player_position(player)
+    for move in pawn_moves:
+        _, _, y, x = MOVE_CODE_TABLE[move]
+        if player == 'red':
+            state.red_pos = (y, x)
+        else:
+            state.blue_pos = (y, x)
+        distances.append(shortest_distance_to_goal(state, player))
+
+    if player == 'red':
+        state.red_pos = old_pos
+    else:
+        state.blue_pos = old_pos
+
+    return distances
+
+
+def staged_moves(
+    state: QuoridorGameState,
+    player: str,
+    max_wall_moves: int = 20,
+    hash_move: Optional[int] = None,
+    field: Optional['DynamicDistanceField'] = None
+) -> Iterator[int]:
+    """
+    단계별 지연 수 생성기 (generate_smart_moves와 같은 수 집합을 좋은 순서로 생성)
+
+    1. 해시 수 (같은 국면의 이전 탐색에서 최선이었던 수)
+    2. 즉시 승리하는 말 이동
+    3. 최단 경로를 따라가는 말 이동 (거리 감소)
+    4. 나머지 말 이동
+    5. 벽 (이 단계에 도달했을 때 후보 수집과 평가 수행)
+
+    호출 측에서 컷오프로 순회를 멈추면 이후 단계의 작업은 수행되지 않음
+    """
+    pawn_moves = [encode_pawn_move(y, x) for y, x in state.get_valid_moves(player)]
+
+    # 1. 해시 수 (해시 충돌에 대비해 합법성 확인)
+    if hash_move is not None:
+        if is_wall_code(hash_move):
+            _, wall_type, y, x = MOVE_CODE_TABLE[hash_move]
+            if state.get_player_walls(player) > 0 and state.can_place_wall(wall_type, y, x):
+                yield hash_move
+            else:
+                hash_move = None
+        elif hash_move in pawn_moves:
+            yield hash_move
+        else:
+            hash_move = None
+
+    # 2~4. 말 이동 (목표까지의 거리순)
+    goal_line = state.get_goal_line(player)
+    distances = pawn_move_distances(state, player, pawn_moves, field)
+    ranked = sorted(
+        zip(distances, pawn_moves),
+        key=lambda item: (MOVE_CODE_TABLE[item[1]][2] != goal_line, item[0])
+    )
+    for dist, move in ranked:
+        if move != hash_move:
+            yield move
+
+    # 5. 벽 (여기까지 왔을 때만 평가)
+    for move in generate_wall_moves(state, player, max_wall_moves, field):
+        if move != hash_move:
+            yield move
+
+
+def apply_move(state: QuoridorGameState, player: str, move: int) -> QuoridorGameState:
+    """수 코드를 적용한 새로운 게임 상태 반환"""
     new_state = state.copy()
+    move_type, wall_type, y, x = MOVE_CODE_TABLE[move]
 
-    if move.move_type == 'move':
-        new_state.make_move(player, move.y, move.x)
-    elif move.move_type == 'wall':
-        new_state.make_wall_move(player, move.wall_type, move.y, move.x)
+    if move_type == 'move':
+        new_state.make_move(player, y, x)
+    else:
+        # generate_smart_moves에서 경로 검증을 마친 벽이므로 재검증하지 않음
+        new_state.place_wall_unchecked(player, wall_type, y, x)
 
     return new_state
 
 
-def order_moves(state: QuoridorGameState, player: str, moves: List[Move]) -> List[Move]:
-    """수들을 좋을 것 같은 순서로 정렬"""
-    opponent = state.get_opponent(player)
-    scored_moves = []
+class SearchBoard:
+    """
+    탐색용 make/unmake 보드 (apply_move와 같은 수 적용을 상태 복사 없이 제자리에서 수행)
 
-    my_current_dist = shortest_distance_to_goal(state, player)
-    opponent_current_dist = shortest_distance_to_goal(state, opponent)
+    - make는 이전 값을 되돌림 기록(undo stack)에 쌓고, unmake는 마지막 수를 되돌림
+    - 벽 수는 DynamicDistanceField도 함께 갱신하므로 탐색 중 거리 조회에 BFS가 필요 없음
+    - 수는 생성기에서 검증을 마친 것만 받음 (make_move/place_wall의 검증 생략)
+    """
 
-    for move in moves:
-        score = 0
+    __slots__ = ('state', 'field', '_undo')
 
-        if move.move_type == 'move':
+    def __init__(self, state: QuoridorGameState):
+        self.state = state.copy()
+        self.field = DynamicDistanceField(self.state.wall_mask)
+        self._undo: List[Tuple[str, Optional[int], Tuple[int, int]]] = []
+
+    def make(self, player: str, move: int):
+        """player가 수 코드 move를 둠 (차례 변경 포함)"""
+        state = self.state
+        move_type, wall_type, y, x = MOVE_CODE_TABLE[move]
+        self._undo.append((player, move, state.get_player_position(player)))
+
+        if move_type == 'move':
             if player == 'red':
-                old_pos = state.red_pos
-                state.red_pos = (move.y, move.x)
+                state.red_pos = (y, x)
             else:
-                old_pos = state.blue_pos
-                state.blue_pos = (move.y, move.x)
+                state.blue_pos = (y, x)
+            state.current_player = state.get_opponent(player)
+        else:
+            state.place_wall_unchecked(player, wall_type, y, x)
+            self.field.push_wall(wall_bit(wall_type, y, x))
 
-            new_dist = shortest_distance_to_goal(state, player)
-            score = (my_current_dist - new_dist) * 10
+    def make_null(self, player: str):
+        """player가 한 수 쉼 (null move, 차례만 변경)"""
+        self._undo.append((player, None, self.state.get_player_position(player)))
+        self.state.current_player = self.state.get_opponent(player)
+
+    def unmake(self):
+        """마지막 make / make_null 되돌리기"""
+        state = self.state
+        player, move, old_pos = self._undo.pop()
+        state.current_player = player
 
+        if move is None:
+            return
+
+        move_type, wall_type, y, x = MOVE_CODE_TABLE[move]
+        if move_type == 'move':
             if player == 'red':
                 state.red_pos = old_pos
             else:
                 state.blue_pos = old_pos
+        else:
+            state.remove_wall(wall_type, y, x)
+            if player == 'red':
+                state.red_walls += 1
+            else:
+                state.blue_walls += 1
+            self.field.pop_wall()
 
-        elif move.move_type == 'wall':
-            if move.wall_type == 'horizontal':
-                state.horizontal_walls.add((move.y, move.x))
+    def distance(self, player: str) -> int:
+        """현재 위치에서 player의 목표까지 최단 거리 (거리장 조회)"""
+        return self.field.distance(player, self.state.get_player_position(player))
+
+
+def order_moves(state: QuoridorGameState, player: str, moves: List[int]) -> List[int]:
+    """수들을 좋을 것 같은 순서로 정렬"""
+    opponent = state.get_opponent(player)
+    scored_moves = []
+
+    my_current_dist = shortest_distance_to_goal(state, player)
+    opponent_current_dist = shortest_distance_to_goal(state, opponent)
+
+    if np is not None and moves:
+        # 이동 수는 현재 벽 배치의 거리장에서 조회, 벽 수는 한 번에 계산
+        pawns = [m for m in moves if not is_wall_code(m)]
+        pawn_dists = iter(pawn_move_distances(state, player, pawns))
+
+        walls = [m for m in moves if is_wall_code(m)]
+        wall_dists = iter([])
+        if walls:
+            red_dists, blue_dists = batched_wall_distances(state, walls)
+            wall_dists = iter((red_dists if opponent == 'red' else blue_dists).tolist())
+
+        for move in moves:
+            if is_wall_code(move):
+                score = (next(wall_dists) - opponent_current_dist) * 5
             else:
-                state.vertical_walls.add((move.y, move.x))
+                score = (my_current_dist - next(pawn_dists)) * 10
+            scored_moves.append((score, move))
+
+        scored_moves.sort(key=lambda x: x[0], reverse=True)
+        return [move for score, move in scored_moves]
 
+    for move in moves:
+        move_type, wall_type, y, x = MOVE_CODE_TABLE[move]
+
+        if move_type == 'move':
+            new_dist = pawn_move_distances(state, player, [move])[0]
+            score = (my_current_dist - new_dist) * 10
+
+        else:
+            state._add_wall(wall_type, y, x)
             new_opponent_dist = shortest_distance_to_goal(state, opponent)
             score = (new_opponent_dist - opponent_current_dist) * 5
-
-            state.remove_wall(move.wall_type, move.y, move.x)
+            state.remove_wall(wall_type, y, x)
 
         scored_moves.append((score, move))
 
@@ -668,6 +1322,149 @@ WALL_COUNT_WEIGHT = 10
 PATH_COUNT_WEIGHT = 5
 CENTER_WEIGHT = 2
 MOBILITY_WEIGHT = 3
+LEAD_BONUS = 20.0            # 목표까지 상대보다 2칸 넘게 앞설 때 (Hard)
+BEHIND_PATH_WEIGHT = 10.0    # 2칸 넘게 뒤질 때 내 경로 수당 가산점 (Hard)
+
+# 튜닝 대상 평가 가중치 (batched_evaluation_features의 특징 순서와 동일)
+EVAL_WEIGHT_NAMES = (
+    'DISTANCE_WEIGHT', 'WALL_COUNT_WEIGHT', 'PATH_COUNT_WEIGHT', 'MOBILITY_WEIGHT',
+    'CENTER_WEIGHT', 'LEAD_BONUS', 'BEHIND_PATH_WEIGHT',
+)
+
+# 기본 평가 가중치 (Easy/Medium 평가가 사용, 튜닝 파일의 영향을 받지 않음)
+DEFAULT_EVAL_WEIGHTS: Dict[str, float] = {name: float(globals()[name]) for name in EVAL_WEIGHT_NAMES}
+
+# Hard 평가(evaluate_advanced, batched_evaluate_children의 hard 경로)만 사용하는 가중치
+# evaluate_advanced 특징으로 튜닝한 값이므로 load_eval_weights는 이 테이블만 교체
+ADVANCED_EVAL_WEIGHTS: Dict[str, float] = dict(DEFAULT_EVAL_WEIGHTS)
+
+# tune_eval.py가 만든 가중치 파일 (없으면 위의 기본값 사용)
+EVAL_WEIGHTS_PATH = os.getenv(
+    'QUORIDOR_EVAL_WEIGHTS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'eval_weights.json')
+)
+
+
+def current_eval_weights() -> Dict[str, float]:
+    """현재 사용 중인 Hard 평가 가중치"""
+    return dict(ADVANCED_EVAL_WEIGHTS)
+
+
+def load_eval_weights(path: str = EVAL_WEIGHTS_PATH) -> bool:
+    """
+    가중치 파일({"weights": {이름: 값}})을 읽어 Hard 평가 가중치 교체
+    파일이 없거나 잘못되면 기존 값을 유지하고 False
+    """
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            weights = json.load(f)['weights']
+        loaded = {name: float(weights[name]) for name in EVAL_WEIGHT_NAMES if name in weights}
+    except (OSError, ValueError, KeyError, TypeError) as e:
+        logger.warning("Failed to load evaluation weights from %s: %s", path, e)
+        return False
+
+    ADVANCED_EVAL_WEIGHTS.update(loaded)
+    logger.info("Loaded evaluation weights from %s: %s", path, loaded)
+    return True
+
+
+# 시작 시 튜닝된 가중치 파일이 있으면 적용
+load_eval_weights()
+
+
+# 둘 차례가 Blue인 포지션의 키에 섞는 상수 (get_hash는 차례를 포함하지 않음)
+_BLUE_TO_MOVE_KEY = 0x5DEECE66D2F1A3B7
+
+
+def evaluation_key(position_hash: int, side_to_move: str) -> int:
+    """포지션 해시와 둘 차례로 평가 캐시 키 생성"""
+    return position_hash ^ _BLUE_TO_MOVE_KEY if side_to_move == 'blue' else position_hash
+
+
+def child_evaluation_keys(state: QuoridorGameState, mover: str, moves: List[int]) -> List[int]:
+    """mover가 각 수를 둔 자식 포지션들의 평가 캐시 키 (자식 상태 객체를 만들지 않음)"""
+    side_to_move = state.get_opponent(mover)
+    keys = []
+
+    for move in moves:
+        red_pos, blue_pos = state.red_pos, state.blue_pos
+        red_walls, blue_walls = state.red_walls, state.blue_walls
+        wall_mask = state.wall_mask
+
+        if not is_wall_code(move):
+            if mover == 'red':
+                red_pos = CELL_POSITIONS[move]
+            else:
+                blue_pos = CELL_POSITIONS[move]
+        else:
+            wall_mask |= 1 << (move - HORIZONTAL_WALL_BASE)
+            if mover == 'red':
+                red_walls -= 1
+            else:
+                blue_walls -= 1
+
+        # QuoridorGameState.get_hash와 같은 구성의 해시
+        position_hash = hash((
+            red_pos, blue_pos, red_walls, blue_walls,
+            wall_mask & WALL_HASH_CHUNK, (wall_mask >> 60) & WALL_HASH_CHUNK, wall_mask >> 120
+        ))
+        keys.append(evaluation_key(position_hash, side_to_move))
+
+    return keys
+
+
+class EvaluationCache:
+    """
+    평가 점수 전용 캐시 (고정 크기, 직접 사상 방식)
+    - 키의 하위 비트로 슬롯을 정하고, 충돌 시 새 항목으로 덮어씀
+    - 점수는 둘 차례인 플레이어 관점으로 저장
+    - 깊이와 무관하므로 반복 심화의 각 반복과 이후 턴에서도 재사용 가능
+    """
+
+    __slots__ = ('size', 'mask', 'keys', 'scores', 'filled', 'hits', 'misses')
+
+    def __init__(self, size_bits: int = 13):
+        self.size = 1 << size_bits
+        self.mask = self.size - 1
+        self.keys = array('q', bytes(8 * self.size))
+        self.scores = array('d', bytes(8 * self.size))
+        self.filled = bytearray(self.size)
+        self.hits = 0
+        self.misses = 0
+
+    def clear(self):
+        """캐시 초기화"""
+        self.filled = bytearray(self.size)
+        self.reset_stats()
+
+    def reset_stats(self):
+        """적중 통계 초기화"""
+        self.hits = 0
+        self.misses = 0
+
+    def probe(self, key: int) -> Optional[float]:
+        """캐시에서 점수 가져오기 (없으면 None)"""
+        index = key & self.mask
+        if self.filled[index] and self.keys[index] == key:
+            self.hits += 1
+            return self.scores[index]
+        self.misses += 1
+        return None
+
+    def store(self, key: int, score: float):
+        """캐시에 점수 저장 (같은 슬롯의 기존 항목은 교체)"""
+        index = key & self.mask
+        self.keys[index] = key
+        self.scores[index] = score
+        self.filled[index] = 1
+
+    @property
+    def hit_rate(self) -> float:
+        """적중률 (0.0 ~ 1.0)"""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
 
 
 def evaluate_position(state: QuoridorGameState, player: str, difficulty: str = 'medium') -> float:
@@ -683,8 +1480,8 @@ def evaluate_position(state: QuoridorGameState, player: str, difficulty: str = '
         return evaluate_basic(state, player)
     elif difficulty == 'medium':
         return evaluate_intermediate(state, player)
-    else:  # hard - Medium과 동일한 평가 함수 사용 (성능 최적화)
-        return evaluate_intermediate(state, player)
+    else:
+        return evaluate_advanced(state, player)
 
 
 def evaluate_basic(state: QuoridorGameState, player: str) -> float:
@@ -720,14 +1517,15 @@ def evaluate_intermediate(state: QuoridorGameState, player: str) -> float:
 
 
 def evaluate_advanced(state: QuoridorGameState, player: str) -> float:
-    """고급 평가 함수 (Hard 난이도)"""
+    """고급 평가 함수 (Hard 난이도, ADVANCED_EVAL_WEIGHTS 사용)"""
+    w = ADVANCED_EVAL_WEIGHTS
     opponent = state.get_opponent(player)
     score = 0.0
 
     my_distance = shortest_distance_to_goal(state, player)
     opponent_distance = shortest_distance_to_goal(state, opponent)
     distance_diff = opponent_distance - my_distance
-    score += distance_diff * DISTANCE_WEIGHT
+    score += distance_diff * w['DISTANCE_WEIGHT']
 
     my_walls = state.get_player_walls(player)
     opponent_walls = state.get_player_walls(opponent)
@@ -735,30 +1533,30 @@ def evaluate_advanced(state: QuoridorGameState, player: str) -> float:
 
     game_phase = get_game_phase(state)
     if game_phase == 'early':
-        score += wall_diff * WALL_COUNT_WEIGHT * 1.5
+        score += wall_diff * w['WALL_COUNT_WEIGHT'] * 1.5
     elif game_phase == 'mid':
-        score += wall_diff * WALL_COUNT_WEIGHT
+        score += wall_diff * w['WALL_COUNT_WEIGHT']
     else:
-        score += wall_diff * WALL_COUNT_WEIGHT * 0.5
+        score += wall_diff * w['WALL_COUNT_WEIGHT'] * 0.5
 
     my_path_count = count_paths_to_goal(state, player, max_paths=5)
     opponent_path_count = count_paths_to_goal(state, opponent, max_paths=5)
-    score += (my_path_count - opponent_path_count) * PATH_COUNT_WEIGHT
+    score += (my_path_count - opponent_path_count) * w['PATH_COUNT_WEIGHT']
 
     my_moves = len(state.get_valid_moves(player))
     opponent_moves = len(state.get_valid_moves(opponent))
-    score += (my_moves - opponent_moves) * MOBILITY_WEIGHT
+    score += (my_moves - opponent_moves) * w['MOBILITY_WEIGHT']
 
     if game_phase == 'early':
         my_center_score = get_center_control_score(state, player)
         opponent_center_score = get_center_control_score(state, opponent)
-        score += (my_center_score - opponent_center_score) * CENTER_WEIGHT
+        score += (my_center_score - opponent_center_score) * w['CENTER_WEIGHT']
 
     if distance_diff > 2:
-        score += 20.0
+        score += w['LEAD_BONUS']
 
     if distance_diff < -2:
-        score += my_path_count * 10.0
+        score += my_path_count * w['BEHIND_PATH_WEIGHT']
 
     return score
 
@@ -795,52 +1593,505 @@ def get_center_control_score(state: QuoridorGameState, player: str) -> float:
     return score
 
 
-def is_winning_move(state: QuoridorGameState, player: str, move: Move) -> bool:
+def is_winning_move(state: QuoridorGameState, player: str, move: int) -> bool:
     """해당 수가 즉시 승리하는 수인지 확인"""
-    if move.move_type == 'move':
-        goal_line = state.get_goal_line(player)
-        return move.y == goal_line
-    return False
+    if is_wall_code(move):
+        return False
+    goal_line = state.get_goal_line(player)
+    return (move // 9) * 2 == goal_line
 
 
 # ============================================================================
-# SECTION 5: Minimax Algorithm
+# SECTION 5: Batched Evaluation (NumPy)
 # ============================================================================
+# 탐색 마지막 깊이(frontier)의 자식 노드들을 한 번에 평가
+# - 9x9 칸 단위 그리드에 각 칸의 막힌 방향을 비트로 저장 (보드 가장자리 포함)
+# - 자식 K개의 그리드를 (K, 9, 9) 배열로 쌓아 BFS 거리/이동성을 벡터 연산으로 계산
+
+# (dr, dc, 해당 방향 비트, 대각선 점프 시 확인할 측면 비트들)
+_DIRECTION_BITS = [
+    (-1, 0, BLOCK_NORTH, (BLOCK_WEST, BLOCK_EAST)),
+    (1, 0, BLOCK_SOUTH, (BLOCK_WEST, BLOCK_EAST)),
+    (0, -1, BLOCK_WEST, (BLOCK_NORTH, BLOCK_SOUTH)),
+    (0, 1, BLOCK_EAST, (BLOCK_NORTH, BLOCK_SOUTH)),
+]
+
+
+def _empty_wall_grid() -> 'np.ndarray':
+    """벽이 없는 9x9 그리드 (보드 가장자리만 막힘)"""
+    grid = np.zeros((CELL_COUNT, CELL_COUNT), dtype=np.uint8)
+    grid[0, :] |= BLOCK_NORTH
+    grid[-1, :] |= BLOCK_SOUTH
+    grid[:, 0] |= BLOCK_WEST
+    grid[:, -1] |= BLOCK_EAST
+    return grid
+
+
+def _add_wall_to_grid(grid: 'np.ndarray', wall_type: str, wy: int, wx: int):
+    """17x17 좌표의 벽을 9x9 그리드(마지막 두 축)에 반영"""
+    r, c = (wy - 1) // 2, (wx - 1) // 2
+    if wall_type == 'horizontal':
+        # (r, c~c+1)과 (r+1, c~c+1) 사이를 막음
+        grid[..., r, c:c + 2] |= BLOCK_SOUTH
+        grid[..., r + 1, c:c + 2] |= BLOCK_NORTH
+    else:
+        # (r~r+1, c)와 (r~r+1, c+1) 사이를 막음
+        grid[..., r:r + 2, c] |= BLOCK_EAST
+        grid[..., r:r + 2, c + 1] |= BLOCK_WEST
+
+
+def build_wall_grid(state: QuoridorGameState) -> 'np.ndarray':
+    """게임 상태의 벽 배치를 9x9 막힌 방향 그리드로 변환"""
+    grid = _empty_wall_grid()
+    for wy, wx in state.horizontal_walls:
+        _add_wall_to_grid(grid, 'horizontal', wy, wx)
+    for wy, wx in state.vertical_walls:
+        _add_wall_to_grid(grid, 'vertical', wy, wx)
+    return grid
+
+
+def batched_wall_distances(state: QuoridorGameState, walls: List[int]):
+    """
+    현재 벽 배치에 후보 벽을 하나씩 더한 K개의 배치에 대해
+    두 플레이어의 목표까지 거리를 한 번에 계산
+
+    Args:
+        walls: 후보 벽의 수 코드 목록
+
+    Returns:
+        (red 거리 배열, blue 거리 배열) - 도달 불가능하면 UNREACHABLE
+    """
+    grids = np.repeat(build_wall_grid(state)[np.newaxis], len(walls), axis=0)
+    for k, code in enumerate(walls):
+        _, wall_type, wy, wx = MOVE_CODE_TABLE[code]
+        _add_wall_to_grid(grids[k], wall_type, wy, wx)
+
+    red_r, red_c = state.red_pos[0] // 2, state.red_pos[1] // 2
+    blue_r, blue_c = state.blue_pos[0] // 2, state.blue_pos[1] // 2
+    red_fields, blue_fields = batched_distance_fields(grids)
+    return red_fields[:, red_r, red_c], blue_fields[:, blue_r, blue_c]
+
+
+def batched_goal_distances(grids: 'np.ndarray', goal_row: int) -> 'np.ndarray':
+    """
+    (K, 9, 9) 그리드 묶음에 대해 목표 행까지의 거리장을 동시에 계산
+
+    목표 행에서 시작하는 다중 출발점 BFS를 배열 시프트 완화(relaxation)로 수행
+    도달 불가능한 칸은 UNREACHABLE(999)
+    """
+    dist = np.full(grids.shape, UNREACHABLE, dtype=np.int32)
+    dist[:, goal_row, :] = 0
+    return _relax_distances(grids, dist)
+
+
+def batched_distance_fields(grids: 'np.ndarray'):
+    """
+    (K, 9, 9) 그리드 묶음에 대해 Red(0행)와 Blue(8행)의 거리장을 한 번의 완화로 계산
+
+    Returns:
+        (red 거리장, blue 거리장) - 각각 (K, 9, 9)
+    """
+    count = grids.shape[0]
+    dist = np.full((2 * count,) + grids.shape[1:], UNREACHABLE, dtype=np.int32)
+    dist[:count, 0, :] = 0
+    dist[count:, CELL_COUNT - 1, :] = 0
+    dist = _relax_distances(np.concatenate((grids, grids)), dist)
+    return dist[:count], dist[count:]
+
+
+def _relax_distances(grids: 'np.ndarray', dist: 'np.ndarray') -> 'np.ndarray':
+    """초기 거리장 dist를 그리드의 열린 방향으로 수렴할 때까지 완화"""
+    # 이동 불가 방향은 UNREACHABLE 비용으로 처리
+    step_n = np.where(grids & BLOCK_NORTH, UNREACHABLE, 1).astype(np.int32)
+    step_s = np.where(grids & BLOCK_SOUTH, UNREACHABLE, 1).astype(np.int32)
+    step_w = np.where(grids & BLOCK_WEST, UNREACHABLE, 1).astype(np.int32)
+    step_e = np.where(grids & BLOCK_EAST, UNREACHABLE, 1).astype(np.int32)
+
+    # 거리는 감소만 하므로 합이 그대로면 수렴
+    previous_total = int(dist.sum())
+    for _ in range(CELL_COUNT * CELL_COUNT):
+        # 각 칸에서 이웃 칸을 거쳐 가는 거리로 갱신
+        np.minimum(dist[:, 1:, :], dist[:, :-1, :] + step_n[:, 1:, :], out=dist[:, 1:, :])
+        np.minimum(dist[:, :-1, :], dist[:, 1:, :] + step_s[:, :-1, :], out=dist[:, :-1, :])
+        np.minimum(dist[:, :, 1:], dist[:, :, :-1] + step_w[:, :, 1:], out=dist[:, :, 1:])
+        np.minimum(dist[:, :, :-1], dist[:, :, 1:] + step_e[:, :, :-1], out=dist[:, :, :-1])
+        total = int(dist.sum())
+        if total == previous_total:
+            break
+        previous_total = total
+
+    np.minimum(dist, UNREACHABLE, out=dist)
+    return dist
+
+
+def batched_path_counts(grids: 'np.ndarray', fields: 'np.ndarray', max_paths: int) -> 'np.ndarray':
+    """
+    (K, 9, 9) 그리드와 목표 거리장으로 각 칸에서 목표까지의 최단 경로 수 계산
+    (거리 층마다 한 단계 가까운 열린 이웃의 경로 수를 합산, count_paths_to_goal과 동일한 값)
+    """
+    counts = (fields == 0).astype(np.int64)
+    open_n = (grids & BLOCK_NORTH) == 0
+    open_s = (grids & BLOCK_SOUTH) == 0
+    open_w = (grids & BLOCK_WEST) == 0
+    open_e = (grids & BLOCK_EAST) == 0
+
+    finite = fields[fields < UNREACHABLE]
+    max_layer = int(finite.max()) if finite.size else 0
+
+    for layer in range(1, max_layer + 1):
+        # 인접한 열린 칸의 거리 차이는 최대 1이므로 이미 계산된 이웃은 모두 이전 층
+        incoming = np.zeros_like(counts)
+        incoming[:, 1:, :] += counts[:, :-1, :] * open_n[:, 1:, :]
+        incoming[:, :-1, :] += counts[:, 1:, :] * open_s[:, :-1, :]
+        incoming[:, :, 1:] += counts[:, :, :-1] * open_w[:, :, 1:]
+        incoming[:, :, :-1] += counts[:, :, 1:] * open_e[:, :, :-1]
+        counts = np.where(fields == layer, incoming, counts)
+
+    return np.minimum(counts, max_paths)
+
+
+def batched_mobility(
+    grids: 'np.ndarray',
+    rows: 'np.ndarray', cols: 'np.ndarray',
+    opp_rows: 'np.ndarray', opp_cols: 'np.ndarray'
+) -> 'np.ndarray':
+    """
+    (K, 9, 9) 그리드 묶음에서 각 플레이어의 이동 가능한 수 개수 계산
+    (get_valid_moves와 동일한 규칙: 점프 및 대각선 점프 포함)
+    """
+    k_index = np.arange(grids.shape[0])
+    own_cell = grids[k_index, rows, cols]
+    opp_cell = grids[k_index, opp_rows, opp_cols]
+    counts = np.zeros(grids.shape[0], dtype=np.int32)
+
+    for dr, dc, bit, side_bits in _DIRECTION_BITS:
+        is_open = (own_cell & bit) == 0
+        occupied = is_open & (rows + dr == opp_rows) & (cols + dc == opp_cols)
+        counts += is_open & ~occupied
+
+        # 상대를 넘어가는 직선 점프, 막혀 있으면 대각선 점프
+        straight = occupied & ((opp_cell & bit) == 0)
+        counts += straight
+        diagonal = occupied & ~straight
+        for side_bit in side_bits:
+            counts += diagonal & ((opp_cell & side_bit) == 0)
+
+    return counts
+
+
+def batched_evaluate_children(
+    state: QuoridorGameState,
+    mover: str,
+    moves: List[int],
+    player: str,
+    difficulty: str = 'medium'
+) -> List[float]:
+    """
+    state에서 mover가 각 수를 둔 자식 포지션들을 player 관점에서 한 번에 평가
+    (evaluate_position과 동일한 점수 반환, 자식 상태 객체를 만들지 않음)
+    """
+    count = len(moves)
+    base_grid = build_wall_grid(state)
+
+    # 자식별 그리드: 0번은 이동 수들이 공유하는 현재 그리드, 이후는 벽 수마다 하나씩
+    wall_moves = [m for m in moves if is_wall_code(m)]
+    grids = np.repeat(base_grid[np.newaxis], 1 + len(wall_moves), axis=0)
+    grid_index = np.zeros(count, dtype=np.intp)
+
+    red_r = np.full(count, state.red_pos[0] // 2)
+    red_c = np.full(count, state.red_pos[1] // 2)
+    blue_r = np.full(count, state.blue_pos[0] // 2)
+    blue_c = np.full(count, state.blue_pos[1] // 2)
+    red_walls = np.full(count, state.red_walls)
+    blue_walls = np.full(count, state.blue_walls)
+
+    mover_r, mover_c = (red_r, red_c) if mover == 'red' else (blue_r, blue_c)
+    mover_walls = red_walls if mover == 'red' else blue_walls
+
+    wall_slot = 0
+    for i, move in enumerate(moves):
+        if not is_wall_code(move):
+            mover_r[i] = move // 9
+            mover_c[i] = move % 9
+        else:
+            _, wall_type, wy, wx = MOVE_CODE_TABLE[move]
+            wall_slot += 1
+            _add_wall_to_grid(grids[wall_slot], wall_type, wy, wx)
+            grid_index[i] = wall_slot
+            mover_walls[i] -= 1
+
+    # 거리 특징 (그리드별 거리장 계산 후 각 자식의 말 위치에서 조회)
+    red_fields, blue_fields = batched_distance_fields(grids)
+    red_field = red_fields[grid_index, red_r, red_c]
+    blue_field = blue_fields[grid_index, blue_r, blue_c]
+
+    if player == 'red':
+        my_dist, opp_dist = red_field, blue_field
+        wall_diff = red_walls - blue_walls
+    else:
+        my_dist, opp_dist = blue_field, red_field
+        wall_diff = blue_walls - red_walls
+
+    # Hard는 튜닝된 가중치, Easy/Medium은 기본 상수
+    hard = difficulty not in ('easy', 'medium')
+    w = ADVANCED_EVAL_WEIGHTS if hard else DEFAULT_EVAL_WEIGHTS
+
+    features = [opp_dist - my_dist]
+    weights = [w['DISTANCE_WEIGHT']]
+
+    if difficulty != 'easy':
+        child_grids = grids[grid_index]
+        red_mobility = batched_mobility(child_grids, red_r, red_c, blue_r, blue_c)
+        blue_mobility = batched_mobility(child_grids, blue_r, blue_c, red_r, red_c)
+        mobility_diff = red_mobility - blue_mobility if player == 'red' else blue_mobility - red_mobility
+
+        features += [mobility_diff]
+        weights += [w['MOBILITY_WEIGHT']]
+
+        if difficulty == 'medium':
+            features += [wall_diff]
+            weights += [w['WALL_COUNT_WEIGHT']]
+
+    # 특징 행렬과 가중치의 곱으로 한 번에 점수 계산
+    scores = np.stack(features, axis=1).astype(np.float64) @ np.array(weights, dtype=np.float64)
+
+    if hard:
+        # evaluate_advanced의 단계별 벽 가중치, 경로 수, 중앙 장악도, 보너스 항
+        red_counts, blue_counts = np.split(
+            batched_path_counts(np.concatenate((grids, grids)), np.concatenate((red_fields, blue_fields)), 5), 2
+        )
+        red_paths = red_counts[grid_index, red_r, red_c]
+        blue_paths = blue_counts[grid_index, blue_r, blue_c]
+        my_paths, opp_paths = (red_paths, blue_paths) if player == 'red' else (blue_paths, red_paths)
+
+        total_walls = QuoridorGameState.INITIAL_WALLS * 2
+        walls_used = total_walls - red_walls - blue_walls
+        total_dist = red_field + blue_field
+        early = (walls_used < total_walls * 0.3) & (total_dist > 10)
+        mid = ~early & ((walls_used < total_walls * 0.7) | (total_dist > 5))
+        wall_scale = np.where(early, 1.5, np.where(mid, 1.0, 0.5))
+        scores += wall_diff * w['WALL_COUNT_WEIGHT'] * wall_scale
+
+        scores += (my_paths - opp_paths) * w['PATH_COUNT_WEIGHT']
+
+        red_center = np.maximum(0, 10 - (np.abs(red_r - 4) + np.abs(red_c - 4)) * 2)
+        blue_center = np.maximum(0, 10 - (np.abs(blue_r - 4) + np.abs(blue_c - 4)) * 2)
+        center_diff = red_center - blue_center if player == 'red' else blue_center - red_center
+        scores += np.where(early, center_diff * w['CENTER_WEIGHT'], 0)
+
+        distance_diff = opp_dist - my_dist
+        scores += np.where(distance_diff > 2, w['LEAD_BONUS'], 0.0)
+        scores += np.where(distance_diff < -2, my_paths * w['BEHIND_PATH_WEIGHT'], 0.0)
+
+    # 목표 도달 포지션은 evaluate_position과 동일하게 처리
+    red_won = red_r == 0
+    blue_won = blue_r == CELL_COUNT - 1
+    my_won, opp_won = (red_won, blue_won) if player == 'red' else (blue_won, red_won)
+    scores = np.where(opp_won, -99999.0, scores)
+    scores = np.where(my_won, 99999.0, scores)
+
+    return scores.tolist()
+
+
+def batched_evaluation_features(states: List[QuoridorGameState]) -> 'np.ndarray':
+    """
+    포지션 묶음의 evaluate_advanced 특징 행렬 (N, len(EVAL_WEIGHT_NAMES))
+
+    각 행은 둘 차례인 플레이어 관점이며, 목표 도달 전 포지션에서
+    특징 행렬 @ 가중치 벡터 == evaluate_advanced(state, state.current_player)
+    """
+    count = len(states)
+    grids = np.repeat(_empty_wall_grid()[np.newaxis], count, axis=0)
+    red_r = np.empty(count, dtype=np.intp)
+    red_c = np.empty(count, dtype=np.intp)
+    blue_r = np.empty(count, dtype=np.intp)
+    blue_c = np.empty(count, dtype=np.intp)
+    red_walls = np.empty(count, dtype=np.int64)
+    blue_walls = np.empty(count, dtype=np.int64)
+    is_red = np.empty(count, dtype=bool)
+
+    for k, state in enumerate(states):
+        for wy, wx in state.horizontal_walls:
+            _add_wall_to_grid(grids[k], 'horizontal', wy, wx)
+        for wy, wx in state.vertical_walls:
+            _add_wall_to_grid(grids[k], 'vertical', wy, wx)
+        red_r[k], red_c[k] = state.red_pos[0] // 2, state.red_pos[1] // 2
+        blue_r[k], blue_c[k] = state.blue_pos[0] // 2, state.blue_pos[1] // 2
+        red_walls[k], blue_walls[k] = state.red_walls, state.blue_walls
+        is_red[k] = state.current_player == 'red'
+
+    k_index = np.arange(count)
+    red_fields, blue_fields = batched_distance_fields(grids)
+    red_dist = red_fields[k_index, red_r, red_c]
+    blue_dist = blue_fields[k_index, blue_r, blue_c]
+    distance_diff = np.where(is_red, blue_dist - red_dist, red_dist - blue_dist)
+
+    # get_game_phase와 같은 단계별 벽 가중치 배율
+    total_walls = QuoridorGameState.INITIAL_WALLS * 2
+    walls_used = total_walls - red_walls - blue_walls
+    total_dist = red_dist + blue_dist
+    early = (walls_used < total_walls * 0.3) & (total_dist > 10)
+    mid = ~early & ((walls_used < total_walls * 0.7) | (total_dist > 5))
+    wall_scale = np.where(early, 1.5, np.where(mid, 1.0, 0.5))
+    wall_diff = np.where(is_red, red_walls - blue_walls, blue_walls - red_walls)
+
+    red_counts, blue_counts = np.split(
+        batched_path_counts(np.concatenate((grids, grids)), np.concatenate((red_fields, blue_fields)), 5), 2
+    )
+    red_paths = red_counts[k_index, red_r, red_c]
+    blue_paths = blue_counts[k_index, blue_r, blue_c]
+    my_paths = np.where(is_red, red_paths, blue_paths)
+    path_diff = np.where(is_red, red_paths - blue_paths, blue_paths - red_paths)
+
+    red_mobility = batched_mobility(grids, red_r, red_c, blue_r, blue_c)
+    blue_mobility = batched_mobility(grids, blue_r, blue_c, red_r, red_c)
+    mobility_diff = np.where(is_red, red_mobility - blue_mobility, blue_mobility - red_mobility)
+
+    red_center = np.maximum(0, 10 - (np.abs(red_r - 4) + np.abs(red_c - 4)) * 2)
+    blue_center = np.maximum(0, 10 - (np.abs(blue_r - 4) + np.abs(blue_c - 4)) * 2)
+    center_diff = np.where(is_red, red_center - blue_center, blue_center - red_center)
+
+    return np.stack((
+        distance_diff,
+        wall_diff * wall_scale,
+        path_diff,
+        mobility_diff,
+        np.where(early, center_diff, 0),
+        distance_diff > 2,
+        np.where(distance_diff < -2, my_paths, 0),
+    ), axis=1).astype(np.float64)
+
+
+# ============================================================================
+# SECTION 6: Minimax Algorithm
+# ============================================================================
+
+# 난이도별 탐색 예산
+# - 고정 깊이 대신 노드 수 / 시간 예산으로 난이도를 정의하여 한 수당 CPU 비용을 일정하게 유지
+# - max_depth는 반복 심화(iterative deepening)의 상한
+# - 배치 평가되는 마지막 깊이의 자식들도 하나하나 노드로 계산 (노드 예산이 평가 비용에 비례)
+DIFFICULTY_BUDGETS: Dict[str, Dict] = {
+    'easy': {
+        'max_depth': 2,
+        'node_budget': 400,
+        'time_budget': 1.0,
+        'max_wall_candidates': 10,
+        'use_move_ordering': False,
+        'use_pruning': False,
+    },
+    'medium': {
+        'max_depth': 3,
+        'node_budget': 2500,
+        'time_budget': 3.0,
+        'max_wall_candidates': 15,
+        'use_move_ordering': True,
+        'use_pruning': False,
+    },
+    'hard': {
+        'max_depth': 6,
+        'node_budget': 15000,
+        'time_budget': 6.0,
+        'max_wall_candidates': 20,
+        'use_move_ordering': True,
+        'use_pruning': True,
+    },
+}
+
+# 전진 가지치기 설정 (use_pruning 난이도에만 적용)
+# - LMR: 정렬상 뒤쪽의 조용한 수(말 이동)는 한 수 얕게 null window로 탐색하고, 기대 이상이면 원래 깊이로 재탐색
+# - Null move: 벽이 남은 쪽이 한 수 쉬어도 컷오프가 나면 그 노드는 탐색 생략
+#   (양쪽 중 하나라도 목표에 가까운 경주 국면에서는 한 수 차이가 결정적이므로 적용하지 않음)
+LMR_FULL_DEPTH_MOVES = 3
+LMR_MIN_DEPTH = 4           # 깊이 3에서는 줄여도 노드가 거의 줄지 않음 (말단 평가만 남음)
+NULL_MOVE_REDUCTION = 2
+NULL_MOVE_MIN_DEPTH = 3
+NULL_MOVE_RACE_DISTANCE = 3
+
+# 부하 인지 모드 설정
+# - 동시 탐색 수가 LOAD_AWARE_BASELINE 이하이면 예산을 그대로 사용
+# - 그 이상이면 동시 탐색 수에 반비례하여 예산 축소 (최소 LOAD_AWARE_MIN_SCALE)
+LOAD_AWARE_BASELINE = 2
+LOAD_AWARE_MIN_SCALE = 0.25
+
+
+class SearchBudgetExceeded(Exception):
+    """탐색 예산(노드 수 / 시간) 초과 시 탐색 중단용 예외"""
+    pass
+
+
+class SearchLoadTracker:
+    """프로세스 내에서 동시에 실행 중인 AI 탐색 수 추적"""
+
+    __slots__ = ('_lock', 'active_searches')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.active_searches = 0
+
+    def __enter__(self) -> 'SearchLoadTracker':
+        with self._lock:
+            self.active_searches += 1
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        with self._lock:
+            self.active_searches -= 1
+
+    def budget_scale(self) -> float:
+        """현재 부하에 따른 예산 배율 (0 < scale <= 1)"""
+        active = max(1, self.active_searches)
+        if active <= LOAD_AWARE_BASELINE:
+            return 1.0
+        return max(LOAD_AWARE_MIN_SCALE, LOAD_AWARE_BASELINE / active)
+
+
+# 전역 부하 추적기
+_search_load = SearchLoadTracker()
+
 
 class MinimaxAI:
     """Minimax 알고리즘을 사용하는 Quoridor AI"""
 
-    def __init__(self, player: str, difficulty: str = 'medium'):
+    def __init__(self, player: str, difficulty: str = 'medium', load_aware: bool = False):
         self.player = player
         self.difficulty = difficulty
+        self.load_aware = load_aware
 
-        if difficulty == 'easy':
-            self.max_depth = 2
-            self.use_move_ordering = False
-            self.max_wall_candidates = 10
-        elif difficulty == 'medium':
-            self.max_depth = 3
-            self.use_move_ordering = True
-            self.max_wall_candidates = 15
-        else:  # hard
-            self.max_depth = 4
-            self.use_move_ordering = True
-            self.max_wall_candidates = 20
+        # 알 수 없는 난이도는 hard로 처리
+        budget = DIFFICULTY_BUDGETS.get(difficulty, DIFFICULTY_BUDGETS['hard'])
+        self.max_depth = budget['max_depth']
+        self.node_budget = budget['node_budget']
+        self.time_budget = budget['time_budget']
+        self.max_wall_candidates = budget['max_wall_candidates']
+        self.use_move_ordering = budget['use_move_ordering']
+        self.use_pruning = budget['use_pruning']
 
-        self.nodes_evaluated = 0
-        self.max_time_per_move = 30.0
-        self.cache_hits = 0
-        self.cache_misses = 0
+        # NumPy가 있으면 마지막 깊이의 자식들을 배치로 평가
+        self.use_batched_leaves = np is not None
+
+        # 평가 점수 캐시 (턴이 바뀌어도 유지)
+        self.eval_cache = EvaluationCache()
+
+        # 국면별 최선 수 (반복 심화의 다음 반복에서 먼저 탐색, 턴마다 초기화)
+        self.hash_moves: Dict[int, int] = {}
+
+        # 탐색 중인 보드 (루트 탐색마다 새로 만들고 minimax에서 make/unmake)
+        self._board: Optional[SearchBoard] = None
 
-    def get_best_move(self, state: QuoridorGameState) -> Optional[Move]:
-        """현재 상태에서 최선의 수 찾기"""
         self.nodes_evaluated = 0
+        self.completed_depth = 0
         self.cache_hits = 0
         self.cache_misses = 0
-        start_time = time.time()
+        self.lmr_researches = 0
 
-        # 각 턴마다 캐시 초기화 (메모리 관리)
-        _pathfinding_cache.clear()
+        # 현재 탐색의 예산 한도 (get_best_move에서 설정)
+        self._node_limit = self.node_budget
+        self._deadline = float('inf')
+        self._abort_enabled = False
+
+    def get_best_move(self, state: QuoridorGameState) -> Optional[int]:
+        """현재 상태에서 최선의 수 코드 찾기 (예산 내 반복 심화)"""
+        start_time = self._begin_search()
 
         moves = generate_smart_moves(state, self.player, max_wall_moves=self.max_wall_candidates)
 
@@ -851,38 +2102,176 @@ class MinimaxAI:
             if is_winning_move(state, self.player, move):
                 return move
 
+        best_move, _ = self._iterative_deepening(state, moves, start_time)
+        self._report_performance(start_time)
+
+        return best_move
+
+    def analyze(
+        self,
+        state: QuoridorGameState,
+        top_n: int = 3,
+        extra_moves: Tuple[int, ...] = (),
+        time_limit: Optional[float] = None
+    ) -> List[Tuple[int, Optional[float]]]:
+        """
+        루트 수들의 정확한 점수 목록 (점수 내림차순)
+
+        반복 심화로 수 순서를 정한 뒤, 상위 top_n개와 extra_moves(예: 실제로 둔 수)만
+        완료된 깊이에서 전체 창(full window)으로 다시 탐색하여 점수를 계산
+
+        time_limit(초)이 주어지면 재탐색도 그 시간에 중단하고,
+        시간 안에 점수를 못 구한 수는 점수 None으로 뒤에 붙임
+        """
+        start_time = self._begin_search()
+
+        moves = generate_smart_moves(state, self.player, max_wall_moves=self.max_wall_candidates)
+        for move in extra_moves:
+            if move not in moves:
+                moves.append(move)
+
+        if not moves:
+            return []
+
+        _, ordered = self._iterative_deepening(state, moves, start_time)
+        depth = max(1, self.completed_depth)
+
+        targets = ordered[:top_n]
+        targets += [move for move in extra_moves if move not in targets]
+
+        results = []
+        if time_limit is not None:
+            self._node_limit = float('inf')
+            self._deadline = start_time + time_limit
+            self._abort_enabled = True
+
+        try:
+            for move in targets:
+                results.append((move, self.score_move(state, move, depth)))
+        except SearchBudgetExceeded:
+            pass
+        finally:
+            self._abort_enabled = False
+
+        results.sort(key=lambda item: item[1], reverse=True)
+        scored = {move for move, _ in results}
+        results += [(move, None) for move in targets if move not in scored]
+        self._report_performance(start_time)
+
+        return results
+
+    def _begin_search(self) -> float:
+        """탐색 통계와 턴 단위 캐시 초기화 후 시작 시각 반환"""
+        self.nodes_evaluated = 0
+        self.completed_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.lmr_researches = 0
+        self.eval_cache.reset_stats()
+        self.hash_moves.clear()
+
+        # 각 턴마다 캐시 초기화 (메모리 관리)
+        _pathfinding_cache.clear()
+
+        return time.time()
+
+    def _iterative_deepening(self, state: QuoridorGameState, moves: List[int], start_time: float):
+        """
+        예산 안에서 깊이를 늘려가며 루트 탐색
+
+        Returns:
+            (최선의 수, 마지막으로 완료된 깊이의 점수순 루트 수 목록)
+        """
         if self.use_move_ordering:
             moves = order_moves(state, self.player, moves)
 
-        best_move = None
-        best_score = float('-inf')
-        alpha = float('-inf')
-        beta = float('inf')
+        with _search_load:
+            scale = _search_load.budget_scale() if self.load_aware else 1.0
+            self._node_limit = int(self.node_budget * scale)
+            self._deadline = start_time + self.time_budget * scale
 
-        for i, move in enumerate(moves):
-            if time.time() - start_time > self.max_time_per_move:
-                break
+            best_move = moves[0]
+            for depth in range(1, self.max_depth + 1):
+                # 깊이 1은 항상 끝까지 탐색하여 수를 보장
+                self._abort_enabled = depth > 1
 
-            new_state = apply_move(state, self.player, move)
+                iteration_best, scores, completed = self._search_root(state, moves, depth)
 
-            score = self.minimax(
-                new_state,
-                self.max_depth - 1,
-                alpha,
-                beta,
-                False
-            )
+                # 이전 반복의 최선 수를 먼저 탐색하므로 중단된 반복의 결과도 사용 가능
+                if iteration_best is not None:
+                    best_move = iteration_best
+
+                if not completed:
+                    break
+
+                self.completed_depth = depth
+
+                # 다음 반복을 위해 점수순으로 루트 수 재정렬
+                moves = sorted(moves, key=lambda m: scores[m], reverse=True)
+
+                if self._budget_exhausted():
+                    break
 
-            if score > best_score:
-                best_score = score
-                best_move = move
-                alpha = max(alpha, score)
+            self._abort_enabled = False
+
+        return best_move, moves
+
+    def _report_performance(self, start_time: float):
+        """탐색 통계 출력"""
+        self.cache_hits = self.eval_cache.hits
+        self.cache_misses = self.eval_cache.misses
 
         elapsed_time = time.time() - start_time
-        print(f"[AI_PERFORMANCE] Nodes: {self.nodes_evaluated}, Time: {elapsed_time:.2f}s, "
-              f"Cache hits: {self.cache_hits}, Cache misses: {self.cache_misses}")
+        print(f"[AI_PERFORMANCE] Nodes: {self.nodes_evaluated}/{self._node_limit}, "
+              f"Depth: {self.completed_depth}, Time: {elapsed_time:.2f}s, "
+              f"Cache hits: {self.cache_hits}, Cache misses: {self.cache_misses}, "
+              f"Hit rate: {self.eval_cache.hit_rate:.1%}")
+
+    def _budget_exhausted(self) -> bool:
+        """노드 또는 시간 예산을 모두 사용했는지 확인"""
+        return self.nodes_evaluated >= self._node_limit or time.time() > self._deadline
+
+    def score_move(self, state: QuoridorGameState, move: int, depth: int) -> float:
+        """루트 수 하나를 depth 깊이까지 전체 창(full window)으로 탐색한 점수"""
+        board = self._board = SearchBoard(state)
+        board.make(self.player, move)
+        return self.minimax(board.state, depth - 1, float('-inf'), float('inf'), False)
+
+    def _search_root(self, state: QuoridorGameState, moves: List[int], depth: int):
+        """
+        루트 노드 탐색 (예산 초과로 중단되면 보드를 버리고 다음 탐색에서 새로 만듦)
 
-        return best_move
+        Returns:
+            (최선의 수, 수별 점수, 반복 완료 여부)
+        """
+        best_move = None
+        best_score = float('-inf')
+        alpha = float('-inf')
+        beta = float('inf')
+        scores: Dict[int, float] = {}
+        board = self._board = SearchBoard(state)
+
+        try:
+            for move in moves:
+                board.make(self.player, move)
+                score = self.minimax(
+                    board.state,
+                    depth - 1,
+                    alpha,
+                    beta,
+                    False
+                )
+                board.unmake()
+                scores[move] = score
+
+                if score > best_score:
+                    best_score = score
+                    best_move = move
+                    alpha = max(alpha, score)
+        except SearchBudgetExceeded:
+            return best_move, scores, False
+
+        return best_move, scores, True
 
     def minimax(
         self,
@@ -890,57 +2279,192 @@ class MinimaxAI:
         depth: int,
         alpha: float,
         beta: float,
-        is_maximizing: bool
+        is_maximizing: bool,
+        allow_null: bool = True
     ) -> float:
-        """Minimax 알고리즘 with Alpha-Beta Pruning"""
+        """
+        Minimax 알고리즘 with Alpha-Beta Pruning (hard는 LMR / Null move 포함)
+        state는 self._board의 상태 (자식은 make/unmake로 탐색하고 반환 시 원래 국면으로 복원)
+        """
         self.nodes_evaluated += 1
 
+        if self._abort_enabled and (
+            self.nodes_evaluated >= self._node_limit or
+            (self.nodes_evaluated & 63 == 0 and time.time() > self._deadline)
+        ):
+            raise SearchBudgetExceeded()
+
         if depth == 0 or state.is_goal('red') or state.is_goal('blue'):
-            return evaluate_position(state, self.player, self.difficulty)
+            return self._evaluate(state)
 
         current_player = self.player if is_maximizing else state.get_opponent(self.player)
+        board = self._board
 
-        moves = generate_smart_moves(state, current_player, max_wall_moves=self.max_wall_candidates)
+        if depth == 1 and self.use_batched_leaves:
+            # 자식 전체를 한 번에 평가하므로 수 목록을 미리 생성
+            moves = generate_smart_moves(
+                state, current_player, max_wall_moves=self.max_wall_candidates, field=board.field
+            )
+            if not moves:
+                return self._evaluate(state)
+            return self._evaluate_frontier(state, current_player, moves, is_maximizing)
+
+        # null window는 기준 경계가 유한할 때만 의미가 있음 (루트 첫 가지처럼 ±무한이면 컷오프가 나지 않음)
+        null_bound = beta if is_maximizing else alpha
+        if allow_null and math.isfinite(null_bound) and self._null_move_allowed(state, current_player, depth):
+            # 상대에게 연속 두 수를 줘도 컷오프가 나면 이 노드는 충분히 좋음
+            null_depth = depth - 1 - NULL_MOVE_REDUCTION
+
+            board.make_null(current_player)
+            if is_maximizing:
+                null_score = self.minimax(state, null_depth, beta - 1, beta, False, allow_null=False)
+                cutoff = null_score >= beta
+            else:
+                null_score = self.minimax(state, null_depth, alpha, alpha + 1, True, allow_null=False)
+                cutoff = null_score <= alpha
+            board.unmake()
 
-        if not moves:
-            return evaluate_position(state, self.player, self.difficulty)
+            if cutoff:
+                return null_score
+
+        position_key = evaluation_key(state.get_hash(), current_player)
 
         if self.use_move_ordering and depth >= 2:
-            moves = order_moves(state, current_player, moves)
+            # 해시 수 -> 말 이동 -> 벽 순서로 지연 생성 (컷오프 시 벽 평가 생략)
+            moves = staged_moves(
+                state, current_player,
+                max_wall_moves=self.max_wall_candidates,
+                hash_move=self.hash_moves.get(position_key),
+                field=board.field
+            )
+        else:
+            moves = generate_smart_moves(
+                state, current_player, max_wall_moves=self.max_wall_candidates, field=board.field
+            )
 
-        if is_maximizing:
-            max_eval = float('-inf')
+        best_score = float('-inf') if is_maximizing else float('inf')
+        best_move = None
+        reduce_late = self.use_pruning and depth >= LMR_MIN_DEPTH
 
-            for move in moves:
-                new_state = apply_move(state, current_player, move)
-                eval_score = self.minimax(new_state, depth - 1, alpha, beta, False)
+        for index, move in enumerate(moves):
+            # 조용한 수(말 이동)만 줄임 (벽은 상대 경로를 바꾸므로 항상 전체 깊이)
+            reduce = (reduce_late and index >= LMR_FULL_DEPTH_MOVES and not is_wall_code(move) and
+                      math.isfinite(alpha if is_maximizing else beta) and
+                      not is_winning_move(state, current_player, move))
 
-                max_eval = max(max_eval, eval_score)
+            board.make(current_player, move)
+            if reduce:
+                eval_score = self._search_reduced(state, depth, alpha, beta, is_maximizing)
+            else:
+                eval_score = self.minimax(state, depth - 1, alpha, beta, not is_maximizing)
+            board.unmake()
+
+            if is_maximizing:
+                if eval_score > best_score:
+                    best_score, best_move = eval_score, move
                 alpha = max(alpha, eval_score)
+            else:
+                if eval_score < best_score:
+                    best_score, best_move = eval_score, move
+                beta = min(beta, eval_score)
 
-                if beta <= alpha:
-                    break
+            if beta <= alpha:
+                break
+
+        if best_move is None:
+            return self._evaluate(state)
 
-            return max_eval
+        self.hash_moves[position_key] = best_move
+        return best_score
 
+    def _search_reduced(
+        self,
+        child: QuoridorGameState,
+        depth: int,
+        alpha: float,
+        beta: float,
+        is_maximizing: bool
+    ) -> float:
+        """뒤쪽 수를 한 수 얕게 null window로 탐색하고, 창을 벗어나면 원래 깊이로 재탐색"""
+        if is_maximizing:
+            score = self.minimax(child, depth - 2, alpha, alpha + 1, False)
+            if score <= alpha:
+                return score
         else:
-            min_eval = float('inf')
+            score = self.minimax(child, depth - 2, beta - 1, beta, True)
+            if score >= beta:
+                return score
 
-            for move in moves:
-                new_state = apply_move(state, current_player, move)
-                eval_score = self.minimax(new_state, depth - 1, alpha, beta, True)
+        self.lmr_researches += 1
+        return self.minimax(child, depth - 1, alpha, beta, not is_maximizing)
 
-                min_eval = min(min_eval, eval_score)
-                beta = min(beta, eval_score)
+    def _null_move_allowed(self, state: QuoridorGameState, current_player: str, depth: int) -> bool:
+        """Null move 적용 가능 여부 (벽이 남아 있고 경주 국면이 아닐 때만)"""
+        if not self.use_pruning or depth < NULL_MOVE_MIN_DEPTH:
+            return False
 
-                if beta <= alpha:
-                    break
+        if state.get_player_walls(current_player) <= 0:
+            return False
 
-            return min_eval
+        opponent = state.get_opponent(current_player)
+        return (self._board.distance(current_player) > NULL_MOVE_RACE_DISTANCE and
+                self._board.distance(opponent) > NULL_MOVE_RACE_DISTANCE)
+
+    def _evaluate_frontier(
+        self,
+        state: QuoridorGameState,
+        current_player: str,
+        moves: List[int],
+        is_maximizing: bool
+    ) -> float:
+        """
+        깊이 1 노드의 자식들을 배치 평가하여 최대/최소 점수 반환
+        (자식마다 노드 하나로 노드 예산에 반영)
+        """
+        self.nodes_evaluated += len(moves)
+
+        # 캐시에 없는 자식만 배치 평가
+        side_to_move = state.get_opponent(current_player)
+        sign = 1.0 if side_to_move == self.player else -1.0
+        keys = child_evaluation_keys(state, current_player, moves)
+
+        scores = []
+        missing = []
+        for i, key in enumerate(keys):
+            cached = self.eval_cache.probe(key)
+            if cached is None:
+                missing.append(i)
+                scores.append(0.0)
+            else:
+                scores.append(cached * sign)
+
+        if missing:
+            batch_scores = batched_evaluate_children(
+                state, current_player, [moves[i] for i in missing], self.player, self.difficulty
+            )
+            for i, score in zip(missing, batch_scores):
+                scores[i] = score
+                self.eval_cache.store(keys[i], score * sign)
+
+        return max(scores) if is_maximizing else min(scores)
+
+    def _evaluate(self, state: QuoridorGameState) -> float:
+        """평가 캐시를 거쳐 포지션 평가 (점수는 self.player 관점)"""
+        # 캐시에는 둘 차례인 플레이어 관점으로 저장
+        sign = 1.0 if state.current_player == self.player else -1.0
+        key = evaluation_key(state.get_hash(), state.current_player)
+
+        cached = self.eval_cache.probe(key)
+        if cached is not None:
+            return cached * sign
+
+        score = evaluate_position(state, self.player, self.difficulty)
+        self.eval_cache.store(key, score * sign)
+        return score
 
 
 # ============================================================================
-# SECTION 6: Main AI Interface
+# SECTION 7: Main AI Interface
 # ============================================================================
 
 class QuoridorAI:
@@ -954,20 +2478,21 @@ class QuoridorAI:
         print(best_move)
     """
 
-    def __init__(self, player: str = 'blue', difficulty: str = 'medium'):
+    def __init__(self, player: str = 'blue', difficulty: str = 'medium', load_aware: bool = False):
         """
         AI 초기화
 
         Args:
             player: AI가 플레이할 색상 ('red' 또는 'blue')
             difficulty: 난이도 ('easy', 'medium', 'hard')
+            load_aware: True이면 동시 탐색 수에 따라 탐색 예산 축소
         """
         self.player = player.lower()
         self.opponent = 'blue' if self.player == 'red' else 'red'
         self.difficulty = difficulty.lower()
 
         self.state = QuoridorGameState()
-        self.ai_engine = MinimaxAI(self.player, self.difficulty)
+        self.ai_engine = MinimaxAI(self.player, self.difficulty, load_aware=load_aware)
 
     def reset(self):
         """게임 상태 초기화"""
@@ -1011,27 +2536,14 @@ class QuoridorAI:
             - 이동: {'type': 'move', 'position': 'Y,X', 'y': Y, 'x': X}
             - 벽: {'type': 'wall', 'wall_type': 'horizontal/vertical', 'position': 'Y,X', 'y': Y, 'x': X}
         """
-        best_move = self.ai_engine.get_best_move(self.state)
+        best_code = self.ai_engine.get_best_move(self.state)
 
-        if not best_move:
+        if best_code is None:
             return None
 
-        if best_move.move_type == 'move':
-            result = {
-                'type': 'move',
-                'position': f"{best_move.y},{best_move.x}",
-                'y': best_move.y,
-                'x': best_move.x
-            }
-
-        else:
-            result = {
-                'type': 'wall',
-                'wall_type': best_move.wall_type,
-                'position': f"{best_move.y},{best_move.x}",
-                'y': best_move.y,
-                'x': best_move.x
-            }
+        # 엔진 내부의 수 코드를 외부용 Move로 변환
+        best_move = Move.from_code(best_code)
+        result = best_move.to_dict()
 
         self._apply_ai_move(best_move)
 
@@ -1078,7 +2590,7 @@ class QuoridorAI:
 
 
 # ============================================================================
-# SECTION 7: Testing & Examples
+# SECTION 8: Testing & Examples
 # ============================================================================
 
 def example_usage():
@@ -1154,11 +2666,69 @@ def performance_test():
         print(f"Total time for {moves_to_test} moves: {total_time:.2f}s")
 
 
+# 가지치기 비교용 고정 국면 (FEN)
+COMPARE_POSITIONS = (
+    'e1 e9 - 10 10 b',
+    'd4 e8 c8h,e8h,d5v 9 8 r',
+    'f3 d8 d5h 10 9 r',
+    'f2 d9 d9h,b7h,h4h,d3h,f3h,a9v,f2v 7 6 r',
+    'f2 e9 c9h,e8h,b7h,d7h,e5h,g5h,e3h,g3h,a9v,g2v 5 5 r',
+)
+COMPARE_DEPTH = 4   # 가지치기 도입 전 hard의 고정 깊이
+
+
+def compare_pruning():
+    """고정 국면에서 가지치기 없는 이전 hard 설정(깊이 4 전체 탐색)과 현재 hard의 노드 수 / 최선 수 비교"""
+    print("=" * 80)
+    print(f"Hard pruning comparison (depth {COMPARE_DEPTH}, then the hard budget)")
+    print("=" * 80)
+
+    def run(state: QuoridorGameState, use_pruning: bool, fixed_depth: bool):
+        ai = MinimaxAI(state.current_player, 'hard')
+        ai.use_pruning = use_pruning
+        if fixed_depth:
+            ai.max_depth = COMPARE_DEPTH
+            ai.node_budget = 10 ** 9
+            ai.time_budget = float('inf')
+
+        start = time.time()
+        with contextlib.redirect_stdout(io.StringIO()):
+            move = ai.get_best_move(state)
+        elapsed = time.time() - start
+        return ai.nodes_evaluated, ai.completed_depth, elapsed, Move.from_code(move) if move is not None else None
+
+    for fen in COMPARE_POSITIONS:
+        state = QuoridorGameState.from_fen(fen)
+        print(f"\n{fen}")
+        moves = {}
+        for label, use_pruning, fixed_depth in (
+            ("baseline depth 4", False, True),
+            ("pruned depth 4  ", True, True),
+            ("hard budget     ", True, False),
+        ):
+            nodes, depth, elapsed, move = run(state, use_pruning, fixed_depth)
+            moves[label] = move
+            print(f"  {label}  nodes {nodes:>7}  depth {depth}  time {elapsed:5.2f}s  move {move}")
+
+        # 다른 수를 골랐으면 가지치기 없는 깊이 4 점수로 손실 확인
+        scorer = MinimaxAI(state.current_player, 'hard')
+        scorer.use_pruning = False
+        scores = {}
+        for move in set(moves.values()):
+            scores[move] = scorer.score_move(state, move.code, COMPARE_DEPTH)
+        best = max(scores.values())
+        print("  depth 4 loss: " + ", ".join(
+            f"{label.strip()} {best - scores[move]:.1f}" for label, move in moves.items()
+        ))
+
+
 if __name__ == "__main__":
     import sys
 
     if len(sys.argv) > 1 and sys.argv[1] == 'test':
         performance_test()
+    elif len(sys.argv) > 1 and sys.argv[1] == 'compare':
+        compare_pruning()
     else:
         example_usage()
 
@@ -0,0 +1,557 @@
+# resp.py
+"""
+Redis 프로토콜(RESP2) 클라이언트와 로컬 대체 서버
+
+- RespClient: asyncio 기반 클라이언트 (연결 하나에 요청을 파이프라인으로 보내고 응답을 순서대로 대응)
+  URL: redis://[:password@]host:port[/db] 또는 unix:///path/to/socket[?db=0]
+- RespSubscriber: 구독 전용 연결 (SUBSCRIBE/UNSUBSCRIBE, 받은 메시지는 콜백으로 전달, 끊기면 다시 연결해 재구독)
+- RespBroker: 공유 세션 저장소와 메시지 버스가 사용하는 명령만 구현한 단일 프로세스 서버
+  Redis 없이 여러 워커를 실행하거나 시험할 때 사용 (TCP 또는 Unix 소켓)
+  지원 명령: PING, AUTH, SELECT, GET, SET(NX/XX/EX/PX), DEL, EXISTS, EXPIRE, PEXPIRE,
+  HSET, HSETNX, HGET, HGETALL, HVALS, HDEL, HINCRBY, RPUSH, LPOP(count), PUBLISH, SUBSCRIBE, UNSUBSCRIBE,
+  EVAL/EVALSHA (등록된 스크립트만, Lua 대신 같은 동작의 Python 함수 실행)
+- RespScript: 여러 명령을 원자적으로 실행하는 Lua 스크립트 (EVALSHA, 서버에 없으면 EVAL)
+
+실행 예:
+    python resp.py --unix /tmp/quoridor-store.sock
+    python resp.py --port 6380
+"""
+import argparse
+import asyncio
+import hashlib
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse, parse_qs, unquote
+
+# ================== 연결 설정 ==================
+CONNECT_TIMEOUT = 5.0              # 연결 대기 (초)
+RECONNECT_DELAY = 1.0              # 구독 연결이 끊겼을 때 다시 연결하기 전 대기 (초)
+EXPIRE_SWEEP_INTERVAL = 1.0        # 대체 서버의 만료 키 정리 간격 (초)
+
+
+class RespError(Exception):
+    """서버가 돌려준 오류 응답"""
+
+
+# ================== 인코딩/파싱 ==================
+def encode_command(args: Tuple[Any, ...]) -> bytes:
+    parts = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        data = arg if isinstance(arg, bytes) else str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+async def read_reply(reader: asyncio.StreamReader) -> Any:
+    """응답 하나 읽기 (오류 응답은 RespError 객체로 반환)"""
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("Connection closed by server")
+    kind, payload = line[:1], line[1:-2]
+
+    if kind == b"+":
+        return payload.decode()
+    if kind == b"-":
+        return RespError(payload.decode())
+    if kind == b":":
+        return int(payload)
+    if kind == b"$":
+        length = int(payload)
+        if length < 0:
+            return None
+        return (await reader.readexactly(length + 2))[:-2].decode()
+    if kind == b"*":
+        count = int(payload)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise ConnectionError(f"Invalid reply: {line[:40]!r}")
+
+
+def encode_reply(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, RespError):
+        return b"-%s\r\n" % str(value).encode()
+    if isinstance(value, bool):
+        return b":%d\r\n" % int(value)
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, (list, tuple)):
+        return b"*%d\r\n" % len(value) + b"".join(encode_reply(item) for item in value)
+    data = value if isinstance(value, bytes) else str(value).encode()
+    return b"$%d\r\n%s\r\n" % (len(data), data)
+
+
+OK = object()   # 대체 서버의 "+OK" 응답
+
+
+# ================== 클라이언트 ==================
+async def open_connection(url: str) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+    """URL의 서버에 연결하고 인증/DB 선택까지 마친 스트림 반환"""
+    parsed = urlparse(url)
+    if parsed.scheme == "unix":
+        opening = asyncio.open_unix_connection(parsed.path)
+    elif parsed.scheme == "redis":
+        opening = asyncio.open_connection(parsed.hostname or "127.0.0.1", parsed.port or 6379)
+    else:
+        raise ValueError(f"Unsupported store URL: {url}")
+    reader, writer = await asyncio.wait_for(opening, CONNECT_TIMEOUT)
+
+    setup = []
+    if parsed.password:
+        setup.append(("AUTH", unquote(parsed.password)))
+    db = parsed.path.lstrip("/") if parsed.scheme == "redis" else parse_qs(parsed.query).get("db", [""])[0]
+    if db and db != "0":
+        setup.append(("SELECT", db))
+    for command in setup:
+        writer.write(encode_command(command))
+        reply = await read_reply(reader)
+        if isinstance(reply, RespError):
+            writer.close()
+            raise reply
+    return reader, writer
+
+
+class RespClient:
+    """파이프라인 RESP 클라이언트 (연결이 끊기면 다음 명령에서 다시 연결)"""
+
+    def __init__(self, url: str):
+        self.url = url
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._pending: Deque[asyncio.Future] = deque()
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock: Optional[asyncio.Lock] = None
+
+    async def _connect(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            reader, writer = await open_connection(self.url)
+            self._reader, self._writer = reader, writer
+            self._reader_task = asyncio.create_task(self._read_replies(reader))
+
+    async def _read_replies(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                reply = await read_reply(reader)
+                future = self._pending.popleft()
+                if not future.done():
+                    if isinstance(reply, RespError):
+                        future.set_exception(reply)
+                    else:
+                        future.set_result(reply)
+        except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+            self._disconnect(ConnectionError(f"Store connection lost: {e}"))
+        except asyncio.CancelledError:
+            self._disconnect(ConnectionError("Store connection closed"))
+            raise
+
+    def _disconnect(self, error: Exception):
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+        while self._pending:
+            future = self._pending.popleft()
+            if not future.done():
+                future.set_exception(error)
+
+    async def execute(self, *args) -> Any:
+        """명령 실행 후 응답 반환 (오류 응답은 RespError)"""
+        if self._writer is None:
+            await self._connect()
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append(future)
+        self._writer.write(encode_command(args))
+        return await future
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            try:
+                await self._reader_task
+            except asyncio.CancelledError:
+                pass
+            self._reader_task = None
+        self._disconnect(ConnectionError("Store connection closed"))
+
+
+class RespScript:
+    """
+    서버에서 원자적으로 실행하는 Lua 스크립트
+    대체 서버는 Lua를 실행하지 않으므로 같은 동작의 Python 함수 emulate(call, keys, args)를 함께 둠
+    (call(*command)는 Lua의 redis.call과 같음)
+    """
+
+    def __init__(self, source: str, emulate: Callable[[Callable[..., Any], List[str], List[str]], Any]):
+        self.source = source
+        self.sha = hashlib.sha1(source.encode()).hexdigest()
+        self.emulate = emulate
+
+    async def run(self, client: RespClient, keys: List[str], args: List[Any]) -> Any:
+        """EVALSHA로 실행 (서버에 스크립트가 없으면 EVAL로 다시 보냄)"""
+        try:
+            return await client.execute("EVALSHA", self.sha, len(keys), *keys, *args)
+        except RespError as e:
+            if not str(e).startswith("NOSCRIPT"):
+                raise
+        return await client.execute("EVAL", self.source, len(keys), *keys, *args)
+
+
+class RespSubscriber:
+    """
+    구독 전용 연결 (받은 메시지는 on_message(channel, message)로 전달)
+    subscribe/unsubscribe는 서버 확인 응답까지 기다림, 연결이 끊기면 다시 연결해 모든 채널을 재구독
+    """
+
+    def __init__(self, url: str, on_message: Callable[[str, str], None]):
+        self.url = url
+        self._on_message = on_message
+        self._channels: Set[str] = set()
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._acks: Deque[asyncio.Future] = deque()
+        self._task: Optional[asyncio.Task] = None
+        self._connected: Optional[asyncio.Event] = None
+
+    async def start(self):
+        self._connected = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await open_connection(self.url)
+            except (OSError, asyncio.TimeoutError, RespError) as e:
+                print(f"[RESP] Subscriber connection failed: {e}")
+                await asyncio.sleep(RECONNECT_DELAY)
+                continue
+
+            self._writer = writer
+            if self._channels:
+                # 재구독 (확인 응답은 읽기 루프에서 버림)
+                for channel in self._channels:
+                    writer.write(encode_command(("SUBSCRIBE", channel)))
+                    self._acks.append(asyncio.get_running_loop().create_future())
+            self._connected.set()
+
+            try:
+                while True:
+                    reply = await read_reply(reader)
+                    if not isinstance(reply, list) or not reply:
+                        continue
+                    kind = reply[0]
+                    if kind == "message":
+                        self._on_message(reply[1], reply[2])
+                    elif kind in ("subscribe", "unsubscribe") and self._acks:
+                        future = self._acks.popleft()
+                        if not future.done():
+                            future.set_result(None)
+            except (ConnectionError, asyncio.IncompleteReadError, OSError) as e:
+                print(f"[RESP] Subscriber connection lost: {e}")
+            finally:
+                self._connected.clear()
+                self._writer = None
+                writer.close()
+                while self._acks:
+                    future = self._acks.popleft()
+                    if not future.done():
+                        future.set_result(None)
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _send(self, command: str, channel: str):
+        await self._connected.wait()
+        future = asyncio.get_running_loop().create_future()
+        self._acks.append(future)
+        self._writer.write(encode_command((command, channel)))
+        await future
+
+    async def subscribe(self, channel: str):
+        self._channels.add(channel)
+        await self._send("SUBSCRIBE", channel)
+
+    async def unsubscribe(self, channel: str):
+        self._channels.discard(channel)
+        await self._send("UNSUBSCRIBE", channel)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# ================== 로컬 대체 서버 ==================
+class RespBroker:
+    """메모리에 데이터를 두는 단일 프로세스 RESP 서버"""
+
+    def __init__(self, scripts: Iterable[RespScript] = ()):
+        self._data: Dict[str, Any] = {}           # 키 -> str | dict | deque
+        self._expires: Dict[str, float] = {}      # 키 -> 만료 시각 (time.monotonic)
+        self._subscribers: Dict[str, Set[asyncio.StreamWriter]] = {}   # 채널 -> 구독 연결
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._sweeper: Optional[asyncio.Task] = None
+        self._scripts: Dict[str, RespScript] = {script.sha: script for script in scripts}   # SHA1 -> 스크립트
+
+    # ---------- 키 관리 ----------
+    def _alive(self, key: str) -> bool:
+        deadline = self._expires.get(key)
+        if deadline is not None and deadline <= time.monotonic():
+            self._data.pop(key, None)
+            del self._expires[key]
+        return key in self._data
+
+    def _get(self, key: str, kind: type, create: bool = False):
+        if not self._alive(key):
+            if not create:
+                return None
+            self._data[key] = kind()
+        value = self._data[key]
+        if not isinstance(value, kind):
+            raise RespError("WRONGTYPE Operation against a key holding the wrong kind of value")
+        return value
+
+    def _delete(self, key: str) -> bool:
+        existed = self._alive(key)
+        self._data.pop(key, None)
+        self._expires.pop(key, None)
+        return existed
+
+    def _drop_if_empty(self, key: str):
+        if not self._data.get(key):
+            self._delete(key)
+
+    # ---------- 명령 ----------
+    def cmd_ping(self, *args):
+        return args[0] if args else "PONG"
+
+    def cmd_auth(self, *args):
+        return OK
+
+    def cmd_select(self, db):
+        return OK
+
+    def cmd_get(self, key):
+        return self._get(key, str)
+
+    def cmd_set(self, key, value, *options):
+        options = [option.upper() for option in options]
+        ttl = None
+        index = 0
+        while index < len(options):
+            option = options[index]
+            if option in ("EX", "PX"):
+                ttl = int(options[index + 1]) / (1 if option == "EX" else 1000)
+                index += 1
+            index += 1
+
+        exists = self._alive(key)
+        if ("NX" in options and exists) or ("XX" in options and not exists):
+            return None
+        self._data[key] = value
+        self._expires.pop(key, None)
+        if ttl is not None:
+            self._expires[key] = time.monotonic() + ttl
+        return OK
+
+    def cmd_del(self, *keys):
+        return sum(self._delete(key) for key in keys)
+
+    def cmd_exists(self, *keys):
+        return sum(self._alive(key) for key in keys)
+
+    def cmd_expire(self, key, seconds):
+        return self.cmd_pexpire(key, int(seconds) * 1000)
+
+    def cmd_pexpire(self, key, milliseconds):
+        if not self._alive(key):
+            return 0
+        self._expires[key] = time.monotonic() + int(milliseconds) / 1000
+        return 1
+
+    def cmd_hset(self, key, *pairs):
+        if not pairs or len(pairs) % 2:
+            raise RespError("ERR wrong number of arguments for 'hset' command")
+        table = self._get(key, dict, create=True)
+        added = 0
+        for field, value in zip(pairs[::2], pairs[1::2]):
+            added += field not in table
+            table[field] = value
+        return added
+
+    def cmd_hsetnx(self, key, field, value):
+        table = self._get(key, dict, create=True)
+        if field in table:
+            return 0
+        table[field] = value
+        return 1
+
+    def cmd_hget(self, key, field):
+        table = self._get(key, dict)
+        return table.get(field) if table else None
+
+    def cmd_hgetall(self, key):
+        table = self._get(key, dict) or {}
+        return [item for pair in table.items() for item in pair]
+
+    def cmd_hvals(self, key):
+        return list((self._get(key, dict) or {}).values())
+
+    def cmd_hdel(self, key, *fields):
+        table = self._get(key, dict)
+        if not table:
+            return 0
+        removed = sum(table.pop(field, None) is not None for field in fields)
+        self._drop_if_empty(key)
+        return removed
+
+    def cmd_hincrby(self, key, field, increment):
+        table = self._get(key, dict, create=True)
+        try:
+            value = int(table.get(field, 0)) + int(increment)
+        except ValueError:
+            raise RespError("ERR hash value is not an integer")
+        table[field] = str(value)
+        return value
+
+    def cmd_rpush(self, key, *values):
+        items = self._get(key, deque, create=True)
+        items.extend(values)
+        return len(items)
+
+    def cmd_lpop(self, key, count=None):
+        items = self._get(key, deque)
+        if not items:
+            return None
+        if count is None:
+            value = items.popleft()
+            self._drop_if_empty(key)
+            return value
+        values = [items.popleft() for _ in range(min(int(count), len(items)))]
+        self._drop_if_empty(key)
+        return values
+
+    def cmd_publish(self, channel, message):
+        writers = self._subscribers.get(channel, ())
+        data = encode_reply(["message", channel, message])
+        for writer in writers:
+            writer.write(data)
+        return len(writers)
+
+    def cmd_eval(self, source, numkeys, *args):
+        return self.cmd_evalsha(hashlib.sha1(source.encode()).hexdigest(), numkeys, *args)
+
+    def cmd_evalsha(self, sha, numkeys, *args):
+        """등록된 스크립트의 Python 함수 실행 (이벤트 루프 하나에서 실행되므로 원자적)"""
+        script = self._scripts.get(sha)
+        if script is None:
+            raise RespError("NOSCRIPT No matching script")
+        count = int(numkeys)
+        return script.emulate(self._call, list(args[:count]), list(args[count:]))
+
+    def _call(self, *args):
+        reply = self.dispatch([str(arg) for arg in args])
+        if isinstance(reply, RespError):
+            raise reply
+        return reply
+
+    def _subscription(self, writer: asyncio.StreamWriter, subscribed: Set[str], command: str,
+                      channels: List[str]) -> bytes:
+        """SUBSCRIBE/UNSUBSCRIBE 처리 후 채널마다 확인 응답"""
+        replies = []
+        for channel in channels or list(subscribed):
+            if command == "subscribe":
+                subscribed.add(channel)
+                self._subscribers.setdefault(channel, set()).add(writer)
+            else:
+                subscribed.discard(channel)
+                writers = self._subscribers.get(channel)
+                if writers is not None:
+                    writers.discard(writer)
+                    if not writers:
+                        del self._subscribers[channel]
+            replies.append(encode_reply([command, channel, len(subscribed)]))
+        return b"".join(replies)
+
+    def dispatch(self, args: List[str]) -> Any:
+        handler = getattr(self, f"cmd_{args[0].lower()}", None)
+        if handler is None:
+            return RespError(f"ERR unknown command '{args[0]}'")
+        try:
+            return handler(*args[1:])
+        except RespError as e:
+            return e
+        except (TypeError, ValueError, IndexError):
+            return RespError(f"ERR wrong arguments for '{args[0].lower()}' command")
+
+    # ---------- 서버 ----------
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        subscribed: Set[str] = set()
+        try:
+            while True:
+                args = await read_reply(reader)
+                if not isinstance(args, list) or not args:
+                    writer.write(encode_reply(RespError("ERR protocol error")))
+                    break
+                command = args[0].lower()
+                if command in ("subscribe", "unsubscribe"):
+                    writer.write(self._subscription(writer, subscribed, command, args[1:]))
+                else:
+                    reply = self.dispatch(args)
+                    writer.write(b"+OK\r\n" if reply is OK else encode_reply(reply))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, OSError):
+            pass
+        finally:
+            self._subscription(writer, subscribed, "unsubscribe", [])
+            writer.close()
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(EXPIRE_SWEEP_INTERVAL)
+            now = time.monotonic()
+            for key in [key for key, deadline in self._expires.items() if deadline <= now]:
+                self._delete(key)
+
+    async def start(self, host: str = "127.0.0.1", port: int = 6379, unix_path: Optional[str] = None):
+        if unix_path:
+            self._server = await asyncio.start_unix_server(self._handle, path=unix_path)
+        else:
+            self._server = await asyncio.start_server(self._handle, host, port)
+        self._sweeper = asyncio.create_task(self._sweep())
+
+    async def serve_forever(self):
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self):
+        self._sweeper.cancel()
+        self._server.close()
+        await self._server.wait_closed()
+
+
+async def run_broker(host: str, port: int, unix_path: Optional[str]):
+    # 세션 저장소의 스크립트 등록 (session_store가 이 모듈을 가져오므로 실행할 때 가져옴)
+    from session_store import STORE_SCRIPTS
+    broker = RespBroker(STORE_SCRIPTS)
+    await broker.start(host, port, unix_path)
+    print(f"[RESP] Listening on {unix_path or f'{host}:{port}'}")
+    await broker.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local Redis-protocol stand-in for the shared session store and message bus")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6379)
+    parser.add_argument("--unix", default=None, help="listen on a Unix socket instead of TCP")
+    args = parser.parse_args()
+    try:
+        asyncio.run(run_broker(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,462 @@
+# session_store.py
+"""
+게임 세션/접속 상태 저장소
+
+- 여러 워커 프로세스가 함께 봐야 하는 상태를 한 인터페이스(SessionStore) 뒤에 둠
+  게임 세션 (플레이어, ID, ELO, 히스토리 ID), 접속 위치 (/fight 접속 워커),
+  만료되는 임시 데이터 (이메일 인증 대기), 매칭 대기열 (참가/취소 이벤트와 대기자 목록), 워커 간 역할 잠금
+- WebSocket 객체는 저장하지 않음 (소켓은 연결을 받은 워커에만 있음)
+- 구현
+  InProcessSessionStore: 프로세스 메모리 (워커 하나, 기본값)
+  RedisSessionStore: Redis 프로토콜 서버 (Redis 또는 resp.py의 로컬 대체 서버)
+  여러 명령이 필요한 작업은 Lua 스크립트로 원자적으로 실행 (대체 서버는 같은 동작의 Python 함수 실행)
+- 저장소 URL (QUORIDOR_SESSION_STORE 환경 변수)
+  memory://  |  redis://host:port/db  |  unix:///path/to/socket
+"""
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional
+
+from resp import RespClient, RespScript
+
+# ================== 저장소 설정 ==================
+SESSION_STORE_URL = os.environ.get("QUORIDOR_SESSION_STORE", "memory://")
+KEY_PREFIX = "quoridor:"
+GAME_SESSION_TTL = 6 * 60 * 60     # 정리되지 않은 게임 세션 보관 시간 (초, 워커가 비정상 종료한 경우)
+
+
+class SessionStore(ABC):
+    """세션 저장소 인터페이스 (값은 JSON으로 표현할 수 있는 일반 값)"""
+
+    # ---------- 게임 세션 ----------
+    @abstractmethod
+    async def create_game(self, time_control: str, game_token: str, fields: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    async def get_game(self, time_control: str, game_token: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def update_game(self, time_control: str, game_token: str, fields: Dict[str, Any]):
+        ...
+
+    @abstractmethod
+    async def claim_game_field(self, time_control: str, game_token: str, field: str, value: Any) -> bool:
+        """필드가 비어 있을 때만 값을 쓰고 True 반환 (여러 연결 중 하나만 작업을 맡을 때 사용)"""
+
+    @abstractmethod
+    async def release_game_field(self, time_control: str, game_token: str, field: str):
+        """claim_game_field로 맡은 필드 삭제 (작업이 실패해 다른 연결이 다시 맡을 수 있게 할 때 사용)"""
+
+    @abstractmethod
+    async def increment_game_field(self, time_control: str, game_token: str, field: str) -> Optional[int]:
+        """정수 필드를 1 늘리고 새 값 반환 (여러 워커가 함께 번호를 매길 때 사용, 세션이 없으면 None)"""
+
+    @abstractmethod
+    async def delete_game(self, time_control: str, game_token: str) -> bool:
+        """게임 세션 삭제 (이미 없으면 False)"""
+
+    # ---------- 접속 위치 ----------
+    @abstractmethod
+    async def set_presence(self, kind: str, username: str, owner: str):
+        ...
+
+    @abstractmethod
+    async def get_presence(self, kind: str, username: str) -> Optional[str]:
+        ...
+
+    @abstractmethod
+    async def clear_presence(self, kind: str, username: str, owner: str):
+        """owner가 등록한 접속 위치일 때만 삭제 (다른 워커로 다시 접속한 경우 유지)"""
+
+    # ---------- 만료되는 임시 데이터 ----------
+    @abstractmethod
+    async def put_temp(self, namespace: str, key: str, value: Dict[str, Any], ttl: int):
+        ...
+
+    @abstractmethod
+    async def get_temp(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        ...
+
+    @abstractmethod
+    async def delete_temp(self, namespace: str, key: str):
+        ...
+
+    # ---------- 매칭 대기열 ----------
+    @abstractmethod
+    async def queue_join(self, time_control: str, entry: Dict[str, Any]):
+        """대기자 등록 (entry: username, connection, player_id, elo, enqueued_at)"""
+
+    @abstractmethod
+    async def queue_leave(self, time_control: str, username: str, connection: str) -> bool:
+        """connection으로 등록된 대기자일 때만 취소"""
+
+    @abstractmethod
+    async def queue_take_events(self, limit: int) -> List[Dict[str, Any]]:
+        """참가/취소 이벤트를 순서대로 꺼냄 (매칭을 맡은 워커가 호출)"""
+
+    @abstractmethod
+    async def queue_entries(self, time_control: str) -> List[Dict[str, Any]]:
+        """현재 대기자 전체 (매칭을 새로 맡은 워커가 대기열을 다시 만들 때 사용)"""
+
+    @abstractmethod
+    async def queue_remove(self, time_control: str, usernames: Iterable[str]):
+        """매칭된 대기자 삭제"""
+
+    # ---------- 역할 잠금 ----------
+    @abstractmethod
+    async def acquire_role(self, role: str, owner: str, ttl: float) -> bool:
+        """역할을 맡거나 이미 맡은 역할의 기한을 연장하면 True (ttl 동안 갱신하지 않으면 다른 워커가 가져감)"""
+
+    async def close(self):
+        pass
+
+
+# ================== 프로세스 메모리 구현 ==================
+class InProcessSessionStore(SessionStore):
+    """워커 하나일 때 사용하는 메모리 저장소 (값은 복사해서 반환)"""
+
+    def __init__(self):
+        self._games: Dict[str, Dict[str, Any]] = {}
+        self._presence: Dict[str, Dict[str, str]] = {}
+        self._temp: Dict[str, tuple] = {}
+        self._queues: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self._events: Deque[Dict[str, Any]] = deque()
+        self._roles: Dict[str, tuple] = {}
+
+    async def create_game(self, time_control, game_token, fields):
+        self._games[f"{time_control}:{game_token}"] = dict(fields)
+
+    async def get_game(self, time_control, game_token):
+        game = self._games.get(f"{time_control}:{game_token}")
+        return dict(game) if game is not None else None
+
+    async def update_game(self, time_control, game_token, fields):
+        game = self._games.get(f"{time_control}:{game_token}")
+        if game is not None:
+            game.update(fields)
+
+    async def claim_game_field(self, time_control, game_token, field, value):
+        game = self._games.get(f"{time_control}:{game_token}")
+        if game is None or field in game:
+            return False
+        game[field] = value
+        return True
+
+    async def release_game_field(self, time_control, game_token, field):
+        game = self._games.get(f"{time_control}:{game_token}")
+        if game is not None:
+            game.pop(field, None)
+
+    async def increment_game_field(self, time_control, game_token, field):
+        game = self._games.get(f"{time_control}:{game_token}")
+        if game is None:
+            return None
+        game[field] = game.get(field, 0) + 1
+        return game[field]
+
+    async def delete_game(self, time_control, game_token):
+        return self._games.pop(f"{time_control}:{game_token}", None) is not None
+
+    async def set_presence(self, kind, username, owner):
+        self._presence.setdefault(kind, {})[username] = owner
+
+    async def get_presence(self, kind, username):
+        return self._presence.get(kind, {}).get(username)
+
+    async def clear_presence(self, kind, username, owner):
+        owners = self._presence.get(kind, {})
+        if owners.get(username) == owner:
+            del owners[username]
+
+    async def put_temp(self, namespace, key, value, ttl):
+        self._temp[f"{namespace}:{key}"] = (time.time() + ttl, dict(value))
+
+    async def get_temp(self, namespace, key):
+        item = self._temp.get(f"{namespace}:{key}")
+        if item is None:
+            return None
+        if item[0] <= time.time():
+            del self._temp[f"{namespace}:{key}"]
+            return None
+        return dict(item[1])
+
+    async def delete_temp(self, namespace, key):
+        self._temp.pop(f"{namespace}:{key}", None)
+
+    async def queue_join(self, time_control, entry):
+        self._queues.setdefault(time_control, {})[entry["username"]] = dict(entry)
+        self._events.append({"type": "join", "time_control": time_control, "entry": dict(entry)})
+
+    async def queue_leave(self, time_control, username, connection):
+        queue = self._queues.get(time_control, {})
+        if queue.get(username, {}).get("connection") != connection:
+            return False
+        del queue[username]
+        self._events.append({"type": "leave", "time_control": time_control,
+                             "username": username, "connection": connection})
+        return True
+
+    async def queue_take_events(self, limit):
+        return [self._events.popleft() for _ in range(min(limit, len(self._events)))]
+
+    async def queue_entries(self, time_control):
+        return [dict(entry) for entry in self._queues.get(time_control, {}).values()]
+
+    async def queue_remove(self, time_control, usernames):
+        queue = self._queues.get(time_control, {})
+        for username in usernames:
+            queue.pop(username, None)
+
+    async def acquire_role(self, role, owner, ttl):
+        holder = self._roles.get(role)
+        if holder is None or holder[0] == owner or holder[1] <= time.time():
+            self._roles[role] = (owner, time.time() + ttl)
+            return True
+        return False
+
+
+# ================== Redis 스크립트 ==================
+# 여러 명령이 필요한 작업을 원자적으로 실행 (Lua 본문과 대체 서버용 Python 함수는 같은 동작)
+
+def _create_game(call, keys, args):
+    call("DEL", keys[0])
+    call("HSET", keys[0], *args[1:])
+    call("EXPIRE", keys[0], args[0])
+    return 1
+
+
+CREATE_GAME = RespScript("""
+redis.call("DEL", KEYS[1])
+redis.call("HSET", KEYS[1], unpack(ARGV, 2))
+redis.call("EXPIRE", KEYS[1], ARGV[1])
+return 1
+""", _create_game)
+
+
+def _update_game(call, keys, args):
+    # 이미 삭제된 세션을 TTL 없는 일부 필드로 다시 만들지 않음
+    if not call("EXISTS", keys[0]):
+        return 0
+    call("HSET", keys[0], *args)
+    return 1
+
+
+UPDATE_GAME = RespScript("""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+redis.call("HSET", KEYS[1], unpack(ARGV))
+return 1
+""", _update_game)
+
+
+def _claim_game_field(call, keys, args):
+    if not call("EXISTS", keys[0]):
+        return 0
+    return call("HSETNX", keys[0], args[0], args[1])
+
+
+CLAIM_GAME_FIELD = RespScript("""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return 0
+end
+return redis.call("HSETNX", KEYS[1], ARGV[1], ARGV[2])
+""", _claim_game_field)
+
+
+def _increment_game_field(call, keys, args):
+    if not call("EXISTS", keys[0]):
+        return None
+    return call("HINCRBY", keys[0], args[0], 1)
+
+
+INCREMENT_GAME_FIELD = RespScript("""
+if redis.call("EXISTS", KEYS[1]) == 0 then
+    return false
+end
+return redis.call("HINCRBY", KEYS[1], ARGV[1], 1)
+""", _increment_game_field)
+
+
+def _clear_presence(call, keys, args):
+    if call("HGET", keys[0], args[0]) != args[1]:
+        return 0
+    return call("HDEL", keys[0], args[0])
+
+
+CLEAR_PRESENCE = RespScript("""
+if redis.call("HGET", KEYS[1], ARGV[1]) ~= ARGV[2] then
+    return 0
+end
+return redis.call("HDEL", KEYS[1], ARGV[1])
+""", _clear_presence)
+
+
+def _queue_join(call, keys, args):
+    call("HSET", keys[0], args[0], args[1])
+    call("RPUSH", keys[1], args[2])
+    return 1
+
+
+QUEUE_JOIN = RespScript("""
+redis.call("HSET", KEYS[1], ARGV[1], ARGV[2])
+redis.call("RPUSH", KEYS[2], ARGV[3])
+return 1
+""", _queue_join)
+
+
+def _queue_leave(call, keys, args):
+    value = call("HGET", keys[0], args[0])
+    if value is None or json.loads(value).get("connection") != args[1]:
+        return 0
+    call("HDEL", keys[0], args[0])
+    call("RPUSH", keys[1], args[2])
+    return 1
+
+
+QUEUE_LEAVE = RespScript("""
+local value = redis.call("HGET", KEYS[1], ARGV[1])
+if not value or cjson.decode(value)["connection"] ~= ARGV[2] then
+    return 0
+end
+redis.call("HDEL", KEYS[1], ARGV[1])
+redis.call("RPUSH", KEYS[2], ARGV[3])
+return 1
+""", _queue_leave)
+
+
+def _acquire_role(call, keys, args):
+    if call("SET", keys[0], args[0], "NX", "PX", args[1]) is not None:
+        return 1
+    if call("GET", keys[0]) != args[0]:
+        return 0
+    call("PEXPIRE", keys[0], args[1])
+    return 1
+
+
+ACQUIRE_ROLE = RespScript("""
+if redis.call("SET", KEYS[1], ARGV[1], "NX", "PX", ARGV[2]) then
+    return 1
+end
+if redis.call("GET", KEYS[1]) ~= ARGV[1] then
+    return 0
+end
+redis.call("PEXPIRE", KEYS[1], ARGV[2])
+return 1
+""", _acquire_role)
+
+# resp.py의 대체 서버에 등록하는 스크립트
+STORE_SCRIPTS = (
+    CREATE_GAME, UPDATE_GAME, CLAIM_GAME_FIELD, INCREMENT_GAME_FIELD, CLEAR_PRESENCE, QUEUE_JOIN, QUEUE_LEAVE, ACQUIRE_ROLE,
+)
+
+
+# ================== Redis 프로토콜 구현 ==================
+class RedisSessionStore(SessionStore):
+    """
+    Redis 프로토콜 서버를 사용하는 공유 저장소
+    게임 세션: 해시 (필드마다 JSON 값), 접속 위치/대기자: 해시, 임시 데이터: 만료 키,
+    대기열 이벤트: 리스트, 역할 잠금: SET NX PX
+    여러 명령이 필요한 작업은 위의 스크립트로 실행
+    """
+
+    def __init__(self, url: str, prefix: str = KEY_PREFIX):
+        self._client = RespClient(url)
+        self._prefix = prefix
+
+    def _game_key(self, time_control: str, game_token: str) -> str:
+        return f"{self._prefix}game:{time_control}:{game_token}"
+
+    async def create_game(self, time_control, game_token, fields):
+        pairs = [item for field, value in fields.items() for item in (field, json.dumps(value))]
+        await CREATE_GAME.run(self._client, [self._game_key(time_control, game_token)], [GAME_SESSION_TTL, *pairs])
+
+    async def get_game(self, time_control, game_token):
+        items = await self._client.execute("HGETALL", self._game_key(time_control, game_token))
+        if not items:
+            return None
+        return {field: json.loads(value) for field, value in zip(items[::2], items[1::2])}
+
+    async def update_game(self, time_control, game_token, fields):
+        pairs = [item for field, value in fields.items() for item in (field, json.dumps(value))]
+        if pairs:
+            await UPDATE_GAME.run(self._client, [self._game_key(time_control, game_token)], pairs)
+
+    async def claim_game_field(self, time_control, game_token, field, value):
+        key = self._game_key(time_control, game_token)
+        return await CLAIM_GAME_FIELD.run(self._client, [key], [field, json.dumps(value)]) == 1
+
+    async def release_game_field(self, time_control, game_token, field):
+        await self._client.execute("HDEL", self._game_key(time_control, game_token), field)
+
+    async def increment_game_field(self, time_control, game_token, field):
+        # HINCRBY 값은 정수 문자열이므로 get_game의 JSON 값과 호환
+        return await INCREMENT_GAME_FIELD.run(self._client, [self._game_key(time_control, game_token)], [field])
+
+    async def delete_game(self, time_control, game_token):
+        return await self._client.execute("DEL", self._game_key(time_control, game_token)) == 1
+
+    async def set_presence(self, kind, username, owner):
+        await self._client.execute("HSET", f"{self._prefix}presence:{kind}", username, owner)
+
+    async def get_presence(self, kind, username):
+        return await self._client.execute("HGET", f"{self._prefix}presence:{kind}", username)
+
+    async def clear_presence(self, kind, username, owner):
+        await CLEAR_PRESENCE.run(self._client, [f"{self._prefix}presence:{kind}"], [username, owner])
+
+    async def put_temp(self, namespace, key, value, ttl):
+        await self._client.execute("SET", f"{self._prefix}temp:{namespace}:{key}", json.dumps(value), "EX", int(ttl))
+
+    async def get_temp(self, namespace, key):
+        value = await self._client.execute("GET", f"{self._prefix}temp:{namespace}:{key}")
+        return json.loads(value) if value is not None else None
+
+    async def delete_temp(self, namespace, key):
+        await self._client.execute("DEL", f"{self._prefix}temp:{namespace}:{key}")
+
+    async def queue_join(self, time_control, entry):
+        event = {"type": "join", "time_control": time_control, "entry": entry}
+        await QUEUE_JOIN.run(
+            self._client, [f"{self._prefix}queue:{time_control}", f"{self._prefix}queue-events"],
+            [entry["username"], json.dumps(entry), json.dumps(event)]
+        )
+
+    async def queue_leave(self, time_control, username, connection):
+        event = {"type": "leave", "time_control": time_control, "username": username, "connection": connection}
+        return await QUEUE_LEAVE.run(
+            self._client, [f"{self._prefix}queue:{time_control}", f"{self._prefix}queue-events"],
+            [username, connection, json.dumps(event)]
+        ) == 1
+
+    async def queue_take_events(self, limit):
+        values = await self._client.execute("LPOP", f"{self._prefix}queue-events", limit)
+        return [json.loads(value) for value in values or []]
+
+    async def queue_entries(self, time_control):
+        return [json.loads(value) for value in await self._client.execute("HVALS", f"{self._prefix}queue:{time_control}")]
+
+    async def queue_remove(self, time_control, usernames):
+        usernames = list(usernames)
+        if usernames:
+            await self._client.execute("HDEL", f"{self._prefix}queue:{time_control}", *usernames)
+
+    async def acquire_role(self, role, owner, ttl):
+        return await ACQUIRE_ROLE.run(self._client, [f"{self._prefix}role:{role}"], [owner, int(ttl * 1000)]) == 1
+
+    async def close(self):
+        await self._client.close()
+
+
+def create_session_store(url: str = SESSION_STORE_URL) -> SessionStore:
+    """URL에 맞는 저장소 생성 (memory:// 또는 redis://, unix://)"""
+    if url.startswith("memory://"):
+        return InProcessSessionStore()
+    if url.startswith(("redis://", "unix://")):
+        return RedisSessionStore(url)
+    raise ValueError(f"Unsupported session store URL: {url}")
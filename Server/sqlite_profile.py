@@ -0,0 +1,75 @@
+# sqlite_profile.py
+"""
+SQLite 연결 설정 프로필
+
+- 프로필: 연결마다 적용할 PRAGMA 묶음 (QUORIDOR_SQLITE_PROFILE 환경 변수로 선택)
+  "wal" (기본): WAL 저널, synchronous=NORMAL, busy timeout, mmap, 캐시 크기
+  "legacy": SQLite 기본값 (롤백 저널, synchronous=FULL) - 벤치마크 비교용
+- 연결 역할
+  "default": HTTP 핸들러용 일반 연결 풀
+  "writer": 단일 쓰기 스레드 전용 연결 하나 (BEGIN IMMEDIATE로 시작해 잠금 대기 중 교착 방지, SAVEPOINT 사용 가능)
+  "reader": 읽기 전용(query_only) 연결 풀 (WAL에서는 읽기가 쓰기를 막지 않으므로 동시에 사용)
+"""
+import os
+from typing import Dict
+
+from sqlalchemy import create_engine, event
+
+# ================== 프로필 설정 ==================
+SQLITE_PROFILES: Dict[str, Dict[str, object]] = {
+    "wal": {
+        "journal_mode": "WAL",          # 읽기와 쓰기가 서로 막지 않음
+        "synchronous": "NORMAL",        # WAL에서는 체크포인트 때만 fsync (전원 장애 시 마지막 커밋만 잃을 수 있음)
+        "busy_timeout": 5000,           # 잠금 대기 (ms) - "database is locked" 대신 대기
+        "mmap_size": 256 * 1024 * 1024,
+        "cache_size": -64 * 1024,       # 음수는 KiB 단위 (64MB)
+        "temp_store": "MEMORY",
+    },
+    "legacy": {},
+}
+SQLITE_PROFILE = os.environ.get("QUORIDOR_SQLITE_PROFILE", "wal")
+
+READ_POOL_SIZE = 4             # 읽기 연결 수
+BUSY_TIMEOUT_SECONDS = 5.0     # 프로필에 busy_timeout이 없을 때 드라이버 기본 대기
+
+
+def create_sqlite_engine(url: str, role: str = "default", profile: str = SQLITE_PROFILE):
+    """프로필 PRAGMA를 적용한 엔진 생성 (role: "default", "writer", "reader")"""
+    if profile not in SQLITE_PROFILES:
+        raise ValueError(f"Unknown SQLite profile: {profile}")
+    pragmas = dict(SQLITE_PROFILES[profile])
+
+    options = {}
+    if role == "writer":
+        options = {"pool_size": 1, "max_overflow": 0}
+    elif role == "reader":
+        options = {"pool_size": READ_POOL_SIZE, "max_overflow": 0}
+        # 저널 모드는 쓰기 연결에서 설정 (데이터베이스 파일에 유지됨)
+        pragmas.pop("journal_mode", None)
+        pragmas["query_only"] = "ON"
+    elif role != "default":
+        raise ValueError(f"Unknown connection role: {role}")
+
+    engine = create_engine(
+        url,
+        connect_args={"check_same_thread": False, "timeout": BUSY_TIMEOUT_SECONDS},
+        **options
+    )
+
+    @event.listens_for(engine, "connect")
+    def apply_pragmas(dbapi_connection, connection_record):
+        if role == "writer":
+            # 드라이버의 암묵적 트랜잭션 대신 begin 이벤트에서 직접 BEGIN (SAVEPOINT가 올바르게 동작)
+            dbapi_connection.isolation_level = None
+
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    if role == "writer":
+        @event.listens_for(engine, "begin")
+        def begin_immediate(connection):
+            connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+    return engine
@@ -0,0 +1,106 @@
+# test_distance_field.py
+"""
+DynamicDistanceField(벽 배치에 따른 거리장 증분 갱신)와 SearchBoard(make/unmake) 테스트
+
+실행: cd Server && python -m pytest -q test_distance_field.py
+"""
+import random
+
+import pytest
+
+from quoridor_ai import (
+    DynamicDistanceField, SearchBoard, QuoridorGameState, CELL_COUNT, encode_wall_move,
+    goal_distance_field, generate_smart_moves, shortest_distance_to_goal, wall_bit,
+)
+from test_state_serialization import random_state
+
+SEEDS = range(100)
+
+
+def free_wall_bits(state: QuoridorGameState):
+    """state에 겹치지 않게 놓을 수 있는 벽 비트 목록 (경로 차단 여부는 확인하지 않음)"""
+    return [
+        wall_bit(wall_type, y, x)
+        for wall_type in ('horizontal', 'vertical')
+        for y in range(1, 16, 2) for x in range(1, 16, 2)
+        if state.can_fit_wall(wall_type, y, x)
+    ]
+
+
+def assert_matches_bfs(field: DynamicDistanceField):
+    assert field.red == goal_distance_field(field.wall_mask, 0)
+    assert field.blue == goal_distance_field(field.wall_mask, CELL_COUNT - 1)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_push_pop_matches_full_bfs(seed):
+    state = random_state(seed)
+    rng = random.Random(seed)
+    field = DynamicDistanceField(state.wall_mask)
+    snapshots = []
+
+    # 벽을 여러 개 쌓으며 매번 전체 BFS와 비교 (도달 불가 칸이 생기는 배치 포함)
+    for bit in rng.sample(free_wall_bits(state), 6):
+        snapshots.append((field.wall_mask, field.red[:], field.blue[:]))
+        field.push_wall(bit)
+        assert_matches_bfs(field)
+
+    # 되돌리면 각 단계의 거리장이 그대로 복원
+    while snapshots:
+        field.pop_wall()
+        assert (field.wall_mask, field.red, field.blue) == snapshots.pop()
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_make_unmake_restores_state(seed):
+    state = random_state(seed)
+    if state.is_goal('red') or state.is_goal('blue'):
+        pytest.skip("game already over")
+
+    rng = random.Random(seed)
+    board = SearchBoard(state)
+    history = []
+
+    for _ in range(6):
+        player = board.state.current_player
+        moves = generate_smart_moves(board.state, player)
+        if not moves or board.state.is_goal('red') or board.state.is_goal('blue'):
+            break
+
+        history.append(board.state.copy())
+        board.make(player, rng.choice(moves))
+        for side in ('red', 'blue'):
+            assert board.distance(side) == shortest_distance_to_goal(board.state, side, use_cache=False)
+
+    while history:
+        board.unmake()
+        assert board.state == history.pop()
+        assert_matches_bfs(board.field)
+
+    assert board.state == state
+    assert board.field.wall_mask == state.wall_mask
+
+
+def test_null_move_only_changes_turn():
+    state = random_state(7)
+    board = SearchBoard(state)
+
+    board.make_null(state.current_player)
+    assert board.state.current_player == state.get_opponent(state.current_player)
+    assert board.state.wall_mask == state.wall_mask
+
+    board.unmake()
+    assert board.state == state
+
+
+def test_wall_move_updates_field():
+    state = QuoridorGameState()
+    board = SearchBoard(state)
+    board.make('red', encode_wall_move('horizontal', 1, 7))
+    assert board.state.red_walls == QuoridorGameState.INITIAL_WALLS - 1
+    # Blue(0, 8)는 바로 아래가 막혀 한 칸 돌아가야 함
+    assert board.distance('blue') == 9
+
+    board.unmake()
+    assert board.state.red_walls == QuoridorGameState.INITIAL_WALLS
+    assert board.distance('blue') == 8
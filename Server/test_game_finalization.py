@@ -0,0 +1,171 @@
+# test_game_finalization.py
+"""
+게임 종료 처리(GameFinalizer, finalize_game_result)의 중복 적용 방지 테스트
+두 GameFinalizer가 한 세션 저장소를 공유하는 경우를 두 워커로 봄
+
+실행: cd Server && python -m pytest -q test_game_finalization.py
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import sessionmaker
+
+from User import Base, User, GameHistory, GameCredit
+from db_async import DatabaseExecutor
+from game_finalization import GameFinalizer, finalize_game_result, FINALIZED_FIELD
+from session_store import InProcessSessionStore
+
+TIME_CONTROL = "Rapid"
+GAME_TOKEN = "token-1"
+START_ELO = 1500
+
+
+@pytest.fixture
+def database(tmp_path):
+    """플레이어 두 명(alice: player1, bob: player2)과 진행 중인 게임 히스토리 하나가 있는 DB"""
+    engine = create_engine(f"sqlite:///{tmp_path / 'finalization.db'}")
+    Base.metadata.create_all(engine)
+    session_factory = sessionmaker(bind=engine, autoflush=False, autocommit=False)
+
+    with session_factory() as db:
+        alice, bob = (
+            User(username=name, email=f"{name}@example.com", password="x",
+                 rapid_elo=START_ELO, blitz_elo=START_ELO, elo_rating=START_ELO)
+            for name in ("alice", "bob")
+        )
+        db.add_all([alice, bob])
+        db.flush()
+        history = GameHistory(
+            game_token=GAME_TOKEN, player1_id=alice.id, player2_id=bob.id, game_mode="rapid",
+            player1_elo_before=START_ELO, player2_elo_before=START_ELO
+        )
+        db.add(history)
+        db.commit()
+        ids = {"alice": alice.id, "bob": bob.id, "history": history.id}
+
+    executor = DatabaseExecutor(session_factory, session_factory)
+    yield session_factory, executor, ids
+    executor.shutdown()
+    engine.dispose()
+
+
+def new_session_store() -> InProcessSessionStore:
+    store = InProcessSessionStore()
+    asyncio.run(store.create_game(TIME_CONTROL, GAME_TOKEN, {"Player1": "alice", "Player2": "bob"}))
+    return store
+
+
+def report(finalizer, ids, winner_name, game_result, charge_loser_credit=False):
+    """winner_name 승리 결과 보고 (ELO는 게임 시작 시 값)"""
+    loser_name = "bob" if winner_name == "alice" else "alice"
+    return finalizer.finalize(
+        TIME_CONTROL, GAME_TOKEN, ids["history"],
+        (ids[winner_name], START_ELO), (ids[loser_name], START_ELO),
+        winner_name == "alice", game_result, charge_loser_credit
+    )
+
+
+def load_elos(session_factory, ids):
+    with session_factory() as db:
+        return {name: db.get(User, ids[name]).rapid_elo for name in ("alice", "bob")}
+
+
+def test_double_report_same_worker_applies_once(database):
+    session_factory, executor, ids = database
+    finalizer = GameFinalizer(executor, new_session_store())
+
+    async def run():
+        return await asyncio.gather(
+            report(finalizer, ids, "alice", "alice won normally"),
+            report(finalizer, ids, "alice", "alice won normally"),
+        )
+
+    first, second = asyncio.run(run())
+    assert (first["applied"], second["applied"]) == (True, False)
+    # 같은 워커의 중복 요청은 첫 결과를 그대로 받음
+    assert second["winner_elo_after"] == first["winner_elo_after"]
+
+    elos = load_elos(session_factory, ids)
+    assert elos["alice"] == first["winner_elo_after"] > START_ELO
+    assert elos["bob"] == first["loser_elo_after"] < START_ELO
+
+
+def test_double_report_across_workers_applies_once(database):
+    session_factory, executor, ids = database
+    store = new_session_store()
+    workers = [GameFinalizer(executor, store), GameFinalizer(executor, store)]
+
+    async def run():
+        return await asyncio.gather(*(report(worker, ids, "alice", "alice won normally") for worker in workers))
+
+    results = asyncio.run(run())
+    assert sorted(result["applied"] for result in results) == [False, True]
+
+    applied = next(result for result in results if result["applied"])
+    assert load_elos(session_factory, ids) == {"alice": applied["winner_elo_after"], "bob": applied["loser_elo_after"]}
+    assert asyncio.run(store.get_game(TIME_CONTROL, GAME_TOKEN))[FINALIZED_FIELD] is True
+
+
+def test_report_racing_disconnect_applies_one_result(database):
+    session_factory, executor, ids = database
+    store = new_session_store()
+    report_worker, disconnect_worker = GameFinalizer(executor, store), GameFinalizer(executor, store)
+
+    async def run():
+        return await asyncio.gather(
+            report(report_worker, ids, "alice", "alice won normally"),
+            report(disconnect_worker, ids, "bob", "bob won by disconnect", charge_loser_credit=True),
+        )
+
+    normal, disconnect = asyncio.run(run())
+    assert normal["applied"] != disconnect["applied"]
+    applied = normal if normal["applied"] else disconnect
+    winner_name, loser_name = ("alice", "bob") if normal["applied"] else ("bob", "alice")
+
+    with session_factory() as db:
+        history = db.get(GameHistory, ids["history"])
+        assert history.winner_id == ids[winner_name]
+        assert history.game_end_time is not None
+        credit = db.execute(select(GameCredit).where(GameCredit.user_id == ids["alice"])).scalar_one_or_none()
+        # 연결 끊김 결과가 적용된 경우에만 패자(alice) 크레딧 차감
+        assert (credit is not None) == disconnect["applied"]
+
+    elos = load_elos(session_factory, ids)
+    assert elos[winner_name] == applied["winner_elo_after"]
+    assert elos[loser_name] == applied["loser_elo_after"]
+
+    # 세션 저장소를 거치지 않은 직접 호출도 마감된 히스토리에는 쓰지 않음
+    late = asyncio.run(executor.run(
+        finalize_game_result, ids["history"], TIME_CONTROL,
+        (ids["bob"], START_ELO), (ids["alice"], START_ELO), False, "bob won by disconnect", True
+    ))
+    assert late["applied"] is False
+    assert load_elos(session_factory, ids) == elos
+
+
+def test_failed_write_releases_claim(database):
+    session_factory, executor, ids = database
+    store = new_session_store()
+
+    class FailingOnceExecutor:
+        """첫 쓰기만 실패하는 실행기"""
+
+        def __init__(self):
+            self.failed = False
+
+        async def run(self, task, *args):
+            if not self.failed:
+                self.failed = True
+                raise RuntimeError("disk I/O error")
+            return await executor.run(task, *args)
+
+    finalizer = GameFinalizer(FailingOnceExecutor(), store)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(report(finalizer, ids, "alice", "alice won normally"))
+    assert FINALIZED_FIELD not in asyncio.run(store.get_game(TIME_CONTROL, GAME_TOKEN))
+
+    retried = asyncio.run(report(finalizer, ids, "alice", "alice won normally"))
+    assert retried["applied"] is True
+    assert load_elos(session_factory, ids)["alice"] == retried["winner_elo_after"]
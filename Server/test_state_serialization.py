@@ -0,0 +1,166 @@
+# test_state_serialization.py
+"""
+QuoridorGameState 직렬화 (to_bytes/from_bytes, to_fen/from_fen) 왕복 및 잘못된 입력 거부 테스트
+
+실행: cd Server && python -m pytest -q test_state_serialization.py
+"""
+import random
+
+import pytest
+
+from quoridor_ai import QuoridorGameState, STATE_BYTES
+
+SEEDS = range(200)
+
+
+def random_state(seed: int) -> QuoridorGameState:
+    """무작위 합법 포지션 (말 이동과 경로를 막지 않는 벽 배치를 섞어 진행)"""
+    rng = random.Random(seed)
+    state = QuoridorGameState()
+    for _ in range(rng.randint(0, 60)):
+        player = state.current_player
+        if state.get_player_walls(player) > 0 and rng.random() < 0.5:
+            wall_type = rng.choice(('horizontal', 'vertical'))
+            y, x = rng.randrange(1, 16, 2), rng.randrange(1, 16, 2)
+            if state.make_wall_move(player, wall_type, y, x):
+                continue
+        state.make_move(player, *rng.choice(state.get_valid_moves(player)))
+        if state.is_goal('red') or state.is_goal('blue'):
+            break
+    return state
+
+
+def exhausted_state(player: str) -> QuoridorGameState:
+    """player가 벽 10개를 모두 쓴 포지션 (남은 벽 0)"""
+    state = QuoridorGameState()
+    state.current_player = player
+    for x in (1, 5, 9, 13):
+        for y in (3, 7):
+            assert state.make_wall_move(player, 'horizontal', y, x)
+            state.current_player = player
+    for x in (1, 5):
+        assert state.make_wall_move(player, 'vertical', 11, x)
+        state.current_player = player
+    assert state.get_player_walls(player) == 0
+    return state
+
+
+def sample_states():
+    states = [random_state(seed) for seed in SEEDS]
+    for state in list(states[:20]):
+        # 같은 배치에서 차례만 바꾼 포지션도 포함
+        flipped = state.copy()
+        flipped.current_player = state.get_opponent(state.current_player)
+        states.append(flipped)
+    states.append(QuoridorGameState())
+    states.append(exhausted_state('red'))
+    states.append(exhausted_state('blue'))
+    return states
+
+
+STATES = sample_states()
+
+
+def test_samples_cover_edge_cases():
+    assert {state.current_player for state in STATES} == {'red', 'blue'}
+    wall_counts = {count for state in STATES for count in (state.red_walls, state.blue_walls)}
+    assert 0 in wall_counts and QuoridorGameState.INITIAL_WALLS in wall_counts
+    assert any(state.horizontal_walls and state.vertical_walls for state in STATES)
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_bytes_round_trip(state):
+    data = state.to_bytes()
+    assert len(data) == STATE_BYTES == 19
+    restored = QuoridorGameState.from_bytes(data)
+    assert restored == state
+    assert restored.horizontal_walls == state.horizontal_walls
+    assert restored.vertical_walls == state.vertical_walls
+    assert restored.to_bytes() == data
+
+
+@pytest.mark.parametrize("state", STATES)
+def test_fen_round_trip(state):
+    text = state.to_fen()
+    restored = QuoridorGameState.from_fen(text)
+    assert restored == state
+    assert restored.horizontal_walls == state.horizontal_walls
+    assert restored.vertical_walls == state.vertical_walls
+    assert restored.to_fen() == text
+
+
+def test_initial_fen():
+    assert QuoridorGameState().to_fen() == "e1 e9 - 10 10 r"
+
+
+@pytest.mark.parametrize("data", [
+    b"",
+    bytes(STATE_BYTES - 1),
+    bytes(STATE_BYTES + 1),
+    QuoridorGameState().to_bytes() + b"\x00",
+])
+def test_bytes_rejects_wrong_length(data):
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_bytes(data)
+
+
+def replace_header(data: bytes, index: int, value: int) -> bytes:
+    return data[:index] + bytes((value,)) + data[index + 1:]
+
+
+def test_bytes_rejects_invalid_fields():
+    data = QuoridorGameState().to_bytes()
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_bytes(replace_header(data, 0, 81))               # 보드 밖 칸
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_bytes(replace_header(data, 1, data[0] & 0x7F))   # 두 말이 같은 칸
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_bytes(replace_header(data, 2, 11 << 4 | 10))     # 남은 벽 11개
+    with pytest.raises(ValueError):
+        # 벽 21개 (놓인 벽 + 남은 벽이 20개 초과)
+        QuoridorGameState.from_bytes(exhausted_state('red').to_bytes()[:2] + bytes((1 << 4 | 10,)) +
+                                     exhausted_state('red').to_bytes()[3:])
+
+
+@pytest.mark.parametrize("walls", [
+    "e5h,e5v",      # 같은 자리에서 교차
+    "d5h,e5h",      # 가로 벽이 같은 행에서 반 칸 겹침
+    "e5v,e4v",      # 세로 벽이 같은 열에서 반 칸 겹침
+])
+def test_rejects_overlapping_walls(walls):
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_fen(f"e1 e9 {walls} 8 10 r")
+
+    # 같은 벽 배치를 비트맵으로 직접 만든 이진 입력도 거부
+    state = QuoridorGameState.from_fen("e1 e9 - 8 10 r")
+    mask = 0
+    for wall in walls.split(','):
+        mask |= QuoridorGameState.from_fen(f"e1 e9 {wall} 9 10 r").wall_mask
+    data = state.to_bytes()[:3] + mask.to_bytes(16, 'little')
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_bytes(data)
+
+
+@pytest.mark.parametrize("text", [
+    "",
+    "e1 e9 - 10 10",                        # 필드 부족
+    "e1 e9 - 10 10 r extra",                # 필드 초과
+    "e1 e9 - 10 10 x",                      # 차례
+    "j1 e9 - 10 10 r",                      # 열 범위
+    "e0 e9 - 10 10 r",                      # 행 범위
+    "e10 e9 - 10 10 r",                     # 칸 이름 길이
+    "e1 e1 - 10 10 r",                      # 두 말이 같은 칸
+    "e1 e9 e5 10 10 r",                     # 벽 방향 없음
+    "e1 e9 e5x 9 10 r",                     # 벽 방향
+    "e1 e9 i5h 9 10 r",                     # 벽이 보드 밖 (마지막 열)
+    "e1 e9 e1h 9 10 r",                     # 벽이 보드 밖 (마지막 행)
+    "e1 e9 - 11 10 r",                      # 남은 벽 초과
+    "e1 e9 - -1 10 r",                      # 음수
+    "e1 e9 e5h 10 10 r",                    # 놓인 벽 + 남은 벽 21개
+    "e1 e9 e5h,e5h 8 10 r",                 # 같은 벽 중복
+    "e1 e9 " + ",".join(["a9h"] * 25) + " 0 0 r",   # 최대 길이 초과
+    "e1 e9 - 10 10 r" + " " * 200,          # 최대 길이 초과 (공백)
+])
+def test_fen_rejects_malformed(text):
+    with pytest.raises(ValueError):
+        QuoridorGameState.from_fen(text)
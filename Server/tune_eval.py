@@ -0,0 +1,252 @@
+# tune_eval.py
+"""
+실제 게임 기록으로 평가 가중치를 튜닝하는 배치 작업 (Texel 방식)
+
+- 승자가 정해진 종료 게임을 재생하며 포지션과 결과(둘 차례인 플레이어의 승패)를 추출
+- 포지션 묶음의 평가 특징 행렬을 NumPy로 한 번에 계산 (batched_evaluation_features)
+- 현재 가중치로 승률 척도 K를 먼저 맞춘 뒤, sigmoid(K * 평가값)의 로지스틱 손실을 최소화하도록 가중치 조정
+  (K를 고정하므로 가중치의 크기는 기존 탐색 점수 범위와 비슷하게 유지)
+- 게임 일부를 검증용으로 떼어 두고 검증 손실이 줄어든 경우에만 가중치 파일 저장
+- 저장된 파일은 quoridor_ai 모듈이 시작 시 읽어 evaluate_position에 적용
+
+실행 예:
+    python tune_eval.py --db ./quoridor.db
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from typing import Dict, List, Tuple
+
+import numpy as np
+from sqlalchemy import text
+
+from quoridor_ai import (
+    QuoridorGameState, EVAL_WEIGHT_NAMES, EVAL_WEIGHTS_PATH,
+    current_eval_weights, batched_evaluation_features
+)
+from game_review import replay_recorded_moves
+from bulk_analysis import DEFAULT_DB_PATH, DEFAULT_CHUNK_SIZE, create_read_engine, stream_games
+
+# ================== 튜닝 설정 ==================
+SKIP_OPENING_PLIES = 4        # 게임 시작 직후 포지션은 결과와 관계가 약하므로 제외
+FEATURE_BATCH = 4096          # 특징 행렬을 한 번에 계산할 포지션 수
+VALIDATION_EVERY = 10         # game_id가 이 값의 배수인 게임은 검증용
+PRIOR_STRENGTH = 100.0        # 기존 가중치 쪽으로 당기는 정도 (포지션 수 단위, 데이터가 적을 때 과적합 방지)
+NEWTON_ITERATIONS = 50
+SCALE_SEARCH_RANGE = (-5.0, 0.0)  # 승률 척도 K의 log10 탐색 범위
+
+# 승자가 있는 종료 게임 (Player1 = Red)
+OUTCOMES_QUERY = text("""
+    SELECT id, player1_id, winner_id FROM game_histories
+    WHERE game_end_time IS NOT NULL AND winner_id IS NOT NULL
+""")
+
+
+# ================== 데이터 추출 ==================
+def load_outcomes(read_engine) -> Dict[int, str]:
+    """game_id -> 승리한 색"""
+    with read_engine.connect() as conn:
+        rows = conn.execute(OUTCOMES_QUERY).fetchall()
+    return {game_id: ("red" if winner_id == player1_id else "blue") for game_id, player1_id, winner_id in rows}
+
+
+def extract_dataset(read_engine, chunk_size: int, skip_opening: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, int]:
+    """
+    (특징 행렬, 결과 벡터, 검증용 여부, 사용한 게임 수)
+    결과는 둘 차례인 플레이어가 그 게임을 이겼으면 1
+    """
+    outcomes = load_outcomes(read_engine)
+
+    feature_parts: List[np.ndarray] = []
+    labels: List[float] = []
+    validation: List[bool] = []
+    pending: List[QuoridorGameState] = []
+    games = 0
+
+    def flush():
+        if pending:
+            feature_parts.append(batched_evaluation_features(pending))
+            pending.clear()
+
+    for game_id, records in stream_games(read_engine, 0, chunk_size):
+        winner = outcomes.get(game_id)
+        if winner is None:
+            continue
+        games += 1
+
+        try:
+            for ply, (before, _) in enumerate(replay_recorded_moves(records)):
+                if ply < skip_opening:
+                    continue
+                pending.append(before)
+                labels.append(1.0 if before.current_player == winner else 0.0)
+                validation.append(game_id % VALIDATION_EVERY == 0)
+                if len(pending) >= FEATURE_BATCH:
+                    flush()
+        except ValueError as e:
+            # 잘못된 기록 이전의 포지션만 사용
+            print(f"[TuneEval] Game {game_id}: {e}")
+
+    flush()
+
+    if not feature_parts:
+        return np.zeros((0, len(EVAL_WEIGHT_NAMES))), np.zeros(0), np.zeros(0, dtype=bool), games
+    return np.concatenate(feature_parts), np.array(labels), np.array(validation, dtype=bool), games
+
+
+# ================== 로지스틱 손실 최소화 ==================
+def logistic_loss(features: np.ndarray, labels: np.ndarray, weights: np.ndarray, scale: float) -> float:
+    """평균 로지스틱 손실 (z = K * 평가값, log(1 + e^z) - y * z를 안정적으로 계산)"""
+    if labels.size == 0:
+        return float("nan")
+    z = scale * (features @ weights)
+    return float(np.mean(np.logaddexp(0.0, z) - labels * z))
+
+
+def fit_scale(features: np.ndarray, labels: np.ndarray, weights: np.ndarray) -> float:
+    """현재 가중치에서 손실이 최소인 승률 척도 K (log10 K 황금분할 탐색)"""
+    low, high = SCALE_SEARCH_RANGE
+    ratio = (5 ** 0.5 - 1) / 2
+
+    def loss_at(log_scale: float) -> float:
+        return logistic_loss(features, labels, weights, 10 ** log_scale)
+
+    a, b = high - ratio * (high - low), low + ratio * (high - low)
+    loss_a, loss_b = loss_at(a), loss_at(b)
+    for _ in range(60):
+        if loss_a < loss_b:
+            high, b, loss_b = b, a, loss_a
+            a = high - ratio * (high - low)
+            loss_a = loss_at(a)
+        else:
+            low, a, loss_a = a, b, loss_b
+            b = low + ratio * (high - low)
+            loss_b = loss_at(b)
+
+    return 10 ** ((low + high) / 2)
+
+
+def fit_weights(
+    features: np.ndarray,
+    labels: np.ndarray,
+    initial: np.ndarray,
+    scale: float,
+    prior_strength: float = PRIOR_STRENGTH
+) -> np.ndarray:
+    """
+    K를 고정하고 뉴턴법으로 가중치 최적화
+    목적 함수 = 평균 로지스틱 손실 + (prior_strength / N) * 0.5 * sum(((w - w0) / s)^2), s = max(|w0|, 1)
+    """
+    count = labels.size
+    prior_scale = np.maximum(np.abs(initial), 1.0)
+    prior = prior_strength / count / prior_scale ** 2
+
+    def objective(weights: np.ndarray) -> float:
+        return logistic_loss(features, labels, weights, scale) + 0.5 * float(np.sum(prior * (weights - initial) ** 2))
+
+    weights = initial.copy()
+    current = objective(weights)
+    for _ in range(NEWTON_ITERATIONS):
+        z = scale * (features @ weights)
+        probability = 1.0 / (1.0 + np.exp(-z))
+
+        gradient = scale * features.T @ (probability - labels) / count + prior * (weights - initial)
+        curvature = (probability * (1.0 - probability))[:, np.newaxis]
+        hessian = scale ** 2 * (features * curvature).T @ features / count + np.diag(prior)
+        step = np.linalg.solve(hessian, gradient)
+
+        # 손실이 줄어들 때까지 보폭 축소
+        step_size = 1.0
+        while step_size > 1e-4:
+            candidate = weights - step_size * step
+            candidate_loss = objective(candidate)
+            if candidate_loss <= current:
+                break
+            step_size /= 2
+        else:
+            break
+
+        weights, improvement, current = candidate, current - candidate_loss, candidate_loss
+        if improvement < 1e-10:
+            break
+
+    return weights
+
+
+# ================== 튜닝 실행 ==================
+def run_tuning(
+    db_path: str = DEFAULT_DB_PATH,
+    output_path: str = EVAL_WEIGHTS_PATH,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    skip_opening: int = SKIP_OPENING_PLIES,
+    prior_strength: float = PRIOR_STRENGTH,
+    force: bool = False
+) -> bool:
+    """가중치를 튜닝하고 검증 손실이 줄면 가중치 파일 저장"""
+    started = time.time()
+    read_engine = create_read_engine(db_path)
+
+    features, labels, validation, games = extract_dataset(read_engine, chunk_size, skip_opening)
+    train_x, train_y = features[~validation], labels[~validation]
+    valid_x, valid_y = features[validation], labels[validation]
+    print(f"[TuneEval] {games} games, {train_y.size} training / {valid_y.size} validation positions "
+          f"({time.time() - started:.1f}s)")
+
+    if train_y.size == 0:
+        print("[TuneEval] No positions to tune on")
+        return False
+
+    current = current_eval_weights()
+    initial = np.array([current[name] for name in EVAL_WEIGHT_NAMES])
+
+    scale = fit_scale(train_x, train_y, initial)
+    tuned = fit_weights(train_x, train_y, initial, scale, prior_strength)
+
+    train_before, train_after = logistic_loss(train_x, train_y, initial, scale), logistic_loss(train_x, train_y, tuned, scale)
+    valid_before, valid_after = logistic_loss(valid_x, valid_y, initial, scale), logistic_loss(valid_x, valid_y, tuned, scale)
+    print(f"[TuneEval] K = {scale:.6f}")
+    print(f"[TuneEval] Training loss {train_before:.5f} -> {train_after:.5f}, "
+          f"validation loss {valid_before:.5f} -> {valid_after:.5f}")
+    for name, before, after in zip(EVAL_WEIGHT_NAMES, initial, tuned):
+        print(f"[TuneEval]   {name:20s} {before:10.3f} -> {after:10.3f}")
+
+    if valid_y.size and not valid_after < valid_before and not force:
+        print("[TuneEval] Validation loss did not improve, weights file not written (use --force to write anyway)")
+        return False
+
+    result = {
+        "weights": {name: round(float(value), 4) for name, value in zip(EVAL_WEIGHT_NAMES, tuned)},
+        "scale": scale,
+        "games": games,
+        "training_positions": int(train_y.size),
+        "validation_positions": int(valid_y.size),
+        "training_loss": {"before": train_before, "after": train_after},
+        "validation_loss": {"before": valid_before, "after": valid_after},
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    with open(output_path, "w", encoding="utf-8") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"[TuneEval] Wrote {output_path} ({time.time() - started:.1f}s)")
+    return True
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Tune evaluation weights on stored games")
+    parser.add_argument("--db", default=DEFAULT_DB_PATH, help="SQLite database path")
+    parser.add_argument("--output", default=EVAL_WEIGHTS_PATH, help="weights file to write")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="game_moves rows per query")
+    parser.add_argument("--skip-opening", type=int, default=SKIP_OPENING_PLIES, help="plies to skip at the start of each game")
+    parser.add_argument("--prior-strength", type=float, default=PRIOR_STRENGTH, help="pull toward the current weights")
+    parser.add_argument("--force", action="store_true", help="write the weights even if validation loss got worse")
+    args = parser.parse_args()
+
+    run_tuning(
+        db_path=args.db,
+        output_path=args.output,
+        chunk_size=args.chunk_size,
+        skip_opening=args.skip_opening,
+        prior_strength=args.prior_strength,
+        force=args.force,
+    )